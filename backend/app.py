@@ -2,16 +2,80 @@
 # Ponto de entrada do backend SpotPer
 # Aplicação Flask modular - todas as rotas em arquivos separados
 
+import os
+
 from flask import Flask, jsonify
 from flask_cors import CORS
 from routes import registrar_rotas
-from config.database import DATABASE
+from config.database import DATABASE, CABECALHO_ESCRITA, marcar_escrita
+from utils.metrics import obter_metricas
+from utils.deadlines import configurar_prazos
+from utils.admission import configurar_admissao
+from utils.profiler import configurar_perfilador
+from utils.warmup import dispensar_aquecimento, iniciar_aquecimento, estado_aquecimento
+from utils.jobs import iniciar_executor_tarefas, TRABALHADORES_PADRAO
+from utils.invalidation import iniciar_difusao
+from utils.etags import marcar_etag
 
 
 def criar_app():
     """Cria e configura a aplicação Flask."""
     app = Flask(__name__)
-    CORS(app)  # Permite requisições do frontend
+    CORS(app, expose_headers=[CABECALHO_ESCRITA, 'ETag'])  # Permite requisições do frontend
+    
+    # Token de escrita para leitura no primário logo após escrever (read-your-writes)
+    app.after_request(marcar_escrita)
+    
+    # ETag nas leituras: o cache do frontend revalida com If-None-Match (304)
+    app.after_request(marcar_etag)
+    
+    # Prazo (segundos) por endpoint; None é o padrão das demais rotas.
+    # Consultas que passam do prazo são canceladas e respondem 504.
+    configurar_prazos(app, {
+        None: 30,
+        'queries.consulta_albuns_acima_media': 15,
+        'queries.consulta_gravadora_dvorak': 15,
+        'queries.consulta_compositor_mais_faixas': 15,
+        'queries.consulta_playlists_concerto_barroco': 15,
+        'composers.buscar_albuns_compositor': 10,
+        'composers.buscar_compositores': 5,
+        'playback.top_faixas': 10,
+        'playback.top_compositores': 10,
+        'playback.top_albuns': 10,
+    })
+    
+    # Admissão por classe: limite de requisições simultâneas e fila de espera.
+    # Relatórios têm poucas vagas para não tomar os workers da reprodução e
+    # das telas interativas; fila cheia responde 503 com Retry-After. O stream
+    # de eventos fica de fora: ocuparia uma vaga enquanto o cliente estiver aberto.
+    configurar_admissao(app, classes={
+        'reproducao': {'limite': 16, 'fila': 64, 'espera_maxima': 5, 'retry_after': 1},
+        'interativo': {'limite': 16, 'fila': 32, 'espera_maxima': 5, 'retry_after': 1},
+        'relatorio': {'limite': 4, 'fila': 8, 'espera_maxima': 10, 'retry_after': 5},
+    }, rotas={
+        'health': None,
+        'ready': None,
+        'metrics': None,
+        'admin': None,
+        'events': None,
+        'queries': 'relatorio',
+        'playback': 'relatorio',
+        'stats': 'relatorio',
+        'composers.buscar_albuns_compositor': 'relatorio',
+        'playlists.registrar_reproducao': 'reproducao',
+        'playlists.obter_faixa_no_tempo': 'reproducao',
+        'playlists.listar_janela_faixas': 'reproducao',
+    })
+    
+    # Perfilador por amostragem: cabeçalho X-SpotPer-Perfil com o token, ou
+    # uma fração das requisições (SPOTPER_TAXA_PERFIL). Sem token nem taxa,
+    # fica desligado.
+    configurar_perfilador(
+        app,
+        token=os.environ.get('SPOTPER_TOKEN_PERFIL'),
+        taxa=float(os.environ.get('SPOTPER_TAXA_PERFIL', 0)),
+        diretorio=os.environ.get('SPOTPER_DIRETORIO_PERFIS'),
+    )
     
     # Rota de health check
     @app.route('/api/health', methods=['GET'])
@@ -23,9 +87,41 @@ def criar_app():
             'database': DATABASE
         })
     
+    # Prontidão: só responde 200 depois do aquecimento (conexões e rotas)
+    @app.route('/api/ready', methods=['GET'])
+    def ready():
+        """Indica se o aquecimento terminou e o backend pode receber tráfego."""
+        estado = estado_aquecimento()
+        if not estado['pronto']:
+            # Aquecimento em andamento, ou concluído sem conexão com o banco
+            return jsonify({'status': 'failed' if estado['concluido'] else 'warming', **estado}), 503
+        return jsonify({'status': 'ready', **estado})
+    
+    # Contadores do processo (repetições de transação etc.)
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Retorna as métricas acumuladas deste processo."""
+        return jsonify(obter_metricas())
+    
     # Registrar todas as rotas
     registrar_rotas(app)
     
+    # Difusão dos eventos entre workers/nós (ex.: unix:///tmp/spotper-invalidacao).
+    # Antes do aquecimento: os caches só são lidos depois de escutar os pares.
+    if os.environ.get('SPOTPER_INVALIDACAO'):
+        iniciar_difusao(os.environ['SPOTPER_INVALIDACAO'], os.environ.get('SPOTPER_INVALIDACAO_SEGREDO'))
+    
+    # Aquecimento em segundo plano (SPOTPER_AQUECIMENTO=0 desliga)
+    if os.environ.get('SPOTPER_AQUECIMENTO', '1') != '0':
+        iniciar_aquecimento(app)
+    else:
+        dispensar_aquecimento()
+    
+    # Executor das tarefas em segundo plano (SPOTPER_TAREFAS=0 desliga; o
+    # processo ainda aceita POST /api/jobs e outro processo as executa)
+    if os.environ.get('SPOTPER_TAREFAS', '1') != '0':
+        iniciar_executor_tarefas(int(os.environ.get('SPOTPER_TRABALHADORES_TAREFAS', TRABALHADORES_PADRAO)))
+    
     return app
 
 
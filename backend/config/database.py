@@ -1,20 +1,228 @@
 # backend/config/database.py
 # Configuração de conexão com SQL Server
+#
+# Escritas (POST/PUT/DELETE) vão sempre para o primário. Leituras (GET) vão
+# para a réplica somente leitura, exceto quando o cliente escreveu há pouco
+# (token X-SpotPer-Escrita) ou quando a réplica está fora do ar.
+
+import threading
+import time
 
 import pyodbc
+from flask import has_request_context, request
+
+from utils.deadlines import monitorar_conexao
+from utils.statements import liberar_conexao
+from utils.workload import capturar_conexao
 
 # Configuração da conexão - Windows Authentication
 SERVER = 'localhost'  # Altere para seu servidor
 DATABASE = 'BDSpotPer'
 
-# String de conexão
-CONEXAO_STRING = f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={SERVER};DATABASE={DATABASE};Trusted_Connection=yes;'
+# Réplica de leitura (secundário do Availability Group). Para testar
+# localmente, aponte para um segundo banco com os mesmos dados.
+# Use SERVER_LEITURA = None para mandar todas as leituras ao primário.
+SERVER_LEITURA = 'localhost'  # Altere para o secundário
+DATABASE_LEITURA = 'BDSpotPer'
+
+# String de conexão. MARS: os cursores preparados de utils/statements.py
+# ficam abertos ao lado dos cursores das rotas na mesma conexão.
+CONEXAO_STRING = (
+    f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={SERVER};DATABASE={DATABASE};Trusted_Connection=yes;'
+    'MARS_Connection=yes;'
+)
+CONEXAO_STRING_LEITURA = (
+    f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={SERVER_LEITURA};DATABASE={DATABASE_LEITURA};'
+    'Trusted_Connection=yes;ApplicationIntent=ReadOnly;MARS_Connection=yes;'
+)
+
+# Read-your-writes: por quantos segundos após uma escrita o cliente lê do primário
+CABECALHO_ESCRITA = 'X-SpotPer-Escrita'
+ATRASO_REPLICA = 5.0
+
+# Após uma falha ao conectar na réplica, quantos segundos usar só o primário
+ESPERA_APOS_FALHA = 30.0
+TIMEOUT_LEITURA = 3  # segundos para abrir a conexão com a réplica
+
+# Conexões ociosas mantidas por destino (primário, primário em leitura, réplica)
+TAMANHO_POOL = 8
+
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+# Leituras em SNAPSHOT não esperam por locks de escrita (requer
+# ALLOW_SNAPSHOT_ISOLATION no banco). Use None para o nível padrão.
+ISOLAMENTO_LEITURA = 'SNAPSHOT'
+
+_estado_replica = {'falhou_em': None}
+_trava = threading.Lock()
+
+
+def _replica_disponivel():
+    """Réplica configurada e fora do período de espera após falha."""
+    if not SERVER_LEITURA:
+        return False
+    with _trava:
+        falhou_em = _estado_replica['falhou_em']
+    return falhou_em is None or time.monotonic() - falhou_em > ESPERA_APOS_FALHA
+
+
+def _marcar_falha_replica():
+    with _trava:
+        _estado_replica['falhou_em'] = time.monotonic()
+
+
+def escreveu_recentemente():
+    """O token enviado pelo cliente indica uma escrita dentro do atraso da réplica."""
+    token = request.headers.get(CABECALHO_ESCRITA)
+    try:
+        return token is not None and time.time() - float(token) < ATRASO_REPLICA
+    except ValueError:
+        return True  # token malformado: na dúvida, lê do primário
+
+
+def leitura_na_replica():
+    """A requisição atual pode ser atendida pela réplica de leitura?"""
+    if not has_request_context() or request.method not in METODOS_LEITURA:
+        return False
+    return not escreveu_recentemente()
+
+
+class _Pool:
+    """Conexões ociosas de um destino (string de conexão), reaproveitadas entre requisições."""
+
+    def __init__(self, conexao_string, isolamento=None, timeout=0):
+        self.conexao_string = conexao_string
+        self.isolamento = isolamento
+        self.timeout = timeout
+        self._ociosas = []
+        self._trava = threading.Lock()
+
+    def obter(self):
+        with self._trava:
+            if self._ociosas:
+                return _ConexaoDoPool(self._ociosas.pop(), self)
+        
+        conexao = pyodbc.connect(self.conexao_string, timeout=self.timeout)
+        if self.isolamento:
+            conexao.execute(f'SET TRANSACTION ISOLATION LEVEL {self.isolamento}')
+        return _ConexaoDoPool(conexao, self)
+
+    def devolver(self, conexao):
+        """Desfaz o que ficou pendente e guarda a conexão (ou fecha, se o pool está cheio)."""
+        try:
+            conexao.rollback()
+            conexao.timeout = 0
+        except pyodbc.Error:
+            self._fechar(conexao)
+            return
+        
+        with self._trava:
+            if len(self._ociosas) < TAMANHO_POOL:
+                self._ociosas.append(conexao)
+                return
+        self._fechar(conexao)
+
+    def _fechar(self, conexao):
+        liberar_conexao(conexao)
+        conexao.close()
+
+    def descartar(self):
+        """Fecha todas as conexões ociosas."""
+        with self._trava:
+            ociosas, self._ociosas = self._ociosas, []
+        for conexao in ociosas:
+            self._fechar(conexao)
+
+
+class _ConexaoDoPool:
+    """Conexão emprestada do pool: close() fecha os cursores e a devolve."""
+
+    def __init__(self, conexao, pool):
+        object.__setattr__(self, '_conexao', conexao)
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_cursores', [])
+
+    def cursor(self):
+        cursor = self._conexao.cursor()
+        self._cursores.append(cursor)
+        return cursor
+
+    def close(self):
+        if self._pool is None:
+            return
+        # Um cursor com resultados pendentes deixaria a conexão ocupada
+        for cursor in self._cursores:
+            try:
+                cursor.close()
+            except pyodbc.Error:
+                pass
+        self._pool.devolver(self._conexao)
+        object.__setattr__(self, '_pool', None)
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._conexao, nome, valor)
+
+
+_pool_primario = _Pool(CONEXAO_STRING)
+_pool_primario_leitura = _Pool(CONEXAO_STRING, ISOLAMENTO_LEITURA)
+_pool_replica = _Pool(CONEXAO_STRING_LEITURA, ISOLAMENTO_LEITURA, TIMEOUT_LEITURA)
+
+
+def get_conexao(somente_leitura=None):
+    """Retorna uma conexão com o banco de dados (do pool; close() a devolve).
+    
+    Sem argumento, decide pela requisição atual: GET sem escrita recente vai
+    para a réplica; o resto vai para o primário. Se a réplica falhar, a
+    conexão é aberta no primário. Conexões de leitura usam ISOLAMENTO_LEITURA.
+    Dentro de uma requisição, a conexão recebe o prazo restante da rota.
+    """
+    if somente_leitura is None:
+        somente_leitura = leitura_na_replica()
+    
+    conexao = None
+    if somente_leitura and _replica_disponivel():
+        try:
+            conexao = _pool_replica.obter()
+        except pyodbc.Error:
+            _marcar_falha_replica()
+            _pool_replica.descartar()
+    
+    if conexao is None:
+        conexao = (_pool_primario_leitura if somente_leitura else _pool_primario).obter()
+    
+    return monitorar_conexao(capturar_conexao(conexao))
+
+
+def aquecer_pool(quantidade=None):
+    """Abre `quantidade` conexões em cada destino e as deixa ociosas no pool."""
+    quantidade = quantidade or TAMANHO_POOL
+    pools = [_pool_primario, _pool_primario_leitura]
+    if _replica_disponivel():
+        pools.append(_pool_replica)
+    
+    for pool in pools:
+        try:
+            conexoes = [pool.obter() for _ in range(quantidade)]
+        except pyodbc.Error:
+            if pool is not _pool_replica:
+                raise
+            _marcar_falha_replica()
+            continue
+        for conexao in conexoes:
+            conexao.close()
 
 
-def get_conexao():
-    """Retorna uma nova conexão com o banco de dados."""
-    return pyodbc.connect(CONEXAO_STRING)
+def marcar_escrita(resposta):
+    """after_request: devolve o token de escrita nas escritas bem-sucedidas."""
+    if request.method not in METODOS_LEITURA and resposta.status_code < 400:
+        resposta.headers[CABECALHO_ESCRITA] = f'{time.time():.3f}'
+    return resposta
 
 
 # Exportar para uso em app.py
-__all__ = ['get_conexao', 'DATABASE', 'SERVER', 'CONEXAO_STRING']
+__all__ = ['get_conexao', 'aquecer_pool', 'marcar_escrita', 'leitura_na_replica', 'DATABASE', 'SERVER',
+           'DATABASE_LEITURA', 'SERVER_LEITURA', 'CONEXAO_STRING', 'CONEXAO_STRING_LEITURA',
+           'CABECALHO_ESCRITA']
@@ -13,6 +13,11 @@ albums_bp = Blueprint('albums', __name__)
 tracks_bp = Blueprint('tracks', __name__)
 playlists_bp = Blueprint('playlists', __name__)
 queries_bp = Blueprint('queries', __name__)
+playback_bp = Blueprint('playback', __name__)
+stats_bp = Blueprint('stats', __name__)
+admin_bp = Blueprint('admin', __name__)
+jobs_bp = Blueprint('jobs', __name__)
+events_bp = Blueprint('events', __name__)
 
 
 def registrar_rotas(app):
@@ -27,6 +32,11 @@ def registrar_rotas(app):
     from routes import tracks
     from routes import playlists
     from routes import queries
+    from routes import playback
+    from routes import stats
+    from routes import admin
+    from routes import jobs
+    from routes import events
     
     # Registrar com prefixos de URL
     app.register_blueprint(periods_bp, url_prefix='/api/periods')
@@ -38,3 +48,8 @@ def registrar_rotas(app):
     app.register_blueprint(tracks_bp, url_prefix='/api/tracks')
     app.register_blueprint(playlists_bp, url_prefix='/api/playlists')
     app.register_blueprint(queries_bp, url_prefix='/api/queries')
+    app.register_blueprint(playback_bp, url_prefix='/api/playback')
+    app.register_blueprint(stats_bp, url_prefix='/api/stats')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
@@ -0,0 +1,55 @@
+# backend/routes/admin.py
+# Rotas de Administração (perfis de requisições, carga de SQL e instruções registradas)
+
+from flask import request, jsonify
+from routes import admin_bp
+from utils.profiler import autorizado, listar_perfis, obter_perfil
+from utils.workload import obter_carga, gravar_carga
+from utils.statements import obter_estatisticas
+
+
+@admin_bp.before_request
+def verificar_token():
+    """Exige o token do perfilador em todas as rotas de administração."""
+    if not autorizado():
+        return jsonify({'error': True, 'message': 'Não autorizado'}), 403
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+def listar_perfis_recentes():
+    """Lista os perfis recentes (?endpoint= filtra por rota)."""
+    return jsonify(listar_perfis(request.args.get('endpoint')))
+
+
+@admin_bp.route('/profiles/<id_perfil>', methods=['GET'])
+def obter_perfil_folded(id_perfil):
+    """Retorna as pilhas no formato folded (?formato=json para o resumo)."""
+    perfil = obter_perfil(id_perfil)
+    if perfil is None:
+        return jsonify({'error': True, 'message': 'Perfil não encontrado'}), 404
+    
+    resumo, folded = perfil
+    if request.args.get('formato') == 'json':
+        return jsonify(resumo)
+    return folded + '\n', 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+
+@admin_bp.route('/workload', methods=['GET'])
+def listar_carga():
+    """Instruções SQL capturadas (SPOTPER_CAPTURA_CARGA), mais executadas primeiro."""
+    return jsonify(obter_carga())
+
+
+@admin_bp.route('/workload/save', methods=['POST'])
+def salvar_carga():
+    """Grava a carga capturada no arquivo configurado."""
+    caminho = gravar_carga()
+    if caminho is None:
+        return jsonify({'error': True, 'message': 'Captura de carga desligada'}), 400
+    return jsonify({'success': True, 'arquivo': caminho})
+
+
+@admin_bp.route('/statements', methods=['GET'])
+def listar_instrucoes():
+    """Estatísticas das instruções do registro (utils/statements.py), por tempo total."""
+    return jsonify(obter_estatisticas())
@@ -4,41 +4,75 @@
 from flask import request, jsonify
 from routes import albums_bp
 from config.database import get_conexao
+from utils.coalescing import coalescer
+from utils.events import publicar
+from utils.statements import registrar, consultar, consultar_um
+from services.validation import validar_album, recusas, resposta_dry_run, resposta_recusa
+from utils.fields import (CampoInvalido, selecionar_campos, montar_select,
+                          linha_para_dict, como_float, como_texto)
+
+
+COLUNAS_ALBUM = {
+    'cod_album': ('a.cod_album', None),
+    'nome': ('a.nome', None),
+    'descricao': ('a.descricao', None),
+    'gravadora': ('g.nome', None),
+    'cod_gravadora': ('a.cod_gravadora', None),
+    'tipo_midia': ('a.tipo_midia', None),
+    'preco_compra': ('a.preco_compra', como_float),
+    'data_compra': ('a.data_compra', como_texto),
+    'data_gravacao': ('a.data_gravacao', como_texto),
+    'tipo_compra': ('a.tipo_compra', None),
+    'qtd_unidades': ('a.qtd_unidades', None),
+    'qtd_faixas': ('a.qtd_faixas', None)
+}
+
+COLUNAS_FAIXA_ALBUM = {
+    'cod_album': ('f.cod_album', None),
+    'numero_unidade': ('f.numero_unidade', None),
+    'numero_faixa': ('f.numero_faixa', None),
+    'descricao': ('f.descricao', None),
+    'cod_tipo_composicao': ('f.cod_tipo_composicao', None),
+    'tipo_composicao': ('tc.descricao', None),
+    'tempo_execucao': ('f.tempo_execucao', None),
+    'tipo_gravacao': ('f.tipo_gravacao', None)
+}
+
+SQL_ALBUNS = """
+    SELECT {colunas}
+    FROM ALBUM a
+    JOIN GRAVADORA g ON a.cod_gravadora = g.cod_gravadora
+"""
+registrar('albuns.listar', SQL_ALBUNS + 'ORDER BY a.nome', colunas=COLUNAS_ALBUM)
+registrar('albuns.obter', SQL_ALBUNS + 'WHERE a.cod_album = ?',
+          parametros=(('cod_album', 'INT'),), colunas=COLUNAS_ALBUM)
+
+# Listas aninhadas que custam uma consulta extra por faixa
+EXTRAS_FAIXA_ALBUM = ('compositores', 'interpretes')
+
+
+def _dry_run():
+    """?dry_run=1: só valida as regras do banco, sem gravar."""
+    return request.args.get('dry_run', '').lower() in ('1', 'true')
+
+
+def _linha_album(cursor, cod_album):
+    """Linha completa do álbum, como na listagem (para o evento de alteração)."""
+    return consultar_um(cursor, 'albuns.obter', (cod_album,))
 
 
 @albums_bp.route('', methods=['GET'])
+@coalescer()
 def listar_albuns():
-    """Lista todos os álbuns."""
+    """Lista todos os álbuns (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_ALBUM)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT a.cod_album, a.nome, a.descricao, g.nome AS gravadora, a.cod_gravadora,
-               a.tipo_midia, a.preco_compra, a.data_compra, a.data_gravacao, 
-               a.tipo_compra, a.qtd_unidades,
-               (SELECT COUNT(*) FROM FAIXA f WHERE f.cod_album = a.cod_album) AS qtd_faixas
-        FROM ALBUM a
-        JOIN GRAVADORA g ON a.cod_gravadora = g.cod_gravadora
-        ORDER BY a.nome
-    """)
-    
-    albuns = []
-    row = cursor.fetchone()
-    while row:
-        albuns.append({
-            'cod_album': row[0],
-            'nome': row[1],
-            'descricao': row[2],
-            'gravadora': row[3],
-            'cod_gravadora': row[4],
-            'tipo_midia': row[5],
-            'preco_compra': float(row[6]) if row[6] else None,
-            'data_compra': str(row[7]) if row[7] else None,
-            'data_gravacao': str(row[8]) if row[8] else None,
-            'tipo_compra': row[9],
-            'qtd_unidades': row[10],
-            'qtd_faixas': row[11]
-        })
-        row = cursor.fetchone()
+    albuns = consultar(cursor, 'albuns.listar', campos=campos)
     
     cursor.close()
     conexao.close()
@@ -47,49 +81,37 @@ def listar_albuns():
 
 @albums_bp.route('/<int:cod_album>', methods=['GET'])
 def obter_album(cod_album):
-    """Obtém um álbum específico."""
+    """Obtém um álbum específico (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_ALBUM)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT a.cod_album, a.nome, a.descricao, g.nome AS gravadora, a.cod_gravadora,
-               a.tipo_midia, a.preco_compra, a.data_compra, a.data_gravacao, 
-               a.tipo_compra, a.qtd_unidades,
-               (SELECT COUNT(*) FROM FAIXA f WHERE f.cod_album = a.cod_album) AS qtd_faixas
-        FROM ALBUM a
-        JOIN GRAVADORA g ON a.cod_gravadora = g.cod_gravadora
-        WHERE a.cod_album = ?
-    """, (cod_album,))
+    album = consultar_um(cursor, 'albuns.obter', (cod_album,), campos)
     
-    row = cursor.fetchone()
-    if not row:
-        cursor.close()
+    cursor.close()
+    if album is None:
         conexao.close()
         return jsonify({'error': True, 'message': 'Álbum não encontrado'}), 404
     
-    album = {
-        'cod_album': row[0],
-        'nome': row[1],
-        'descricao': row[2],
-        'gravadora': row[3],
-        'cod_gravadora': row[4],
-        'tipo_midia': row[5],
-        'preco_compra': float(row[6]) if row[6] else None,
-        'data_compra': str(row[7]) if row[7] else None,
-        'data_gravacao': str(row[8]) if row[8] else None,
-        'tipo_compra': row[9],
-        'qtd_unidades': row[10],
-        'qtd_faixas': row[11]
-    }
-    
-    cursor.close()
     conexao.close()
     return jsonify(album)
 
 
 @albums_bp.route('', methods=['POST'])
 def criar_album():
-    """Cria um novo álbum."""
-    dados = request.get_json()
+    """Cria um novo álbum (?dry_run=1 só valida)."""
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': True, 'message': 'Corpo da requisição deve ser um objeto JSON'}), 400
+    violacoes = validar_album(dados)
+    if _dry_run():
+        return jsonify(resposta_dry_run(violacoes))
+    violacoes = recusas(violacoes)
+    if violacoes:
+        return jsonify(resposta_recusa(violacoes)), 400
     
     conexao = get_conexao()
     cursor = conexao.cursor()
@@ -112,13 +134,15 @@ def criar_album():
         ))
         
         cursor.execute("SELECT SCOPE_IDENTITY()")
-        cod_album = cursor.fetchone()[0]
+        cod_album = int(cursor.fetchone()[0])
+        album = _linha_album(cursor, cod_album)
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
-        return jsonify({'success': True, 'cod_album': int(cod_album)}), 201
+        publicar('albums', 'insert', {'cod_album': cod_album}, album)
+        return jsonify({'success': True, 'cod_album': cod_album}), 201
     except Exception as e:
         conexao.rollback()
         cursor.close()
@@ -128,8 +152,22 @@ def criar_album():
 
 @albums_bp.route('/<int:cod_album>', methods=['PUT'])
 def atualizar_album(cod_album):
-    """Atualiza um álbum."""
-    dados = request.get_json()
+    """Atualiza um álbum (?dry_run=1 só valida)."""
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': True, 'message': 'Corpo da requisição deve ser um objeto JSON'}), 400
+    try:
+        violacoes = validar_album(dados, cod_album)
+    except LookupError as e:
+        if _dry_run():
+            return jsonify({'error': True, 'message': str(e)}), 404
+        # Os agregados deste processo podem não ter o álbum ainda: o UPDATE decide
+        violacoes = []
+    if _dry_run():
+        return jsonify(resposta_dry_run(violacoes))
+    violacoes = recusas(violacoes)
+    if violacoes:
+        return jsonify(resposta_recusa(violacoes)), 400
     
     conexao = get_conexao()
     cursor = conexao.cursor()
@@ -156,10 +194,12 @@ def atualizar_album(cod_album):
             cursor.close()
             conexao.close()
             return jsonify({'error': True, 'message': 'Álbum não encontrado'}), 404
+        album = _linha_album(cursor, cod_album)
         
         conexao.commit()
         cursor.close()
         conexao.close()
+        publicar('albums', 'update', {'cod_album': cod_album}, album)
         return jsonify({'success': True, 'message': 'Álbum atualizado'})
     except Exception as e:
         conexao.rollback()
@@ -184,6 +224,7 @@ def deletar_album(cod_album):
         conexao.commit()
         cursor.close()
         conexao.close()
+        publicar('albums', 'delete', {'cod_album': cod_album})
         return jsonify({'success': True, 'message': 'Álbum removido'})
     except Exception as e:
         conexao.rollback()
@@ -194,62 +235,69 @@ def deletar_album(cod_album):
 
 @albums_bp.route('/<int:cod_album>/tracks', methods=['GET'])
 def listar_faixas_album(cod_album):
-    """Lista todas as faixas de um álbum."""
+    """Lista todas as faixas de um álbum (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_FAIXA_ALBUM,
+                                   EXTRAS_FAIXA_ALBUM)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    buscar_compositores = 'compositores' in campos
+    buscar_interpretes = 'interpretes' in campos
+    
+    # As listas aninhadas precisam da chave da faixa, mesmo que não pedida
+    consulta = campos
+    if buscar_compositores or buscar_interpretes:
+        chave = ('cod_album', 'numero_unidade', 'numero_faixa')
+        consulta = chave + tuple(c for c in campos if c not in chave)
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT f.cod_album, f.numero_unidade, f.numero_faixa, f.descricao,
-               f.cod_tipo_composicao, tc.descricao AS tipo_composicao,
-               f.tempo_execucao, f.tipo_gravacao
+    cursor.execute(montar_select("""
+        SELECT {colunas}
         FROM FAIXA f
         JOIN TIPO_COMPOSICAO tc ON f.cod_tipo_composicao = tc.cod_tipo_composicao
         WHERE f.cod_album = ?
         ORDER BY f.numero_unidade, f.numero_faixa
-    """, (cod_album,))
+    """, COLUNAS_FAIXA_ALBUM, consulta), (cod_album,))
     
     faixas = []
     row = cursor.fetchone()
     while row:
-        faixa = {
-            'cod_album': row[0],
-            'numero_unidade': row[1],
-            'numero_faixa': row[2],
-            'descricao': row[3],
-            'cod_tipo_composicao': row[4],
-            'tipo_composicao': row[5],
-            'tempo_execucao': row[6],
-            'tipo_gravacao': row[7],
-            'compositores': [],
-            'interpretes': []
-        }
+        linha = linha_para_dict(row, COLUNAS_FAIXA_ALBUM, consulta)
+        faixa = {c: linha[c] for c in campos if c in linha}
         
         # Buscar compositores
-        cursor2 = conexao.cursor()
-        cursor2.execute("""
-            SELECT c.cod_compositor, c.nome 
-            FROM FAIXA_COMPOSITOR fc
-            JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
-            WHERE fc.cod_album = ? AND fc.numero_unidade = ? AND fc.numero_faixa = ?
-        """, (row[0], row[1], row[2]))
-        comp = cursor2.fetchone()
-        while comp:
-            faixa['compositores'].append({'cod_compositor': comp[0], 'nome': comp[1]})
+        if buscar_compositores:
+            faixa['compositores'] = []
+            cursor2 = conexao.cursor()
+            cursor2.execute("""
+                SELECT c.cod_compositor, c.nome 
+                FROM FAIXA_COMPOSITOR fc
+                JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
+                WHERE fc.cod_album = ? AND fc.numero_unidade = ? AND fc.numero_faixa = ?
+            """, (row[0], row[1], row[2]))
             comp = cursor2.fetchone()
-        cursor2.close()
+            while comp:
+                faixa['compositores'].append({'cod_compositor': comp[0], 'nome': comp[1]})
+                comp = cursor2.fetchone()
+            cursor2.close()
         
         # Buscar intérpretes
-        cursor3 = conexao.cursor()
-        cursor3.execute("""
-            SELECT i.cod_interprete, i.nome 
-            FROM FAIXA_INTERPRETE fi
-            JOIN INTERPRETE i ON fi.cod_interprete = i.cod_interprete
-            WHERE fi.cod_album = ? AND fi.numero_unidade = ? AND fi.numero_faixa = ?
-        """, (row[0], row[1], row[2]))
-        interp = cursor3.fetchone()
-        while interp:
-            faixa['interpretes'].append({'cod_interprete': interp[0], 'nome': interp[1]})
+        if buscar_interpretes:
+            faixa['interpretes'] = []
+            cursor3 = conexao.cursor()
+            cursor3.execute("""
+                SELECT i.cod_interprete, i.nome 
+                FROM FAIXA_INTERPRETE fi
+                JOIN INTERPRETE i ON fi.cod_interprete = i.cod_interprete
+                WHERE fi.cod_album = ? AND fi.numero_unidade = ? AND fi.numero_faixa = ?
+            """, (row[0], row[1], row[2]))
             interp = cursor3.fetchone()
-        cursor3.close()
+            while interp:
+                faixa['interpretes'].append({'cod_interprete': interp[0], 'nome': interp[1]})
+                interp = cursor3.fetchone()
+            cursor3.close()
         
         faixas.append(faixa)
         row = cursor.fetchone()
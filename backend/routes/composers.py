@@ -4,34 +4,53 @@
 from flask import request, jsonify
 from routes import composers_bp
 from config.database import get_conexao
+from utils.coalescing import coalescer
+from utils.events import publicar
+from utils.fields import (CampoInvalido, selecionar_campos, montar_select,
+                          linha_para_dict, como_texto)
+
+
+COLUNAS_COMPOSITOR = {
+    'cod_compositor': ('c.cod_compositor', None),
+    'nome': ('c.nome', None),
+    'cidade_nascimento': ('c.cidade_nascimento', None),
+    'pais_nascimento': ('c.pais_nascimento', None),
+    'data_nascimento': ('c.data_nascimento', como_texto),
+    'data_morte': ('c.data_morte', como_texto),
+    'cod_periodo': ('c.cod_periodo', None),
+    'periodo': ('p.descricao', None)
+}
+
+SQL_OBTER_COMPOSITOR = """
+    SELECT {colunas}
+    FROM COMPOSITOR c
+    JOIN PERIODO_MUSICAL p ON c.cod_periodo = p.cod_periodo
+    WHERE c.cod_compositor = ?
+"""
 
 
 @composers_bp.route('', methods=['GET'])
+@coalescer()
 def listar_compositores():
-    """Lista todos os compositores."""
+    """Lista todos os compositores (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_COMPOSITOR)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT c.cod_compositor, c.nome, c.cidade_nascimento, c.pais_nascimento,
-               c.data_nascimento, c.data_morte, c.cod_periodo, p.descricao AS periodo
+    cursor.execute(montar_select("""
+        SELECT {colunas}
         FROM COMPOSITOR c
         JOIN PERIODO_MUSICAL p ON c.cod_periodo = p.cod_periodo
         ORDER BY c.nome
-    """)
+    """, COLUNAS_COMPOSITOR, campos))
     
     compositores = []
     row = cursor.fetchone()
     while row:
-        compositores.append({
-            'cod_compositor': row[0],
-            'nome': row[1],
-            'cidade_nascimento': row[2],
-            'pais_nascimento': row[3],
-            'data_nascimento': str(row[4]) if row[4] else None,
-            'data_morte': str(row[5]) if row[5] else None,
-            'cod_periodo': row[6],
-            'periodo': row[7]
-        })
+        compositores.append(linha_para_dict(row, COLUNAS_COMPOSITOR, campos))
         row = cursor.fetchone()
     
     cursor.close()
@@ -41,16 +60,15 @@ def listar_compositores():
 
 @composers_bp.route('/<int:cod_compositor>', methods=['GET'])
 def obter_compositor(cod_compositor):
-    """Obtém um compositor específico."""
+    """Obtém um compositor específico (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_COMPOSITOR)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT c.cod_compositor, c.nome, c.cidade_nascimento, c.pais_nascimento,
-               c.data_nascimento, c.data_morte, c.cod_periodo, p.descricao AS periodo
-        FROM COMPOSITOR c
-        JOIN PERIODO_MUSICAL p ON c.cod_periodo = p.cod_periodo
-        WHERE c.cod_compositor = ?
-    """, (cod_compositor,))
+    cursor.execute(montar_select(SQL_OBTER_COMPOSITOR, COLUNAS_COMPOSITOR, campos), (cod_compositor,))
     
     row = cursor.fetchone()
     if not row:
@@ -58,16 +76,7 @@ def obter_compositor(cod_compositor):
         conexao.close()
         return jsonify({'error': True, 'message': 'Compositor não encontrado'}), 404
     
-    compositor = {
-        'cod_compositor': row[0],
-        'nome': row[1],
-        'cidade_nascimento': row[2],
-        'pais_nascimento': row[3],
-        'data_nascimento': str(row[4]) if row[4] else None,
-        'data_morte': str(row[5]) if row[5] else None,
-        'cod_periodo': row[6],
-        'periodo': row[7]
-    }
+    compositor = linha_para_dict(row, COLUNAS_COMPOSITOR, campos)
     
     cursor.close()
     conexao.close()
@@ -97,13 +106,19 @@ def criar_compositor():
         ))
         
         cursor.execute("SELECT SCOPE_IDENTITY()")
-        cod_compositor = cursor.fetchone()[0]
+        cod_compositor = int(cursor.fetchone()[0])
+        
+        # Linha completa (com o nome do período) para o evento de alteração
+        campos = tuple(COLUNAS_COMPOSITOR)
+        cursor.execute(montar_select(SQL_OBTER_COMPOSITOR, COLUNAS_COMPOSITOR, campos), (cod_compositor,))
+        compositor = linha_para_dict(cursor.fetchone(), COLUNAS_COMPOSITOR, campos)
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
-        return jsonify({'success': True, 'cod_compositor': int(cod_compositor)}), 201
+        publicar('composers', 'insert', {'cod_compositor': cod_compositor}, compositor)
+        return jsonify({'success': True, 'cod_compositor': cod_compositor}), 201
     except Exception as e:
         conexao.rollback()
         cursor.close()
@@ -143,6 +158,7 @@ def buscar_compositores():
 
 
 @composers_bp.route('/albums', methods=['GET'])
+@coalescer()
 def buscar_albuns_compositor():
     """Busca álbuns por nome do compositor usando a função do banco."""
     nome = request.args.get('nome', '')
@@ -4,6 +4,16 @@
 from flask import request, jsonify
 from routes import composition_types_bp
 from config.database import get_conexao
+from utils.events import publicar
+from utils.statements import registrar, consultar
+
+
+registrar('tipos_composicao.listar', """
+    SELECT {colunas} FROM TIPO_COMPOSICAO ORDER BY descricao
+""", colunas={
+    'cod_tipo_composicao': ('cod_tipo_composicao', None),
+    'descricao': ('descricao', None)
+})
 
 
 @composition_types_bp.route('', methods=['GET'])
@@ -11,16 +21,7 @@ def listar_tipos_composicao():
     """Lista todos os tipos de composição."""
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("SELECT cod_tipo_composicao, descricao FROM TIPO_COMPOSICAO ORDER BY descricao")
-    
-    tipos = []
-    row = cursor.fetchone()
-    while row:
-        tipos.append({
-            'cod_tipo_composicao': row[0],
-            'descricao': row[1]
-        })
-        row = cursor.fetchone()
+    tipos = consultar(cursor, 'tipos_composicao.listar')
     
     cursor.close()
     conexao.close()
@@ -38,13 +39,15 @@ def criar_tipo_composicao():
     try:
         cursor.execute("INSERT INTO TIPO_COMPOSICAO (descricao) VALUES (?)", (dados['descricao'],))
         cursor.execute("SELECT SCOPE_IDENTITY()")
-        cod_tipo = cursor.fetchone()[0]
+        cod_tipo = int(cursor.fetchone()[0])
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
-        return jsonify({'success': True, 'cod_tipo_composicao': int(cod_tipo)}), 201
+        publicar('composition_types', 'insert', {'cod_tipo_composicao': cod_tipo},
+                 {'cod_tipo_composicao': cod_tipo, 'descricao': dados['descricao']})
+        return jsonify({'success': True, 'cod_tipo_composicao': cod_tipo}), 201
     except Exception as e:
         conexao.rollback()
         cursor.close()
@@ -0,0 +1,64 @@
+# backend/routes/events.py
+# Stream de eventos de alteração (Server-Sent Events)
+
+import json
+
+from flask import Response, request, jsonify, stream_with_context
+from routes import events_bp
+from utils.events import barramento, ENTIDADES
+
+INTERVALO_KEEPALIVE = 15    # segundos entre comentários de keep-alive
+RECONEXAO_MS = 3000         # espera sugerida ao EventSource antes de reconectar
+
+
+def _formatar(evento):
+    return (f"id: {barramento.id_evento(evento['seq'])}\nevent: change\n"
+            f"data: {json.dumps(evento, default=str)}\n\n")
+
+
+def _reset():
+    """Pede ao cliente que recarregue as listas (eventos perdidos)."""
+    return f'id: {barramento.id_evento(barramento.sequencia)}\nevent: reset\ndata: {{}}\n\n'
+
+
+@events_bp.route('', methods=['GET'])
+def stream_eventos():
+    """Alterações em tempo real (text/event-stream).
+    
+    Retoma depois do cabeçalho Last-Event-ID (ou ?desde=<id>); sem ele,
+    começa nos próximos eventos. ?entidades=albums,playlists filtra. Depois
+    dos eventos perdidos na desconexão vem "synced": o cliente está em dia.
+    """
+    ultimo = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    filtro = {e.strip() for e in request.args.get('entidades', '').split(',') if e.strip()}
+    invalidas = sorted(filtro.difference(ENTIDADES))
+    if invalidas:
+        return jsonify({'error': True, 'message': 'Entidades inválidas: ' + ', '.join(invalidas)}), 400
+    
+    inicio = barramento.sequencia_do_id(ultimo) if ultimo else barramento.sequencia
+    
+    def gerar():
+        posicao = inicio
+        yield f'retry: {RECONEXAO_MS}\n\n'
+        # Primeira volta sem espera: só o que o cliente perdeu
+        eventos = None if posicao is None else barramento.eventos_apos(posicao)
+        sincronizado = False
+        
+        while True:
+            if eventos is None:
+                # Id de outra época ou mais antigo que o histórico circular
+                posicao = barramento.sequencia
+                yield _reset()
+            elif not eventos and sincronizado:
+                yield ': keep-alive\n\n'
+            for evento in eventos or ():
+                posicao = evento['seq']
+                if not filtro or evento['entidade'] in filtro:
+                    yield _formatar(evento)
+            if not sincronizado:
+                sincronizado = True
+                yield f'id: {barramento.id_evento(posicao)}\nevent: synced\ndata: {{}}\n\n'
+            eventos = barramento.aguardar(posicao, INTERVALO_KEEPALIVE)
+    
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
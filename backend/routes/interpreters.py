@@ -4,6 +4,17 @@
 from flask import request, jsonify
 from routes import interpreters_bp
 from config.database import get_conexao
+from utils.events import publicar
+from utils.statements import registrar, consultar
+
+
+registrar('interpretes.listar', """
+    SELECT {colunas} FROM INTERPRETE ORDER BY nome
+""", colunas={
+    'cod_interprete': ('cod_interprete', None),
+    'nome': ('nome', None),
+    'tipo': ('tipo', None)
+})
 
 
 @interpreters_bp.route('', methods=['GET'])
@@ -11,17 +22,7 @@ def listar_interpretes():
     """Lista todos os intérpretes."""
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("SELECT cod_interprete, nome, tipo FROM INTERPRETE ORDER BY nome")
-    
-    interpretes = []
-    row = cursor.fetchone()
-    while row:
-        interpretes.append({
-            'cod_interprete': row[0],
-            'nome': row[1],
-            'tipo': row[2]
-        })
-        row = cursor.fetchone()
+    interpretes = consultar(cursor, 'interpretes.listar')
     
     cursor.close()
     conexao.close()
@@ -40,13 +41,18 @@ def criar_interprete():
         cursor.execute("INSERT INTO INTERPRETE (nome, tipo) VALUES (?, ?)", 
                       (dados['nome'], dados['tipo']))
         cursor.execute("SELECT SCOPE_IDENTITY()")
-        cod_interprete = cursor.fetchone()[0]
+        cod_interprete = int(cursor.fetchone()[0])
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
-        return jsonify({'success': True, 'cod_interprete': int(cod_interprete)}), 201
+        publicar('interpreters', 'insert', {'cod_interprete': cod_interprete}, {
+            'cod_interprete': cod_interprete,
+            'nome': dados['nome'],
+            'tipo': dados['tipo']
+        })
+        return jsonify({'success': True, 'cod_interprete': cod_interprete}), 201
     except Exception as e:
         conexao.rollback()
         cursor.close()
@@ -0,0 +1,73 @@
+# backend/routes/jobs.py
+# Rotas de Tarefas em segundo plano
+
+from flask import request, jsonify
+from routes import jobs_bp
+from utils.jobs import (criar_tarefa, obter_tarefa, listar_tarefas, cancelar_tarefa,
+                        tipos_registrados, ESTADOS, LIMITE_LISTAGEM)
+
+# Os módulos de serviço registram seus tipos de tarefa ao serem importados
+import services.track_import  # noqa: F401
+import services.maintenance  # noqa: F401
+
+
+@jobs_bp.route('', methods=['POST'])
+def criar():
+    """Cria uma tarefa: {"tipo": ..., "parametros": {...}}. Responde 202."""
+    dados = request.get_json(silent=True) or {}
+    parametros = dados.get('parametros') or {}
+    if not isinstance(parametros, dict):
+        return jsonify({'error': True, 'message': 'parametros deve ser um objeto'}), 400
+    
+    try:
+        cod_tarefa = criar_tarefa(dados.get('tipo'), parametros)
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 500
+    return jsonify({'cod_tarefa': cod_tarefa, 'estado': 'PENDENTE'}), 202
+
+
+@jobs_bp.route('', methods=['GET'])
+def listar():
+    """Lista as tarefas mais recentes (?estado= e ?limite=)."""
+    estado = request.args.get('estado')
+    if estado and estado not in ESTADOS:
+        return jsonify({'error': True, 'message': f'Estado inválido: {estado}'}), 400
+    limite = min(max(request.args.get('limite', 50, type=int), 1), LIMITE_LISTAGEM)
+    try:
+        return jsonify(listar_tarefas(estado, limite))
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 500
+
+
+@jobs_bp.route('/types', methods=['GET'])
+def listar_tipos():
+    """Tipos de tarefa aceitos por este processo."""
+    return jsonify(tipos_registrados())
+
+
+@jobs_bp.route('/<int:cod_tarefa>', methods=['GET'])
+def obter(cod_tarefa):
+    """Estado, progresso, resultado e erro de uma tarefa."""
+    try:
+        tarefa = obter_tarefa(cod_tarefa)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 500
+    if tarefa is None:
+        return jsonify({'error': True, 'message': 'Tarefa não encontrada'}), 404
+    return jsonify(tarefa)
+
+
+@jobs_bp.route('/<int:cod_tarefa>/cancel', methods=['POST'])
+def cancelar(cod_tarefa):
+    """Cancela uma tarefa pendente ou pede o cancelamento de uma em execução."""
+    try:
+        estado = cancelar_tarefa(cod_tarefa)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 500
+    if estado is None:
+        return jsonify({'error': True, 'message': 'Tarefa não encontrada'}), 404
+    if estado not in ('CANCELADA', 'EXECUTANDO'):
+        return jsonify({'error': True, 'message': f'Tarefa já finalizada ({estado})'}), 409
+    return jsonify({'cod_tarefa': cod_tarefa, 'estado': estado})
@@ -4,6 +4,15 @@
 from flask import request, jsonify
 from routes import labels_bp
 from config.database import get_conexao
+from utils.events import publicar
+from utils.associations import sincronizar, TELEFONE_GRAVADORA
+from utils.statements import registrar, executar_lote
+
+registrar('gravadoras.inserir_telefone', """
+    INSERT INTO TELEFONE_GRAVADORA (cod_gravadora, telefone, tipo_telefone)
+    VALUES (?, ?, ?)
+""", parametros=(('cod_gravadora', 'INT'), ('telefone', 'VARCHAR(15)'), ('tipo_telefone', 'VARCHAR(15)')),
+          lote=True)
 
 
 @labels_bp.route('', methods=['GET'])
@@ -89,18 +98,21 @@ def criar_gravadora():
         cursor.execute("SELECT SCOPE_IDENTITY()")
         cod_gravadora = int(cursor.fetchone()[0])
         
-        telefones = dados.get('telefones', [])
-        for tel in telefones:
-            if tel.get('numero'):
-                cursor.execute("""
-                    INSERT INTO TELEFONE_GRAVADORA (cod_gravadora, telefone, tipo_telefone) 
-                    VALUES (?, ?, ?)
-                """, (cod_gravadora, tel['numero'], tel.get('tipo')))
+        executar_lote(cursor, 'gravadoras.inserir_telefone', [
+            (cod_gravadora, tel['numero'], tel.get('tipo'))
+            for tel in dados.get('telefones', []) if tel.get('numero')
+        ])
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
+        publicar('labels', 'insert', {'cod_gravadora': cod_gravadora}, {
+            'cod_gravadora': cod_gravadora,
+            'nome': dados['nome'],
+            'endereco': dados.get('endereco'),
+            'homepage': dados.get('homepage')
+        })
         return jsonify({'success': True, 'cod_gravadora': cod_gravadora}), 201
     except Exception as e:
         conexao.rollback()
@@ -130,17 +142,18 @@ def atualizar_gravadora(cod_gravadora):
         """, (dados.get('nome'), dados.get('endereco'), dados.get('homepage'), cod_gravadora))
         
         if 'telefones' in dados:
-            cursor.execute("DELETE FROM TELEFONE_GRAVADORA WHERE cod_gravadora = ?", (cod_gravadora,))
-            for tel in dados['telefones']:
-                if tel.get('numero'):
-                    cursor.execute("""
-                        INSERT INTO TELEFONE_GRAVADORA (cod_gravadora, telefone, tipo_telefone)
-                        VALUES (?, ?, ?)
-                    """, (cod_gravadora, tel['numero'], tel.get('tipo')))
+            telefones = {tel['numero']: (tel.get('tipo'),) for tel in dados['telefones'] if tel.get('numero')}
+            sincronizar(cursor, TELEFONE_GRAVADORA, (cod_gravadora,), telefones)
         
         conexao.commit()
         cursor.close()
         conexao.close()
+        publicar('labels', 'update', {'cod_gravadora': cod_gravadora}, {
+            'cod_gravadora': cod_gravadora,
+            'nome': dados.get('nome'),
+            'endereco': dados.get('endereco'),
+            'homepage': dados.get('homepage')
+        })
         return jsonify({'success': True, 'message': 'Gravadora atualizada'})
     except Exception as e:
         conexao.rollback()
@@ -4,6 +4,18 @@
 from flask import request, jsonify
 from routes import periods_bp
 from config.database import get_conexao
+from utils.events import publicar
+from utils.statements import registrar, consultar
+
+
+registrar('periodos.listar', """
+    SELECT {colunas} FROM PERIODO_MUSICAL ORDER BY ano_inicio
+""", colunas={
+    'cod_periodo': ('cod_periodo', None),
+    'descricao': ('descricao', None),
+    'ano_inicio': ('ano_inicio', None),
+    'ano_fim': ('ano_fim', None)
+})
 
 
 @periods_bp.route('', methods=['GET'])
@@ -11,18 +23,7 @@ def listar_periodos():
     """Lista todos os períodos musicais."""
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("SELECT cod_periodo, descricao, ano_inicio, ano_fim FROM PERIODO_MUSICAL ORDER BY ano_inicio")
-    
-    periodos = []
-    row = cursor.fetchone()
-    while row:
-        periodos.append({
-            'cod_periodo': row[0],
-            'descricao': row[1],
-            'ano_inicio': row[2],
-            'ano_fim': row[3]
-        })
-        row = cursor.fetchone()
+    periodos = consultar(cursor, 'periodos.listar')
     
     cursor.close()
     conexao.close()
@@ -44,13 +45,19 @@ def criar_periodo():
         """, (dados['descricao'], dados['ano_inicio'], dados['ano_fim']))
         
         cursor.execute("SELECT SCOPE_IDENTITY()")
-        cod_periodo = cursor.fetchone()[0]
+        cod_periodo = int(cursor.fetchone()[0])
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
-        return jsonify({'success': True, 'cod_periodo': int(cod_periodo)}), 201
+        publicar('periods', 'insert', {'cod_periodo': cod_periodo}, {
+            'cod_periodo': cod_periodo,
+            'descricao': dados['descricao'],
+            'ano_inicio': dados['ano_inicio'],
+            'ano_fim': dados['ano_fim']
+        })
+        return jsonify({'success': True, 'cod_periodo': cod_periodo}), 201
     except Exception as e:
         conexao.rollback()
         cursor.close()
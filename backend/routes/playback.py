@@ -0,0 +1,187 @@
+# backend/routes/playback.py
+# Rotas para Estatísticas de Reprodução (rollups do histórico)
+
+from datetime import datetime, timedelta, time
+
+from flask import request, jsonify
+from routes import playback_bp
+from config.database import get_conexao
+
+
+JANELA_PADRAO = timedelta(days=7)
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 100
+
+# Une os rollups diários (dias inteiros da janela) aos rollups por minuto
+# (bordas da janela). Parâmetros: dia_inicio, dia_fim e dois intervalos de minutos.
+CONTAGEM_JANELA = """
+    WITH contagem AS (
+        SELECT cod_album, numero_unidade, numero_faixa, qtd_reproducoes
+        FROM REPRODUCAO_DIA
+        WHERE dia >= ? AND dia < ?
+        UNION ALL
+        SELECT cod_album, numero_unidade, numero_faixa, qtd_reproducoes
+        FROM REPRODUCAO_MINUTO
+        WHERE (minuto >= ? AND minuto < ?) OR (minuto >= ? AND minuto < ?)
+    )
+"""
+
+
+def _data_hora(texto):
+    """ISO 8601 -> datetime sem fuso, no horário local.
+    
+    O histórico grava SYSDATETIME() (horário local do servidor), então um
+    valor com fuso é convertido para o local antes de perder o fuso; assim
+    ?inicio= e ?fim= podem vir um com fuso e outro sem.
+    """
+    valor = datetime.fromisoformat(texto)
+    if valor.tzinfo is not None:
+        valor = valor.astimezone().replace(tzinfo=None)
+    return valor
+
+
+def _parametros_janela():
+    """Lê ?inicio=, ?fim= (ISO 8601) e ?limite= da requisição.
+    
+    Retorna (inicio, fim, limite, parametros da CONTAGEM_JANELA).
+    """
+    fim = request.args.get('fim')
+    fim = _data_hora(fim) if fim else datetime.now()
+    inicio = request.args.get('inicio')
+    inicio = _data_hora(inicio) if inicio else fim - JANELA_PADRAO
+    if inicio >= fim:
+        raise ValueError('inicio deve ser anterior a fim')
+    
+    limite = min(int(request.args.get('limite', LIMITE_PADRAO)), LIMITE_MAXIMO)
+    if limite <= 0:
+        raise ValueError('limite deve ser um inteiro positivo')
+    
+    # Rollups por minuto: a janela é arredondada para o minuto
+    inicio = inicio.replace(second=0, microsecond=0)
+    fim = fim.replace(second=0, microsecond=0)
+    
+    # Dias inteiros contidos na janela vêm de REPRODUCAO_DIA
+    dia_inicio = inicio.date() if inicio.time() == time(0) else inicio.date() + timedelta(days=1)
+    dia_fim = fim.date()
+    
+    if dia_inicio >= dia_fim:
+        parametros = (dia_inicio, dia_inicio, inicio, fim, fim, fim)
+    else:
+        parametros = (
+            dia_inicio, dia_fim,
+            inicio, datetime.combine(dia_inicio, time(0)),
+            datetime.combine(dia_fim, time(0)), fim
+        )
+    return inicio, fim, limite, parametros
+
+
+@playback_bp.route('/top-tracks', methods=['GET'])
+def top_faixas():
+    """Faixas mais tocadas na janela (?inicio=&fim=&limite=)."""
+    try:
+        inicio, fim, limite, parametros = _parametros_janela()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    cursor.execute(CONTAGEM_JANELA + """
+        SELECT TOP (?) c.cod_album, c.numero_unidade, c.numero_faixa,
+               f.descricao AS nome_faixa, a.nome AS nome_album,
+               SUM(c.qtd_reproducoes) AS qtd_reproducoes
+        FROM contagem c
+        JOIN FAIXA f ON c.cod_album = f.cod_album
+                    AND c.numero_unidade = f.numero_unidade
+                    AND c.numero_faixa = f.numero_faixa
+        JOIN ALBUM a ON f.cod_album = a.cod_album
+        GROUP BY c.cod_album, c.numero_unidade, c.numero_faixa, f.descricao, a.nome
+        ORDER BY qtd_reproducoes DESC
+    """, parametros + (limite,))
+    
+    resultados = []
+    row = cursor.fetchone()
+    while row:
+        resultados.append({
+            'cod_album': row[0],
+            'numero_unidade': row[1],
+            'numero_faixa': row[2],
+            'nome_faixa': row[3],
+            'nome_album': row[4],
+            'qtd_reproducoes': row[5]
+        })
+        row = cursor.fetchone()
+    
+    cursor.close()
+    conexao.close()
+    return jsonify({'inicio': inicio.isoformat(), 'fim': fim.isoformat(), 'faixas': resultados})
+
+
+@playback_bp.route('/top-composers', methods=['GET'])
+def top_compositores():
+    """Compositores mais tocados na janela (?inicio=&fim=&limite=)."""
+    try:
+        inicio, fim, limite, parametros = _parametros_janela()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    cursor.execute(CONTAGEM_JANELA + """
+        SELECT TOP (?) comp.cod_compositor, comp.nome,
+               SUM(c.qtd_reproducoes) AS qtd_reproducoes
+        FROM contagem c
+        JOIN FAIXA_COMPOSITOR fc ON c.cod_album = fc.cod_album
+                                AND c.numero_unidade = fc.numero_unidade
+                                AND c.numero_faixa = fc.numero_faixa
+        JOIN COMPOSITOR comp ON fc.cod_compositor = comp.cod_compositor
+        GROUP BY comp.cod_compositor, comp.nome
+        ORDER BY qtd_reproducoes DESC
+    """, parametros + (limite,))
+    
+    resultados = []
+    row = cursor.fetchone()
+    while row:
+        resultados.append({
+            'cod_compositor': row[0],
+            'nome': row[1],
+            'qtd_reproducoes': row[2]
+        })
+        row = cursor.fetchone()
+    
+    cursor.close()
+    conexao.close()
+    return jsonify({'inicio': inicio.isoformat(), 'fim': fim.isoformat(), 'compositores': resultados})
+
+
+@playback_bp.route('/top-albums', methods=['GET'])
+def top_albuns():
+    """Álbuns mais tocados na janela (?inicio=&fim=&limite=)."""
+    try:
+        inicio, fim, limite, parametros = _parametros_janela()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    cursor.execute(CONTAGEM_JANELA + """
+        SELECT TOP (?) a.cod_album, a.nome,
+               SUM(c.qtd_reproducoes) AS qtd_reproducoes
+        FROM contagem c
+        JOIN ALBUM a ON c.cod_album = a.cod_album
+        GROUP BY a.cod_album, a.nome
+        ORDER BY qtd_reproducoes DESC
+    """, parametros + (limite,))
+    
+    resultados = []
+    row = cursor.fetchone()
+    while row:
+        resultados.append({
+            'cod_album': row[0],
+            'nome': row[1],
+            'qtd_reproducoes': row[2]
+        })
+        row = cursor.fetchone()
+    
+    cursor.close()
+    conexao.close()
+    return jsonify({'inicio': inicio.isoformat(), 'fim': fim.isoformat(), 'albuns': resultados})
@@ -1,33 +1,137 @@
 # backend/routes/playlists.py
 # Rotas para Playlists
 
+import json
+from datetime import datetime
+
 from flask import request, jsonify
 from routes import playlists_bp
 from config.database import get_conexao
+from utils.transactions import executar_transacao
+from utils.events import publicar
+from utils.statements import registrar, executar_lote
+from services.playlist_generator import gerar_faixas, TOLERANCIA_PADRAO
+from services.track_index import FACETAS, FACETAS_SIMPLES
+from utils.fields import (CampoInvalido, selecionar_campos, montar_select,
+                          linha_para_dict, como_texto)
+
+# Espaçamento entre posições consecutivas de ordem_reproducao. As lacunas
+# permitem mover uma faixa alterando só a sua linha; quando duas vizinhas
+# ficam sem espaço entre si, a playlist é renumerada.
+INTERVALO_ORDEM = 1024
+
+COLUNAS_PLAYLIST = {
+    'cod_playlist': ('p.cod_playlist', None),
+    'nome': ('p.nome', None),
+    'data_criacao': ('p.data_criacao', como_texto),
+    'tempo_total_execucao': ('p.tempo_total_execucao', None),
+    'qtd_faixas': ('p.qtd_faixas', None),
+    'qtd_albuns': ('p.qtd_albuns', None)
+}
+
+COLUNAS_FAIXA_PLAYLIST = {
+    'ordem_reproducao': ('pf.ordem_reproducao', None),
+    'cod_album': ('pf.cod_album', None),
+    'numero_unidade': ('pf.numero_unidade', None),
+    'numero_faixa': ('pf.numero_faixa', None),
+    'nome_faixa': ('f.descricao', None),
+    'nome_album': ('a.nome', None),
+    'tipo_composicao': ('tc.descricao', None),
+    'tempo_execucao': ('f.tempo_execucao', None),
+    'data_ultima_vez_tocada': ('pf.data_ultima_vez_tocada', como_texto),
+    'num_vezes_tocada': ('pf.num_vezes_tocada', None),
+    'tempo_inicio': ('pf.tempo_inicio', None)
+}
+
+SQL_OBTER_PLAYLIST = """
+    SELECT {colunas}
+    FROM PLAYLIST p
+    WHERE p.cod_playlist = ?
+"""
+
+# FROM comum às consultas de faixas da playlist
+JUNCAO_FAIXAS_PLAYLIST = """
+    FROM PLAYLIST_FAIXA pf
+    JOIN FAIXA f ON pf.cod_album = f.cod_album 
+                AND pf.numero_unidade = f.numero_unidade 
+                AND pf.numero_faixa = f.numero_faixa
+    JOIN ALBUM a ON f.cod_album = a.cod_album
+    JOIN TIPO_COMPOSICAO tc ON f.cod_tipo_composicao = tc.cod_tipo_composicao
+"""
+
+JANELA_FAIXAS_PADRAO = 10
+JANELA_FAIXAS_MAXIMA = 200
+
+# Combinações de playlists: condição do HAVING sobre as faixas agrupadas e o
+# parâmetro dela em função da quantidade de playlists de origem. `lista.posicao`
+# é a posição da playlist na lista (0 = primeira).
+OPERACOES_COMBINACAO = {
+    'uniao': ('COUNT(DISTINCT lista.posicao) >= ?', lambda quantidade: 1),
+    'intersecao': ('COUNT(DISTINCT lista.posicao) = ?', lambda quantidade: quantidade),
+    'diferenca': ('MAX(lista.posicao) = ?', lambda quantidade: 0),
+}
+
+# Insere no destino, numa única instrução, as faixas da combinação que ele
+# ainda não tem. A ordem segue a primeira ocorrência da faixa (playlist de
+# origem, depois ordem_reproducao) e continua depois da última faixa do destino.
+SQL_INSERIR_COMBINACAO = """
+    INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade,
+                               numero_faixa, ordem_reproducao, num_vezes_tocada)
+    SELECT ?, sel.cod_album, sel.numero_unidade, sel.numero_faixa,
+           base.ordem + ROW_NUMBER() OVER (ORDER BY sel.chave) * ?, 0
+    FROM (
+        SELECT pf.cod_album, pf.numero_unidade, pf.numero_faixa,
+               MIN(CAST(lista.posicao AS BIGINT) * 2147483648 + pf.ordem_reproducao) AS chave
+        FROM (SELECT CAST([key] AS INT) AS posicao, CAST([value] AS INT) AS cod_playlist
+              FROM OPENJSON(?)) AS lista
+        JOIN PLAYLIST_FAIXA pf ON pf.cod_playlist = lista.cod_playlist
+        GROUP BY pf.cod_album, pf.numero_unidade, pf.numero_faixa
+        HAVING {condicao}
+    ) AS sel
+    CROSS JOIN (
+        SELECT ISNULL(MAX(ordem_reproducao), 0) AS ordem
+        FROM PLAYLIST_FAIXA WITH (UPDLOCK, HOLDLOCK)
+        WHERE cod_playlist = ?
+    ) AS base
+    WHERE NOT EXISTS (
+        SELECT 1 FROM PLAYLIST_FAIXA atual
+        WHERE atual.cod_playlist = ? AND atual.cod_album = sel.cod_album
+          AND atual.numero_unidade = sel.numero_unidade AND atual.numero_faixa = sel.numero_faixa
+    )
+"""
+
+registrar('playlists.inserir_faixa', """
+    INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade,
+                               numero_faixa, ordem_reproducao, num_vezes_tocada)
+    VALUES (?, ?, ?, ?, ?, 0)
+""", parametros=(('cod_playlist', 'INT'), ('cod_album', 'INT'), ('numero_unidade', 'TINYINT'),
+                   ('numero_faixa', 'TINYINT'), ('ordem_reproducao', 'INT')), lote=True)
+
+# Restrições numéricas aceitas por /generate (além de duracao_alvo)
+RESTRICOES_GERACAO = ('tolerancia', 'duracao_min', 'duracao_max', 'max_por_album',
+                      'max_por_compositor', 'max_faixas', 'semente')
 
 
 @playlists_bp.route('', methods=['GET'])
 def listar_playlists():
-    """Lista todas as playlists."""
+    """Lista todas as playlists (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_PLAYLIST)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT p.cod_playlist, p.nome, p.data_criacao, p.tempo_total_execucao,
-               (SELECT COUNT(*) FROM PLAYLIST_FAIXA pf WHERE pf.cod_playlist = p.cod_playlist) AS qtd_faixas
+    cursor.execute(montar_select("""
+        SELECT {colunas}
         FROM PLAYLIST p
         ORDER BY p.nome
-    """)
+    """, COLUNAS_PLAYLIST, campos))
     
     playlists = []
     row = cursor.fetchone()
     while row:
-        playlists.append({
-            'cod_playlist': row[0],
-            'nome': row[1],
-            'data_criacao': str(row[2]) if row[2] else None,
-            'tempo_total_execucao': row[3],
-            'qtd_faixas': row[4]
-        })
+        playlists.append(linha_para_dict(row, COLUNAS_PLAYLIST, campos))
         row = cursor.fetchone()
     
     cursor.close()
@@ -37,15 +141,15 @@ def listar_playlists():
 
 @playlists_bp.route('/<int:cod_playlist>', methods=['GET'])
 def obter_playlist(cod_playlist):
-    """Obtém uma playlist específica."""
+    """Obtém uma playlist específica (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_PLAYLIST)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT p.cod_playlist, p.nome, p.data_criacao, p.tempo_total_execucao,
-               (SELECT COUNT(*) FROM PLAYLIST_FAIXA pf WHERE pf.cod_playlist = p.cod_playlist) AS qtd_faixas
-        FROM PLAYLIST p
-        WHERE p.cod_playlist = ?
-    """, (cod_playlist,))
+    cursor.execute(montar_select(SQL_OBTER_PLAYLIST, COLUNAS_PLAYLIST, campos), (cod_playlist,))
     
     row = cursor.fetchone()
     if not row:
@@ -53,28 +157,135 @@ def obter_playlist(cod_playlist):
         conexao.close()
         return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
     
-    playlist = {
-        'cod_playlist': row[0],
-        'nome': row[1],
-        'data_criacao': str(row[2]) if row[2] else None,
-        'tempo_total_execucao': row[3],
-        'qtd_faixas': row[4]
-    }
+    playlist = linha_para_dict(row, COLUNAS_PLAYLIST, campos)
     
     cursor.close()
     conexao.close()
     return jsonify(playlist)
 
 
+def _linha_playlist(cursor, cod_playlist):
+    """Linha completa da playlist, como na listagem (para o evento de alteração)."""
+    campos = tuple(COLUNAS_PLAYLIST)
+    cursor.execute(montar_select(SQL_OBTER_PLAYLIST, COLUNAS_PLAYLIST, campos), (cod_playlist,))
+    return linha_para_dict(cursor.fetchone(), COLUNAS_PLAYLIST, campos)
+
+
+def _publicar_playlist(acao, playlist):
+    publicar('playlists', acao, {'cod_playlist': playlist['cod_playlist']}, playlist)
+
+
+def _publicar_faixas_playlist(cod_playlist):
+    """Várias faixas da playlist mudaram (ordem, tempo_inicio): o cliente relê a lista."""
+    publicar('playlist_tracks', 'update', {'cod_playlist': cod_playlist})
+
+
 @playlists_bp.route('', methods=['POST'])
 def criar_playlist():
     """Cria uma nova playlist."""
     dados = request.get_json()
+
+    def inserir(cursor):
+        cursor.execute("""
+            INSERT INTO PLAYLIST (nome, data_criacao, tempo_total_execucao)
+            VALUES (?, GETDATE(), 0)
+        """, (dados['nome'],))
+        
+        cursor.execute("SELECT SCOPE_IDENTITY()")
+        cod_playlist = int(cursor.fetchone()[0])
+        
+        # Adicionar faixas se fornecidas
+        executar_lote(cursor, 'playlists.inserir_faixa', [
+            (cod_playlist, faixa['cod_album'], faixa['numero_unidade'], faixa['numero_faixa'],
+             INTERVALO_ORDEM * (i + 1))
+            for i, faixa in enumerate(dados.get('faixas', []))
+        ])
+        return _linha_playlist(cursor, cod_playlist)
     
-    conexao = get_conexao()
+    try:
+        playlist = executar_transacao(inserir)
+        _publicar_playlist('insert', playlist)
+        return jsonify({'success': True, 'cod_playlist': playlist['cod_playlist']}), 201
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+def _ler_restricoes(dados):
+    """Valida o corpo de /generate; retorna os argumentos de gerar_faixas."""
+    duracao_alvo = dados.get('duracao_alvo')
+    if not isinstance(duracao_alvo, int) or duracao_alvo <= 0:
+        raise ValueError('duracao_alvo deve ser um inteiro positivo (segundos)')
+    
+    restricoes = {'duracao_alvo': duracao_alvo, 'tolerancia': TOLERANCIA_PADRAO}
+    for nome in RESTRICOES_GERACAO:
+        valor = dados.get(nome)
+        if valor is None:
+            continue
+        if not isinstance(valor, int) or valor < 0 or (valor == 0 and nome.startswith('max_')):
+            raise ValueError(f'{nome} deve ser um inteiro positivo')
+        restricoes[nome] = valor
+    
+    filtros = dados.get('filtros') or {}
+    if not isinstance(filtros, dict):
+        raise ValueError('filtros deve ser um objeto {faceta: [valores]}')
+    invalidas = sorted(set(filtros).difference(FACETAS))
+    if invalidas:
+        raise ValueError('Facetas inválidas: ' + ', '.join(invalidas))
+    restricoes['filtros'] = {
+        faceta: [v if FACETAS_SIMPLES.get(faceta, False) else int(v)
+                 for v in (valores if isinstance(valores, list) else [valores])]
+        for faceta, valores in filtros.items()
+    }
+    return restricoes
+
+
+def _tocadas_desde(desde):
+    """Chaves das faixas tocadas em alguma playlist a partir de `desde`."""
+    conexao = get_conexao(somente_leitura=False)
     cursor = conexao.cursor()
+    try:
+        cursor.execute("""
+            SELECT DISTINCT cod_album, numero_unidade, numero_faixa
+            FROM PLAYLIST_FAIXA
+            WHERE data_ultima_vez_tocada >= ?
+        """, (desde,))
+        return [tuple(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+@playlists_bp.route('/generate', methods=['POST'])
+def gerar_playlist():
+    """Gera e grava uma playlist a partir de restrições.
     
+    Corpo: nome, duracao_alvo (segundos) e, opcionais, tolerancia, filtros
+    (facetas de /api/tracks/filter, ex. {"periodo": [2], "tipo_gravacao":
+    ["DDD"]}), duracao_min/duracao_max por faixa, nao_tocada_desde (ISO 8601),
+    max_por_album, max_por_compositor, max_faixas e semente.
+    """
+    dados = request.get_json(silent=True) or {}
     try:
+        if not isinstance(dados, dict):
+            raise ValueError('Corpo da requisição deve ser um objeto JSON')
+        if not dados.get('nome'):
+            raise ValueError('nome é obrigatório')
+        restricoes = _ler_restricoes(dados)
+        desde = dados.get('nao_tocada_desde')
+        desde = datetime.fromisoformat(desde) if desde else None
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    try:
+        if desde is not None:
+            restricoes['excluidas'] = _tocadas_desde(desde)
+        faixas = gerar_faixas(**restricoes)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 500
+    if not faixas:
+        return jsonify({'error': True, 'message': 'Nenhuma faixa atende às restrições'}), 400
+
+    def inserir(cursor):
         cursor.execute("""
             INSERT INTO PLAYLIST (nome, data_criacao, tempo_total_execucao)
             VALUES (?, GETDATE(), 0)
@@ -83,26 +294,162 @@ def criar_playlist():
         cursor.execute("SELECT SCOPE_IDENTITY()")
         cod_playlist = int(cursor.fetchone()[0])
         
-        # Adicionar faixas se fornecidas
-        ordem = 1
-        for faixa in dados.get('faixas', []):
-            cursor.execute("""
-                INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade, 
-                                           numero_faixa, ordem_reproducao, num_vezes_tocada)
-                VALUES (?, ?, ?, ?, ?, 0)
-            """, (cod_playlist, faixa['cod_album'], faixa['numero_unidade'], 
-                  faixa['numero_faixa'], ordem))
-            ordem += 1
+        # Todas as faixas numa instrução (os triggers atualizam os contadores uma vez)
+        cursor.execute("""
+            INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade,
+                                       numero_faixa, ordem_reproducao, num_vezes_tocada)
+            SELECT ?, cod_album, numero_unidade, numero_faixa, posicao * ?, 0
+            FROM OPENJSON(?) WITH (
+                cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, posicao INT
+            )
+        """, (cod_playlist, INTERVALO_ORDEM, json.dumps([
+            dict(faixa, posicao=i) for i, faixa in enumerate(faixas, start=1)
+        ])))
+        return _linha_playlist(cursor, cod_playlist)
+    
+    try:
+        playlist = executar_transacao(inserir)
+        _publicar_playlist('insert', playlist)
+        return jsonify({
+            'success': True,
+            'cod_playlist': playlist['cod_playlist'],
+            'qtd_faixas': len(faixas),
+            'tempo_total_execucao': sum(f['tempo_execucao'] for f in faixas),
+            'faixas': faixas,
+        }), 201
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+def _inserir_combinacao(cursor, destino, origens, operacao):
+    """Adiciona ao destino as faixas da combinação das playlists de origem."""
+    condicao, parametro = OPERACOES_COMBINACAO[operacao]
+    cursor.execute(SQL_INSERIR_COMBINACAO.format(condicao=condicao), (
+        destino, INTERVALO_ORDEM, json.dumps(origens), parametro(len(origens)), destino, destino
+    ))
+
+
+def _playlists_existem(cursor, codigos):
+    cursor.execute("""
+        SELECT COUNT(*) FROM PLAYLIST
+        WHERE cod_playlist IN (SELECT CAST([value] AS INT) FROM OPENJSON(?))
+    """, (json.dumps(codigos),))
+    return cursor.fetchone()[0] == len(codigos)
+
+
+def _ler_origens(dados, minimo):
+    """Lista de playlists de origem do corpo ({"playlists": [...]}, sem repetições)."""
+    origens = list(dict.fromkeys(int(c) for c in dados.get('playlists') or []))
+    if len(origens) < minimo:
+        raise ValueError(f'Informe ao menos {minimo} playlist(s) distinta(s) em "playlists"')
+    return origens
+
+
+def _combinar_em_nova(operacao):
+    """Cria uma playlist com a combinação das playlists do corpo."""
+    dados = request.get_json() or {}
+    try:
+        if not dados.get('nome'):
+            raise ValueError('nome é obrigatório')
+        origens = _ler_origens(dados, 2)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+    def combinar(cursor):
+        if not _playlists_existem(cursor, origens):
+            return None
+        cursor.execute("""
+            INSERT INTO PLAYLIST (nome, data_criacao, tempo_total_execucao)
+            VALUES (?, GETDATE(), 0)
+        """, (dados['nome'],))
         
-        conexao.commit()
-        cursor.close()
-        conexao.close()
+        cursor.execute("SELECT SCOPE_IDENTITY()")
+        cod_playlist = int(cursor.fetchone()[0])
+        _inserir_combinacao(cursor, cod_playlist, origens, operacao)
+        return _linha_playlist(cursor, cod_playlist)
+    
+    try:
+        playlist = executar_transacao(combinar)
+        if playlist is None:
+            return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
+        _publicar_playlist('insert', playlist)
+        return jsonify(dict(playlist, success=True)), 201
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+@playlists_bp.route('/union', methods=['POST'])
+def unir_playlists():
+    """Nova playlist com as faixas de qualquer uma das playlists ({"nome", "playlists"})."""
+    return _combinar_em_nova('uniao')
+
+
+@playlists_bp.route('/intersect', methods=['POST'])
+def intersectar_playlists():
+    """Nova playlist com as faixas presentes em todas as playlists ({"nome", "playlists"})."""
+    return _combinar_em_nova('intersecao')
+
+
+@playlists_bp.route('/difference', methods=['POST'])
+def subtrair_playlists():
+    """Nova playlist com as faixas da primeira que não estão nas demais ({"nome", "playlists"})."""
+    return _combinar_em_nova('diferenca')
+
+
+@playlists_bp.route('/<int:cod_playlist>/clone', methods=['POST'])
+def clonar_playlist(cod_playlist):
+    """Duplica a playlist, na mesma ordem ({"nome"} opcional)."""
+    nome = (request.get_json(silent=True) or {}).get('nome')
+
+    def clonar(cursor):
+        cursor.execute("""
+            INSERT INTO PLAYLIST (nome, data_criacao, tempo_total_execucao)
+            SELECT ISNULL(?, LEFT(nome + ' (cópia)', 150)), GETDATE(), 0
+            FROM PLAYLIST WHERE cod_playlist = ?
+        """, (nome, cod_playlist))
+        if cursor.rowcount == 0:
+            return None
         
-        return jsonify({'success': True, 'cod_playlist': cod_playlist}), 201
+        cursor.execute("SELECT SCOPE_IDENTITY()")
+        nova = int(cursor.fetchone()[0])
+        _inserir_combinacao(cursor, nova, [cod_playlist], 'uniao')
+        return _linha_playlist(cursor, nova)
+    
+    try:
+        playlist = executar_transacao(clonar)
+        if playlist is None:
+            return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
+        _publicar_playlist('insert', playlist)
+        return jsonify(dict(playlist, success=True)), 201
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+@playlists_bp.route('/<int:cod_playlist>/append', methods=['POST'])
+def anexar_playlists(cod_playlist):
+    """Acrescenta ao fim da playlist as faixas de outras ({"playlists": [...]}).
+    
+    Faixas que a playlist já tem são ignoradas.
+    """
+    try:
+        origens = _ler_origens(request.get_json() or {}, 1)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+    def anexar(cursor):
+        if not _playlists_existem(cursor, list(dict.fromkeys([cod_playlist] + origens))):
+            return None
+        _inserir_combinacao(cursor, cod_playlist, origens, 'uniao')
+        return _linha_playlist(cursor, cod_playlist)
+    
+    try:
+        playlist = executar_transacao(anexar)
+        if playlist is None:
+            return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
+        _publicar_playlist('update', playlist)
+        _publicar_faixas_playlist(cod_playlist)
+        return jsonify(dict(playlist, success=True))
     except Exception as e:
-        conexao.rollback()
-        cursor.close()
-        conexao.close()
         return jsonify({'error': True, 'message': str(e)}), 400
 
 
@@ -122,10 +469,12 @@ def atualizar_playlist(cod_playlist):
             cursor.close()
             conexao.close()
             return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
+        playlist = _linha_playlist(cursor, cod_playlist)
         
         conexao.commit()
         cursor.close()
         conexao.close()
+        _publicar_playlist('update', playlist)
         return jsonify({'success': True, 'message': 'Playlist atualizada'})
     except Exception as e:
         conexao.rollback()
@@ -150,6 +499,7 @@ def deletar_playlist(cod_playlist):
         conexao.commit()
         cursor.close()
         conexao.close()
+        publicar('playlists', 'delete', {'cod_playlist': cod_playlist})
         return jsonify({'success': True, 'message': 'Playlist removida'})
     except Exception as e:
         conexao.rollback()
@@ -160,38 +510,110 @@ def deletar_playlist(cod_playlist):
 
 @playlists_bp.route('/<int:cod_playlist>/tracks', methods=['GET'])
 def listar_faixas_playlist(cod_playlist):
-    """Lista faixas de uma playlist."""
+    """Lista faixas de uma playlist (aceita ?fields=)."""
+    try:
+        campos = selecionar_campos(request.args.get('fields'), COLUNAS_FAIXA_PLAYLIST)
+    except CampoInvalido as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
     conexao = get_conexao()
     cursor = conexao.cursor()
-    cursor.execute("""
-        SELECT pf.ordem_reproducao, pf.cod_album, pf.numero_unidade, pf.numero_faixa,
-               f.descricao AS nome_faixa, a.nome AS nome_album, tc.descricao AS tipo_composicao,
-               f.tempo_execucao, pf.data_ultima_vez_tocada, pf.num_vezes_tocada
-        FROM PLAYLIST_FAIXA pf
-        JOIN FAIXA f ON pf.cod_album = f.cod_album 
-                    AND pf.numero_unidade = f.numero_unidade 
-                    AND pf.numero_faixa = f.numero_faixa
-        JOIN ALBUM a ON f.cod_album = a.cod_album
-        JOIN TIPO_COMPOSICAO tc ON f.cod_tipo_composicao = tc.cod_tipo_composicao
+    cursor.execute(montar_select("SELECT {colunas}" + JUNCAO_FAIXAS_PLAYLIST + """
         WHERE pf.cod_playlist = ?
         ORDER BY pf.ordem_reproducao
-    """, (cod_playlist,))
+    """, COLUNAS_FAIXA_PLAYLIST, campos), (cod_playlist,))
+    
+    faixas = []
+    row = cursor.fetchone()
+    while row:
+        faixas.append(linha_para_dict(row, COLUNAS_FAIXA_PLAYLIST, campos))
+        row = cursor.fetchone()
+    
+    cursor.close()
+    conexao.close()
+    return jsonify(faixas)
+
+
+@playlists_bp.route('/<int:cod_playlist>/tracks/at', methods=['GET'])
+def obter_faixa_no_tempo(cod_playlist):
+    """Retorna a faixa tocando no instante ?t= (segundos desde o início)."""
+    try:
+        instante = int(request.args['t'])
+    except (KeyError, ValueError):
+        return jsonify({'error': True, 'message': 'Informe ?t= em segundos'}), 400
+    
+    campos = tuple(COLUNAS_FAIXA_PLAYLIST)
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    cursor.execute(montar_select("SELECT {colunas}" + JUNCAO_FAIXAS_PLAYLIST + """
+        WHERE pf.cod_playlist = ? AND pf.tempo_inicio <= ?
+        ORDER BY pf.tempo_inicio DESC
+        OFFSET 0 ROWS FETCH NEXT 1 ROWS ONLY
+    """, COLUNAS_FAIXA_PLAYLIST, campos), (cod_playlist, instante))
+    
+    row = cursor.fetchone()
+    cursor.close()
+    conexao.close()
+    
+    faixa = linha_para_dict(row, COLUNAS_FAIXA_PLAYLIST, campos) if row else None
+    if instante < 0 or not faixa or instante >= faixa['tempo_inicio'] + faixa['tempo_execucao']:
+        return jsonify({'error': True, 'message': 'Instante fora da playlist'}), 404
+    
+    faixa['deslocamento'] = instante - faixa['tempo_inicio']
+    return jsonify(faixa)
+
+
+@playlists_bp.route('/<int:cod_playlist>/tracks/window', methods=['GET'])
+def listar_janela_faixas(cod_playlist):
+    """Lista ?n= faixas ao redor de uma posição (?ordem=) ou instante (?t=)."""
+    try:
+        quantidade = min(int(request.args.get('n', JANELA_FAIXAS_PADRAO)), JANELA_FAIXAS_MAXIMA)
+        ordem = request.args.get('ordem')
+        instante = request.args.get('t')
+        ordem = int(ordem) if ordem is not None else None
+        instante = int(instante) if instante is not None else None
+    except ValueError:
+        return jsonify({'error': True, 'message': 'Parâmetros inválidos'}), 400
+    if quantidade < 0:
+        # antes/depois saem de n e vão para TOP (?), que não aceita negativos
+        return jsonify({'error': True, 'message': 'n deve ser um inteiro não negativo'}), 400
+    if ordem is None and instante is None:
+        return jsonify({'error': True, 'message': 'Informe ?ordem= ou ?t='}), 400
+    
+    campos = tuple(COLUNAS_FAIXA_PLAYLIST)
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    
+    if ordem is None:
+        cursor.execute("""
+            SELECT TOP 1 ordem_reproducao FROM PLAYLIST_FAIXA
+            WHERE cod_playlist = ? AND tempo_inicio <= ?
+            ORDER BY tempo_inicio DESC
+        """, (cod_playlist, instante))
+        row = cursor.fetchone()
+        ordem = row[0] if row else 0
+    
+    antes = quantidade // 2
+    depois = quantidade - antes
+    cursor.execute(montar_select("""
+        SELECT * FROM (
+            SELECT TOP (?) {colunas}""" + JUNCAO_FAIXAS_PLAYLIST + """
+            WHERE pf.cod_playlist = ? AND pf.ordem_reproducao < ?
+            ORDER BY pf.ordem_reproducao DESC
+        ) AS anteriores
+        UNION ALL
+        SELECT * FROM (
+            SELECT TOP (?) {colunas}""" + JUNCAO_FAIXAS_PLAYLIST + """
+            WHERE pf.cod_playlist = ? AND pf.ordem_reproducao >= ?
+            ORDER BY pf.ordem_reproducao
+        ) AS seguintes
+        ORDER BY ordem_reproducao
+    """, COLUNAS_FAIXA_PLAYLIST, campos), (antes, cod_playlist, ordem, depois, cod_playlist, ordem))
     
     faixas = []
     row = cursor.fetchone()
     while row:
-        faixas.append({
-            'ordem_reproducao': row[0],
-            'cod_album': row[1],
-            'numero_unidade': row[2],
-            'numero_faixa': row[3],
-            'nome_faixa': row[4],
-            'nome_album': row[5],
-            'tipo_composicao': row[6],
-            'tempo_execucao': row[7],
-            'data_ultima_vez_tocada': str(row[8]) if row[8] else None,
-            'num_vezes_tocada': row[9]
-        })
+        faixas.append(linha_para_dict(row, COLUNAS_FAIXA_PLAYLIST, campos))
         row = cursor.fetchone()
     
     cursor.close()
@@ -203,29 +625,235 @@ def listar_faixas_playlist(cod_playlist):
 def adicionar_faixa_playlist(cod_playlist):
     """Adiciona uma faixa à playlist."""
     dados = request.get_json()
+
+    def inserir(cursor):
+        # Calcula a próxima posição e insere na mesma instrução; UPDLOCK/HOLDLOCK
+        # serializa inserções concorrentes na mesma playlist
+        cursor.execute("""
+            INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade, 
+                                       numero_faixa, ordem_reproducao, num_vezes_tocada)
+            SELECT ?, ?, ?, ?, ISNULL(MAX(ordem_reproducao), 0) + ?, 0
+            FROM PLAYLIST_FAIXA WITH (UPDLOCK, HOLDLOCK)
+            WHERE cod_playlist = ?
+        """, (cod_playlist, dados['cod_album'], dados['numero_unidade'], 
+              dados['numero_faixa'], INTERVALO_ORDEM, cod_playlist))
+        return _linha_playlist(cursor, cod_playlist)
+    
+    try:
+        playlist = executar_transacao(inserir)
+        chave = {'cod_playlist': cod_playlist, 'cod_album': dados['cod_album'],
+                 'numero_unidade': dados['numero_unidade'], 'numero_faixa': dados['numero_faixa']}
+        publicar('playlist_tracks', 'insert', chave, dict(chave))
+        _publicar_playlist('update', playlist)
+        return jsonify({'success': True, 'message': 'Faixa adicionada'}), 201
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+@playlists_bp.route('/<int:cod_playlist>/tracks/order', methods=['PUT'])
+def reordenar_faixas_playlist(cod_playlist):
+    """Reordena faixas da playlist.
+    
+    Aceita um movimento ({"faixa": {...}, "posicao": N}, com N a partir de 1)
+    ou a permutação completa ({"faixas": [{...}, ...]}).
+    """
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': True, 'message': 'Corpo da requisição deve ser um objeto JSON'}), 400
+    
+    if 'faixas' in dados:
+        return _aplicar_permutacao(cod_playlist, dados['faixas'])
+    if 'faixa' in dados and 'posicao' in dados:
+        try:
+            posicao = int(dados['posicao'])
+        except (TypeError, ValueError):
+            return jsonify({'error': True, 'message': 'posicao deve ser um inteiro'}), 400
+        return _mover_faixa(cod_playlist, dados['faixa'], posicao)
+    return jsonify({'error': True, 'message': 'Informe "faixas" ou "faixa" e "posicao"'}), 400
+
+
+def _renumerar_playlist(cursor, cod_playlist):
+    """Redistribui ordem_reproducao com o intervalo padrão (uma instrução)."""
+    cursor.execute("""
+        WITH renumeradas AS (
+            SELECT ordem_reproducao,
+                   ROW_NUMBER() OVER (ORDER BY ordem_reproducao) * ? AS nova_ordem
+            FROM PLAYLIST_FAIXA
+            WHERE cod_playlist = ?
+        )
+        UPDATE renumeradas SET ordem_reproducao = nova_ordem
+    """, (INTERVALO_ORDEM, cod_playlist))
+
+
+def _vizinhas(cursor, cod_playlist, ordem_atual, posicao):
+    """Retorna a ordem das faixas que ficarão antes e depois da posição.
+    
+    A faixa movida é desconsiderada. Posições além do fim levam ao final.
+    """
+    inicio = max(posicao - 2, 0)
+    quantidade = 2 if posicao >= 2 else 1
+    cursor.execute("""
+        SELECT ordem_reproducao
+        FROM PLAYLIST_FAIXA WITH (UPDLOCK, HOLDLOCK)
+        WHERE cod_playlist = ? AND ordem_reproducao <> ?
+        ORDER BY ordem_reproducao
+        OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    """, (cod_playlist, ordem_atual, inicio, quantidade))
+    ordens = [row[0] for row in cursor.fetchall()]
+    
+    if posicao < 2:
+        return 0, (ordens[0] if ordens else None)
+    if ordens:
+        return ordens[0], (ordens[1] if len(ordens) > 1 else None)
+    
+    cursor.execute("""
+        SELECT ISNULL(MAX(ordem_reproducao), 0) FROM PLAYLIST_FAIXA
+        WHERE cod_playlist = ? AND ordem_reproducao <> ?
+    """, (cod_playlist, ordem_atual))
+    return cursor.fetchone()[0], None
+
+
+def _mover_faixa(cod_playlist, faixa, posicao):
+    """Move uma faixa alterando apenas a sua linha (salvo renumeração)."""
+    if posicao < 1:
+        return jsonify({'error': True, 'message': 'posicao deve ser maior ou igual a 1'}), 400
+    chave_faixa = _chave_faixa(faixa)
+    if chave_faixa is None:
+        return jsonify({'error': True, 'message':
+                        'faixa deve ter cod_album, numero_unidade e numero_faixa inteiros'}), 400
+    
+    conexao = get_conexao()
+    cursor = conexao.cursor()
+    
+    try:
+        chave = (cod_playlist,) + chave_faixa
+        cursor.execute("""
+            SELECT ordem_reproducao FROM PLAYLIST_FAIXA WITH (UPDLOCK, HOLDLOCK)
+            WHERE cod_playlist = ? AND cod_album = ? 
+              AND numero_unidade = ? AND numero_faixa = ?
+        """, chave)
+        row = cursor.fetchone()
+        if not row:
+            conexao.rollback()
+            cursor.close()
+            conexao.close()
+            return jsonify({'error': True, 'message': 'Faixa não encontrada na playlist'}), 404
+        ordem_atual = row[0]
+        
+        anterior, seguinte = _vizinhas(cursor, cod_playlist, ordem_atual, posicao)
+        
+        rebalanceada = False
+        if seguinte is not None and seguinte - anterior < 2:
+            _renumerar_playlist(cursor, cod_playlist)
+            rebalanceada = True
+            cursor.execute("""
+                SELECT ordem_reproducao FROM PLAYLIST_FAIXA
+                WHERE cod_playlist = ? AND cod_album = ? 
+                  AND numero_unidade = ? AND numero_faixa = ?
+            """, chave)
+            ordem_atual = cursor.fetchone()[0]
+            anterior, seguinte = _vizinhas(cursor, cod_playlist, ordem_atual, posicao)
+        
+        if seguinte is None:
+            nova_ordem = anterior + INTERVALO_ORDEM
+        else:
+            nova_ordem = (anterior + seguinte) // 2
+        
+        if anterior < ordem_atual and (seguinte is None or ordem_atual < seguinte):
+            # Já está na posição pedida
+            nova_ordem = ordem_atual
+        else:
+            cursor.execute("""
+                UPDATE PLAYLIST_FAIXA SET ordem_reproducao = ?
+                WHERE cod_playlist = ? AND cod_album = ? 
+                  AND numero_unidade = ? AND numero_faixa = ?
+            """, (nova_ordem,) + chave)
+        
+        conexao.commit()
+        cursor.close()
+        conexao.close()
+        if nova_ordem != ordem_atual or rebalanceada:
+            _publicar_faixas_playlist(cod_playlist)
+        return jsonify({'success': True, 'message': 'Faixa movida',
+                        'ordem_reproducao': nova_ordem, 'rebalanceada': rebalanceada})
+    except Exception as e:
+        conexao.rollback()
+        cursor.close()
+        conexao.close()
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+
+def _chave_faixa(faixa):
+    """(cod_album, numero_unidade, numero_faixa) da faixa, ou None se malformada."""
+    if not isinstance(faixa, dict):
+        return None
+    chave = tuple(faixa.get(campo) for campo in ('cod_album', 'numero_unidade', 'numero_faixa'))
+    if not all(isinstance(valor, int) for valor in chave):
+        return None
+    return chave
+
+
+def _aplicar_permutacao(cod_playlist, faixas):
+    """Aplica a nova ordem completa da playlist em uma única instrução."""
+    if not isinstance(faixas, list):
+        return jsonify({'error': True, 'message': 'faixas deve ser uma lista'}), 400
+    chaves = [_chave_faixa(f) for f in faixas]
+    if None in chaves:
+        return jsonify({'error': True, 'message':
+                        'Cada faixa deve ter cod_album, numero_unidade e numero_faixa inteiros'}), 400
+    if len(set(chaves)) != len(chaves):
+        return jsonify({'error': True, 'message': 'Faixa repetida na nova ordem'}), 400
+    
+    nova_ordem = json.dumps([
+        {'cod_album': c[0], 'numero_unidade': c[1], 'numero_faixa': c[2], 'posicao': i}
+        for i, c in enumerate(chaves, start=1)
+    ])
     
     conexao = get_conexao()
     cursor = conexao.cursor()
     
     try:
         cursor.execute("""
-            SELECT ISNULL(MAX(ordem_reproducao), 0) + 1 
-            FROM PLAYLIST_FAIXA WHERE cod_playlist = ?
+            SELECT qtd_faixas FROM PLAYLIST WITH (UPDLOCK, HOLDLOCK)
+            WHERE cod_playlist = ?
         """, (cod_playlist,))
-        proxima_ordem = cursor.fetchone()[0]
+        row = cursor.fetchone()
+        if not row:
+            conexao.rollback()
+            cursor.close()
+            conexao.close()
+            return jsonify({'error': True, 'message': 'Playlist não encontrada'}), 404
+        
+        if row[0] != len(chaves):
+            conexao.rollback()
+            cursor.close()
+            conexao.close()
+            return jsonify({'error': True, 'message': 'A nova ordem deve conter todas as faixas da playlist'}), 400
         
         cursor.execute("""
-            INSERT INTO PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade, 
-                                       numero_faixa, ordem_reproducao, num_vezes_tocada)
-            VALUES (?, ?, ?, ?, ?, 0)
-        """, (cod_playlist, dados['cod_album'], dados['numero_unidade'], 
-              dados['numero_faixa'], proxima_ordem))
+            UPDATE pf
+            SET ordem_reproducao = nova.posicao * ?
+            FROM PLAYLIST_FAIXA pf
+            JOIN OPENJSON(?) WITH (
+                cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, posicao INT
+            ) AS nova
+              ON pf.cod_album = nova.cod_album
+             AND pf.numero_unidade = nova.numero_unidade
+             AND pf.numero_faixa = nova.numero_faixa
+            WHERE pf.cod_playlist = ?
+        """, (INTERVALO_ORDEM, nova_ordem, cod_playlist))
+        
+        if cursor.rowcount != len(chaves):
+            conexao.rollback()
+            cursor.close()
+            conexao.close()
+            return jsonify({'error': True, 'message': 'Faixa não encontrada na playlist'}), 400
         
         conexao.commit()
         cursor.close()
         conexao.close()
-        
-        return jsonify({'success': True, 'message': 'Faixa adicionada'}), 201
+        _publicar_faixas_playlist(cod_playlist)
+        return jsonify({'success': True, 'message': 'Ordem atualizada'})
     except Exception as e:
         conexao.rollback()
         cursor.close()
@@ -250,10 +878,14 @@ def remover_faixa_playlist(cod_playlist, cod_album, numero_unidade, numero_faixa
             cursor.close()
             conexao.close()
             return jsonify({'error': True, 'message': 'Faixa não encontrada na playlist'}), 404
+        playlist = _linha_playlist(cursor, cod_playlist)
         
         conexao.commit()
         cursor.close()
         conexao.close()
+        publicar('playlist_tracks', 'delete', {'cod_playlist': cod_playlist, 'cod_album': cod_album,
+                                               'numero_unidade': numero_unidade, 'numero_faixa': numero_faixa})
+        _publicar_playlist('update', playlist)
         return jsonify({'success': True, 'message': 'Faixa removida da playlist'})
     except Exception as e:
         conexao.rollback()
@@ -264,14 +896,20 @@ def remover_faixa_playlist(cod_playlist, cod_album, numero_unidade, numero_faixa
 
 @playlists_bp.route('/<int:cod_playlist>/tracks/<int:cod_album>/<int:numero_unidade>/<int:numero_faixa>/playback', methods=['POST'])
 def registrar_reproducao(cod_playlist, cod_album, numero_unidade, numero_faixa):
-    """Registra reprodução de uma faixa."""
+    """Registra reprodução de uma faixa.
+    
+    Só grava o evento no histórico (se a faixa está na playlist). Contadores
+    e rollups são consolidados em lote (services/maintenance.py), que publica
+    a alteração da faixa da playlist.
+    """
     conexao = get_conexao()
     cursor = conexao.cursor()
     
     try:
         cursor.execute("""
-            UPDATE PLAYLIST_FAIXA
-            SET data_ultima_vez_tocada = GETDATE(), num_vezes_tocada = num_vezes_tocada + 1
+            INSERT INTO HISTORICO_REPRODUCAO (cod_playlist, cod_album, numero_unidade, numero_faixa)
+            SELECT cod_playlist, cod_album, numero_unidade, numero_faixa
+            FROM PLAYLIST_FAIXA
             WHERE cod_playlist = ? AND cod_album = ? 
               AND numero_unidade = ? AND numero_faixa = ?
         """, (cod_playlist, cod_album, numero_unidade, numero_faixa))
@@ -4,9 +4,11 @@
 from flask import jsonify
 from routes import queries_bp
 from config.database import get_conexao
+from utils.coalescing import coalescer
 
 
 @queries_bp.route('/albums-above-average', methods=['GET'])
+@coalescer()
 def consulta_albuns_acima_media():
     """Requisito iii.a: Álbuns com preço acima da média."""
     conexao = get_conexao()
@@ -35,6 +37,7 @@ def consulta_albuns_acima_media():
 
 
 @queries_bp.route('/label-most-dvorak-playlists', methods=['GET'])
+@coalescer()
 def consulta_gravadora_dvorak():
     """Requisito iii.b: Gravadora com mais playlists com faixas de Dvorak."""
     conexao = get_conexao()
@@ -56,6 +59,7 @@ def consulta_gravadora_dvorak():
 
 
 @queries_bp.route('/composer-most-playlist-tracks', methods=['GET'])
+@coalescer()
 def consulta_compositor_mais_faixas():
     """Requisito iii.c: Compositor com mais faixas em playlists."""
     conexao = get_conexao()
@@ -77,6 +81,7 @@ def consulta_compositor_mais_faixas():
 
 
 @queries_bp.route('/playlists-concerto-barroco', methods=['GET'])
+@coalescer()
 def consulta_playlists_concerto_barroco():
     """Requisito iii.d: Playlists com todas faixas Concerto e Barroco."""
     conexao = get_conexao()
@@ -100,6 +105,7 @@ def consulta_playlists_concerto_barroco():
 
 
 @queries_bp.route('/ddd-average', methods=['GET'])
+@coalescer()
 def obter_media_ddd():
     """Retorna a média de preço dos álbuns com faixas DDD."""
     conexao = get_conexao()
@@ -0,0 +1,19 @@
+# backend/routes/stats.py
+# Rotas para Estatísticas do Acervo (retrato colunar em services/stats.py)
+
+from flask import request, jsonify
+from routes import stats_bp
+from services.stats import obter_estatisticas, LIMITE_GRUPOS
+
+LIMITE_MAXIMO = 500
+
+
+@stats_bp.route('', methods=['GET'])
+def obter_estatisticas_acervo():
+    """Tempo por período/compositor/gravadora/mídia, preços, gravação e reproduções (?limite=)."""
+    try:
+        limite = max(1, min(int(request.args.get('limite', LIMITE_GRUPOS)), LIMITE_MAXIMO))
+    except ValueError:
+        return jsonify({'error': True, 'message': 'limite deve ser um inteiro'}), 400
+    
+    return jsonify(obter_estatisticas(limite))
@@ -4,12 +4,94 @@
 from flask import request, jsonify
 from routes import tracks_bp
 from config.database import get_conexao
+from utils.transactions import executar_transacao
+from utils.associations import sincronizar, FAIXA_COMPOSITOR, FAIXA_INTERPRETE
+from utils.events import publicar
+from utils.statements import registrar, executar_lote
+from services.track_index import indice_faixas, FACETAS, FACETAS_SIMPLES
+from services.validation import (validar_faixas, validar_atualizacao_faixa, recusas,
+                                 resposta_dry_run, resposta_recusa)
+from services.track_import import inserir_faixas, publicar_albuns
+
+LIMITE_FILTRO_PADRAO = 50
+LIMITE_FILTRO_MAXIMO = 500
+LIMITE_LOTE = 1000
+
+# Campos do corpo de POST/PUT repassados no evento de alteração da faixa
+CAMPOS_EVENTO_FAIXA = ('descricao', 'cod_tipo_composicao', 'tempo_execucao', 'tipo_gravacao',
+                       'compositores', 'interpretes', 'compositores_adicionados',
+                       'interpretes_adicionados')
+
+registrar('faixas.inserir_compositor', """
+    INSERT INTO FAIXA_COMPOSITOR (cod_album, numero_unidade, numero_faixa, cod_compositor)
+    VALUES (?, ?, ?, ?)
+""", parametros=(('cod_album', 'INT'), ('numero_unidade', 'TINYINT'), ('numero_faixa', 'TINYINT'),
+                   ('cod_compositor', 'INT')), lote=True)
+registrar('faixas.inserir_interprete', """
+    INSERT INTO FAIXA_INTERPRETE (cod_album, numero_unidade, numero_faixa, cod_interprete)
+    VALUES (?, ?, ?, ?)
+""", parametros=(('cod_album', 'INT'), ('numero_unidade', 'TINYINT'), ('numero_faixa', 'TINYINT'),
+                   ('cod_interprete', 'INT')), lote=True)
+
+
+def _publicar_faixa(acao, cod_album, numero_unidade, numero_faixa, dados=None):
+    """Publica a alteração da faixa com os valores gravados (None em delete)."""
+    chave = {'cod_album': cod_album, 'numero_unidade': numero_unidade, 'numero_faixa': numero_faixa}
+    linha = None if dados is None else dict(chave, **{c: dados[c] for c in CAMPOS_EVENTO_FAIXA if c in dados})
+    publicar('tracks', acao, chave, linha)
+
+
+def _dry_run():
+    """?dry_run=1: só valida as regras do banco, sem gravar."""
+    return request.args.get('dry_run', '').lower() in ('1', 'true')
+
+
+def _lista_parametro(nome, inteiro):
+    """Lê um parâmetro com valores separados por vírgula."""
+    valores = [v.strip() for v in request.args.get(nome, '').split(',') if v.strip()]
+    return [int(v) for v in valores] if inteiro else valores
+
+
+@tracks_bp.route('/filter', methods=['GET'])
+def filtrar_faixas():
+    """Filtra faixas por facetas e retorna as contagens de cada faceta.
+    
+    Facetas (valores separados por vírgula): tipo_midia, tipo_gravacao,
+    tipo_composicao, periodo, compositor, interprete. Também aceita
+    duracao_min/duracao_max (segundos), facetas=, limite= e offset=.
+    """
+    try:
+        filtros = {
+            faceta: _lista_parametro(faceta, not FACETAS_SIMPLES.get(faceta, False))
+            for faceta in FACETAS
+        }
+        facetas = _lista_parametro('facetas', False) or list(FACETAS)
+        invalidas = sorted(set(facetas).difference(FACETAS))
+        if invalidas:
+            raise ValueError('Facetas inválidas: ' + ', '.join(invalidas))
+        duracao_min = request.args.get('duracao_min', type=int)
+        duracao_max = request.args.get('duracao_max', type=int)
+        limite = min(int(request.args.get('limite', LIMITE_FILTRO_PADRAO)), LIMITE_FILTRO_MAXIMO)
+        deslocamento = max(int(request.args.get('offset', 0)), 0)
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    return jsonify(indice_faixas.filtrar(filtros, duracao_min, duracao_max, facetas,
+                                         limite, deslocamento))
 
 
 @tracks_bp.route('', methods=['POST'])
 def criar_faixa():
-    """Cria uma nova faixa."""
-    dados = request.get_json()
+    """Cria uma nova faixa (?dry_run=1 só valida)."""
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': True, 'message': 'Corpo da requisição deve ser um objeto JSON'}), 400
+    violacoes = validar_faixas([dados])
+    if _dry_run():
+        return jsonify(resposta_dry_run(violacoes))
+    violacoes = recusas(violacoes)
+    if violacoes:
+        return jsonify(resposta_recusa(violacoes)), 400
     
     conexao = get_conexao()
     cursor = conexao.cursor()
@@ -29,24 +111,18 @@ def criar_faixa():
             dados.get('tipo_gravacao')
         ))
         
-        # Associar compositores
-        for cod_compositor in dados.get('compositores', []):
-            cursor.execute("""
-                INSERT INTO FAIXA_COMPOSITOR (cod_album, numero_unidade, numero_faixa, cod_compositor)
-                VALUES (?, ?, ?, ?)
-            """, (dados['cod_album'], dados['numero_unidade'], dados['numero_faixa'], cod_compositor))
-        
-        # Associar intérpretes
-        for cod_interprete in dados.get('interpretes', []):
-            cursor.execute("""
-                INSERT INTO FAIXA_INTERPRETE (cod_album, numero_unidade, numero_faixa, cod_interprete)
-                VALUES (?, ?, ?, ?)
-            """, (dados['cod_album'], dados['numero_unidade'], dados['numero_faixa'], cod_interprete))
+        # Associar compositores e intérpretes
+        chave = (dados['cod_album'], dados['numero_unidade'], dados['numero_faixa'])
+        executar_lote(cursor, 'faixas.inserir_compositor',
+                      [(*chave, cod) for cod in dados.get('compositores', [])])
+        executar_lote(cursor, 'faixas.inserir_interprete',
+                      [(*chave, cod) for cod in dados.get('interpretes', [])])
         
         conexao.commit()
         cursor.close()
         conexao.close()
         
+        _publicar_faixa('insert', dados['cod_album'], dados['numero_unidade'], dados['numero_faixa'], dados)
         return jsonify({'success': True, 'message': 'Faixa criada'}), 201
     except Exception as e:
         conexao.rollback()
@@ -55,15 +131,56 @@ def criar_faixa():
         return jsonify({'error': True, 'message': str(e)}), 400
 
 
-@tracks_bp.route('/<int:cod_album>/<int:numero_unidade>/<int:numero_faixa>', methods=['PUT'])
-def atualizar_faixa(cod_album, numero_unidade, numero_faixa):
-    """Atualiza uma faixa."""
-    dados = request.get_json()
+@tracks_bp.route('/batch', methods=['POST'])
+def criar_faixas_lote():
+    """Cria várias faixas numa transação (?dry_run=1 só valida).
     
-    conexao = get_conexao()
-    cursor = conexao.cursor()
+    Corpo: {"faixas": [...]}, cada faixa como em POST /api/tracks. Todas as
+    violações das regras do banco voltam de uma vez; com alguma, nada é gravado.
+    """
+    dados = request.get_json(silent=True) or {}
+    faixas = dados.get('faixas')
+    if not isinstance(faixas, list) or not faixas or not all(isinstance(f, dict) for f in faixas):
+        return jsonify({'error': True, 'message': 'Informe a lista de faixas'}), 400
+    if len(faixas) > LIMITE_LOTE:
+        return jsonify({'error': True, 'message': f'Máximo de {LIMITE_LOTE} faixas por lote'}), 400
+    
+    violacoes = validar_faixas(faixas)
+    if _dry_run():
+        return jsonify(resposta_dry_run(violacoes))
+    violacoes = recusas(violacoes)
+    if violacoes:
+        return jsonify(resposta_recusa(violacoes)), 400
     
     try:
+        qtd_faixas = executar_transacao(lambda cursor: inserir_faixas(cursor, faixas))
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    
+    publicar_albuns(qtd_faixas)
+    return jsonify({'success': True, 'qtd_faixas': len(faixas)}), 201
+
+
+@tracks_bp.route('/<int:cod_album>/<int:numero_unidade>/<int:numero_faixa>', methods=['PUT'])
+def atualizar_faixa(cod_album, numero_unidade, numero_faixa):
+    """Atualiza uma faixa (?dry_run=1 só valida)."""
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'error': True, 'message': 'Corpo da requisição deve ser um objeto JSON'}), 400
+    try:
+        violacoes = validar_atualizacao_faixa((cod_album, numero_unidade, numero_faixa), dados)
+    except LookupError as e:
+        if _dry_run():
+            return jsonify({'error': True, 'message': str(e)}), 404
+        # O índice deste processo pode não ter a faixa ainda: o UPDATE decide
+        violacoes = []
+    if _dry_run():
+        return jsonify(resposta_dry_run(violacoes))
+    violacoes = recusas(violacoes)
+    if violacoes:
+        return jsonify(resposta_recusa(violacoes)), 400
+
+    def atualizar(cursor):
         cursor.execute("""
             UPDATE FAIXA
             SET descricao = ?, cod_tipo_composicao = ?, tempo_execucao = ?, tipo_gravacao = ?
@@ -77,42 +194,22 @@ def atualizar_faixa(cod_album, numero_unidade, numero_faixa):
         ))
         
         if cursor.rowcount == 0:
-            cursor.close()
-            conexao.close()
-            return jsonify({'error': True, 'message': 'Faixa não encontrada'}), 404
+            return False
         
-        # Atualizar compositores se fornecidos
+        # Compositores e intérpretes, se fornecidos: só a diferença é gravada
+        chave = (cod_album, numero_unidade, numero_faixa)
         if 'compositores' in dados:
-            cursor.execute("""
-                DELETE FROM FAIXA_COMPOSITOR 
-                WHERE cod_album = ? AND numero_unidade = ? AND numero_faixa = ?
-            """, (cod_album, numero_unidade, numero_faixa))
-            for cod_compositor in dados['compositores']:
-                cursor.execute("""
-                    INSERT INTO FAIXA_COMPOSITOR (cod_album, numero_unidade, numero_faixa, cod_compositor)
-                    VALUES (?, ?, ?, ?)
-                """, (cod_album, numero_unidade, numero_faixa, cod_compositor))
-        
-        # Atualizar intérpretes se fornecidos
+            sincronizar(cursor, FAIXA_COMPOSITOR, chave, [int(c) for c in dados['compositores']])
         if 'interpretes' in dados:
-            cursor.execute("""
-                DELETE FROM FAIXA_INTERPRETE 
-                WHERE cod_album = ? AND numero_unidade = ? AND numero_faixa = ?
-            """, (cod_album, numero_unidade, numero_faixa))
-            for cod_interprete in dados['interpretes']:
-                cursor.execute("""
-                    INSERT INTO FAIXA_INTERPRETE (cod_album, numero_unidade, numero_faixa, cod_interprete)
-                    VALUES (?, ?, ?, ?)
-                """, (cod_album, numero_unidade, numero_faixa, cod_interprete))
-        
-        conexao.commit()
-        cursor.close()
-        conexao.close()
+            sincronizar(cursor, FAIXA_INTERPRETE, chave, [int(i) for i in dados['interpretes']])
+        return True
+    
+    try:
+        if not executar_transacao(atualizar):
+            return jsonify({'error': True, 'message': 'Faixa não encontrada'}), 404
+        _publicar_faixa('update', cod_album, numero_unidade, numero_faixa, dados)
         return jsonify({'success': True, 'message': 'Faixa atualizada'})
     except Exception as e:
-        conexao.rollback()
-        cursor.close()
-        conexao.close()
         return jsonify({'error': True, 'message': str(e)}), 400
 
 
@@ -136,6 +233,7 @@ def deletar_faixa(cod_album, numero_unidade, numero_faixa):
         conexao.commit()
         cursor.close()
         conexao.close()
+        _publicar_faixa('delete', cod_album, numero_unidade, numero_faixa)
         return jsonify({'success': True, 'message': 'Faixa removida'})
     except Exception as e:
         conexao.rollback()
@@ -161,6 +259,8 @@ def associar_compositor_faixa(cod_album, numero_unidade, numero_faixa):
         conexao.commit()
         cursor.close()
         conexao.close()
+        _publicar_faixa('update', cod_album, numero_unidade, numero_faixa,
+                        {'compositores_adicionados': [dados['cod_compositor']]})
         return jsonify({'success': True, 'message': 'Compositor associado'}), 201
     except Exception as e:
         conexao.rollback()
@@ -186,6 +286,8 @@ def associar_interprete_faixa(cod_album, numero_unidade, numero_faixa):
         conexao.commit()
         cursor.close()
         conexao.close()
+        _publicar_faixa('update', cod_album, numero_unidade, numero_faixa,
+                        {'interpretes_adicionados': [dados['cod_interprete']]})
         return jsonify({'success': True, 'message': 'Intérprete associado'}), 201
     except Exception as e:
         conexao.rollback()
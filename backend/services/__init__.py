@@ -0,0 +1,2 @@
+# backend/services/__init__.py
+# Serviços de domínio em memória usados pelas rotas (índices, estatísticas)
@@ -0,0 +1,305 @@
+# backend/services/maintenance.py
+# Tarefas de manutenção executadas em segundo plano (POST /api/jobs)
+#
+# Os triggers mantêm os valores derivados por variação; estas tarefas os
+# recalculam do zero (após carga direta no banco, trigger desabilitado etc.).
+# Trabalham em faixas de chaves, uma transação curta por faixa, para não
+# segurar bloqueios nas tabelas de playlists por muito tempo.
+#
+# Reproduções: registrar uma reprodução só insere o evento no histórico. Os
+# rollups por minuto e por dia e os contadores de PLAYLIST_FAIXA
+# (num_vezes_tocada, data_ultima_vez_tocada) são somados em lote por
+# consolidar_reproducoes, periódica no executor de tarefas, a partir de
+# CONSOLIDACAO_REPRODUCAO.consolidado_ate. Assim a linha quente de
+# PLAYLIST_FAIXA e os MERGE nos rollups saem do caminho da reprodução, e uma
+# faixa tocada mil vezes no intervalo custa uma atualização. Só entram eventos
+# com mais de MARGEM_CONSOLIDACAO segundos, lidos com READCOMMITTEDLOCK: uma
+# inserção ainda não confirmada dentro do intervalo é esperada, não pulada.
+# Os números ficam até INTERVALO_CONSOLIDACAO + MARGEM_CONSOLIDACAO segundos
+# atrasados (mais, se nenhum processo roda o executor).
+
+from datetime import date, timedelta
+
+from config.database import get_conexao
+from utils.events import publicar
+from utils.fields import como_texto
+from utils.jobs import periodica, tarefa
+from utils.transactions import executar_transacao
+
+LOTE_PLAYLISTS = 500
+INTERVALO_CONSOLIDACAO = 10   # segundos entre consolidações das reproduções
+MARGEM_CONSOLIDACAO = 5       # idade mínima, em segundos, de um evento consolidado
+JANELA_CONSOLIDACAO = timedelta(hours=1)   # histórico somado por transação
+
+# Totais calculados das playlists de uma faixa de cod_playlist (também usados
+# por tools/check_consistency.py)
+CTE_TOTAIS_PLAYLISTS = """
+    WITH total AS (
+        SELECT play.cod_playlist,
+               ISNULL(SUM(fax.tempo_execucao), 0) AS tempo_total,
+               COUNT(fax.cod_album) AS faixas,
+               COUNT(DISTINCT fax.cod_album) AS albuns
+        FROM dbo.PLAYLIST play
+        LEFT JOIN dbo.PLAYLIST_FAIXA pf ON pf.cod_playlist = play.cod_playlist
+        LEFT JOIN dbo.FAIXA fax
+            ON pf.cod_album = fax.cod_album
+            AND pf.numero_unidade = fax.numero_unidade
+            AND pf.numero_faixa = fax.numero_faixa
+        WHERE play.cod_playlist BETWEEN ? AND ?
+        GROUP BY play.cod_playlist
+    )
+"""
+SQL_RECALCULAR_PLAYLISTS = CTE_TOTAIS_PLAYLISTS + """
+    UPDATE play
+    SET tempo_total_execucao = total.tempo_total,
+        qtd_faixas = total.faixas,
+        qtd_albuns = total.albuns
+    FROM dbo.PLAYLIST play
+    JOIN total ON play.cod_playlist = total.cod_playlist
+    WHERE play.tempo_total_execucao <> total.tempo_total
+       OR play.qtd_faixas <> total.faixas
+       OR play.qtd_albuns <> total.albuns
+"""
+CTE_TEMPO_INICIO = """
+    WITH recalculo AS (
+        SELECT pf.cod_playlist, pf.cod_album, pf.numero_unidade, pf.numero_faixa,
+               SUM(fax.tempo_execucao) OVER (PARTITION BY pf.cod_playlist
+                                             ORDER BY pf.ordem_reproducao
+                                             ROWS UNBOUNDED PRECEDING)
+             - fax.tempo_execucao AS novo_tempo_inicio
+        FROM dbo.PLAYLIST_FAIXA pf
+        JOIN dbo.FAIXA fax
+            ON pf.cod_album = fax.cod_album
+            AND pf.numero_unidade = fax.numero_unidade
+            AND pf.numero_faixa = fax.numero_faixa
+        WHERE pf.cod_playlist BETWEEN ? AND ?
+    )
+"""
+SQL_RECALCULAR_TEMPO_INICIO = CTE_TEMPO_INICIO + """
+    UPDATE pf
+    SET tempo_inicio = rec.novo_tempo_inicio
+    FROM dbo.PLAYLIST_FAIXA pf
+    JOIN recalculo rec
+        ON pf.cod_playlist = rec.cod_playlist
+        AND pf.cod_album = rec.cod_album
+        AND pf.numero_unidade = rec.numero_unidade
+        AND pf.numero_faixa = rec.numero_faixa
+    WHERE pf.tempo_inicio <> rec.novo_tempo_inicio
+"""
+
+# Minuto do evento (chave de REPRODUCAO_MINUTO)
+MINUTO = ("DATEADD(MINUTE, DATEDIFF(MINUTE, '2000-01-01', data_reproducao), "
+          "CAST('2000-01-01' AS DATETIME2(0)))")
+
+# Limite já consolidado e o novo corte. A trava na linha serializa as
+# consolidações (e as reconstruções); com READPAST, quem a encontra travada
+# não recebe linha e desiste até o próximo intervalo.
+SQL_LIMITE_CONSOLIDACAO = """
+    SELECT consolidado_ate, DATEADD(SECOND, -?, CAST(SYSDATETIME() AS DATETIME2(0)))
+    FROM dbo.CONSOLIDACAO_REPRODUCAO WITH (UPDLOCK, READPAST)
+"""
+SQL_PRIMEIRO_EVENTO = """
+    SELECT MIN(data_reproducao) FROM dbo.HISTORICO_REPRODUCAO WITH (READCOMMITTEDLOCK)
+    WHERE data_reproducao >= ? AND data_reproducao < ?
+"""
+# Parâmetros: início e fim da fatia em cada consulta ao histórico, e o novo limite
+SQL_CONSOLIDAR_FATIA = f"""
+    SET NOCOUNT ON;
+    
+    MERGE dbo.REPRODUCAO_MINUTO WITH (HOLDLOCK) AS alvo
+    USING (
+        SELECT {MINUTO} AS minuto, cod_album, numero_unidade, numero_faixa, COUNT(*) AS qtd
+        FROM dbo.HISTORICO_REPRODUCAO WITH (READCOMMITTEDLOCK)
+        WHERE data_reproducao >= ? AND data_reproducao < ?
+        GROUP BY {MINUTO}, cod_album, numero_unidade, numero_faixa
+    ) AS novo
+    ON alvo.minuto = novo.minuto
+       AND alvo.cod_album = novo.cod_album
+       AND alvo.numero_unidade = novo.numero_unidade
+       AND alvo.numero_faixa = novo.numero_faixa
+    WHEN MATCHED THEN
+        UPDATE SET qtd_reproducoes = alvo.qtd_reproducoes + novo.qtd
+    WHEN NOT MATCHED THEN
+        INSERT (minuto, cod_album, numero_unidade, numero_faixa, qtd_reproducoes)
+        VALUES (novo.minuto, novo.cod_album, novo.numero_unidade, novo.numero_faixa, novo.qtd);
+    
+    MERGE dbo.REPRODUCAO_DIA WITH (HOLDLOCK) AS alvo
+    USING (
+        SELECT CAST(data_reproducao AS DATE) AS dia, cod_album, numero_unidade, numero_faixa,
+               COUNT(*) AS qtd
+        FROM dbo.HISTORICO_REPRODUCAO WITH (READCOMMITTEDLOCK)
+        WHERE data_reproducao >= ? AND data_reproducao < ?
+        GROUP BY CAST(data_reproducao AS DATE), cod_album, numero_unidade, numero_faixa
+    ) AS novo
+    ON alvo.dia = novo.dia
+       AND alvo.cod_album = novo.cod_album
+       AND alvo.numero_unidade = novo.numero_unidade
+       AND alvo.numero_faixa = novo.numero_faixa
+    WHEN MATCHED THEN
+        UPDATE SET qtd_reproducoes = alvo.qtd_reproducoes + novo.qtd
+    WHEN NOT MATCHED THEN
+        INSERT (dia, cod_album, numero_unidade, numero_faixa, qtd_reproducoes)
+        VALUES (novo.dia, novo.cod_album, novo.numero_unidade, novo.numero_faixa, novo.qtd);
+    
+    -- PLAYLIST_FAIXA tem triggers: OUTPUT só com INTO
+    DECLARE @alteradas TABLE (cod_playlist INT, cod_album INT, numero_unidade TINYINT,
+                              numero_faixa TINYINT, num_vezes_tocada INT, data_ultima_vez_tocada DATETIME);
+    UPDATE pf
+    SET num_vezes_tocada = pf.num_vezes_tocada + ev.qtd,
+        data_ultima_vez_tocada = CASE WHEN pf.data_ultima_vez_tocada >= ev.ultima
+                                      THEN pf.data_ultima_vez_tocada ELSE ev.ultima END
+    OUTPUT inserted.cod_playlist, inserted.cod_album, inserted.numero_unidade, inserted.numero_faixa,
+           inserted.num_vezes_tocada, inserted.data_ultima_vez_tocada INTO @alteradas
+    FROM dbo.PLAYLIST_FAIXA pf
+    JOIN (
+        SELECT cod_playlist, cod_album, numero_unidade, numero_faixa,
+               COUNT(*) AS qtd, MAX(data_reproducao) AS ultima
+        FROM dbo.HISTORICO_REPRODUCAO WITH (READCOMMITTEDLOCK)
+        WHERE data_reproducao >= ? AND data_reproducao < ? AND cod_playlist IS NOT NULL
+        GROUP BY cod_playlist, cod_album, numero_unidade, numero_faixa
+    ) AS ev
+        ON pf.cod_playlist = ev.cod_playlist
+        AND pf.cod_album = ev.cod_album
+        AND pf.numero_unidade = ev.numero_unidade
+        AND pf.numero_faixa = ev.numero_faixa;
+    
+    UPDATE dbo.CONSOLIDACAO_REPRODUCAO SET consolidado_ate = ?;
+    
+    SELECT cod_playlist, cod_album, numero_unidade, numero_faixa, num_vezes_tocada, data_ultima_vez_tocada
+    FROM @alteradas;
+"""
+SQL_DIAS_REPRODUCAO = """
+    SELECT dia FROM (
+        SELECT DISTINCT CAST(data_reproducao AS DATE) AS dia FROM dbo.HISTORICO_REPRODUCAO
+        UNION
+        SELECT dia FROM dbo.REPRODUCAO_DIA
+    ) AS dias
+    WHERE (? IS NULL OR dia >= ?) AND (? IS NULL OR dia <= ?)
+    ORDER BY dia
+"""
+
+
+def _consultar(sql, parametros=()):
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+@tarefa('recalcular_tempos_playlists')
+def recalcular_tempos_playlists(contexto, lote=LOTE_PLAYLISTS):
+    """Recalcula tempo total, contadores e tempo_inicio de todas as playlists.
+    
+    Retorna quantas playlists e posições estavam divergentes e foram corrigidas.
+    """
+    minimo, maximo = _consultar("SELECT MIN(cod_playlist), MAX(cod_playlist) FROM dbo.PLAYLIST")[0]
+    playlists = posicoes = 0
+    if minimo is None:
+        return {'playlists_corrigidas': 0, 'posicoes_corrigidas': 0}
+    
+    for inicio in range(minimo, maximo + 1, lote):
+        contexto.progresso((inicio - minimo) / (maximo - minimo + 1),
+                           f'Playlists {inicio} a {min(inicio + lote - 1, maximo)}')
+
+        def recalcular(cursor):
+            cursor.execute(SQL_RECALCULAR_PLAYLISTS, (inicio, inicio + lote - 1))
+            corrigidas = cursor.rowcount
+            cursor.execute(SQL_RECALCULAR_TEMPO_INICIO, (inicio, inicio + lote - 1))
+            return corrigidas, cursor.rowcount
+        
+        corrigidas, movidas = executar_transacao(recalcular)
+        playlists += corrigidas
+        posicoes += movidas
+    return {'playlists_corrigidas': playlists, 'posicoes_corrigidas': posicoes}
+
+
+def _consolidar_fatia(cursor):
+    """Soma nos rollups e contadores a próxima fatia do histórico.
+    
+    Retorna (há mais a consolidar, linhas de PLAYLIST_FAIXA alteradas), ou
+    None se não há o que fazer ou outro processo está consolidando.
+    """
+    cursor.execute(SQL_LIMITE_CONSOLIDACAO, (MARGEM_CONSOLIDACAO,))
+    row = cursor.fetchone()
+    if row is None or row[0] >= row[1]:
+        return None
+    consolidado_ate, corte = row
+    
+    # Pula de uma vez os intervalos sem reprodução
+    cursor.execute(SQL_PRIMEIRO_EVENTO, (consolidado_ate, corte))
+    inicio = cursor.fetchone()[0]
+    if inicio is None:
+        cursor.execute("UPDATE dbo.CONSOLIDACAO_REPRODUCAO SET consolidado_ate = ?", (corte,))
+        return False, []
+    
+    fim = min(corte, inicio + JANELA_CONSOLIDACAO)
+    cursor.execute(SQL_CONSOLIDAR_FATIA, (inicio, fim) * 3 + (fim,))
+    alteradas = [tuple(row) for row in cursor.fetchall()]
+    return fim < corte, alteradas
+
+
+@periodica('consolidar_reproducoes', INTERVALO_CONSOLIDACAO)
+def consolidar_reproducoes():
+    """Consolida as reproduções pendentes, uma transação por fatia do histórico."""
+    continuar = True
+    while continuar:
+        fatia = executar_transacao(_consolidar_fatia)
+        if fatia is None:
+            return
+        continuar, alteradas = fatia
+        for cod_playlist, cod_album, numero_unidade, numero_faixa, vezes, ultima in alteradas:
+            chave = {'cod_playlist': cod_playlist, 'cod_album': cod_album,
+                     'numero_unidade': numero_unidade, 'numero_faixa': numero_faixa}
+            publicar('playlist_tracks', 'update', chave,
+                     dict(chave, num_vezes_tocada=vezes, data_ultima_vez_tocada=como_texto(ultima)))
+
+
+def reconstruir_dia_reproducao(cursor, dia):
+    """Refaz os rollups de um dia a partir do histórico (na transação do chamador).
+    
+    Só conta o histórico já consolidado: o restante entra pela consolidação.
+    """
+    cursor.execute("SELECT consolidado_ate FROM dbo.CONSOLIDACAO_REPRODUCAO WITH (UPDLOCK)")
+    limite = cursor.fetchone()[0]
+    cursor.execute("""
+        DELETE FROM dbo.REPRODUCAO_MINUTO
+        WHERE minuto >= ? AND minuto < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+    """, (dia, dia))
+    cursor.execute(f"""
+        INSERT INTO dbo.REPRODUCAO_MINUTO (minuto, cod_album, numero_unidade, numero_faixa, qtd_reproducoes)
+        SELECT {MINUTO}, cod_album, numero_unidade, numero_faixa, COUNT(*)
+        FROM dbo.HISTORICO_REPRODUCAO
+        WHERE data_reproducao >= ? AND data_reproducao < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+          AND data_reproducao < ?
+        GROUP BY {MINUTO}, cod_album, numero_unidade, numero_faixa
+    """, (dia, dia, limite))
+    cursor.execute("DELETE FROM dbo.REPRODUCAO_DIA WHERE dia = ?", (dia,))
+    cursor.execute("""
+        INSERT INTO dbo.REPRODUCAO_DIA (dia, cod_album, numero_unidade, numero_faixa, qtd_reproducoes)
+        SELECT ?, cod_album, numero_unidade, numero_faixa, COUNT(*)
+        FROM dbo.HISTORICO_REPRODUCAO
+        WHERE data_reproducao >= ? AND data_reproducao < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+          AND data_reproducao < ?
+        GROUP BY cod_album, numero_unidade, numero_faixa
+    """, (dia, dia, dia, limite))
+
+
+@tarefa('reconstruir_rollups_reproducao')
+def reconstruir_rollups_reproducao(contexto, desde=None, ate=None):
+    """Refaz REPRODUCAO_MINUTO e REPRODUCAO_DIA a partir do histórico.
+    
+    `desde` e `ate` (AAAA-MM-DD, inclusivos) limitam os dias; cada dia é
+    reconstruído na sua própria transação.
+    """
+    desde = date.fromisoformat(desde) if desde else None
+    ate = date.fromisoformat(ate) if ate else None
+    dias = [row[0] for row in _consultar(SQL_DIAS_REPRODUCAO, (desde, desde, ate, ate))]
+    
+    for i, dia in enumerate(dias):
+        contexto.progresso(i / len(dias), f'Dia {dia.isoformat()}')
+        executar_transacao(lambda cursor: reconstruir_dia_reproducao(cursor, dia))
+    return {'dias_reconstruidos': len(dias)}
@@ -0,0 +1,120 @@
+# backend/services/playlist_generator.py
+# Geração de playlists por restrições sobre o índice de faixas
+#
+# As candidatas saem do índice colunar (services/track_index.py), com as
+# mesmas facetas de /api/tracks/filter. O preenchimento até a duração alvo
+# tem duas fases, e cada candidata é avaliada no máximo uma vez em cada:
+#
+# 1. Gulosa em ordem aleatória: as candidatas embaralhadas são percorridas em
+#    lotes; cada lote é podado de forma vetorizada (duração que ainda cabe,
+#    álbum com vaga) e as que sobram entram enquanto respeitarem os limites.
+# 2. Fechamento: quando falta pouco para o alvo, entra a maior candidata que
+#    ainda cabe, até a playlist ficar dentro da tolerância.
+
+import numpy as np
+
+from services.track_index import indice_faixas
+
+TOLERANCIA_PADRAO = 60   # segundos abaixo do alvo aceitos
+LOTE = 4096
+# A fase gulosa para quando faltam menos que FATOR_FECHAMENTO x a duração média
+FATOR_FECHAMENTO = 2
+
+
+class _Preenchimento:
+    """Estado do preenchimento: faixas escolhidas e vagas por álbum/compositor."""
+
+    def __init__(self, candidatas, duracao_alvo, max_por_album, max_por_compositor, max_faixas):
+        self.candidatas = candidatas
+        self.duracao = candidatas['duracao'].astype(np.int64)
+        self.restante = duracao_alvo
+        self.max_por_album = max_por_album
+        self.max_por_compositor = max_por_compositor
+        self.max_faixas = max_faixas or len(self.duracao)
+        tamanho = int(candidatas['cod_album'].max()) + 1
+        self.por_album = np.zeros(tamanho, dtype=np.int32)
+        self.album_cheio = np.zeros(tamanho, dtype=bool)
+        self.por_compositor = {}
+        self.escolhidas = []
+
+    @property
+    def completa(self):
+        return len(self.escolhidas) >= self.max_faixas
+
+    def aceitar(self, i):
+        """Inclui a candidata `i` se couber e respeitar os limites."""
+        album = self.candidatas['cod_album'][i]
+        if self.duracao[i] > self.restante or self.album_cheio[album]:
+            return False
+        inicio = self.candidatas['inicio_compositores']
+        compositores = self.candidatas['compositores'][inicio[i]:inicio[i + 1]].tolist()
+        if self.max_por_compositor is not None and any(
+                self.por_compositor.get(c, 0) >= self.max_por_compositor for c in compositores):
+            return False
+        
+        self.escolhidas.append(i)
+        self.restante -= int(self.duracao[i])
+        self.por_album[album] += 1
+        if self.max_por_album is not None and self.por_album[album] >= self.max_por_album:
+            self.album_cheio[album] = True
+        for c in compositores:
+            self.por_compositor[c] = self.por_compositor.get(c, 0) + 1
+        return True
+
+
+def _fase_gulosa(estado, ordem, limiar):
+    """Percorre as candidatas em `ordem` até faltar no máximo `limiar` segundos."""
+    duracao, album = estado.duracao, estado.candidatas['cod_album']
+    for inicio in range(0, len(ordem), LOTE):
+        if estado.restante <= limiar or estado.completa:
+            return
+        lote = ordem[inicio:inicio + LOTE]
+        lote = lote[(duracao[lote] <= estado.restante) & ~estado.album_cheio[album[lote]]]
+        for i in lote.tolist():
+            if estado.aceitar(i) and (estado.restante <= limiar or estado.completa):
+                return
+
+
+def _fase_fechamento(estado, livres, tolerancia):
+    """Inclui a maior candidata que ainda cabe até chegar na tolerância."""
+    duracao, album = estado.duracao, estado.candidatas['cod_album']
+    while estado.restante > tolerancia and not estado.completa:
+        livres = livres[(duracao[livres] <= estado.restante) & ~estado.album_cheio[album[livres]]]
+        if not len(livres):
+            return
+        posicao = int(np.argmax(duracao[livres]))
+        i = int(livres[posicao])
+        livres = np.delete(livres, posicao)
+        estado.aceitar(i)
+
+
+def gerar_faixas(duracao_alvo, filtros=None, tolerancia=TOLERANCIA_PADRAO, duracao_min=None,
+                 duracao_max=None, excluidas=(), max_por_album=None, max_por_compositor=None,
+                 max_faixas=None, semente=None):
+    """Escolhe faixas que somem até `duracao_alvo` segundos sem ultrapassá-la.
+    
+    `filtros` usa as facetas do índice (periodo, tipo_composicao,
+    tipo_gravacao, ...); `excluidas` são chaves de faixas que não podem
+    entrar. Retorna a lista de faixas em ordem de reprodução.
+    """
+    candidatas = indice_faixas.candidatas(filtros or {}, duracao_min, duracao_max, excluidas)
+    if not len(candidatas['duracao']):
+        return []
+    
+    estado = _Preenchimento(candidatas, duracao_alvo, max_por_album, max_por_compositor, max_faixas)
+    rng = np.random.default_rng(semente)
+    ordem = rng.permutation(len(estado.duracao))
+    _fase_gulosa(estado, ordem, FATOR_FECHAMENTO * float(estado.duracao.mean()))
+    
+    livres = np.ones(len(estado.duracao), dtype=bool)
+    livres[estado.escolhidas] = False
+    _fase_fechamento(estado, np.flatnonzero(livres), tolerancia)
+    
+    # As faixas do fechamento são as mais longas; embaralhar evita que fiquem todas no fim
+    escolhidas = rng.permutation(estado.escolhidas) if estado.escolhidas else []
+    return [{
+        'cod_album': int(candidatas['cod_album'][i]),
+        'numero_unidade': int(candidatas['numero_unidade'][i]),
+        'numero_faixa': int(candidatas['numero_faixa'][i]),
+        'tempo_execucao': int(candidatas['duracao'][i]),
+    } for i in escolhidas]
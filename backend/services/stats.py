@@ -0,0 +1,299 @@
+# backend/services/stats.py
+# Estatísticas do acervo calculadas sobre um retrato colunar (NumPy)
+#
+# O retrato guarda as colunas do catálogo (faixas, álbuns, compositores) e as
+# contagens de reprodução de PLAYLIST_FAIXA em arrays. Cada agrupamento é um
+# np.bincount sobre códigos densos, então todas as estatísticas saem de uma
+# passada pelos arrays, sem uma consulta GROUP BY por estatística.
+#
+# O resultado fica em cache. Eventos de alteração do catálogo invalidam o
+# retrato (invalidar_catalogo); reproduções só marcam as contagens como velhas, que
+# são relidas no máximo a cada INTERVALO_REPRODUCOES segundos. Um descarte do
+# barramento (eventos perdidos) relê tudo.
+
+import threading
+import time
+
+import numpy as np
+
+from config.database import get_conexao
+from utils.events import assinar, ao_descartar
+
+INTERVALO_REPRODUCOES = 30.0   # segundos
+PERCENTIS = (25, 50, 75, 90)
+FAIXAS_HISTOGRAMA_REPRODUCOES = (0, 1, 2, 5, 10, 20, 50, 100)
+FAIXAS_HISTOGRAMA_PRECO = 10
+LIMITE_GRUPOS = 20
+
+SQL_FAIXAS = "SELECT cod_album, numero_unidade, numero_faixa, tempo_execucao, tipo_gravacao FROM FAIXA"
+SQL_ALBUNS = "SELECT cod_album, cod_gravadora, preco_compra, tipo_compra, tipo_midia FROM ALBUM"
+SQL_COMPOSITORES = """
+    SELECT fc.cod_album, fc.numero_unidade, fc.numero_faixa, fc.cod_compositor, c.cod_periodo
+    FROM FAIXA_COMPOSITOR fc
+    JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
+"""
+SQL_REPRODUCOES = "SELECT cod_album, numero_unidade, numero_faixa, num_vezes_tocada FROM PLAYLIST_FAIXA"
+SQL_NOMES = {
+    'periodo': "SELECT cod_periodo, descricao FROM PERIODO_MUSICAL",
+    'compositor': "SELECT cod_compositor, nome FROM COMPOSITOR",
+    'gravadora': "SELECT cod_gravadora, nome FROM GRAVADORA",
+}
+
+_trava = threading.Lock()
+_estado = {
+    'catalogo': None,          # dict de arrays do catálogo
+    'catalogo_velho': True,
+    'reproducoes': None,       # dict de arrays de PLAYLIST_FAIXA
+    'reproducoes_velhas': True,
+    'reproducoes_lidas_em': 0.0,
+    'resultados': {},          # limite -> estatísticas calculadas
+}
+
+
+def _ler(cursor, sql):
+    """Executa a consulta e devolve as colunas como listas."""
+    cursor.execute(sql)
+    linhas = cursor.fetchall()
+    quantidade = len(cursor.description)
+    if not linhas:
+        return [[] for _ in range(quantidade)]
+    return [list(coluna) for coluna in zip(*linhas)]
+
+
+def _chave_faixa(cod_album, numero_unidade, numero_faixa):
+    """Chave inteira única por faixa (unidade e faixa são TINYINT)."""
+    return (np.asarray(cod_album, dtype=np.int64) << 16) \
+        | (np.asarray(numero_unidade, dtype=np.int64) << 8) \
+        | np.asarray(numero_faixa, dtype=np.int64)
+
+
+def _codificar(valores):
+    """(códigos densos, valores distintos) de uma coluna."""
+    distintos, codigos = np.unique(np.asarray(valores, dtype=object).astype(str), return_inverse=True)
+    return codigos, distintos
+
+
+def _posicoes(chaves_ordenadas, chaves):
+    """Posição de cada chave no array ordenado (-1 se não existir)."""
+    if not len(chaves_ordenadas):
+        return np.full(len(chaves), -1, dtype=np.int64)
+    posicoes = np.searchsorted(chaves_ordenadas, chaves)
+    posicoes = np.minimum(posicoes, len(chaves_ordenadas) - 1)
+    return np.where(chaves_ordenadas[posicoes] == chaves, posicoes, -1)
+
+
+def _carregar_catalogo(cursor):
+    album, unidade, faixa, duracao, gravacao = _ler(cursor, SQL_FAIXAS)
+    chaves = _chave_faixa(album, unidade, faixa)
+    ordem = np.argsort(chaves)
+    
+    cod_album, cod_gravadora, preco, tipo_compra, tipo_midia = _ler(cursor, SQL_ALBUNS)
+    albuns = np.asarray(cod_album, dtype=np.int64)
+    ordem_albuns = np.argsort(albuns)
+    albuns = albuns[ordem_albuns]
+    indice_album = _posicoes(albuns, np.asarray(album, dtype=np.int64)[ordem])
+    
+    comp_album, comp_unidade, comp_faixa, compositor, periodo = _ler(cursor, SQL_COMPOSITORES)
+    chaves_ordenadas = chaves[ordem]
+    faixa_do_par = _posicoes(chaves_ordenadas, _chave_faixa(comp_album, comp_unidade, comp_faixa))
+    validos = faixa_do_par >= 0
+    
+    nomes = {}
+    for grupo, sql in SQL_NOMES.items():
+        codigos, descricoes = _ler(cursor, sql)
+        nomes[grupo] = dict(zip(codigos, descricoes))
+    
+    codigos_midia, midias = _codificar(np.asarray(tipo_midia, dtype=object)[ordem_albuns])
+    codigos_compra, compras = _codificar(np.asarray(tipo_compra, dtype=object)[ordem_albuns])
+    
+    # Tipo de gravação é opcional: só as faixas com valor entram nos códigos
+    gravacao = np.asarray(gravacao, dtype=object)[ordem]
+    informadas = np.flatnonzero(gravacao != None)  # noqa: E711 (comparação elemento a elemento)
+    codigos_gravacao, gravacoes = _codificar(gravacao[informadas])
+    
+    # Tempo por período conta cada faixa uma vez por período distinto
+    par_faixa = faixa_do_par[validos]
+    periodo = np.asarray(periodo, dtype=np.int64)[validos]
+    base = int(periodo.max()) + 1 if len(periodo) else 1
+    pares_periodo = np.unique(par_faixa * base + periodo)
+    
+    com_album = np.flatnonzero(indice_album >= 0)
+    return {
+        'chaves': chaves_ordenadas,
+        'duracao': np.asarray(duracao, dtype=np.int64)[ordem],
+        'gravacao': codigos_gravacao,
+        'gravacoes': gravacoes,
+        'com_album': com_album,
+        'faixa_gravadora': np.asarray(cod_gravadora, dtype=np.int64)[ordem_albuns][indice_album[com_album]],
+        'faixa_midia': codigos_midia[indice_album[com_album]],
+        'midias': midias,
+        'album_preco': np.asarray(preco, dtype=np.float64)[ordem_albuns],
+        'album_compra': codigos_compra,
+        'compras': compras,
+        'par_faixa': par_faixa,
+        'par_compositor': np.asarray(compositor, dtype=np.int64)[validos],
+        'periodo_faixa': pares_periodo // base,
+        'periodo': pares_periodo % base,
+        'nomes': nomes,
+    }
+
+
+def _carregar_reproducoes(cursor, catalogo):
+    album, unidade, faixa, vezes = _ler(cursor, SQL_REPRODUCOES)
+    posicoes = _posicoes(catalogo['chaves'], _chave_faixa(album, unidade, faixa))
+    return {'faixa': posicoes, 'vezes': np.asarray(vezes, dtype=np.int64)}
+
+
+def _somar_por(codigos, faixas, tempos, rotulo, limite=None):
+    """Soma o tempo de catálogo e o tempo escutado das `faixas` por código.
+    
+    `tempos` é o par (duração, duração x reproduções) por faixa. A lista sai
+    do maior para o menor tempo escutado.
+    """
+    if not len(codigos):
+        return []
+    catalogo = np.bincount(codigos, weights=tempos[0][faixas])
+    escutado = np.bincount(codigos, weights=tempos[1][faixas])
+    presentes = np.flatnonzero(catalogo)
+    presentes = presentes[np.lexsort((-catalogo[presentes], -escutado[presentes]))][:limite]
+    return [dict(rotulo(int(c)), segundos=int(catalogo[c]), segundos_escutados=int(escutado[c]))
+            for c in presentes]
+
+
+def _por_nome(nomes):
+    return lambda codigo: {'codigo': codigo, 'nome': nomes.get(codigo)}
+
+
+def _estatisticas_precos(catalogo):
+    precos = catalogo['album_preco']
+    resultado = {}
+    for codigo, tipo in enumerate(catalogo['compras']):
+        grupo = precos[catalogo['album_compra'] == codigo]
+        if not len(grupo):
+            continue
+        percentis = np.percentile(grupo, PERCENTIS)
+        resultado[str(tipo)] = {
+            'qtd_albuns': int(len(grupo)),
+            'minimo': round(float(grupo.min()), 2),
+            'maximo': round(float(grupo.max()), 2),
+            'media': round(float(grupo.mean()), 2),
+            'percentis': {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTIS, percentis)},
+        }
+    distribuicao = []
+    if len(precos):
+        contagem, limites = np.histogram(precos, bins=FAIXAS_HISTOGRAMA_PRECO)
+        distribuicao = [{'de': round(float(limites[i]), 2), 'ate': round(float(limites[i + 1]), 2),
+                         'qtd_albuns': int(c)} for i, c in enumerate(contagem)]
+    return {'por_tipo_compra': resultado, 'distribuicao': distribuicao}
+
+
+def _histograma_reproducoes(vezes):
+    faixas = np.array(FAIXAS_HISTOGRAMA_REPRODUCOES)
+    contagem = np.bincount(np.searchsorted(faixas, vezes, side='right') - 1, minlength=len(faixas))
+    return [{
+        'de': int(inicio),
+        'ate': int(faixas[i + 1] - 1) if i + 1 < len(faixas) else None,
+        'qtd': int(contagem[i]),
+    } for i, inicio in enumerate(faixas)]
+
+
+def _estatisticas_reproducoes(reproducoes, vezes_por_faixa):
+    vezes = reproducoes['vezes']
+    return {
+        'qtd_entradas_playlist': int(len(vezes)),
+        'total_reproducoes': int(vezes.sum()),
+        # Reproduções de cada entrada de playlist e de cada faixa (somando playlists)
+        'histograma_por_entrada': _histograma_reproducoes(vezes),
+        'histograma_por_faixa': _histograma_reproducoes(vezes_por_faixa.astype(np.int64)),
+    }
+
+
+def _calcular(catalogo, reproducoes, limite):
+    duracao = catalogo['duracao']
+    nomes = catalogo['nomes']
+    conhecidas = reproducoes['faixa'] >= 0
+    vezes_por_faixa = np.bincount(reproducoes['faixa'][conhecidas], weights=reproducoes['vezes'][conhecidas],
+                                  minlength=len(duracao))
+    tempos = (duracao, duracao * vezes_por_faixa)
+    
+    midias = catalogo['midias']
+    contagem_gravacao = np.bincount(catalogo['gravacao'], minlength=len(catalogo['gravacoes']))
+    total_gravacao = int(contagem_gravacao.sum())
+    
+    return {
+        'qtd_faixas': int(len(duracao)),
+        'qtd_albuns': int(len(catalogo['album_preco'])),
+        'tempo_total_segundos': int(duracao.sum()),
+        'tempo_escutado_segundos': int(tempos[1].sum()),
+        'tempo_por_tipo_midia': _somar_por(catalogo['faixa_midia'], catalogo['com_album'], tempos,
+                                           lambda c: {'tipo_midia': str(midias[c])}),
+        'tempo_por_gravadora': _somar_por(catalogo['faixa_gravadora'], catalogo['com_album'], tempos,
+                                          _por_nome(nomes['gravadora']), limite),
+        'tempo_por_compositor': _somar_por(catalogo['par_compositor'], catalogo['par_faixa'], tempos,
+                                           _por_nome(nomes['compositor']), limite),
+        'tempo_por_periodo': _somar_por(catalogo['periodo'], catalogo['periodo_faixa'], tempos,
+                                        _por_nome(nomes['periodo'])),
+        'tipo_gravacao': {
+            str(t): {'qtd_faixas': int(c), 'proporcao': round(int(c) / total_gravacao, 4)}
+            for t, c in zip(catalogo['gravacoes'], contagem_gravacao)
+        },
+        'precos': _estatisticas_precos(catalogo),
+        'reproducoes': _estatisticas_reproducoes(reproducoes, vezes_por_faixa),
+    }
+
+
+def obter_estatisticas(limite=LIMITE_GRUPOS):
+    """Estatísticas do acervo, recarregando só o que foi invalidado.
+    
+    A leitura é sempre no primário: depois de uma invalidação, a réplica
+    atrasada poderia repor no cache o retrato anterior à escrita.
+    """
+    with _trava:
+        agora = time.monotonic()
+        catalogo = _estado['catalogo_velho'] or _estado['catalogo'] is None
+        reproducoes = catalogo or (_estado['reproducoes_velhas']
+                                   and agora - _estado['reproducoes_lidas_em'] >= INTERVALO_REPRODUCOES)
+        if catalogo or reproducoes:
+            # As marcas são limpas antes da leitura: uma escrita durante a
+            # carga marca de novo e a próxima chamada relê
+            conexao = get_conexao(somente_leitura=False)
+            cursor = conexao.cursor()
+            try:
+                if catalogo:
+                    _estado['catalogo_velho'] = False
+                    _estado['catalogo'] = _carregar_catalogo(cursor)
+                _estado['reproducoes_velhas'] = False
+                _estado['reproducoes'] = _carregar_reproducoes(cursor, _estado['catalogo'])
+                _estado['reproducoes_lidas_em'] = agora
+                _estado['resultados'] = {}
+            except Exception:
+                _estado['catalogo_velho'] = _estado['reproducoes_velhas'] = True
+                raise
+            finally:
+                cursor.close()
+                conexao.close()
+        
+        if limite not in _estado['resultados']:
+            _estado['resultados'][limite] = _calcular(_estado['catalogo'], _estado['reproducoes'], limite)
+        return _estado['resultados'][limite]
+
+
+@assinar('albums', 'tracks', 'labels', 'composers')
+def invalidar_catalogo(evento=None):
+    """Marca o retrato como velho (alterações de faixas, álbuns, gravadoras, compositores)."""
+    _estado['catalogo_velho'] = True
+
+
+@assinar('playlists', 'playlist_tracks')
+def invalidar_reproducoes(evento=None):
+    """Marca as contagens como velhas (reproduções e faixas das playlists).
+    
+    As contagens são relidas no máximo a cada INTERVALO_REPRODUCOES segundos.
+    """
+    _estado['reproducoes_velhas'] = True
+
+
+@ao_descartar
+def _descartar():
+    # Catálogo velho relê também as contagens, sem esperar o intervalo
+    invalidar_catalogo()
@@ -0,0 +1,94 @@
+# backend/services/track_import.py
+# Inserção de faixas em lote (POST /api/tracks/batch e a tarefa importar_faixas)
+#
+# Um INSERT ... SELECT FROM OPENJSON por tabela: os triggers de FAIXA rodam
+# uma vez por lote em vez de uma vez por faixa. A importação em segundo plano
+# pré-valida o corpo (services/validation.py) e grava em lotes de LOTE_IMPORTACAO
+# faixas, cada um na sua transação. Cada lote publica um evento de alteração
+# por álbum (com a nova qtd_faixas), que atualiza índice, agregados e
+# estatísticas de uma vez por álbum.
+
+import json
+
+from utils.events import publicar
+from utils.jobs import tarefa
+from utils.transactions import executar_transacao
+from services.validation import validar_faixas, recusas
+
+LOTE_IMPORTACAO = 200
+CHAVE_FAIXA = ('cod_album', 'numero_unidade', 'numero_faixa')
+MAXIMO_VIOLACOES_ERRO = 20
+
+SQL_INSERIR_FAIXAS = """
+    INSERT INTO FAIXA (cod_album, numero_unidade, numero_faixa, descricao,
+                      cod_tipo_composicao, tempo_execucao, tipo_gravacao)
+    SELECT cod_album, numero_unidade, numero_faixa, descricao,
+           cod_tipo_composicao, tempo_execucao, tipo_gravacao
+    FROM OPENJSON(?) WITH (
+        cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, descricao NVARCHAR(MAX),
+        cod_tipo_composicao INT, tempo_execucao INT, tipo_gravacao NVARCHAR(MAX)
+    )
+"""
+SQL_INSERIR_ASSOCIACOES = """
+    INSERT INTO {tabela} (cod_album, numero_unidade, numero_faixa, {campo})
+    SELECT cod_album, numero_unidade, numero_faixa, codigo
+    FROM OPENJSON(?) WITH (
+        cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, codigo INT
+    )
+"""
+ASSOCIACOES = (
+    ('FAIXA_COMPOSITOR', 'cod_compositor', 'compositores'),
+    ('FAIXA_INTERPRETE', 'cod_interprete', 'interpretes'),
+)
+
+
+def inserir_faixas(cursor, faixas):
+    """Insere as faixas e suas associações (dentro da transação do chamador).
+    
+    Retorna {cod_album: qtd_faixas} dos álbuns afetados, já com as novas faixas.
+    """
+    cursor.execute(SQL_INSERIR_FAIXAS, (json.dumps(faixas),))
+    for tabela, campo, lista in ASSOCIACOES:
+        associacoes = [dict({c: f[c] for c in CHAVE_FAIXA}, codigo=codigo)
+                       for f in faixas for codigo in f.get(lista) or ()]
+        if associacoes:
+            cursor.execute(SQL_INSERIR_ASSOCIACOES.format(tabela=tabela, campo=campo),
+                           (json.dumps(associacoes),))
+    
+    cursor.execute("""
+        SELECT cod_album, qtd_faixas FROM ALBUM
+        WHERE cod_album IN (SELECT CAST([value] AS INT) FROM OPENJSON(?))
+    """, (json.dumps(sorted({int(f['cod_album']) for f in faixas})),))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def publicar_albuns(qtd_faixas):
+    """Publica a alteração de cada álbum que recebeu faixas (depois do commit)."""
+    for cod_album, quantidade in sorted(qtd_faixas.items()):
+        publicar('albums', 'update', {'cod_album': cod_album},
+                 {'cod_album': cod_album, 'qtd_faixas': quantidade})
+
+
+@tarefa('importar_faixas')
+def importar_faixas(contexto, faixas, lote=LOTE_IMPORTACAO):
+    """Importa `faixas` (como em POST /api/tracks) em lotes.
+    
+    Com alguma violação decidida pelo corpo (services/validation.recusas)
+    nada é gravado; as regras que dependem dos caches ficam com os triggers,
+    lote a lote. Um cancelamento entre lotes mantém os lotes já confirmados.
+    """
+    violacoes = recusas(validar_faixas(faixas))
+    if violacoes:
+        resumo = '; '.join(f"item {v['item']}: {v['mensagem']}" if v['item'] is not None
+                           else f"álbum {v['cod_album']}: {v['mensagem']}"
+                           for v in violacoes[:MAXIMO_VIOLACOES_ERRO])
+        raise ValueError(f'{len(violacoes)} violações: {resumo}')
+    
+    inseridas = 0
+    for inicio in range(0, len(faixas), lote):
+        contexto.progresso(inseridas / len(faixas), f'{inseridas} de {len(faixas)} faixas inseridas')
+        parte = faixas[inicio:inicio + lote]
+        publicar_albuns(executar_transacao(lambda cursor: inserir_faixas(cursor, parte)))
+        inseridas += len(parte)
+    contexto.progresso(1, f'{inseridas} de {len(faixas)} faixas inseridas')
+    return {'qtd_faixas': inseridas}
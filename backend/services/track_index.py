@@ -0,0 +1,496 @@
+# backend/services/track_index.py
+# Índice colunar de faixas em memória (filtros por facetas)
+#
+# Os atributos de FAIXA/ALBUM usados nos filtros ficam em arrays NumPy, uma
+# posição por faixa. Facetas de valor único (mídia, gravação, tipo de
+# composição) são colunas codificadas; facetas multivaloradas (compositor,
+# intérprete, período) são listas de pares (linha, valor). Um filtro vira uma
+# máscara booleana por faceta: dentro da faceta os valores são OU, entre
+# facetas são E. As contagens de cada faceta usam as máscaras das demais
+# (facetas disjuntivas), para o cliente ver quantas faixas cada opção traria.
+#
+# O índice carrega do banco no primeiro uso e é atualizado pelos eventos de
+# alteração de faixas e álbuns (utils/events.py), publicados após o commit.
+
+import threading
+
+import numpy as np
+
+from config.database import get_conexao
+from utils.events import assinar, ao_descartar
+
+CAPACIDADE_INICIAL = 1024
+LOTE_CARGA = 5000
+
+# Facetas de valor único: coluna do índice e se o valor é texto codificado
+FACETAS_SIMPLES = {
+    'tipo_midia': True,
+    'tipo_gravacao': True,
+    'tipo_composicao': False,
+}
+FACETAS_MULTIPLAS = ('compositor', 'interprete', 'periodo')
+FACETAS = tuple(FACETAS_SIMPLES) + FACETAS_MULTIPLAS
+
+SQL_FAIXAS = """
+    SELECT f.cod_album, f.numero_unidade, f.numero_faixa, a.tipo_midia,
+           f.tipo_gravacao, f.cod_tipo_composicao, f.tempo_execucao
+    FROM FAIXA f
+    JOIN ALBUM a ON f.cod_album = a.cod_album
+"""
+SQL_COMPOSITORES = """
+    SELECT fc.cod_album, fc.numero_unidade, fc.numero_faixa, fc.cod_compositor, c.cod_periodo
+    FROM FAIXA_COMPOSITOR fc
+    JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
+"""
+SQL_INTERPRETES = """
+    SELECT fi.cod_album, fi.numero_unidade, fi.numero_faixa, fi.cod_interprete
+    FROM FAIXA_INTERPRETE fi
+"""
+
+
+class _Pares:
+    """Relação multivalorada linha -> valor em dois arrays paralelos.
+    
+    Remoções só marcam os pares como mortos; o espaço é compactado quando
+    metade dos pares estiver morta. Para consultas seletivas, os pares vivos
+    são agrupados (sob demanda, até a próxima alteração) por valor e por
+    linha, o que permite visitar só os pares das linhas/valores envolvidos.
+    """
+
+    def __init__(self):
+        self.linha = np.zeros(CAPACIDADE_INICIAL, dtype=np.int32)
+        self.valor = np.zeros(CAPACIDADE_INICIAL, dtype=np.int32)
+        self.vivo = np.zeros(CAPACIDADE_INICIAL, dtype=bool)
+        self.total = 0
+        self.mortos = 0
+        self._agrupamentos = {}
+        self._contagem_total = None
+
+    def _alterado(self):
+        self._agrupamentos = {}
+        self._contagem_total = None
+
+    def adicionar(self, linhas, valores):
+        quantidade = len(linhas)
+        if self.total + quantidade > len(self.linha):
+            capacidade = max(len(self.linha) * 2, self.total + quantidade)
+            for nome in ('linha', 'valor', 'vivo'):
+                antigo = getattr(self, nome)
+                novo = np.zeros(capacidade, dtype=antigo.dtype)
+                novo[:self.total] = antigo[:self.total]
+                setattr(self, nome, novo)
+        fim = self.total + quantidade
+        self.linha[self.total:fim] = linhas
+        self.valor[self.total:fim] = valores
+        self.vivo[self.total:fim] = True
+        self.total = fim
+        self._alterado()
+
+    def remover_linhas(self, linhas):
+        alvo = self.vivo[:self.total] & np.isin(self.linha[:self.total], linhas)
+        self.vivo[:self.total][alvo] = False
+        self.mortos += int(alvo.sum())
+        if self.mortos * 2 > self.total:
+            self._compactar()
+        self._alterado()
+
+    def _compactar(self):
+        vivos = self.vivo[:self.total]
+        quantidade = int(vivos.sum())
+        self.linha[:quantidade] = self.linha[:self.total][vivos]
+        self.valor[:quantidade] = self.valor[:self.total][vivos]
+        self.vivo[:quantidade] = True
+        self.vivo[quantidade:self.total] = False
+        self.total = quantidade
+        self.mortos = 0
+
+    def _vivos(self, campo):
+        if not self.mortos:
+            return getattr(self, campo)[:self.total]
+        return getattr(self, campo)[:self.total][self.vivo[:self.total]]
+
+    def _agrupado(self, campo, tamanho):
+        """(pares vivos ordenados por `campo`, início de cada chave), em cache."""
+        cache = self._agrupamentos.get(campo)
+        if cache is not None and len(cache[1]) >= tamanho + 1:
+            return cache
+        chaves = self._vivos(campo)
+        outros = self._vivos('valor' if campo == 'linha' else 'linha')
+        tamanho = max(tamanho, int(chaves.max()) + 1 if len(chaves) else 0)
+        inicio = np.zeros(tamanho + 1, dtype=np.int64)
+        np.cumsum(np.bincount(chaves, minlength=tamanho), out=inicio[1:])
+        cache = (outros[np.argsort(chaves, kind='stable')], inicio)
+        self._agrupamentos[campo] = cache
+        return cache
+
+    @staticmethod
+    def _expandir(agrupado, chaves):
+        """Concatena os pares de cada uma das `chaves` (sem laço em Python)."""
+        outros, inicio = agrupado
+        chaves = chaves[(chaves >= 0) & (chaves < len(inicio) - 1)]
+        comecos = inicio[chaves]
+        tamanhos = inicio[chaves + 1] - comecos
+        quantidade = int(tamanhos.sum())
+        if not quantidade:
+            return outros[:0]
+        deslocamentos = np.repeat(comecos - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+        return outros[deslocamentos + np.arange(quantidade)]
+
+    def mascara(self, valores, linhas):
+        """Máscara das linhas com algum dos `valores`."""
+        mascara = np.zeros(linhas, dtype=bool)
+        mascara[self._expandir(self._agrupado('valor', 0), valores)] = True
+        return mascara
+
+    def contar(self, mascara, selecionadas):
+        """Contagem por valor entre as linhas da máscara.
+        
+        Com poucas linhas selecionadas, visita só os pares delas; com quase
+        todas, subtrai do total os pares das não selecionadas; no meio termo,
+        percorre todos os pares.
+        """
+        linhas = len(mascara)
+        if selecionadas * 8 <= linhas:
+            valores = self._expandir(self._agrupado('linha', linhas), np.flatnonzero(mascara))
+            contagem = np.bincount(valores)
+        elif (linhas - selecionadas) * 8 <= linhas:
+            if self._contagem_total is None:
+                self._contagem_total = np.bincount(self._vivos('valor'))
+            fora = self._expandir(self._agrupado('linha', linhas), np.flatnonzero(~mascara))
+            contagem = self._contagem_total - np.bincount(fora, minlength=len(self._contagem_total))
+        else:
+            valores = self._vivos('valor')[mascara[self._vivos('linha')]]
+            contagem = np.bincount(valores)
+        return {int(v): int(contagem[v]) for v in np.flatnonzero(contagem)}
+
+
+class IndiceFaixas:
+    """Índice colunar das faixas com filtros e contagens por facetas."""
+
+    def __init__(self):
+        self._trava = threading.RLock()
+        self._carregado = False
+        self._limpar()
+
+    def _limpar(self):
+        self.total = 0
+        self._linhas = {}
+        self._por_album = {}
+        self._colunas = {
+            'cod_album': np.zeros(CAPACIDADE_INICIAL, dtype=np.int32),
+            'numero_unidade': np.zeros(CAPACIDADE_INICIAL, dtype=np.int16),
+            'numero_faixa': np.zeros(CAPACIDADE_INICIAL, dtype=np.int16),
+            'tipo_midia': np.zeros(CAPACIDADE_INICIAL, dtype=np.int16),
+            'tipo_gravacao': np.zeros(CAPACIDADE_INICIAL, dtype=np.int16),
+            'tipo_composicao': np.zeros(CAPACIDADE_INICIAL, dtype=np.int32),
+            'duracao': np.zeros(CAPACIDADE_INICIAL, dtype=np.int32),
+            'ativo': np.zeros(CAPACIDADE_INICIAL, dtype=bool),
+        }
+        # Dicionários das colunas de texto: valor -> código e código -> valor
+        self._codigos = {faceta: {} for faceta, texto in FACETAS_SIMPLES.items() if texto}
+        self._valores = {faceta: [] for faceta in self._codigos}
+        self._pares = {faceta: _Pares() for faceta in FACETAS_MULTIPLAS}
+
+    def _codificar(self, faceta, valor):
+        codigos = self._codigos[faceta]
+        if valor not in codigos:
+            codigos[valor] = len(self._valores[faceta])
+            self._valores[faceta].append(valor)
+        return codigos[valor]
+
+    def _garantir_capacidade(self, quantidade):
+        capacidade = len(self._colunas['ativo'])
+        if quantidade <= capacidade:
+            return
+        capacidade = max(capacidade * 2, quantidade)
+        for nome, antigo in self._colunas.items():
+            novo = np.zeros(capacidade, dtype=antigo.dtype)
+            novo[:self.total] = antigo[:self.total]
+            self._colunas[nome] = novo
+
+    def _inserir_faixas(self, linhas_banco):
+        """Insere (ou sobrescreve) faixas; retorna as posições usadas."""
+        self._garantir_capacidade(self.total + len(linhas_banco))
+        colunas = self._colunas
+        posicoes = []
+        for cod_album, unidade, faixa, midia, gravacao, tipo, duracao in linhas_banco:
+            chave = (cod_album, unidade, faixa)
+            posicao = self._linhas.get(chave)
+            if posicao is None:
+                posicao = self.total
+                self._linhas[chave] = posicao
+                self._por_album.setdefault(cod_album, []).append(posicao)
+                self.total += 1
+            colunas['cod_album'][posicao] = cod_album
+            colunas['numero_unidade'][posicao] = unidade
+            colunas['numero_faixa'][posicao] = faixa
+            colunas['tipo_midia'][posicao] = self._codificar('tipo_midia', midia)
+            colunas['tipo_gravacao'][posicao] = self._codificar('tipo_gravacao', gravacao)
+            colunas['tipo_composicao'][posicao] = tipo
+            colunas['duracao'][posicao] = duracao
+            colunas['ativo'][posicao] = True
+            posicoes.append(posicao)
+        return posicoes
+
+    def _inserir_associacoes(self, cursor, sql, parametros, multiplas):
+        """Lê pares (chave, valor...) e os adiciona às facetas multivaloradas."""
+        pares = {faceta: set() for faceta in multiplas}
+        cursor.execute(sql, parametros)
+        linhas_banco = cursor.fetchmany(LOTE_CARGA)
+        while linhas_banco:
+            for row in linhas_banco:
+                posicao = self._linhas.get((row[0], row[1], row[2]))
+                if posicao is None:
+                    continue
+                for faceta, valor in zip(multiplas, row[3:]):
+                    pares[faceta].add((posicao, valor))
+            linhas_banco = cursor.fetchmany(LOTE_CARGA)
+        for faceta, itens in pares.items():
+            if itens:
+                linhas, valores = zip(*itens)
+                self._pares[faceta].adicionar(linhas, valores)
+
+    def _carregar(self, cursor, filtro='', parametros=()):
+        cursor.execute(SQL_FAIXAS + filtro, parametros)
+        linhas_banco = cursor.fetchmany(LOTE_CARGA)
+        while linhas_banco:
+            self._inserir_faixas(linhas_banco)
+            linhas_banco = cursor.fetchmany(LOTE_CARGA)
+        
+        filtro_associacao = filtro.replace('f.', '{alias}.')
+        self._inserir_associacoes(cursor, SQL_COMPOSITORES + filtro_associacao.format(alias='fc'),
+                                  parametros, ('compositor', 'periodo'))
+        self._inserir_associacoes(cursor, SQL_INTERPRETES + filtro_associacao.format(alias='fi'),
+                                  parametros, ('interprete',))
+
+    def garantir_carregado(self):
+        """Carrega todas as faixas do banco no primeiro uso."""
+        if self._carregado:
+            return
+        with self._trava:
+            if self._carregado:
+                return
+            conexao = get_conexao(somente_leitura=False)
+            cursor = conexao.cursor()
+            try:
+                self._limpar()
+                self._carregar(cursor)
+                self._carregado = True
+            finally:
+                cursor.close()
+                conexao.close()
+
+    def descartar(self):
+        """Esvazia o índice; o próximo uso recarrega tudo do banco."""
+        with self._trava:
+            self._carregado = False
+            self._limpar()
+
+    def _remover_posicoes(self, posicoes):
+        if not posicoes:
+            return
+        self._colunas['ativo'][posicoes] = False
+        for pares in self._pares.values():
+            pares.remover_linhas(posicoes)
+
+    def recarregar(self, cod_album, numero_unidade=None, numero_faixa=None):
+        """Relê do banco uma faixa (ou todas do álbum) após uma escrita.
+        
+        Faixas que não existem mais no banco saem do índice. Se o índice
+        ainda não foi carregado, não há nada a fazer.
+        """
+        if not self._carregado:
+            return
+        filtro, parametros = ' WHERE f.cod_album = ?', (cod_album,)
+        if numero_faixa is not None:
+            filtro += ' AND f.numero_unidade = ? AND f.numero_faixa = ?'
+            parametros += (numero_unidade, numero_faixa)
+        
+        conexao = get_conexao(somente_leitura=False)
+        cursor = conexao.cursor()
+        try:
+            with self._trava:
+                if numero_faixa is None:
+                    posicoes = self._por_album.get(cod_album, [])
+                else:
+                    posicao = self._linhas.get((cod_album, numero_unidade, numero_faixa))
+                    posicoes = [] if posicao is None else [posicao]
+                self._remover_posicoes(posicoes)
+                self._carregar(cursor, filtro, parametros)
+        finally:
+            cursor.close()
+            conexao.close()
+
+    def _mascara_faceta(self, faceta, valores):
+        total = self.total
+        if faceta in FACETAS_MULTIPLAS:
+            # Códigos negativos ou acima de int64 não existem (nem indexam os pares)
+            valores = [v for v in valores if 0 <= v <= np.iinfo(np.int64).max]
+            return self._pares[faceta].mascara(np.asarray(valores, dtype=np.int64), total)
+        
+        if not total:
+            return np.zeros(0, dtype=bool)
+        coluna = self._colunas[faceta][:total]
+        maximo = int(coluna.max())
+        if FACETAS_SIMPLES[faceta]:
+            valores = [self._codigos[faceta][v] for v in valores if v in self._codigos[faceta]]
+        # Códigos acima do maior presente nunca casam: ficam fora da tabela,
+        # que assim não cresce com o valor pedido (?tipo_composicao=2000000000)
+        valores = [v for v in valores if 0 <= v <= maximo]
+        if not valores:
+            return np.zeros(total, dtype=bool)
+        
+        # Tabela de consulta código -> aceito: um acesso indexado por linha
+        tabela = np.zeros(maximo + 1, dtype=bool)
+        tabela[valores] = True
+        return tabela[coluna]
+
+    def _contar_faceta(self, faceta, mascara, selecionadas):
+        if faceta in FACETAS_MULTIPLAS:
+            return self._pares[faceta].contar(mascara, selecionadas)
+        
+        coluna = self._colunas[faceta][:self.total]
+        if selecionadas * 8 <= len(mascara):
+            contagem = np.bincount(coluna[np.flatnonzero(mascara)])
+        else:
+            contagem = np.bincount(coluna, weights=mascara).astype(np.int64)
+        if FACETAS_SIMPLES[faceta]:
+            # Valores nulos (ex.: faixa sem tipo_gravacao) não viram opção de faceta
+            nomes = self._valores[faceta]
+            return {nomes[c]: int(contagem[c]) for c in np.flatnonzero(contagem) if nomes[c] is not None}
+        return {int(c): int(contagem[c]) for c in np.flatnonzero(contagem)}
+
+    def _mascaras(self, filtros, duracao_min, duracao_max):
+        """(máscara das faixas ativas na faixa de duração, {faceta: máscara})."""
+        colunas = self._colunas
+        base = colunas['ativo'][:self.total].copy()
+        if duracao_min is not None:
+            base &= colunas['duracao'][:self.total] >= duracao_min
+        if duracao_max is not None:
+            base &= colunas['duracao'][:self.total] <= duracao_max
+        return base, {f: self._mascara_faceta(f, v) for f, v in filtros.items() if v}
+
+    def filtrar(self, filtros, duracao_min=None, duracao_max=None, facetas=FACETAS,
+                limite=50, deslocamento=0):
+        """Filtra as faixas e calcula as contagens das facetas.
+        
+        `filtros` mapeia faceta -> lista de valores aceitos. Retorna
+        {'total', 'faixas': [...], 'facetas': {faceta: {valor: contagem}}}.
+        """
+        self.garantir_carregado()
+        with self._trava:
+            total = self.total
+            colunas = {nome: coluna[:total] for nome, coluna in self._colunas.items()}
+            base, mascaras = self._mascaras(filtros, duracao_min, duracao_max)
+            mascara = base.copy()
+            for m in mascaras.values():
+                mascara &= m
+            
+            selecionadas = np.flatnonzero(mascara)
+            contagens = {}
+            for faceta in facetas:
+                # Disjuntiva: a faceta não filtra a si mesma
+                if faceta in mascaras:
+                    parcial = base.copy()
+                    for outra, m in mascaras.items():
+                        if outra != faceta:
+                            parcial &= m
+                    quantidade = int(np.count_nonzero(parcial))
+                else:
+                    parcial, quantidade = mascara, len(selecionadas)
+                contagens[faceta] = self._contar_faceta(faceta, parcial, quantidade)
+            
+            pagina = selecionadas[deslocamento:deslocamento + limite]
+            nomes_midia = self._valores['tipo_midia']
+            nomes_gravacao = self._valores['tipo_gravacao']
+            faixas = [{
+                'cod_album': int(colunas['cod_album'][p]),
+                'numero_unidade': int(colunas['numero_unidade'][p]),
+                'numero_faixa': int(colunas['numero_faixa'][p]),
+                'tipo_midia': nomes_midia[colunas['tipo_midia'][p]],
+                'tipo_gravacao': nomes_gravacao[colunas['tipo_gravacao'][p]],
+                'cod_tipo_composicao': int(colunas['tipo_composicao'][p]),
+                'tempo_execucao': int(colunas['duracao'][p]),
+            } for p in pagina]
+        
+        return {'total': int(len(selecionadas)), 'faixas': faixas, 'facetas': contagens}
+
+    def candidatas(self, filtros, duracao_min=None, duracao_max=None, excluidas=()):
+        """Faixas que passam nos filtros, em arrays paralelos (gerador de playlists).
+        
+        `excluidas` são chaves (cod_album, numero_unidade, numero_faixa) que
+        ficam de fora. Retorna as colunas das candidatas e os compositores de
+        cada uma: os da i-ésima candidata são
+        compositores[inicio_compositores[i]:inicio_compositores[i + 1]].
+        """
+        self.garantir_carregado()
+        with self._trava:
+            mascara, mascaras = self._mascaras(filtros, duracao_min, duracao_max)
+            for m in mascaras.values():
+                mascara &= m
+            fora = [self._linhas[c] for c in excluidas if c in self._linhas]
+            mascara[fora] = False
+            posicoes = np.flatnonzero(mascara)
+            
+            resultado = {nome: self._colunas[nome][posicoes]
+                         for nome in ('cod_album', 'numero_unidade', 'numero_faixa', 'duracao')}
+            agrupado = self._pares['compositor']._agrupado('linha', self.total)
+        
+        inicio = agrupado[1]
+        resultado['inicio_compositores'] = np.concatenate(([0], np.cumsum(inicio[posicoes + 1] - inicio[posicoes])))
+        resultado['compositores'] = _Pares._expandir(agrupado, posicoes)
+        return resultado
+
+    def estado_faixas(self, chaves):
+        """Gravação e períodos atuais das faixas (pré-validação de escritas).
+        
+        Retorna {chave: {'tipo_gravacao', 'periodos'}} só para as chaves
+        (cod_album, numero_unidade, numero_faixa) que existem no índice.
+        """
+        self.garantir_carregado()
+        with self._trava:
+            ativo = self._colunas['ativo']
+            posicoes = {}
+            for chave in chaves:
+                posicao = self._linhas.get(chave)
+                if posicao is not None and ativo[posicao]:
+                    posicoes[chave] = posicao
+            if not posicoes:
+                return {}
+            gravacao = self._colunas['tipo_gravacao']
+            nomes = self._valores['tipo_gravacao']
+            periodos, inicio = self._pares['periodo']._agrupado('linha', self.total)
+            return {chave: {
+                'tipo_gravacao': nomes[gravacao[p]],
+                'periodos': set(periodos[inicio[p]:inicio[p + 1]].tolist()),
+            } for chave, p in posicoes.items()}
+
+
+# Instância única usada pelas rotas
+indice_faixas = IndiceFaixas()
+
+
+def recarregar_faixa(cod_album, numero_unidade, numero_faixa):
+    """Atualiza uma faixa no índice (chamar depois do commit)."""
+    indice_faixas.recarregar(cod_album, numero_unidade, numero_faixa)
+
+
+def recarregar_album(cod_album):
+    """Atualiza todas as faixas de um álbum no índice (chamar depois do commit)."""
+    indice_faixas.recarregar(cod_album)
+
+
+@assinar('tracks')
+def _faixa_alterada(evento):
+    chave = evento['chave']
+    recarregar_faixa(chave['cod_album'], chave['numero_unidade'], chave['numero_faixa'])
+
+
+@assinar('albums')
+def _album_alterado(evento):
+    recarregar_album(evento['chave']['cod_album'])
+
+
+@ao_descartar
+def _descartar():
+    indice_faixas.descartar()
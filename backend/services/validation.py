@@ -0,0 +1,479 @@
+# backend/services/validation.py
+# Pré-validação das regras de negócio de banco.sql antes de qualquer escrita
+#
+# Os triggers e CHECKs só acusam um erro depois que o banco já fez o trabalho
+# e desfez a transação, e o primeiro erro esconde os demais. Aqui as mesmas
+# regras são avaliadas em memória e todas as violações voltam de uma vez:
+#
+#   - por álbum: tipo de mídia, unidades, preço, faixas e faixas não DDD
+#     (uma consulta GROUP BY na carga, relida por álbum a cada evento de
+#     alteração do álbum ou das suas faixas);
+#   - compositores e períodos barrocos (tabelas pequenas, relidas quando
+#     aparece um compositor desconhecido);
+#   - por faixa: gravação e períodos atuais, do índice de faixas.
+#
+# Cada violação é {'regra', 'mensagem', 'item', 'campo'}: `regra` é o nome do
+# trigger ou da constraint, `mensagem` o texto que o banco daria e `item` a
+# posição no lote (None nas regras de álbum, que trazem 'cod_album'). Os
+# triggers continuam valendo; a pré-validação só antecipa o erro.
+#
+# Numa escrita real, só as regras decididas pelo próprio corpo recusam a
+# requisição (recusas()). As demais dependem dos caches deste processo, que
+# podem estar atrás do banco (álbum criado por outro worker, evento perdido
+# sem SPOTPER_INVALIDACAO): nelas quem decide é o banco, e a lista completa
+# só volta no ?dry_run=1.
+
+import threading
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from config.database import get_conexao
+from utils.events import assinar, ao_descartar
+from services.track_index import indice_faixas
+
+TIPOS_MIDIA = ('CD', 'VINIL', 'DOWNLOAD')
+TIPOS_GRAVACAO = ('ADD', 'DDD')
+LIMITE_FAIXAS_ALBUM = 64
+FATOR_PRECO_DDD = 3
+DATA_GRAVACAO_MINIMA = date(2000, 1, 1)
+CENTAVOS = Decimal('0.01')
+# AVG de DECIMAL(10,2) tem escala 6 no SQL Server; a média vai para DECIMAL(10,2)
+ESCALA_MEDIA = Decimal('0.000001')
+
+CAMPOS_ALBUM = ('nome', 'descricao', 'cod_gravadora', 'preco_compra', 'data_compra',
+                'data_gravacao', 'tipo_compra', 'tipo_midia')
+CAMPOS_FAIXA = ('cod_album', 'numero_unidade', 'numero_faixa', 'descricao',
+                'cod_tipo_composicao', 'tempo_execucao')
+
+SQL_ALBUNS = """
+    SELECT a.cod_album, a.tipo_midia, a.qtd_unidades, a.preco_compra,
+           COUNT(f.numero_faixa),
+           SUM(CASE WHEN f.numero_faixa IS NOT NULL
+                     AND (f.tipo_gravacao IS NULL OR f.tipo_gravacao <> 'DDD') THEN 1 ELSE 0 END)
+    FROM ALBUM a
+    LEFT JOIN FAIXA f ON f.cod_album = a.cod_album
+"""
+SQL_ALBUNS_AGRUPAMENTO = " GROUP BY a.cod_album, a.tipo_midia, a.qtd_unidades, a.preco_compra"
+SQL_COMPOSITORES = """
+    SELECT c.cod_compositor, p.cod_periodo,
+           CASE WHEN UPPER(p.descricao) LIKE '%BARROCO%' THEN 1 ELSE 0 END
+    FROM COMPOSITOR c
+    JOIN PERIODO_MUSICAL p ON c.cod_periodo = p.cod_periodo
+"""
+
+# Mensagens dos triggers (RAISERROR), para o cliente ver o mesmo texto
+MENSAGENS = {
+    'VALIDAR_TIPO_GRAVACAO_FAIXA_CD': 'Faixas de CD devem ter tipo_gravacao (ADD ou DDD).',
+    'VALIDAR_TIPO_GRAVACAO_FAIXA_OUTRAS': 'Faixas de VINIL ou DOWNLOAD nao podem ter tipo_gravacao',
+    'VALIDAR_NUMERO_UNIDADE_FAIXA_DOWNLOAD': 'Downloads so podem ter numero_unidade = 1.',
+    'VALIDAR_NUMERO_UNIDADE_FAIXA': 'numero_unidade excede qtd_unidades do album',
+    'LIMITE_64_FAIXAS_ALBUM': 'Album nao pode ter mais que 64 faixas.',
+    'BARROCO_EXIGE_DDD_COMPOSITOR': 'Nao e possivel associar compositor Barroco a faixa sem tipo_gravacao = DDD.',
+    'BARROCO_FAIXA_UPDATE_GRAVACAO': 'Nao e permitido remover tipo_gravacao DDD de faixa com compositor Barroco.',
+    'VALIDAR_PRECO_ALBUM': 'Preco de compra excede 3x a media dos albuns DDD (media atual: R$ {media}).',
+    'VALIDAR_PRECO_APOS_FAIXA': 'Preco do album excede 3x a media dos albuns com todas as faixas DDD.',
+}
+
+# Regras que só olham os dados enviados (CHECKs e formato): valem para
+# recusar uma escrita real. DOWNLOAD com uma unidade usa o tipo_midia do
+# álbum na atualização, que não muda depois de criado.
+REGRAS_DO_CORPO = frozenset({
+    'CAMPO_OBRIGATORIO', 'VALOR_INVALIDO',
+    'VERIFICAR_ALBUM_PRECO', 'VERIFICAR_ALBUM_DATA_GRAVACAO', 'VERIFICAR_ALBUM_TIPO_MIDIA',
+    'VERIFICAR_ALBUM_QTD_UNIDADES', 'VERIFICAR_DOWNLOAD_UNIDADE_UNICA',
+    'VERIFICAR_FAIXA_NUMERO_UNIDADE', 'VERIFICAR_FAIXA_NUMERO_FAIXA', 'VERIFICAR_FAIXA_TEMPO',
+    'VERIFICAR_FAIXA_TIPO_GRAVACAO',
+})
+
+
+def _violacao(regra, mensagem, item=None, campo=None, **extras):
+    return dict({'regra': regra, 'mensagem': mensagem, 'item': item, 'campo': campo}, **extras)
+
+
+def _todo_ddd(album):
+    """Álbum que entra na média: tem faixas e todas são DDD."""
+    return album['qtd_faixas'] > 0 and album['qtd_nao_ddd'] == 0
+
+
+class AgregadosValidacao:
+    """Agregados por álbum e compositores usados pela pré-validação."""
+
+    def __init__(self):
+        self._trava = threading.RLock()
+        self._carregado = False
+        self._albuns = {}
+        self._soma_ddd = Decimal(0)
+        self._qtd_ddd = 0
+        self._compositores = {}        # cod_compositor -> é barroco
+        self._periodos_barrocos = set()
+
+    def _trocar_album(self, cod_album, album):
+        """Substitui (ou remove, com album=None) um álbum mantendo a soma DDD."""
+        antigo = self._albuns.pop(cod_album, None)
+        if antigo is not None and _todo_ddd(antigo):
+            self._soma_ddd -= antigo['preco']
+            self._qtd_ddd -= 1
+        if album is not None:
+            self._albuns[cod_album] = album
+            if _todo_ddd(album):
+                self._soma_ddd += album['preco']
+                self._qtd_ddd += 1
+
+    def _ler_albuns(self, cursor, filtro='', parametros=()):
+        cursor.execute(SQL_ALBUNS + filtro + SQL_ALBUNS_AGRUPAMENTO, parametros)
+        return {row[0]: {
+            'tipo_midia': row[1],
+            'qtd_unidades': row[2],
+            'preco': Decimal(row[3]),
+            'qtd_faixas': row[4],
+            'qtd_nao_ddd': row[5] or 0,
+        } for row in cursor.fetchall()}
+
+    def _ler_compositores(self, cursor):
+        cursor.execute(SQL_COMPOSITORES)
+        self._compositores = {}
+        self._periodos_barrocos = set()
+        for cod_compositor, cod_periodo, barroco in cursor.fetchall():
+            self._compositores[cod_compositor] = bool(barroco)
+            if barroco:
+                self._periodos_barrocos.add(cod_periodo)
+
+    def garantir_carregado(self):
+        """Carrega os agregados do banco no primeiro uso."""
+        if self._carregado:
+            return
+        with self._trava:
+            if self._carregado:
+                return
+            conexao = get_conexao(somente_leitura=False)
+            cursor = conexao.cursor()
+            try:
+                self._albuns, self._soma_ddd, self._qtd_ddd = {}, Decimal(0), 0
+                for cod_album, album in self._ler_albuns(cursor).items():
+                    self._trocar_album(cod_album, album)
+                self._ler_compositores(cursor)
+                self._carregado = True
+            finally:
+                cursor.close()
+                conexao.close()
+
+    def descartar(self):
+        """Esvazia os agregados; o próximo uso recarrega tudo do banco."""
+        with self._trava:
+            self._carregado = False
+            self._albuns, self._soma_ddd, self._qtd_ddd = {}, Decimal(0), 0
+            self._compositores, self._periodos_barrocos = {}, set()
+
+    def recarregar_album(self, cod_album):
+        """Relê os agregados de um álbum após uma escrita (chamar depois do commit)."""
+        if not self._carregado:
+            return
+        conexao = get_conexao(somente_leitura=False)
+        cursor = conexao.cursor()
+        try:
+            album = self._ler_albuns(cursor, ' WHERE a.cod_album = ?', (cod_album,)).get(cod_album)
+            with self._trava:
+                self._trocar_album(cod_album, album)
+        finally:
+            cursor.close()
+            conexao.close()
+
+    def compositores_barrocos(self, codigos):
+        """{cod_compositor: é barroco} para os códigos; desconhecidos ficam de fora.
+        
+        Um código desconhecido pode ser um compositor recém-criado, então a
+        tabela é relida uma vez antes de desistir dele.
+        """
+        self.garantir_carregado()
+        if any(c not in self._compositores for c in codigos):
+            conexao = get_conexao(somente_leitura=False)
+            cursor = conexao.cursor()
+            try:
+                with self._trava:
+                    self._ler_compositores(cursor)
+            finally:
+                cursor.close()
+                conexao.close()
+        return {c: self._compositores[c] for c in codigos if c in self._compositores}
+
+    def periodos_barrocos(self):
+        self.garantir_carregado()
+        return self._periodos_barrocos
+
+    def album(self, cod_album):
+        self.garantir_carregado()
+        return self._albuns.get(cod_album)
+
+    def media_ddd(self, excluidos=()):
+        """Média de preço dos álbuns todo DDD fora de `excluidos`, como no trigger.
+        
+        Retorna None quando não há álbum na média (o trigger não valida).
+        """
+        self.garantir_carregado()
+        with self._trava:
+            soma, quantidade = self._soma_ddd, self._qtd_ddd
+            for cod_album in set(excluidos):
+                album = self._albuns.get(cod_album)
+                if album is not None and _todo_ddd(album):
+                    soma -= album['preco']
+                    quantidade -= 1
+        if not quantidade:
+            return None
+        media = (soma / quantidade).quantize(ESCALA_MEDIA, ROUND_HALF_UP)
+        return media.quantize(CENTAVOS, ROUND_HALF_UP)
+
+
+# Instância única usada pelas rotas
+agregados = AgregadosValidacao()
+
+
+def recarregar_agregados_album(cod_album):
+    """Atualiza os agregados de um álbum (chamar depois do commit)."""
+    agregados.recarregar_album(cod_album)
+
+
+@assinar('albums', 'tracks')
+def _album_alterado(evento):
+    recarregar_agregados_album(evento['chave']['cod_album'])
+
+
+@ao_descartar
+def _descartar():
+    agregados.descartar()
+
+
+def _inteiro(dados, campo, item, violacoes):
+    valor = dados.get(campo)
+    if valor is None:
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        violacoes.append(_violacao('VALOR_INVALIDO', f'{campo} deve ser um inteiro', item, campo))
+        return None
+
+
+def _obrigatorios(dados, campos, item, violacoes):
+    for campo in campos:
+        if dados.get(campo) is None:
+            violacoes.append(_violacao('CAMPO_OBRIGATORIO', f'Campo obrigatório: {campo}', item, campo))
+
+
+def _preco_maximo(excluidos):
+    """3 x a média DDD fora de `excluidos` (None se o trigger não valida)."""
+    media = agregados.media_ddd(excluidos)
+    if not media:
+        return None, media
+    return FATOR_PRECO_DDD * media, media
+
+
+def validar_album(dados, cod_album=None):
+    """Violações ao criar (cod_album=None) ou atualizar um álbum com `dados`.
+    
+    Na atualização os campos ausentes valem como a rota os grava (NULL, e
+    qtd_unidades = 1). Levanta LookupError se o álbum não existe.
+    """
+    violacoes = []
+    atual = None
+    if cod_album is not None:
+        atual = agregados.album(cod_album)
+        if atual is None:
+            raise LookupError('Álbum não encontrado')
+    _obrigatorios(dados, CAMPOS_ALBUM if atual is None else CAMPOS_ALBUM[:-1], None, violacoes)
+    
+    preco = dados.get('preco_compra')
+    if preco is not None:
+        try:
+            preco = Decimal(str(preco)).quantize(CENTAVOS, ROUND_HALF_UP)
+        except InvalidOperation:
+            violacoes.append(_violacao('VALOR_INVALIDO', 'preco_compra deve ser numérico', None, 'preco_compra'))
+            preco = None
+    if preco is not None and preco <= 0:
+        violacoes.append(_violacao('VERIFICAR_ALBUM_PRECO', 'preco_compra deve ser maior que zero',
+                                   None, 'preco_compra'))
+    
+    data_gravacao = dados.get('data_gravacao')
+    if data_gravacao is not None:
+        try:
+            data_gravacao = date.fromisoformat(str(data_gravacao)[:10])
+        except ValueError:
+            violacoes.append(_violacao('VALOR_INVALIDO', 'data_gravacao deve estar no formato AAAA-MM-DD',
+                                       None, 'data_gravacao'))
+        else:
+            if data_gravacao <= DATA_GRAVACAO_MINIMA:
+                violacoes.append(_violacao('VERIFICAR_ALBUM_DATA_GRAVACAO',
+                                           'data_gravacao deve ser posterior a 2000-01-01',
+                                           None, 'data_gravacao'))
+    
+    tipo_midia = dados.get('tipo_midia') if atual is None else atual['tipo_midia']
+    if tipo_midia is not None and tipo_midia not in TIPOS_MIDIA:
+        violacoes.append(_violacao('VERIFICAR_ALBUM_TIPO_MIDIA',
+                                   'tipo_midia deve ser CD, VINIL ou DOWNLOAD', None, 'tipo_midia'))
+    
+    qtd_unidades = _inteiro(dados, 'qtd_unidades', None, violacoes) if 'qtd_unidades' in dados else 1
+    if qtd_unidades is not None:
+        if qtd_unidades < 1:
+            violacoes.append(_violacao('VERIFICAR_ALBUM_QTD_UNIDADES', 'qtd_unidades deve ser ao menos 1',
+                                       None, 'qtd_unidades'))
+        elif tipo_midia == 'DOWNLOAD' and qtd_unidades != 1:
+            violacoes.append(_violacao('VERIFICAR_DOWNLOAD_UNIDADE_UNICA',
+                                       'Álbuns DOWNLOAD têm exatamente uma unidade', None, 'qtd_unidades'))
+    
+    if preco is not None and preco > 0:
+        maximo, media = _preco_maximo(() if cod_album is None else (cod_album,))
+        if maximo is not None and preco > maximo:
+            violacoes.append(_violacao('VALIDAR_PRECO_ALBUM',
+                                       MENSAGENS['VALIDAR_PRECO_ALBUM'].format(media=media),
+                                       None, 'preco_compra', preco_maximo=float(maximo)))
+    return violacoes
+
+
+def _validar_faixa(chave, dados, item, album, atual, compositor_barroco, violacoes):
+    """Regras de uma faixa isolada (CHECKs e triggers por linha)."""
+    _, numero_unidade, numero_faixa = chave
+    tempo_execucao = _inteiro(dados, 'tempo_execucao', item, violacoes)
+    tipo_gravacao = dados.get('tipo_gravacao')
+    
+    if numero_unidade < 1:
+        violacoes.append(_violacao('VERIFICAR_FAIXA_NUMERO_UNIDADE', 'numero_unidade deve ser ao menos 1',
+                                   item, 'numero_unidade'))
+    if numero_faixa < 1:
+        violacoes.append(_violacao('VERIFICAR_FAIXA_NUMERO_FAIXA', 'numero_faixa deve ser ao menos 1',
+                                   item, 'numero_faixa'))
+    if tempo_execucao is not None and tempo_execucao <= 0:
+        violacoes.append(_violacao('VERIFICAR_FAIXA_TEMPO', 'tempo_execucao deve ser maior que zero',
+                                   item, 'tempo_execucao'))
+    if tipo_gravacao is not None and tipo_gravacao not in TIPOS_GRAVACAO:
+        violacoes.append(_violacao('VERIFICAR_FAIXA_TIPO_GRAVACAO', 'tipo_gravacao deve ser ADD ou DDD',
+                                   item, 'tipo_gravacao'))
+    
+    if album['tipo_midia'] == 'CD' and tipo_gravacao is None:
+        violacoes.append(_violacao('VALIDAR_TIPO_GRAVACAO_FAIXA',
+                                   MENSAGENS['VALIDAR_TIPO_GRAVACAO_FAIXA_CD'], item, 'tipo_gravacao'))
+    elif album['tipo_midia'] in ('VINIL', 'DOWNLOAD') and tipo_gravacao is not None:
+        violacoes.append(_violacao('VALIDAR_TIPO_GRAVACAO_FAIXA',
+                                   MENSAGENS['VALIDAR_TIPO_GRAVACAO_FAIXA_OUTRAS'], item, 'tipo_gravacao'))
+    
+    if album['tipo_midia'] == 'DOWNLOAD' and numero_unidade != 1:
+        violacoes.append(_violacao('VALIDAR_NUMERO_UNIDADE_FAIXA',
+                                   MENSAGENS['VALIDAR_NUMERO_UNIDADE_FAIXA_DOWNLOAD'], item, 'numero_unidade'))
+    elif numero_unidade > album['qtd_unidades']:
+        violacoes.append(_violacao('VALIDAR_NUMERO_UNIDADE_FAIXA',
+                                   MENSAGENS['VALIDAR_NUMERO_UNIDADE_FAIXA'], item, 'numero_unidade'))
+    
+    # Barroco exige DDD. Na atualização os compositores antigos ainda estão
+    # associados quando o UPDATE roda; os novos entram depois.
+    if tipo_gravacao != 'DDD':
+        if atual is not None and atual['periodos'] & agregados.periodos_barrocos():
+            violacoes.append(_violacao('BARROCO_FAIXA_UPDATE_GRAVACAO',
+                                       MENSAGENS['BARROCO_FAIXA_UPDATE_GRAVACAO'], item, 'tipo_gravacao'))
+        elif compositor_barroco:
+            violacoes.append(_violacao('BARROCO_EXIGE_DDD_COMPOSITOR',
+                                       MENSAGENS['BARROCO_EXIGE_DDD_COMPOSITOR'], item, 'compositores'))
+
+
+def _ler_chave_e_compositores(dados, chave_atual, item, violacoes):
+    """(chave da faixa ou None, códigos de compositores) de um item do lote."""
+    if chave_atual is None:
+        _obrigatorios(dados, CAMPOS_FAIXA, item, violacoes)
+        chave = tuple(_inteiro(dados, campo, item, violacoes) for campo in CAMPOS_FAIXA[:3])
+    else:
+        _obrigatorios(dados, CAMPOS_FAIXA[3:], item, violacoes)
+        chave = chave_atual
+    
+    compositores = dados.get('compositores') or []
+    try:
+        compositores = [int(c) for c in compositores]
+    except (TypeError, ValueError):
+        violacoes.append(_violacao('VALOR_INVALIDO', 'compositores deve ser uma lista de códigos',
+                                   item, 'compositores'))
+        compositores = []
+    return (None if None in chave else chave), compositores
+
+
+def _validar_escrita_faixas(itens):
+    """Violações de gravar `itens` numa única transação.
+    
+    Cada item é (dados, chave_atual): chave_atual é None numa inserção ou a
+    chave da faixa atualizada (e então os dados não trazem a chave).
+    """
+    violacoes = []
+    lidos = [_ler_chave_e_compositores(dados, chave_atual, item, violacoes)
+             for item, (dados, chave_atual) in enumerate(itens)]
+    estados = indice_faixas.estado_faixas([chave for chave, _ in lidos if chave is not None])
+    barrocos = agregados.compositores_barrocos({c for _, compositores in lidos for c in compositores})
+    
+    novas_por_album = {}
+    afetados = set()
+    vistas = set()
+    for item, ((dados, chave_atual), (chave, compositores)) in enumerate(zip(itens, lidos)):
+        if chave is None:
+            continue
+        album = agregados.album(chave[0])
+        if album is None:
+            violacoes.append(_violacao('FK_FAIXA_ALBUM', f'Álbum {chave[0]} não existe', item, 'cod_album'))
+            continue
+        if chave_atual is None and (chave in estados or chave in vistas):
+            violacoes.append(_violacao('PK_FAIXA', 'Já existe uma faixa com esta chave', item, 'numero_faixa'))
+            continue
+        vistas.add(chave)
+        
+        for c in compositores:
+            if c not in barrocos:
+                violacoes.append(_violacao('FK_FAIXA_COMPOSITOR_COMPOSITOR', f'Compositor {c} não existe',
+                                           item, 'compositores'))
+        _validar_faixa(chave, dados, item, album, estados.get(chave_atual),
+                       any(barrocos.get(c) for c in compositores), violacoes)
+        afetados.add(chave[0])
+        if chave_atual is None:
+            novas_por_album[chave[0]] = novas_por_album.get(chave[0], 0) + 1
+    
+    for cod_album, novas in sorted(novas_por_album.items()):
+        if agregados.album(cod_album)['qtd_faixas'] + novas > LIMITE_FAIXAS_ALBUM:
+            violacoes.append(_violacao('LIMITE_64_FAIXAS_ALBUM', MENSAGENS['LIMITE_64_FAIXAS_ALBUM'],
+                                       cod_album=cod_album))
+    
+    # O trigger compara o preço dos álbuns afetados com a média dos demais,
+    # mesmo que a escrita não mexa em preço nem em gravação
+    maximo, _ = _preco_maximo(afetados)
+    if maximo is not None:
+        for cod_album in sorted(afetados):
+            if agregados.album(cod_album)['preco'] > maximo:
+                violacoes.append(_violacao('VALIDAR_PRECO_APOS_FAIXA', MENSAGENS['VALIDAR_PRECO_APOS_FAIXA'],
+                                           cod_album=cod_album, preco_maximo=float(maximo)))
+    return violacoes
+
+
+def validar_faixas(faixas):
+    """Violações ao inserir as `faixas` (corpo de POST /api/tracks) numa transação."""
+    return _validar_escrita_faixas([(dados, None) for dados in faixas])
+
+
+def validar_atualizacao_faixa(chave, dados):
+    """Violações ao atualizar a faixa `chave` com `dados` (corpo do PUT).
+    
+    Levanta LookupError se a faixa não existe.
+    """
+    if not indice_faixas.estado_faixas([chave]):
+        raise LookupError('Faixa não encontrada')
+    return _validar_escrita_faixas([(dados, chave)])
+
+
+def resposta_dry_run(violacoes):
+    """Corpo da resposta de ?dry_run=1."""
+    return {'valido': not violacoes, 'violacoes': violacoes}
+
+
+def recusas(violacoes):
+    """Violações que recusam uma escrita real (sem dry_run): as do corpo.
+    
+    As que vêm dos caches (FK, PK, triggers de álbum e de compositor) ficam
+    para o banco, que tem a palavra final.
+    """
+    return [v for v in violacoes if v['regra'] in REGRAS_DO_CORPO]
+
+
+def resposta_recusa(violacoes):
+    """Corpo da resposta 400 quando a escrita é recusada pela pré-validação."""
+    mensagens = list(dict.fromkeys(v['mensagem'] for v in violacoes))
+    return {'error': True, 'message': '; '.join(mensagens), 'violacoes': violacoes}
@@ -0,0 +1,11 @@
+# backend/tests/conftest.py
+# Configuração comum dos testes (rodar a partir de backend/: python -m pytest)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Os testes não sobem as threads de aquecimento nem de tarefas do app
+os.environ.setdefault('SPOTPER_AQUECIMENTO', '0')
+os.environ.setdefault('SPOTPER_TAREFAS', '0')
@@ -0,0 +1,126 @@
+# backend/tests/test_admission.py
+# Admissão: uma classe saturada enfileira, recusa o excesso com 503 +
+# Retry-After e não impede as outras classes de responder
+
+import threading
+import time
+
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+from utils import admission
+from utils.admission import configurar_admissao
+
+LIMITE = 2
+FILA = 2
+RETRY_AFTER = 7
+# Muito abaixo dos 5 s em que os relatórios ficam travados
+LATENCIA_MAXIMA_REPRODUCAO = 0.5
+
+
+def _aguardar(condicao, prazo=5.0):
+    limite = time.monotonic() + prazo
+    while not condicao():
+        if time.monotonic() > limite:
+            raise AssertionError('condição não atingida no prazo')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def servidor():
+    """App com uma classe de relatórios lenta e uma de reprodução rápida."""
+    admission._classes.clear()
+    admission._rotas.clear()
+    estado = {'liberar': threading.Event(), 'simultaneas': 0, 'maximo': 0}
+    trava = threading.Lock()
+
+    relatorios = Blueprint('relatorios', __name__)
+    reproducao = Blueprint('reproducao', __name__)
+
+    @relatorios.route('/relatorio')
+    def relatorio():
+        with trava:
+            estado['simultaneas'] += 1
+            estado['maximo'] = max(estado['maximo'], estado['simultaneas'])
+        estado['liberar'].wait(5)
+        with trava:
+            estado['simultaneas'] -= 1
+        return jsonify({'ok': True})
+
+    @reproducao.route('/tocar')
+    def tocar():
+        return jsonify({'ok': True})
+
+    app = Flask(__name__)
+    app.register_blueprint(relatorios)
+    app.register_blueprint(reproducao)
+    configurar_admissao(app, classes={
+        'relatorio': {'limite': LIMITE, 'fila': FILA, 'espera_maxima': 5.0, 'retry_after': RETRY_AFTER},
+        'reproducao': {'limite': 1, 'fila': 0},
+    }, rotas={'relatorios': 'relatorio', 'reproducao': 'reproducao'})
+
+    yield app, estado
+    estado['liberar'].set()
+    admission._classes.clear()
+    admission._rotas.clear()
+
+
+def _em_paralelo(app, url, quantidade):
+    respostas = []
+
+    def requisitar():
+        respostas.append(app.test_client().get(url))
+
+    threads = [threading.Thread(target=requisitar) for _ in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    return threads, respostas
+
+
+def test_classe_saturada_enfileira_recusa_e_nao_afeta_outras(servidor):
+    app, estado = servidor
+    classe = admission._classes['relatorio']
+
+    ativas, respostas = _em_paralelo(app, '/relatorio', LIMITE)
+    _aguardar(lambda: classe.ativas == LIMITE)
+    na_fila, respostas_fila = _em_paralelo(app, '/relatorio', FILA)
+    _aguardar(lambda: classe.esperando == FILA)
+
+    # Fila cheia: recusa imediata com Retry-After
+    excedente = app.test_client().get('/relatorio')
+    assert excedente.status_code == 503
+    assert excedente.headers['Retry-After'] == str(RETRY_AFTER)
+
+    # A reprodução continua respondendo com os relatórios travados, sem
+    # esperar por eles: a latência fica longe da espera dos relatórios
+    cliente = app.test_client()
+    latencias = []
+    for _ in range(20):
+        inicio = time.perf_counter()
+        assert cliente.get('/tocar').status_code == 200
+        latencias.append(time.perf_counter() - inicio)
+    assert max(latencias) < LATENCIA_MAXIMA_REPRODUCAO
+
+    estado['liberar'].set()
+    for thread in ativas + na_fila:
+        thread.join(5)
+    assert [r.status_code for r in respostas + respostas_fila] == [200] * (LIMITE + FILA)
+    assert estado['maximo'] == LIMITE
+    assert classe.ativas == 0 and classe.esperando == 0
+
+
+def test_espera_maxima_na_fila_recusa(servidor):
+    app, estado = servidor
+    classe = admission._classes['relatorio']
+    classe.espera_maxima = 0.1
+
+    ativas, _ = _em_paralelo(app, '/relatorio', LIMITE)
+    _aguardar(lambda: classe.ativas == LIMITE)
+    resposta = app.test_client().get('/relatorio')
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == str(RETRY_AFTER)
+
+    estado['liberar'].set()
+    for thread in ativas:
+        thread.join(5)
+    assert classe.ativas == 0
@@ -0,0 +1,86 @@
+# backend/tests/test_associations.py
+# sincronizar(): instruções enviadas ao banco para cada tipo de diferença
+
+import json
+
+from utils.associations import FAIXA_COMPOSITOR, TELEFONE_GRAVADORA, sincronizar
+
+FAIXA = (1, 1, 3)
+
+
+class CursorFalso:
+    """Responde à leitura com `atuais` e registra cada instrução executada."""
+
+    def __init__(self, atuais):
+        self.atuais = atuais
+        self.instrucoes = []
+        self._resultado = []
+
+    def execute(self, sql, parametros=()):
+        self.instrucoes.append((sql, tuple(parametros)))
+        self._resultado = list(self.atuais) if sql.lstrip().startswith('SELECT') else []
+
+    def fetchall(self):
+        return self._resultado
+
+    def escritas(self):
+        return [(sql, parametros) for sql, parametros in self.instrucoes
+                if not sql.lstrip().startswith('SELECT')]
+
+
+def _json(parametros):
+    """Linhas do lote OPENJSON enviado numa instrução."""
+    return next(json.loads(p) for p in parametros if isinstance(p, str))
+
+
+def test_sem_diferenca_nao_escreve():
+    cursor = CursorFalso([(7,), (3,), (5,)])
+    resultado = sincronizar(cursor, FAIXA_COMPOSITOR, FAIXA, [5, 7, 3])
+
+    assert cursor.instrucoes == [(FAIXA_COMPOSITOR.sql_ler, FAIXA)]
+    assert resultado == {'inseridos': [], 'removidos': [], 'alterados': []}
+
+
+def test_sem_diferenca_com_atributos_nao_escreve():
+    cursor = CursorFalso([('8533-0000', 'COMERCIAL')])
+    sincronizar(cursor, TELEFONE_GRAVADORA, (4,), {'8533-0000': ('COMERCIAL',)})
+
+    assert cursor.escritas() == []
+
+
+def test_insercoes_e_remocoes_em_uma_instrucao_cada():
+    atuais = [(codigo,) for codigo in range(1, 51)]
+    desejados = list(range(26, 101))
+    cursor = CursorFalso(atuais)
+    resultado = sincronizar(cursor, FAIXA_COMPOSITOR, FAIXA, desejados)
+
+    escritas = cursor.escritas()
+    assert [sql for sql, _ in escritas] == [FAIXA_COMPOSITOR.sql_remover, FAIXA_COMPOSITOR.sql_inserir]
+    remover, inserir = (parametros for _, parametros in escritas)
+    assert remover[:3] == FAIXA and inserir[:3] == FAIXA
+    assert _json(remover) == [{'cod_compositor': c} for c in range(1, 26)]
+    assert _json(inserir) == [{'cod_compositor': c} for c in range(51, 101)]
+    assert resultado['removidos'] == list(range(1, 26))
+    assert resultado['inseridos'] == list(range(51, 101))
+
+
+def test_atributo_alterado_em_um_update():
+    cursor = CursorFalso([('8533-0000', 'COMERCIAL'), ('8533-1111', 'FAX'), ('8533-2222', 'CELULAR')])
+    desejados = {'8533-0000': ('FAX',), '8533-1111': ('COMERCIAL',), '8533-2222': ('CELULAR',)}
+    resultado = sincronizar(cursor, TELEFONE_GRAVADORA, (4,), desejados)
+
+    escritas = cursor.escritas()
+    assert len(escritas) == 1
+    sql, parametros = escritas[0]
+    assert sql == TELEFONE_GRAVADORA.sql_alterar
+    assert parametros[1:] == (4,)
+    assert _json(parametros) == [{'telefone': '8533-0000', 'tipo_telefone': 'FAX'},
+                                 {'telefone': '8533-1111', 'tipo_telefone': 'COMERCIAL'}]
+    assert resultado['alterados'] == ['8533-0000', '8533-1111']
+
+
+def test_esvaziar_remove_tudo_em_uma_instrucao():
+    cursor = CursorFalso([(1,), (2,), (3,)])
+    sincronizar(cursor, FAIXA_COMPOSITOR, FAIXA, [])
+
+    assert [sql for sql, _ in cursor.escritas()] == [FAIXA_COMPOSITOR.sql_remover]
@@ -0,0 +1,97 @@
+# backend/tests/test_coalescing.py
+# Coalescência: GETs idênticos concorrentes compartilham uma única execução
+
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from config.database import CABECALHO_ESCRITA
+from utils import coalescing
+from utils.coalescing import coalescer
+
+REQUISICOES = 8
+
+
+@pytest.fixture
+def servidor():
+    """App mínimo com uma rota coalescida que conta as execuções."""
+    coalescing._chamadas.clear()
+    app = Flask(__name__)
+    estado = {'execucoes': 0, 'entrou': threading.Event(), 'liberar': threading.Event()}
+
+    @app.route('/lista')
+    @coalescer()
+    def lista():
+        estado['execucoes'] += 1
+        estado['entrou'].set()
+        estado['liberar'].wait(5)
+        return jsonify({'execucao': estado['execucoes']})
+
+    yield app, estado
+    estado['liberar'].set()
+    coalescing._chamadas.clear()
+
+
+def _get_concorrentes(app, quantidade, cabecalhos=None):
+    respostas = [None] * quantidade
+
+    def requisitar(i):
+        respostas[i] = app.test_client().get('/lista', headers=cabecalhos or {})
+
+    threads = [threading.Thread(target=requisitar, args=(i,)) for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    return threads, respostas
+
+
+def test_gets_concorrentes_executam_uma_vez(servidor):
+    app, estado = servidor
+    threads, respostas = _get_concorrentes(app, REQUISICOES)
+    assert estado['entrou'].wait(5)
+    time.sleep(0.2)  # os demais chegam e ficam aguardando o líder
+    estado['liberar'].set()
+    for thread in threads:
+        thread.join(5)
+
+    assert estado['execucoes'] == 1
+    assert [r.status_code for r in respostas] == [200] * REQUISICOES
+    assert {r.get_json()['execucao'] for r in respostas} == {1}
+
+
+def test_janela_de_graca_reaproveita_resposta_pronta(servidor):
+    app, estado = servidor
+    estado['liberar'].set()
+    cliente = app.test_client()
+    assert cliente.get('/lista').get_json() == {'execucao': 1}
+    assert cliente.get('/lista').get_json() == {'execucao': 1}
+    assert estado['execucoes'] == 1
+
+
+def test_escrita_recente_nao_reaproveita_execucao_anterior(servidor):
+    app, estado = servidor
+    estado['liberar'].set()
+    cliente = app.test_client()
+    cabecalhos = {CABECALHO_ESCRITA: f'{time.time():.3f}'}
+    assert cliente.get('/lista', headers=cabecalhos).get_json() == {'execucao': 1}
+
+    # Nova escrita depois da execução anterior: a resposta pronta é antiga
+    time.sleep(0.01)
+    cabecalhos = {CABECALHO_ESCRITA: f'{time.time():.3f}'}
+    assert cliente.get('/lista', headers=cabecalhos).get_json() == {'execucao': 2}
+    assert estado['execucoes'] == 2
+
+
+def test_escrita_recente_compartilha_execucao_posterior(servidor):
+    app, estado = servidor
+    cabecalhos = {CABECALHO_ESCRITA: f'{time.time() - 1:.3f}'}
+    threads, respostas = _get_concorrentes(app, REQUISICOES, cabecalhos)
+    assert estado['entrou'].wait(5)
+    time.sleep(0.2)
+    estado['liberar'].set()
+    for thread in threads:
+        thread.join(5)
+
+    assert estado['execucoes'] == 1
+    assert {r.get_json()['execucao'] for r in respostas} == {1}
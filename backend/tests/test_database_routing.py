@@ -0,0 +1,155 @@
+# backend/tests/test_database_routing.py
+# Roteamento das conexões: GET na réplica, read-your-writes pelo token de
+# escrita e volta ao primário quando a réplica falha
+
+import time
+
+import pyodbc
+import pytest
+from flask import Flask
+
+from config import database
+from config.database import CABECALHO_ESCRITA, get_conexao
+
+
+class ConexaoFalsa:
+    """Conexão de um dos dois bancos locais de teste."""
+
+    def __init__(self, destino, timeout):
+        self.destino = destino
+        self.timeout_abertura = timeout
+        self.timeout = 0
+        self.instrucoes = []
+        self.fechada = False
+
+    def execute(self, sql):
+        self.instrucoes.append(sql)
+
+    def cursor(self):
+        return self
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.fechada = True
+
+
+class Bancos:
+    """Fábrica de conexões no lugar de pyodbc.connect: primário e réplica."""
+
+    def __init__(self):
+        self.aberturas = []
+        self.replica_fora = False
+
+    def connect(self, conexao_string, timeout=0):
+        destino = 'replica' if conexao_string == database.CONEXAO_STRING_LEITURA else 'primario'
+        self.aberturas.append(destino)
+        if destino == 'replica' and self.replica_fora:
+            raise pyodbc.Error('08001', 'Login timeout expired')
+        return ConexaoFalsa(destino, timeout)
+
+
+@pytest.fixture
+def bancos(monkeypatch):
+    bancos = Bancos()
+    monkeypatch.setattr(database.pyodbc, 'connect', bancos.connect)
+    # Pools e estado da réplica novos a cada teste
+    monkeypatch.setattr(database, '_pool_primario', database._Pool(database.CONEXAO_STRING))
+    monkeypatch.setattr(database, '_pool_primario_leitura',
+                        database._Pool(database.CONEXAO_STRING, database.ISOLAMENTO_LEITURA))
+    monkeypatch.setattr(database, '_pool_replica',
+                        database._Pool(database.CONEXAO_STRING_LEITURA, database.ISOLAMENTO_LEITURA,
+                                       database.TIMEOUT_LEITURA))
+    monkeypatch.setattr(database, '_estado_replica', {'falhou_em': None})
+    return bancos
+
+
+app = Flask(__name__)
+
+
+def _conectar(metodo='GET', token=None, **argumentos):
+    """Conexão obtida dentro de uma requisição `metodo` (com o token, se houver)."""
+    cabecalhos = {CABECALHO_ESCRITA: token} if token is not None else {}
+    with app.test_request_context('/', method=metodo, headers=cabecalhos):
+        conexao = get_conexao(**argumentos)
+        destino = conexao.destino
+        conexao.close()
+    return destino
+
+
+def test_get_vai_para_a_replica(bancos):
+    with app.test_request_context('/', method='GET'):
+        conexao = get_conexao()
+        assert conexao.destino == 'replica'
+        assert conexao.timeout_abertura == database.TIMEOUT_LEITURA
+        assert conexao.instrucoes == [f'SET TRANSACTION ISOLATION LEVEL {database.ISOLAMENTO_LEITURA}']
+        conexao.close()
+
+
+@pytest.mark.parametrize('metodo', ['POST', 'PUT', 'DELETE'])
+def test_escritas_vao_para_o_primario(bancos, metodo):
+    assert _conectar(metodo) == 'primario'
+    assert bancos.aberturas == ['primario']
+
+
+def test_escrita_recente_le_do_primario(bancos):
+    assert _conectar(token=f'{time.time() - 1:.3f}') == 'primario'
+    assert bancos.aberturas == ['primario']
+
+
+def test_token_fora_da_janela_volta_para_a_replica(bancos):
+    assert _conectar(token=f'{time.time() - database.ATRASO_REPLICA - 1:.3f}') == 'replica'
+
+
+def test_token_malformado_le_do_primario(bancos):
+    assert _conectar(token='abc') == 'primario'
+
+
+def test_leitura_no_primario_por_falha_usa_isolamento_de_leitura(bancos):
+    bancos.replica_fora = True
+    with app.test_request_context('/', method='GET'):
+        conexao = get_conexao()
+        assert conexao.destino == 'primario'
+        assert conexao.instrucoes == [f'SET TRANSACTION ISOLATION LEVEL {database.ISOLAMENTO_LEITURA}']
+        conexao.close()
+    # Read-your-writes lê como a escrita: primário no nível padrão
+    with app.test_request_context('/', method='GET', headers={CABECALHO_ESCRITA: f'{time.time():.3f}'}):
+        conexao = get_conexao()
+        assert conexao.instrucoes == []
+        conexao.close()
+
+
+def test_fora_de_requisicao(bancos):
+    assert get_conexao().destino == 'primario'
+    assert get_conexao(somente_leitura=True).destino == 'replica'
+    assert get_conexao(somente_leitura=False).destino == 'primario'
+
+
+def test_falha_da_replica_usa_o_primario_durante_a_espera(bancos):
+    bancos.replica_fora = True
+    assert _conectar() == 'primario'
+    assert bancos.aberturas == ['replica', 'primario']
+
+    # Dentro de ESPERA_APOS_FALHA a réplica nem é tentada
+    bancos.replica_fora = False
+    assert _conectar() == 'primario'
+    assert bancos.aberturas == ['replica', 'primario']      # a conexão do primário foi reaproveitada
+
+    # Passada a espera, a réplica volta a ser usada
+    database._estado_replica['falhou_em'] -= database.ESPERA_APOS_FALHA + 1
+    assert _conectar() == 'replica'
+    assert bancos.aberturas[-1] == 'replica'
+
+
+def test_sem_replica_configurada(bancos, monkeypatch):
+    monkeypatch.setattr(database, 'SERVER_LEITURA', None)
+    assert _conectar() == 'primario'
+    assert 'replica' not in bancos.aberturas
+
+
+def test_conexoes_devolvidas_sao_reaproveitadas_por_destino(bancos):
+    for _ in range(3):
+        _conectar()
+        _conectar('POST')
+    assert bancos.aberturas == ['replica', 'primario']
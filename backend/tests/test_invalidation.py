@@ -0,0 +1,212 @@
+# backend/tests/test_invalidation.py
+# Difusão de invalidações entre processos locais (transporte unix)
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from utils import invalidation
+from utils.events import BarramentoEventos, ENTIDADES
+from utils.invalidation import DifusaoInvalidacoes
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Worker de teste: liga a difusão no diretório recebido, publica eventos
+# locais a cada "publicar N" lido da entrada e escreve na saída os eventos
+# recebidos dos outros processos e os descartes do barramento
+WORKER = r"""
+import json, sys, threading
+from utils import invalidation
+from utils.events import barramento, ENTIDADES
+
+invalidation.INTERVALO_BATIDA = 0.02   # batidas concorrendo com os eventos
+saida = threading.Lock()
+
+def escrever(linha):
+    with saida:
+        print(linha, flush=True)
+
+def recebido(evento):
+    if 'origem' in evento:
+        escrever('recebido ' + json.dumps([evento['origem'], evento['chave']]))
+
+barramento.assinar(ENTIDADES, recebido)
+barramento.ao_descartar(lambda: escrever('descarte'))
+difusao = invalidation.iniciar_difusao('unix://' + sys.argv[1])
+escrever('pronto ' + difusao.no)
+
+contador = 0
+for comando in sys.stdin:
+    if comando.startswith('publicar'):
+        for _ in range(int(comando.split()[1])):
+            contador += 1
+            barramento.publicar('tracks', 'update', {'cod_album': contador})
+"""
+
+
+class Worker:
+    """Processo com a difusão ligada; as linhas da saída vão para uma fila."""
+
+    def __init__(self, diretorio):
+        self.processo = subprocess.Popen([sys.executable, '-c', WORKER, diretorio], cwd=BACKEND,
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        self.linhas = queue.Queue()
+        threading.Thread(target=self._ler, daemon=True).start()
+        self.no = self.esperar('pronto').split()[1]
+
+    def _ler(self):
+        for linha in self.processo.stdout:
+            self.linhas.put(linha.strip())
+
+    def esperar(self, prefixo, prazo=10.0):
+        limite = time.monotonic() + prazo
+        while True:
+            linha = self.linhas.get(timeout=max(limite - time.monotonic(), 0.01))
+            if linha.startswith(prefixo):
+                return linha
+
+    def publicar(self, quantidade):
+        self.processo.stdin.write(f'publicar {quantidade}\n')
+        self.processo.stdin.flush()
+
+    def recebidos(self, quantidade, prazo=10.0):
+        """Os próximos `quantidade` eventos recebidos, falhando em descartes."""
+        eventos = []
+        while len(eventos) < quantidade:
+            linha = self.esperar('', prazo)
+            assert linha != 'descarte', f'descarte após {len(eventos)} eventos'
+            eventos.append(json.loads(linha.split(' ', 1)[1]))
+        return eventos
+
+    def sem_mais_linhas(self, espera=0.3):
+        time.sleep(espera)
+        return self.linhas.empty()
+
+    def encerrar(self):
+        self.processo.stdin.close()
+        self.processo.wait(5)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    criados = []
+
+    def criar(quantidade):
+        for _ in range(quantidade):
+            criados.append(Worker(str(tmp_path)))
+        return criados
+
+    yield criar
+    for worker in criados:
+        worker.encerrar()
+
+
+def test_eventos_chegam_aos_outros_processos(workers):
+    origem, *destinos = workers(3)
+    # Deixa as batidas iniciais circularem antes dos eventos
+    time.sleep(0.2)
+
+    origem.publicar(50)
+    esperado = [[origem.no, {'cod_album': i}] for i in range(1, 51)]
+    for destino in destinos:
+        assert destino.recebidos(50) == esperado
+
+    destinos[0].publicar(3)
+    assert origem.recebidos(3) == [[destinos[0].no, {'cod_album': i}] for i in range(1, 4)]
+    assert destinos[1].recebidos(3) == [[destinos[0].no, {'cod_album': i}] for i in range(1, 4)]
+
+    # A própria escrita não volta pela difusão, e nada foi descartado
+    assert all(worker.sem_mais_linhas() for worker in (origem, *destinos))
+
+
+class _Parar(BaseException):
+    """Interrompe o laço de envio (que só trata Exception)."""
+
+
+class TransporteMemoria(invalidation.Transporte):
+    """Guarda as mensagens enviadas; para o laço depois de `limite` envios."""
+
+    def __init__(self, limite):
+        self.enviadas = []
+        self.limite = limite
+
+    def iniciar(self, no, receber):
+        pass
+
+    def enviar(self, mensagem):
+        self.enviadas.append(mensagem)
+        if len(self.enviadas) == self.limite:
+            raise _Parar
+        return 0
+
+
+class FilaComEscritaNaBatida(queue.Queue):
+    """Na primeira espera vazia, um evento é enfileirado antes do Empty."""
+
+    def __init__(self, difusao):
+        super().__init__()
+        self.difusao = difusao
+        self.primeira = True
+
+    def get(self, block=True, timeout=None):
+        if self.primeira:
+            self.primeira = False
+            self.difusao._difundir({'entidade': 'tracks', 'acao': 'update', 'chave': {'cod_album': 1},
+                                    'dados': None})
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_batida_nao_anuncia_evento_ainda_na_fila(monkeypatch):
+    barramento = BarramentoEventos()
+    recebidos = []
+    barramento.assinar(ENTIDADES, recebidos.append)
+    monkeypatch.setattr(invalidation, 'barramento', barramento)
+
+    transporte = TransporteMemoria(limite=2)
+    emissor = DifusaoInvalidacoes(transporte)
+    emissor._fila = FilaComEscritaNaBatida(emissor)
+    with pytest.raises(_Parar):
+        emissor._laco_envio()
+
+    mensagens = [json.loads(dados) for dados in transporte.enviadas]
+    assert [m['seq'] for m in mensagens] == [0, 1]
+    assert 'evento' not in mensagens[0] and 'evento' in mensagens[1]
+
+    # Um par que começou depois recebe a batida e em seguida o evento
+    receptor = DifusaoInvalidacoes(TransporteMemoria(limite=0))
+    for dados in transporte.enviadas:
+        receptor._receber(dados)
+    assert [evento['chave'] for evento in recebidos] == [{'cod_album': 1}]
+    assert barramento.sequencia == 1  # nenhum descarte
+
+
+def test_salto_de_seq_descarta(monkeypatch):
+    barramento = BarramentoEventos()
+    descartes = []
+    barramento.ao_descartar(lambda: descartes.append(True))
+    monkeypatch.setattr(invalidation, 'barramento', barramento)
+
+    receptor = DifusaoInvalidacoes(TransporteMemoria(limite=0))
+    mensagem = {'no': 'outro', 'inicio': receptor.inicio + 1, 'evento': {
+        'entidade': 'tracks', 'acao': 'update', 'chave': {'cod_album': 1}, 'dados': None}}
+    receptor._receber(json.dumps(dict(mensagem, seq=1)).encode())
+    receptor._receber(json.dumps(dict(mensagem, seq=1)).encode())   # repetida
+    assert descartes == []
+    receptor._receber(json.dumps(dict(mensagem, seq=3)).encode())   # seq 2 perdida
+    assert descartes == [True]
+
+
+def test_transporte_incompleto_nao_instancia():
+    class SoEnvia(invalidation.Transporte):
+        def enviar(self, mensagem):
+            return 0
+
+    with pytest.raises(TypeError):
+        SoEnvia()
@@ -0,0 +1,313 @@
+# backend/tests/test_jobs.py
+# Tarefas em segundo plano: execução, progresso, cancelamento, reivindicação
+# no máximo uma vez e recolhimento das abandonadas, com a tabela TAREFA em
+# memória no lugar de _executar_sql
+
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from utils import jobs
+from utils.jobs import COLUNAS, ContextoTarefa, ExecutorTarefas, TarefaCancelada, cancelar_tarefa
+
+
+class TabelaTarefas:
+    """TAREFA em memória: responde a cada comando de utils/jobs.py pelo seu texto."""
+
+    def __init__(self):
+        self.linhas = {}
+        self.comandos = []
+        self._trava = threading.Lock()
+
+    def criar(self, tipo='eco', parametros=None, **campos):
+        cod_tarefa = len(self.linhas) + 1
+        linha = dict({c: None for c in COLUNAS}, cod_tarefa=cod_tarefa, tipo=tipo,
+                     parametros=json.dumps(parametros or {}), estado='PENDENTE', progresso=0,
+                     data_criacao=datetime.now(), cancelar=False)
+        self.linhas[cod_tarefa] = dict(linha, **campos)
+        return cod_tarefa
+
+    def __call__(self, sql, parametros=(), buscar=False):
+        with self._trava:
+            self.comandos.append(sql)
+            linhas = self._executar(sql, parametros)
+        return linhas if buscar else len(linhas)
+
+    def _executando(self, cod_tarefa, instancia):
+        linha = self.linhas.get(cod_tarefa)
+        if linha and linha['estado'] == 'EXECUTANDO' and linha['instancia'] == instancia:
+            return linha
+        return None
+
+    def _executar(self, sql, parametros):
+        if 'INSERT INTO TAREFA' in sql:
+            return [(self.criar(parametros[0], json.loads(parametros[1])),)]
+        if 'WITH proxima' in sql:
+            tipos, instancia = json.loads(parametros[0]), parametros[1]
+            for linha in self.linhas.values():
+                if linha['estado'] == 'PENDENTE' and linha['tipo'] in tipos:
+                    linha.update(estado='EXECUTANDO', instancia=instancia, data_sinal=time.time())
+                    return [(linha['cod_tarefa'], linha['tipo'], linha['parametros'])]
+            return []
+        if 'SET progresso' in sql:
+            progresso, mensagem, cod_tarefa, instancia = parametros
+            linha = self._executando(cod_tarefa, instancia)
+            if not linha:
+                return []
+            linha.update(progresso=progresso, mensagem=mensagem, data_sinal=time.time())
+            return [(linha['cancelar'],)]
+        if 'SET estado = ?, resultado' in sql:
+            estado, resultado, erro, _, cod_tarefa, instancia = parametros
+            linha = self._executando(cod_tarefa, instancia)
+            if not linha:
+                return []
+            linha.update(estado=estado, resultado=resultado, erro=erro, data_fim=datetime.now())
+            if estado == 'CONCLUIDA':
+                linha['progresso'] = 100
+            return [linha]
+        if "SET estado = 'CANCELADA'" in sql:
+            linha = self.linhas.get(parametros[0])
+            if linha and linha['estado'] == 'PENDENTE':
+                linha.update(estado='CANCELADA', data_fim=datetime.now())
+                return [linha]
+            return []
+        if 'SET cancelar = 1' in sql:
+            linha = self.linhas.get(parametros[0])
+            if linha and linha['estado'] == 'EXECUTANDO':
+                linha['cancelar'] = True
+                return [linha]
+            return []
+        if 'OUTPUT inserted.cod_tarefa, inserted.cancelar' in sql:
+            afetadas = [l for l in self.linhas.values()
+                        if l['estado'] == 'EXECUTANDO' and l['instancia'] == parametros[0]]
+            for linha in afetadas:
+                linha['data_sinal'] = time.time()
+            return [(l['cod_tarefa'], l['cancelar']) for l in afetadas]
+        if "SET estado = 'FALHOU'" in sql:
+            limite = time.time() - parametros[0]
+            afetadas = [l for l in self.linhas.values()
+                        if l['estado'] == 'EXECUTANDO' and l['data_sinal'] < limite]
+            for linha in afetadas:
+                linha.update(estado='FALHOU', data_fim=datetime.now(), erro='Interrompida')
+            return afetadas
+        if 'WHERE cod_tarefa = ?' in sql:
+            linha = self.linhas.get(parametros[0])
+            if not linha:
+                return []
+            # data_sinal é guardada em segundos para comparar com TEMPO_ABANDONO
+            sinal = linha['data_sinal'] and datetime.fromtimestamp(linha['data_sinal'])
+            return [tuple(sinal if c == 'data_sinal' else linha[c] for c in COLUNAS)]
+        if 'ORDER BY cod_tarefa DESC' in sql:
+            return []
+        raise AssertionError(f'Comando inesperado: {sql}')
+
+
+class PoolFalso:
+    """Guarda as submissões em vez de executá-las."""
+
+    def __init__(self):
+        self.submetidas = []
+
+    def submit(self, funcao, *argumentos):
+        self.submetidas.append(argumentos)
+
+
+def _eco(contexto, **parametros):
+    return parametros
+
+
+def _falha(contexto, **parametros):
+    raise RuntimeError('arquivo inválido')
+
+
+def _cancela(contexto, **parametros):
+    raise TarefaCancelada()
+
+
+def _nao_serializavel(contexto, **parametros):
+    return {'quando': datetime.now()}
+
+
+@pytest.fixture
+def tabela(monkeypatch):
+    tabela = TabelaTarefas()
+    monkeypatch.setattr(jobs, '_executar_sql', tabela)
+    monkeypatch.setattr(jobs, '_tipos', {'eco': _eco, 'falha': _falha, 'cancela': _cancela,
+                                         'nao_serializavel': _nao_serializavel})
+    monkeypatch.setattr(jobs.executor, 'acordar', lambda: None)
+    return tabela
+
+
+def _executor():
+    executor = ExecutorTarefas()
+    executor.trabalhadores = 2
+    executor._pool = PoolFalso()
+    return executor
+
+
+def _rodar(tabela, tipo, parametros=None):
+    """Cria, reivindica e executa uma tarefa; retorna a linha final."""
+    cod_tarefa = tabela.criar(tipo, parametros)
+    executor = _executor()
+    assert executor._reivindicar()
+    contexto, tipo_reivindicado, parametros_reivindicados = executor._pool.submetidas[0]
+    executor._executar(contexto, tipo_reivindicado, parametros_reivindicados)
+    assert executor._em_execucao == {}
+    return tabela.linhas[cod_tarefa]
+
+
+# Execução
+
+def test_tarefa_concluida_grava_resultado(tabela):
+    linha = _rodar(tabela, 'eco', {'arquivo': 'a.csv'})
+    assert linha['estado'] == 'CONCLUIDA'
+    assert json.loads(linha['resultado']) == {'arquivo': 'a.csv'}
+    assert linha['progresso'] == 100 and linha['erro'] is None
+
+
+@pytest.mark.parametrize('tipo, erro', [
+    ('falha', 'arquivo inválido'),
+    ('nao_serializavel', 'is not JSON serializable'),
+])
+def test_tarefa_que_falha(tabela, tipo, erro):
+    linha = _rodar(tabela, tipo)
+    assert linha['estado'] == 'FALHOU'
+    assert erro in linha['erro']
+    assert linha['resultado'] is None
+
+
+def test_tarefa_cancelada_pela_funcao(tabela):
+    linha = _rodar(tabela, 'cancela')
+    assert linha['estado'] == 'CANCELADA' and linha['resultado'] is None
+
+
+def test_fim_nao_sobrescreve_tarefa_recolhida(tabela):
+    cod_tarefa = tabela.criar('eco')
+    executor = _executor()
+    executor._reivindicar()
+    contexto, tipo, parametros = executor._pool.submetidas[0]
+    tabela.linhas[cod_tarefa]['estado'] = 'FALHOU'       # dada como abandonada no meio
+    executor._executar(contexto, tipo, parametros)
+    assert tabela.linhas[cod_tarefa]['estado'] == 'FALHOU'
+    assert tabela.linhas[cod_tarefa]['resultado'] is None
+
+
+# Progresso e cancelamento
+
+def test_progresso_grava_no_maximo_a_cada_intervalo(tabela):
+    cod_tarefa = tabela.criar('eco', estado='EXECUTANDO', instancia='eu')
+    contexto = ContextoTarefa(cod_tarefa, 'eu')
+    contexto.progresso(0.25, 'lendo')
+    contexto.progresso(0.5)                               # dentro do intervalo: não grava
+    assert tabela.linhas[cod_tarefa]['progresso'] == 25.0
+    contexto.progresso(1)                                 # o fim sempre grava
+    assert tabela.linhas[cod_tarefa]['progresso'] == 100.0
+    assert sum('SET progresso' in sql for sql in tabela.comandos) == 2
+
+
+def test_progresso_levanta_quando_o_cancelamento_foi_pedido(tabela):
+    cod_tarefa = tabela.criar('eco', estado='EXECUTANDO', instancia='eu')
+    contexto = ContextoTarefa(cod_tarefa, 'eu')
+    contexto.progresso(0.1)
+    assert cancelar_tarefa(cod_tarefa) == 'EXECUTANDO'
+    contexto._ultima_gravacao = 0.0
+    with pytest.raises(TarefaCancelada):
+        contexto.progresso(0.2)
+    assert contexto.cancelamento_pedido
+
+
+def test_progresso_de_tarefa_abandonada_cancela(tabela):
+    cod_tarefa = tabela.criar('eco', estado='FALHOU', instancia='eu')
+    with pytest.raises(TarefaCancelada):
+        ContextoTarefa(cod_tarefa, 'eu').progresso(0.5)
+
+
+def test_cancelar_tarefa(tabela):
+    pendente = tabela.criar('eco')
+    executando = tabela.criar('eco', estado='EXECUTANDO', instancia='eu')
+    concluida = tabela.criar('eco', estado='CONCLUIDA')
+    assert cancelar_tarefa(pendente) == 'CANCELADA'
+    assert cancelar_tarefa(executando) == 'EXECUTANDO'
+    assert tabela.linhas[executando]['cancelar'] is True
+    assert cancelar_tarefa(concluida) == 'CONCLUIDA'
+    assert cancelar_tarefa(99) is None
+
+
+def test_renovar_sinal_repassa_o_pedido_de_cancelamento(tabela):
+    executor = _executor()
+    cod_tarefa = tabela.criar('eco')
+    executor._reivindicar()
+    contexto = executor._em_execucao[cod_tarefa]
+    cancelar_tarefa(cod_tarefa)
+    executor._renovar_sinal()
+    assert contexto.cancelamento_pedido
+
+
+# Reivindicação e abandono
+
+def test_cada_tarefa_e_reivindicada_uma_vez(tabela):
+    for _ in range(20):
+        tabela.criar('eco')
+    executores = [_executor() for _ in range(4)]
+    barreira = threading.Barrier(len(executores))
+
+    def reivindicar(executor):
+        barreira.wait()
+        while executor._reivindicar():
+            pass
+
+    threads = [threading.Thread(target=reivindicar, args=(e,)) for e in executores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reivindicadas = [contexto.cod_tarefa for e in executores for contexto, _, _ in e._pool.submetidas]
+    assert sorted(reivindicadas) == list(range(1, 21))
+    assert all(linha['estado'] == 'EXECUTANDO' for linha in tabela.linhas.values())
+
+
+def test_tipo_desconhecido_nao_e_reivindicado(tabela):
+    tabela.criar('de_outro_processo')
+    assert not _executor()._reivindicar()
+
+
+def test_abandonadas_viram_falhou(tabela):
+    antiga = tabela.criar('eco', estado='EXECUTANDO', instancia='morto',
+                          data_sinal=time.time() - jobs.TEMPO_ABANDONO - 1)
+    viva = tabela.criar('eco', estado='EXECUTANDO', instancia='vivo', data_sinal=time.time())
+    _executor()._recolher_abandonadas()
+    assert tabela.linhas[antiga]['estado'] == 'FALHOU'
+    assert tabela.linhas[viva]['estado'] == 'EXECUTANDO'
+
+
+# Listagem
+
+@pytest.mark.parametrize('limite, top', [(-1, 1), (0, 1), (10, 10), (10000, jobs.LIMITE_LISTAGEM)])
+def test_limite_da_listagem(tabela, limite, top):
+    from app import app
+    resposta = app.test_client().get(f'/api/jobs?limite={limite}')
+    assert resposta.status_code == 200
+    assert f'SELECT TOP ({top})' in tabela.comandos[-1]
+
+
+# Funções periódicas
+
+def test_periodicas_respeitam_o_intervalo_e_isolam_falhas(monkeypatch):
+    chamadas = []
+
+    def falhar():
+        raise RuntimeError('banco fora')
+
+    monkeypatch.setattr(jobs, '_periodicas', {})
+    jobs.periodica('rapida', 0)(lambda: chamadas.append('rapida'))
+    jobs.periodica('falha', 0)(falhar)
+    jobs.periodica('lenta', 3600)(lambda: chamadas.append('lenta'))
+
+    executor = _executor()
+    executor._executar_periodicas()
+    executor._executar_periodicas()
+    assert chamadas == ['rapida', 'lenta', 'rapida']
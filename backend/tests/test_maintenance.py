@@ -0,0 +1,94 @@
+# backend/tests/test_maintenance.py
+# Consolidação das reproduções: fatias do histórico, limite travado por
+# outro processo e publicação dos contadores alterados
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import maintenance
+from services.maintenance import (JANELA_CONSOLIDACAO, SQL_CONSOLIDAR_FATIA, SQL_LIMITE_CONSOLIDACAO,
+                                  SQL_PRIMEIRO_EVENTO, consolidar_reproducoes)
+
+T0 = datetime(2024, 3, 1, 0, 0, 0)
+
+
+class BancoReproducoes:
+    """Cursor com o limite consolidado, o corte e os instantes do histórico."""
+
+    def __init__(self, consolidado_ate, corte, eventos, travado=False):
+        self.consolidado_ate = consolidado_ate
+        self.corte = corte
+        self.eventos = sorted(eventos)
+        self.travado = travado
+        self.fatias = []
+        self.resultado = None
+
+    def execute(self, sql, parametros=()):
+        if sql == SQL_LIMITE_CONSOLIDACAO:
+            self.resultado = None if self.travado else (self.consolidado_ate, self.corte)
+        elif sql == SQL_PRIMEIRO_EVENTO:
+            inicio, fim = parametros
+            self.resultado = (min((e for e in self.eventos if inicio <= e < fim), default=None),)
+        elif sql == SQL_CONSOLIDAR_FATIA:
+            inicio, fim = parametros[:2]
+            assert parametros == (inicio, fim) * 3 + (fim,)
+            self.fatias.append((inicio, fim))
+            self.consolidado_ate = fim
+            tocadas = [e for e in self.eventos if inicio <= e < fim]
+            self.resultado = [(7, 1, 1, 2, len(tocadas), max(tocadas))] if tocadas else []
+        elif sql.startswith('UPDATE dbo.CONSOLIDACAO_REPRODUCAO'):
+            self.consolidado_ate = parametros[0]
+        else:
+            raise AssertionError(f'Comando inesperado: {sql}')
+
+    def fetchone(self):
+        return self.resultado
+
+    def fetchall(self):
+        return self.resultado
+
+
+@pytest.fixture
+def publicados(monkeypatch):
+    eventos = []
+    monkeypatch.setattr(maintenance, 'publicar', lambda *evento: eventos.append(evento))
+    return eventos
+
+
+def _consolidar(monkeypatch, banco):
+    monkeypatch.setattr(maintenance, 'executar_transacao', lambda unidade: unidade(banco))
+    consolidar_reproducoes()
+
+
+def test_consolida_em_fatias_a_partir_do_primeiro_evento(monkeypatch, publicados):
+    corte = T0 + timedelta(hours=3)
+    banco = BancoReproducoes(T0, corte, [T0 + timedelta(minutes=30), T0 + timedelta(minutes=40),
+                                         T0 + timedelta(hours=2, minutes=10)])
+    _consolidar(monkeypatch, banco)
+
+    primeira = T0 + timedelta(minutes=30)
+    assert banco.fatias == [(primeira, primeira + JANELA_CONSOLIDACAO),
+                            (T0 + timedelta(hours=2, minutes=10), corte)]
+    assert banco.consolidado_ate == corte
+    chave = {'cod_playlist': 7, 'cod_album': 1, 'numero_unidade': 1, 'numero_faixa': 2}
+    assert publicados == [
+        ('playlist_tracks', 'update', chave,
+         dict(chave, num_vezes_tocada=2, data_ultima_vez_tocada=str(T0 + timedelta(minutes=40)))),
+        ('playlist_tracks', 'update', chave,
+         dict(chave, num_vezes_tocada=1, data_ultima_vez_tocada=str(T0 + timedelta(hours=2, minutes=10)))),
+    ]
+
+
+def test_sem_eventos_so_avanca_o_limite(monkeypatch, publicados):
+    banco = BancoReproducoes(T0, T0 + timedelta(minutes=5), [T0 - timedelta(days=1)])
+    _consolidar(monkeypatch, banco)
+    assert banco.fatias == [] and publicados == []
+    assert banco.consolidado_ate == T0 + timedelta(minutes=5)
+
+
+@pytest.mark.parametrize('travado, corte', [(True, T0 + timedelta(hours=1)), (False, T0)])
+def test_travado_ou_em_dia_nao_faz_nada(monkeypatch, publicados, travado, corte):
+    banco = BancoReproducoes(T0, corte, [T0 + timedelta(minutes=1)], travado=travado)
+    _consolidar(monkeypatch, banco)
+    assert banco.fatias == [] and banco.consolidado_ate == T0
@@ -0,0 +1,67 @@
+# backend/tests/test_playback.py
+# Janela das rotas de mais tocadas: ?inicio= e ?fim= com e sem fuso
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import routes.playback as playback
+from app import app
+
+
+class ConexaoVazia:
+    """Guarda os parâmetros da consulta e não devolve linhas."""
+
+    def __init__(self):
+        self.parametros = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, parametros):
+        self.parametros = parametros
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def conexao(monkeypatch):
+    conexao = ConexaoVazia()
+    monkeypatch.setattr(playback, 'get_conexao', lambda: conexao)
+    return conexao
+
+
+@pytest.fixture
+def horario_local(monkeypatch):
+    """Servidor em UTC-3 (sem horário de verão)."""
+    monkeypatch.setenv('TZ', 'BRT+3')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('inicio, fim, esperado', [
+    ('2024-01-01T00:00:00+00:00', '2024-01-08T00:00:00', ('2023-12-31T21:00:00', '2024-01-08T00:00:00')),
+    ('2024-01-01T00:00:00', '2024-01-08T00:00:00Z', ('2024-01-01T00:00:00', '2024-01-07T21:00:00')),
+    ('2024-01-01T03:00:00+03:00', '2024-01-08T00:00:00-02:00', ('2023-12-31T21:00:00', '2024-01-07T23:00:00')),
+])
+def test_fuso_e_convertido_para_o_horario_local(conexao, horario_local, inicio, fim, esperado):
+    resposta = app.test_client().get('/api/playback/top-tracks', query_string={'inicio': inicio, 'fim': fim})
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert (dados['inicio'], dados['fim']) == esperado
+
+
+def test_inicio_depois_do_fim_com_fusos_diferentes(conexao):
+    fim = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    inicio = (fim + timedelta(hours=1)).astimezone(timezone(timedelta(hours=-5)))
+    resposta = app.test_client().get('/api/playback/top-tracks',
+                                     query_string={'inicio': inicio.isoformat(), 'fim': fim.isoformat()})
+    assert resposta.status_code == 400
+    assert conexao.parametros is None
@@ -0,0 +1,186 @@
+# backend/tests/test_statements.py
+# Registro de instruções: cursores preparados por conexão, limite de
+# MAXIMO_PREPARADAS e lotes com fast_executemany e setinputsizes
+
+import pyodbc
+import pytest
+
+from utils import statements
+from utils.statements import (InstrucaoDesconhecida, ajustar, consultar, consultar_um, executar,
+                              executar_lote, liberar_conexao, obter_estatisticas, registrar,
+                              tamanho_entrada)
+
+
+class CursorFalso:
+    """Cursor que registra as chamadas e devolve `linhas` nas consultas."""
+
+    def __init__(self, conexao, linhas=()):
+        self.connection = conexao
+        self.linhas = list(linhas)
+        self.execucoes = []
+        self.tamanhos = None
+        self.fast_executemany = False
+        self.rowcount = -1
+        self.fechado = False
+
+    def setinputsizes(self, tamanhos):
+        self.tamanhos = tamanhos
+
+    def execute(self, sql, parametros):
+        self.execucoes.append((sql, parametros))
+        self.rowcount = len(self.linhas) or 1
+
+    def executemany(self, sql, lotes):
+        self.execucoes.append((sql, lotes))
+
+    def fetchall(self):
+        return list(self.linhas)
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+
+    def __init__(self, linhas=()):
+        self.linhas = linhas
+        self.timeout = 30
+        self.cursores = []
+
+    def cursor(self):
+        # O cursor preparado é criado sem o timeout da requisição
+        assert self.timeout == 0
+        cursor = CursorFalso(self, self.linhas)
+        self.cursores.append(cursor)
+        return cursor
+
+
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    monkeypatch.setattr(statements, '_instrucoes', {})
+    monkeypatch.setattr(statements, '_preparadas', {})
+    monkeypatch.setattr(statements, 'registrar_cursor', lambda cursor: None)
+    for nome in statements.TIPOS_SQL.values():
+        monkeypatch.setattr(pyodbc, nome, nome, raising=False)
+
+
+def _cursor(linhas=()):
+    """Cursor da requisição: só a conexão dele é usada pelo registro."""
+    return CursorFalso(ConexaoFalsa(linhas))
+
+
+def test_registro_e_nomes_desconhecidos():
+    registrar('a.listar', 'SELECT 1')
+    with pytest.raises(ValueError):
+        registrar('a.listar', 'SELECT 2')
+    with pytest.raises(InstrucaoDesconhecida):
+        consultar(_cursor(), 'b.listar')
+
+
+def test_consulta_com_catalogo_e_parametros_nomeados():
+    registrar('a.obter', 'SELECT {colunas} FROM A WHERE id = ? AND nome = ?',
+              parametros=(('id', 'INT'), ('nome', 'VARCHAR(50)')),
+              colunas={'id': ('a.id', None), 'preco': ('a.preco', float)})
+    cursor = _cursor([(1, '9.50')])
+    linha = consultar_um(cursor, 'a.obter', {'nome': 'x', 'id': 1})
+    assert linha == {'id': 1, 'preco': 9.5}
+
+    preparado, = cursor.connection.cursores
+    assert preparado.execucoes == [('SELECT a.id AS id, a.preco AS preco FROM A WHERE id = ? AND nome = ?',
+                                    (1, 'x'))]
+    assert preparado.tamanhos == [('SQL_INTEGER', 0, 0), ('SQL_VARCHAR', 50, 0)]
+    assert cursor.connection.timeout == 30
+
+
+def test_cursor_preparado_e_reaproveitado_por_conexao():
+    registrar('a.atualizar', 'UPDATE A SET x = ? WHERE id = ?')
+    cursor = _cursor()
+    for i in range(3):
+        executar(cursor, 'a.atualizar', (i, 1))
+    outra = _cursor()
+    executar(outra, 'a.atualizar', (0, 2))
+
+    assert len(cursor.connection.cursores) == 1
+    assert len(cursor.connection.cursores[0].execucoes) == 3
+    assert len(outra.connection.cursores) == 1
+    estatisticas, = obter_estatisticas()['instrucoes']
+    assert estatisticas['execucoes'] == 4 and estatisticas['preparacoes'] == 2
+
+
+def test_cursores_alem_de_maximo_preparadas_fecham_o_mais_antigo(monkeypatch):
+    monkeypatch.setattr(statements, 'MAXIMO_PREPARADAS', 3)
+    for i in range(5):
+        registrar(f'a.{i}', f'SELECT {i}')
+    cursor = _cursor()
+    for nome in ('a.0', 'a.1', 'a.2', 'a.0', 'a.3', 'a.4'):
+        consultar(cursor, nome)
+
+    preparados = cursor.connection.cursores
+    # a.0 foi usado de novo antes de a.3: o mais antigo passa a ser a.1, depois a.2
+    assert [p.fechado for p in preparados] == [False, True, True, False, False]
+    assert obter_estatisticas()['cursores_preparados'] == 3
+
+    liberar_conexao(cursor.connection)
+    assert all(p.fechado for p in preparados)
+    assert obter_estatisticas()['cursores_preparados'] == 0
+
+
+def test_lote_usa_fast_executemany_e_tipos():
+    registrar('a.inserir', 'INSERT INTO A (id, nome, preco) VALUES (?, ?, ?)',
+              parametros=(('id', 'INT'), ('nome', 'NVARCHAR(MAX)'), ('preco', 'DECIMAL(10, 2)')),
+              lote=True)
+    cursor = _cursor()
+    enviadas = executar_lote(cursor, 'a.inserir', [(1, 'x', 1), {'preco': 2, 'id': 2, 'nome': 'y'}])
+
+    preparado, = cursor.connection.cursores
+    assert enviadas == 2
+    assert preparado.fast_executemany is True
+    assert preparado.tamanhos == [('SQL_INTEGER', 0, 0), ('SQL_WVARCHAR', 0, 0), ('SQL_DECIMAL', 10, 2)]
+    assert preparado.execucoes == [('INSERT INTO A (id, nome, preco) VALUES (?, ?, ?)',
+                                    [(1, 'x', 1), (2, 'y', 2)])]
+    assert executar_lote(cursor, 'a.inserir', []) == 0
+
+
+def test_lote_sem_todos_os_tipos_nao_declara_tamanhos():
+    registrar('a.inserir', 'INSERT INTO A VALUES (?, ?)', parametros=(('id', 'INT'), ('nome', None)),
+              lote=True, fast_executemany=False)
+    cursor = _cursor()
+    executar_lote(cursor, 'a.inserir', [(1, 'x')])
+    preparado, = cursor.connection.cursores
+    assert preparado.tamanhos is None and preparado.fast_executemany is False
+
+
+def test_ajustar_troca_o_cursor_preparado():
+    registrar('a.inserir', 'INSERT INTO A VALUES (?)', parametros=(('id', 'INT'),), lote=True)
+    cursor = _cursor()
+    executar_lote(cursor, 'a.inserir', [(1,)])
+    ajustar('a.inserir', fast_executemany=False, parametros=(('id', 'BIGINT'),))
+    executar_lote(cursor, 'a.inserir', [(2,)])
+
+    antigo, novo = cursor.connection.cursores
+    assert antigo.fast_executemany is True and novo.fast_executemany is False
+    assert novo.tamanhos == [('SQL_BIGINT', 0, 0)]
+
+
+def test_erro_conta_nas_estatisticas():
+    registrar('a.falha', 'SELECT 1')
+    cursor = _cursor()
+
+    def falhar(sql, parametros):
+        raise pyodbc.Error('42000', 'erro')
+
+    consultar(cursor, 'a.falha')
+    cursor.connection.cursores[0].execute = falhar
+    with pytest.raises(pyodbc.Error):
+        consultar(cursor, 'a.falha')
+    estatisticas, = obter_estatisticas()['instrucoes']
+    assert estatisticas['erros'] == 1 and estatisticas['execucoes'] == 1
+
+
+@pytest.mark.parametrize('tipo', ['TEXT', 'VARCHAR(', 'INT(10, 2, 3)'])
+def test_tipo_nao_suportado(tipo):
+    with pytest.raises(ValueError):
+        tamanho_entrada(tipo)
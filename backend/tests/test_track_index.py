@@ -0,0 +1,83 @@
+# backend/tests/test_track_index.py
+# Índice de faixas: códigos fora do intervalo e índice vazio
+
+import tracemalloc
+
+import pytest
+
+from services.track_index import IndiceFaixas
+
+FAIXAS = [
+    # cod_album, unidade, faixa, mídia, gravação, tipo de composição, duração
+    (1, 1, 1, 'CD', 'DDD', 1, 300),
+    (1, 1, 2, 'CD', 'ADD', 2, 240),
+    (2, 1, 1, 'VINIL', None, 3, 600),
+]
+COMPOSITORES = [(1, 1, 1, 10, 1), (1, 1, 2, 11, 2), (2, 1, 1, 10, 1)]
+INTERPRETES = [(1, 1, 1, 5), (2, 1, 1, 6)]
+
+
+class CursorFalso:
+    """Devolve as linhas das três consultas de carga do índice."""
+
+    def __init__(self, faixas, compositores, interpretes):
+        self.tabelas = (faixas, compositores, interpretes)
+        self.linhas = []
+
+    def execute(self, sql, parametros=()):
+        if 'FROM FAIXA f' in sql:
+            self.linhas = list(self.tabelas[0])
+        elif 'FAIXA_COMPOSITOR' in sql:
+            self.linhas = list(self.tabelas[1])
+        else:
+            self.linhas = list(self.tabelas[2])
+
+    def fetchmany(self, quantidade):
+        lote, self.linhas = self.linhas[:quantidade], self.linhas[quantidade:]
+        return lote
+
+
+def _indice(faixas=FAIXAS, compositores=COMPOSITORES, interpretes=INTERPRETES):
+    indice = IndiceFaixas()
+    indice._carregar(CursorFalso(faixas, compositores, interpretes))
+    indice._carregado = True
+    return indice
+
+
+def _chaves(resultado):
+    return [(f['cod_album'], f['numero_unidade'], f['numero_faixa']) for f in resultado['faixas']]
+
+
+def test_tipo_composicao_enorme_nao_aloca_tabela_do_tamanho_do_codigo():
+    indice = _indice()
+    tracemalloc.start()
+    try:
+        resultado = indice.filtrar({'tipo_composicao': [2000000000]})
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert resultado['total'] == 0
+    assert pico < 1024 * 1024
+
+
+@pytest.mark.parametrize('faceta, valores, esperado', [
+    ('tipo_composicao', [2, 2000000000], [(1, 1, 2)]),
+    ('tipo_composicao', [-1, 3], [(2, 1, 1)]),
+    ('compositor', [-1, 11], [(1, 1, 2)]),
+    ('interprete', [2 ** 70, 6], [(2, 1, 1)]),
+    ('tipo_midia', ['VINIL', 'FITA'], [(2, 1, 1)]),
+])
+def test_codigos_inexistentes_sao_ignorados(faceta, valores, esperado):
+    assert _chaves(_indice().filtrar({faceta: valores})) == esperado
+
+
+def test_indice_vazio():
+    indice = _indice([], [], [])
+    resultado = indice.filtrar({'tipo_composicao': [1], 'tipo_midia': ['CD'], 'compositor': [10]})
+    assert resultado == {'total': 0, 'faixas': [], 'facetas': {
+        'tipo_midia': {}, 'tipo_gravacao': {}, 'tipo_composicao': {},
+        'compositor': {}, 'interprete': {}, 'periodo': {}}}
+
+    candidatas = indice.candidatas({'tipo_composicao': [2000000000]})
+    assert len(candidatas['cod_album']) == 0
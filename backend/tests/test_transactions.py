@@ -0,0 +1,137 @@
+# backend/tests/test_transactions.py
+# Repetição de transações em deadlock (1205) e conflito de snapshot (3960)
+
+import pyodbc
+import pytest
+
+from utils import transactions
+from utils.transactions import codigo_erro, executar_transacao
+
+
+def _erro(sqlstate, texto, codigo):
+    """Erro no formato em que o pyodbc entrega os diagnósticos do SQL Server."""
+    return pyodbc.Error(sqlstate, f'[{sqlstate}] [Microsoft][ODBC Driver 18 for SQL Server]'
+                                  f'[SQL Server]{texto} ({codigo}) (SQLExecDirectW)')
+
+
+DEADLOCK = _erro('40001', 'Transaction (Process ID 57) was deadlocked on lock resources '
+                          'with another process and has been chosen as the deadlock victim.', 1205)
+SNAPSHOT = _erro('HY000', "Snapshot isolation transaction aborted due to update conflict.", 3960)
+
+
+class CursorFalso:
+    """Cursor que falha com os erros de `falhas`, um por execução, e depois funciona."""
+
+    def __init__(self, falhas):
+        self.falhas = list(falhas)
+        self.execucoes = 0
+        self.fechado = False
+
+    def execute(self, sql, *parametros):
+        self.execucoes += 1
+        if self.falhas:
+            raise self.falhas.pop(0)
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+        self.fechada = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.fechada = True
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    """Substitui a conexão e o sleep; devolve (preparar(falhas), esperas)."""
+    esperas = []
+    monkeypatch.setattr(transactions.time, 'sleep', esperas.append)
+    # Sem jitter: a espera é o teto da tentativa
+    monkeypatch.setattr(transactions.random, 'uniform', lambda inicio, fim: fim)
+    conexoes = []
+
+    def preparar(falhas):
+        conexao = ConexaoFalsa(CursorFalso(falhas))
+        conexoes.append(conexao)
+        monkeypatch.setattr(transactions, 'get_conexao', lambda somente_leitura=True: conexao)
+        return conexao
+
+    return preparar, esperas
+
+
+def _unidade(cursor):
+    cursor.execute("UPDATE dbo.PLAYLIST SET nome = ? WHERE cod_playlist = ?", 'x', 1)
+    return 'ok'
+
+
+def test_repete_deadlock_e_conflito_de_snapshot_com_backoff(banco):
+    preparar, esperas = banco
+    conexao = preparar([DEADLOCK, SNAPSHOT, DEADLOCK])
+
+    assert executar_transacao(_unidade) == 'ok'
+    assert conexao._cursor.execucoes == 4
+    assert conexao.rollbacks == 3
+    assert conexao.commits == 1
+    base = transactions.ESPERA_BASE
+    assert esperas == [base, base * 2, base * 4]
+    assert conexao._cursor.fechado and conexao.fechada
+
+
+def test_backoff_limitado_a_espera_maxima(banco, monkeypatch):
+    preparar, esperas = banco
+    monkeypatch.setattr(transactions, 'ESPERA_MAXIMA', 0.15)
+    preparar([DEADLOCK] * 4)
+
+    assert executar_transacao(_unidade, tentativas=5) == 'ok'
+    assert esperas == [0.05, 0.1, 0.15, 0.15]
+
+
+def test_relanca_apos_esgotar_tentativas(banco):
+    preparar, esperas = banco
+    conexao = preparar([SNAPSHOT] * 10)
+
+    with pytest.raises(pyodbc.Error):
+        executar_transacao(_unidade, tentativas=3)
+    assert conexao._cursor.execucoes == 3
+    assert len(esperas) == 2
+    assert conexao.commits == 0 and conexao.rollbacks == 3
+
+
+def test_erro_nao_transitorio_nao_repete(banco):
+    preparar, esperas = banco
+    # O valor da chave entre parênteses não é o código nativo (2627)
+    duplicada = _erro('23000', "Violation of PRIMARY KEY constraint 'PK_PLAYLIST'. "
+                               "The duplicate key value is (1205).", 2627)
+    conexao = preparar([duplicada])
+
+    with pytest.raises(pyodbc.Error):
+        executar_transacao(_unidade)
+    assert conexao._cursor.execucoes == 1
+    assert esperas == []
+
+
+def test_codigo_erro_ancorado_no_codigo_nativo():
+    assert codigo_erro(DEADLOCK) == 1205
+    assert codigo_erro(SNAPSHOT) == 3960
+    assert codigo_erro(_erro('42S02', 'Invalid object name (1222).', 208)) is None
+    # Diagnósticos extras vêm depois de "; " sem o nome da função
+    composto = pyodbc.Error('HY000', str(_erro('HY000', 'Statement terminated.', 3621).args[1])
+                            + '; [HY000] [Microsoft][ODBC Driver 18 for SQL Server][SQL Server]'
+                              'Lock request time out period exceeded. (1222)')
+    assert codigo_erro(composto) == 1222
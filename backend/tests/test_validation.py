@@ -0,0 +1,237 @@
+# backend/tests/test_validation.py
+# Pré-validação: as mesmas decisões dos triggers de banco.sql, com os
+# agregados e o índice de faixas substituídos por dados fixos
+
+from decimal import Decimal
+
+import pytest
+
+from services import validation
+from services.validation import (AgregadosValidacao, LIMITE_FAIXAS_ALBUM, recusas,
+                                 validar_album, validar_atualizacao_faixa, validar_faixas)
+
+BARROCO, CLASSICO = 1, 2           # períodos
+BACH, MOZART = 10, 20              # compositores
+
+
+def _album(tipo_midia='CD', qtd_unidades=2, preco='10.00', qtd_faixas=0, qtd_nao_ddd=0):
+    return {'tipo_midia': tipo_midia, 'qtd_unidades': qtd_unidades, 'preco': Decimal(preco),
+            'qtd_faixas': qtd_faixas, 'qtd_nao_ddd': qtd_nao_ddd}
+
+
+class IndiceFalso:
+    """estado_faixas() a partir de {chave: {'tipo_gravacao', 'periodos'}}."""
+
+    def __init__(self, faixas):
+        self.faixas = faixas
+
+    def estado_faixas(self, chaves):
+        return {chave: self.faixas[chave] for chave in chaves if chave in self.faixas}
+
+
+class ConexaoCompositores:
+    """Conexão cujo cursor só responde à leitura de compositores."""
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, *parametros):
+        assert sql == validation.SQL_COMPOSITORES
+
+    def fetchall(self):
+        return [(BACH, BARROCO, 1), (MOZART, CLASSICO, 0)]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    """Agregados já carregados, sem consultar o banco.
+
+    Álbuns 1, 2 e 5 são todo DDD (média 15.00, máximo 45.00); os demais
+    não entram na média. Compositor desconhecido relê a tabela de uma
+    conexão falsa. Devolve a função que acrescenta álbuns.
+    """
+    agregados = AgregadosValidacao()
+    agregados._carregado = True
+    agregados._compositores = {BACH: True, MOZART: False}
+    agregados._periodos_barrocos = {BARROCO}
+    indice = IndiceFalso({(5, 1, 1): {'tipo_gravacao': 'DDD', 'periodos': {BARROCO}},
+                          (5, 1, 2): {'tipo_gravacao': 'DDD', 'periodos': {CLASSICO}}})
+    monkeypatch.setattr(validation, 'agregados', agregados)
+    monkeypatch.setattr(validation, 'indice_faixas', indice)
+    monkeypatch.setattr(validation, 'get_conexao', lambda somente_leitura=True: ConexaoCompositores())
+
+    def criar(cod_album, **campos):
+        agregados._trocar_album(cod_album, _album(**campos))
+
+    criar(1, preco='10.00', qtd_faixas=3)
+    criar(2, preco='20.00', qtd_faixas=5)
+    criar(3, preco='45.00')                                  # sem faixas: fora da média
+    criar(4, preco='45.01', qtd_faixas=1, qtd_nao_ddd=1)
+    criar(5, preco='15.00', qtd_faixas=2)
+    criar(6, tipo_midia='DOWNLOAD', qtd_unidades=1, preco='9.00')
+    criar(7, tipo_midia='VINIL', qtd_unidades=1, preco='30.00', qtd_faixas=1, qtd_nao_ddd=1)
+    return criar
+
+
+def _faixa(cod_album=3, numero_unidade=1, numero_faixa=1, tipo_gravacao='DDD', compositores=(), **extras):
+    return dict({'cod_album': cod_album, 'numero_unidade': numero_unidade, 'numero_faixa': numero_faixa,
+                 'descricao': 'faixa', 'cod_tipo_composicao': 1, 'tempo_execucao': 200,
+                 'tipo_gravacao': tipo_gravacao, 'compositores': list(compositores)}, **extras)
+
+
+def _novo_album(preco, **extras):
+    return dict({'nome': 'a', 'descricao': 'd', 'cod_gravadora': 1, 'preco_compra': preco,
+                 'data_compra': '2024-01-01', 'data_gravacao': '2010-01-01', 'tipo_compra': 'FISICA',
+                 'tipo_midia': 'CD'}, **extras)
+
+
+def _regras(violacoes):
+    return [v['regra'] for v in violacoes]
+
+
+# Preço: 3x a média dos álbuns todo DDD (VALIDAR_PRECO_ALBUM)
+
+@pytest.mark.parametrize('preco, regras', [
+    ('45.00', []),                          # exatamente 3x
+    ('45.01', ['VALIDAR_PRECO_ALBUM']),
+    (45.004, []),                           # arredondado para 45.00, como DECIMAL(10,2)
+])
+def test_preco_de_album_novo(banco, preco, regras):
+    assert _regras(validar_album(_novo_album(preco))) == regras
+
+
+def test_preco_maximo_informado_na_violacao(banco):
+    violacao, = validar_album(_novo_album('90.00'))
+    assert violacao['preco_maximo'] == 45.0
+    assert 'R$ 15.00' in violacao['mensagem']
+
+
+def test_atualizacao_exclui_o_proprio_album_da_media(banco):
+    # Sem o álbum 1 a média é 17.50: o máximo passa a ser 52.50
+    assert _regras(validar_album(_novo_album('52.50'), cod_album=1)) == []
+    assert _regras(validar_album(_novo_album('52.51'), cod_album=1)) == ['VALIDAR_PRECO_ALBUM']
+
+
+def test_sem_album_ddd_o_preco_nao_e_validado(banco):
+    agregados = validation.agregados
+    for cod_album in (1, 2, 5):
+        agregados._trocar_album(cod_album, None)
+    assert _regras(validar_album(_novo_album('1000.00'))) == []
+
+
+# Preço depois de mexer nas faixas (VALIDAR_PRECO_APOS_FAIXA)
+
+def test_preco_apos_faixa_no_limite(banco):
+    # Álbum 3 custa exatamente 3x a média dos outros
+    assert _regras(validar_faixas([_faixa(cod_album=3)])) == []
+
+
+def test_preco_apos_faixa_acima_do_limite(banco):
+    violacoes = validar_faixas([_faixa(cod_album=4)])
+    assert _regras(violacoes) == ['VALIDAR_PRECO_APOS_FAIXA']
+    assert violacoes[0]['cod_album'] == 4 and violacoes[0]['preco_maximo'] == 45.0
+
+
+def test_preco_apos_faixa_exclui_albuns_afetados_da_media(banco):
+    # Com uma faixa no álbum 1, ele sai da média (17.50, máximo 52.50)
+    banco(8, preco='52.50')
+    assert _regras(validar_faixas([_faixa(cod_album=1, numero_faixa=9), _faixa(cod_album=8)])) == []
+    banco(8, preco='52.51')
+    assert _regras(validar_faixas([_faixa(cod_album=1, numero_faixa=9), _faixa(cod_album=8)])) == [
+        'VALIDAR_PRECO_APOS_FAIXA']
+
+
+# Barroco exige DDD
+
+@pytest.mark.parametrize('tipo_gravacao, compositores, regras', [
+    ('DDD', [BACH], []),
+    ('ADD', [BACH], ['BARROCO_EXIGE_DDD_COMPOSITOR']),
+    ('ADD', [MOZART], []),
+    ('ADD', [MOZART, BACH], ['BARROCO_EXIGE_DDD_COMPOSITOR']),
+])
+def test_barroco_exige_ddd_na_insercao(banco, tipo_gravacao, compositores, regras):
+    assert _regras(validar_faixas([_faixa(tipo_gravacao=tipo_gravacao, compositores=compositores)])) == regras
+
+
+def test_barroco_impede_remover_ddd_na_atualizacao(banco):
+    dados = {'descricao': 'x', 'cod_tipo_composicao': 1, 'tempo_execucao': 100, 'tipo_gravacao': 'ADD'}
+    assert _regras(validar_atualizacao_faixa((5, 1, 1), dados)) == ['BARROCO_FAIXA_UPDATE_GRAVACAO']
+    assert _regras(validar_atualizacao_faixa((5, 1, 2), dados)) == []
+    assert _regras(validar_atualizacao_faixa((5, 1, 1), dict(dados, tipo_gravacao='DDD'))) == []
+
+
+def test_atualizacao_de_faixa_inexistente(banco):
+    with pytest.raises(LookupError):
+        validar_atualizacao_faixa((5, 1, 9), {'descricao': 'x'})
+
+
+# Limite de 64 faixas por álbum
+
+@pytest.mark.parametrize('existentes, novas, regras', [
+    (LIMITE_FAIXAS_ALBUM - 1, 1, []),                       # chega exatamente a 64
+    (LIMITE_FAIXAS_ALBUM - 1, 2, ['LIMITE_64_FAIXAS_ALBUM']),
+    (LIMITE_FAIXAS_ALBUM, 1, ['LIMITE_64_FAIXAS_ALBUM']),
+    (0, LIMITE_FAIXAS_ALBUM, []),
+])
+def test_limite_de_faixas(banco, existentes, novas, regras):
+    banco(9, preco='10.00', qtd_faixas=existentes, qtd_nao_ddd=existentes)
+    faixas = [_faixa(cod_album=9, numero_faixa=existentes + i) for i in range(1, novas + 1)]
+    assert _regras(validar_faixas(faixas)) == regras
+
+
+# Números de unidade
+
+@pytest.mark.parametrize('cod_album, numero_unidade, regras', [
+    (3, 2, []),                                        # exatamente qtd_unidades
+    (3, 3, ['VALIDAR_NUMERO_UNIDADE_FAIXA']),
+    (3, 0, ['VERIFICAR_FAIXA_NUMERO_UNIDADE']),
+    (6, 1, []),
+    (6, 2, ['VALIDAR_NUMERO_UNIDADE_FAIXA']),          # DOWNLOAD: só a unidade 1
+])
+def test_numero_unidade(banco, cod_album, numero_unidade, regras):
+    gravacao = None if cod_album == 6 else 'DDD'
+    faixa = _faixa(cod_album=cod_album, numero_unidade=numero_unidade, tipo_gravacao=gravacao)
+    violacoes = validar_faixas([faixa])
+    assert _regras(violacoes) == regras
+    if cod_album == 6 and regras:
+        assert violacoes[0]['mensagem'] == validation.MENSAGENS['VALIDAR_NUMERO_UNIDADE_FAIXA_DOWNLOAD']
+
+
+def test_download_com_varias_unidades(banco):
+    assert _regras(validar_album(_novo_album('10.00', tipo_midia='DOWNLOAD', qtd_unidades=2))) == [
+        'VERIFICAR_DOWNLOAD_UNIDADE_UNICA']
+
+
+# Tipo de gravação por mídia
+
+@pytest.mark.parametrize('cod_album, tipo_gravacao, regras', [
+    (3, None, ['VALIDAR_TIPO_GRAVACAO_FAIXA']),        # CD exige gravação
+    (7, 'DDD', ['VALIDAR_TIPO_GRAVACAO_FAIXA']),       # VINIL não tem
+    (7, None, []),
+    (3, 'XYZ', ['VERIFICAR_FAIXA_TIPO_GRAVACAO']),
+])
+def test_tipo_gravacao_por_midia(banco, cod_album, tipo_gravacao, regras):
+    assert _regras(validar_faixas([_faixa(cod_album=cod_album, tipo_gravacao=tipo_gravacao)])) == regras
+
+
+# Chaves e referências
+
+def test_chaves_e_referencias(banco):
+    violacoes = validar_faixas([
+        _faixa(cod_album=99),                          # álbum inexistente
+        _faixa(cod_album=5, numero_faixa=1),           # já existe
+        _faixa(cod_album=3, numero_faixa=4),
+        _faixa(cod_album=3, numero_faixa=4),           # repetida no lote
+        _faixa(cod_album=3, numero_faixa=5, compositores=[77]),
+    ])
+    assert [(v['regra'], v['item']) for v in violacoes] == [
+        ('FK_FAIXA_ALBUM', 0), ('PK_FAIXA', 1), ('PK_FAIXA', 3), ('FK_FAIXA_COMPOSITOR_COMPOSITOR', 4)]
+
+
+def test_recusas_so_com_regras_do_corpo(banco):
+    violacoes = validar_faixas([_faixa(cod_album=99), _faixa(tempo_execucao=0), _faixa(numero_faixa='x')])
+    assert _regras(violacoes) == ['VALOR_INVALIDO', 'FK_FAIXA_ALBUM', 'VERIFICAR_FAIXA_TEMPO']
+    assert _regras(recusas(violacoes)) == ['VALOR_INVALIDO', 'VERIFICAR_FAIXA_TEMPO']
@@ -0,0 +1,32 @@
+# backend/tests/test_warmup.py
+# Prontidão: /api/ready com o aquecimento desligado e depois de aquecer
+
+import pytest
+
+import app as modulo_app
+from utils import warmup
+
+
+@pytest.fixture
+def estado(monkeypatch):
+    monkeypatch.setattr(warmup, '_estado', dict(warmup._estado, pronto=False, concluido=False,
+                                                desligado=False, falhas=[]))
+    return warmup._estado
+
+
+def _cliente(monkeypatch, aquecimento):
+    monkeypatch.setenv('SPOTPER_AQUECIMENTO', aquecimento)
+    monkeypatch.setattr(modulo_app, 'iniciar_aquecimento', lambda app: None)
+    return modulo_app.criar_app().test_client()
+
+
+def test_aquecimento_desligado_fica_pronto(estado, monkeypatch):
+    resposta = _cliente(monkeypatch, '0').get('/api/ready')
+    assert resposta.status_code == 200
+    assert resposta.get_json()['desligado'] is True
+
+
+def test_aquecimento_em_andamento_nao_fica_pronto(estado, monkeypatch):
+    resposta = _cliente(monkeypatch, '1').get('/api/ready')
+    assert resposta.status_code == 503
+    assert resposta.get_json()['status'] == 'warming'
@@ -0,0 +1,2 @@
+# backend/tools/__init__.py
+# Ferramentas de linha de comando (executar a partir de backend/ com python -m tools.<nome>)
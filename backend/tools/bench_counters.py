@@ -0,0 +1,127 @@
+# backend/tools/bench_counters.py
+# Compara os contadores mantidos por trigger (ALBUM.qtd_faixas,
+# PLAYLIST.qtd_faixas/qtd_albuns) com os COUNT(*) correlacionados de antes
+#
+# Uso (a partir de backend/):
+#   python -m tools.bench_counters [--repeticoes 5] [--faixas 1000]
+#
+# Mede, no banco configurado em config/database.py:
+#   leitura  - listagens de álbuns e playlists com as subconsultas
+#              correlacionadas x lendo as colunas
+#   escrita  - inserir e remover `--faixas` entradas numa playlist com os
+#              triggers de contadores ligados x desligados (custo da
+#              manutenção). Tudo roda numa transação desfeita ao final.
+
+import argparse
+import statistics
+import sys
+import time
+
+from config.database import get_conexao
+
+LEITURAS = {
+    'álbuns': (
+        """
+        SELECT alb.cod_album, alb.nome,
+               (SELECT COUNT(*) FROM dbo.FAIXA fax WHERE fax.cod_album = alb.cod_album) AS qtd_faixas
+        FROM dbo.ALBUM alb
+        ORDER BY alb.nome
+        """,
+        "SELECT cod_album, nome, qtd_faixas FROM dbo.ALBUM ORDER BY nome",
+    ),
+    'playlists': (
+        """
+        SELECT play.cod_playlist, play.nome,
+               (SELECT COUNT(*) FROM dbo.PLAYLIST_FAIXA pf
+                WHERE pf.cod_playlist = play.cod_playlist) AS qtd_faixas,
+               (SELECT COUNT(DISTINCT pf.cod_album) FROM dbo.PLAYLIST_FAIXA pf
+                WHERE pf.cod_playlist = play.cod_playlist) AS qtd_albuns
+        FROM dbo.PLAYLIST play
+        ORDER BY play.nome
+        """,
+        "SELECT cod_playlist, nome, qtd_faixas, qtd_albuns FROM dbo.PLAYLIST ORDER BY nome",
+    ),
+}
+
+TRIGGERS_CONTADORES = ('ATUALIZAR_CONTADORES_PLAYLIST',)
+
+SQL_INSERIR_ENTRADAS = """
+    INSERT INTO dbo.PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade, numero_faixa,
+                                    ordem_reproducao, num_vezes_tocada)
+    SELECT TOP (?) ?, cod_album, numero_unidade, numero_faixa,
+           ROW_NUMBER() OVER (ORDER BY cod_album, numero_unidade, numero_faixa) * 1024, 0
+    FROM dbo.FAIXA
+    ORDER BY cod_album, numero_unidade, numero_faixa
+"""
+
+
+def _medir(funcao, repeticoes):
+    """Mediana, em milissegundos, de `repeticoes` execuções."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def _ler(cursor, sql):
+    cursor.execute(sql)
+    cursor.fetchall()
+
+
+def _escrever(cursor, cod_playlist, faixas):
+    """Insere e remove as entradas da playlist de teste (uma instrução cada)."""
+    cursor.execute(SQL_INSERIR_ENTRADAS, (faixas, cod_playlist))
+    cursor.execute("DELETE FROM dbo.PLAYLIST_FAIXA WHERE cod_playlist = ?", (cod_playlist,))
+
+
+def _alternar_triggers(cursor, ligar):
+    for trigger in TRIGGERS_CONTADORES:
+        cursor.execute(f"{'ENABLE' if ligar else 'DISABLE'} TRIGGER dbo.{trigger} ON dbo.PLAYLIST_FAIXA")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara contadores mantidos com COUNT(*) correlacionado.')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--faixas', type=int, default=1000, help='entradas inseridas por escrita')
+    args = parser.parse_args(argv)
+    
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM dbo.ALBUM), (SELECT COUNT(*) FROM dbo.FAIXA),
+                   (SELECT COUNT(*) FROM dbo.PLAYLIST), (SELECT COUNT(*) FROM dbo.PLAYLIST_FAIXA)
+        """)
+        albuns, faixas, playlists, entradas = cursor.fetchone()
+        print(f'{albuns} álbuns, {faixas} faixas, {playlists} playlists, {entradas} entradas; '
+              f'mediana de {args.repeticoes} execuções\n')
+        
+        print(f'{"leitura":<12} {"correlacionado (ms)":>20} {"contadores (ms)":>16}')
+        for nome, (correlacionado, colunas) in LEITURAS.items():
+            antes = _medir(lambda: _ler(cursor, correlacionado), args.repeticoes)
+            depois = _medir(lambda: _ler(cursor, colunas), args.repeticoes)
+            print(f'{nome:<12} {antes:20.1f} {depois:16.1f}')
+        
+        # Escrita: playlist temporária, desfeita com o resto da transação
+        cursor.execute("""
+            INSERT INTO dbo.PLAYLIST (nome, data_criacao, tempo_total_execucao)
+            OUTPUT inserted.cod_playlist VALUES ('bench contadores', GETDATE(), 0)
+        """)
+        cod_playlist = cursor.fetchone()[0]
+        com_triggers = _medir(lambda: _escrever(cursor, cod_playlist, args.faixas), args.repeticoes)
+        _alternar_triggers(cursor, False)
+        sem_triggers = _medir(lambda: _escrever(cursor, cod_playlist, args.faixas), args.repeticoes)
+        print(f'\n{"escrita":<12} {"sem contadores (ms)":>20} {"com contadores (ms)":>20}')
+        print(f'{f"{args.faixas} faixas":<12} {sem_triggers:20.1f} {com_triggers:20.1f}')
+    finally:
+        # Desfaz a playlist de teste e religa os triggers (DDL é transacional)
+        conexao.rollback()
+        cursor.close()
+        conexao.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
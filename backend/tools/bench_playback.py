@@ -0,0 +1,153 @@
+# backend/tools/bench_playback.py
+# Mede as rotas /api/playback/* (rollups) com o histórico em grande volume
+#
+# Uso (a partir de backend/), num banco de rascunho:
+#   python -m tools.bench_playback [--eventos 100000000] [--dias 365] [--repeticoes 5]
+#
+# 1. Completa HISTORICO_REPRODUCAO até `--eventos` reproduções, espalhadas ao
+#    acaso pelos últimos `--dias` dias e pelas faixas do catálogo. A inserção
+#    é em lotes de `--lote`, cada um na sua transação. Os eventos gerados são
+#    retroativos, anteriores ao já consolidado: depois de consolidar o
+#    restante, os rollups dos dias da janela são reconstruídos do histórico.
+#    As linhas geradas ficam no banco (refazer 100M eventos a cada execução
+#    não compensa).
+# 2. Para janelas de 1, 7, 30 e `--dias` dias, compara top-tracks pela rota
+#    (só rollups) com o GROUP BY direto sobre o histórico.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SPOTPER_AQUECIMENTO', '0')
+os.environ.setdefault('SPOTPER_TAREFAS', '0')
+
+from app import app
+from config.database import get_conexao
+from services.maintenance import consolidar_reproducoes, reconstruir_dia_reproducao
+from utils.transactions import executar_transacao
+
+LOTE_PADRAO = 1000000
+
+SQL_GERAR_EVENTOS = """
+    WITH numeros AS (
+        SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS n
+        FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c
+    ), sorteio AS (
+        SELECT ABS(CHECKSUM(NEWID())) % ? + 1 AS posicao,
+               ABS(CHECKSUM(NEWID())) % (? * 86400) AS segundos
+        FROM numeros
+    )
+    INSERT INTO dbo.HISTORICO_REPRODUCAO (data_reproducao, cod_playlist, cod_album, numero_unidade, numero_faixa)
+    SELECT DATEADD(SECOND, -s.segundos, CAST(SYSDATETIME() AS DATETIME2(0))), NULL,
+           f.cod_album, f.numero_unidade, f.numero_faixa
+    FROM sorteio s
+    JOIN #faixas f ON f.posicao = s.posicao
+"""
+
+SQL_TOP_HISTORICO = """
+    SELECT TOP (?) h.cod_album, h.numero_unidade, h.numero_faixa, COUNT(*) AS qtd_reproducoes
+    FROM dbo.HISTORICO_REPRODUCAO h
+    WHERE h.data_reproducao >= ? AND h.data_reproducao < ?
+    GROUP BY h.cod_album, h.numero_unidade, h.numero_faixa
+    ORDER BY qtd_reproducoes DESC
+"""
+
+
+def _medir(funcao, repeticoes):
+    """Mediana, em milissegundos, de `repeticoes` execuções."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def _gerar(conexao, eventos, dias, lote):
+    """Insere reproduções até o histórico ter `eventos` linhas."""
+    cursor = conexao.cursor()
+    cursor.execute("SELECT COUNT_BIG(*) FROM dbo.HISTORICO_REPRODUCAO")
+    existentes = cursor.fetchone()[0]
+    if existentes >= eventos:
+        cursor.close()
+        return existentes
+    
+    cursor.execute("""
+        SELECT ROW_NUMBER() OVER (ORDER BY cod_album, numero_unidade, numero_faixa) AS posicao,
+               cod_album, numero_unidade, numero_faixa
+        INTO #faixas
+        FROM dbo.FAIXA
+    """)
+    cursor.execute("SELECT COUNT(*) FROM #faixas")
+    qtd_faixas = cursor.fetchone()[0]
+    conexao.commit()
+    if not qtd_faixas:
+        raise RuntimeError('O catálogo não tem faixas')
+    
+    inicio = time.perf_counter()
+    total = existentes
+    while total < eventos:
+        quantidade = min(lote, eventos - total)
+        cursor.execute(SQL_GERAR_EVENTOS, (quantidade, qtd_faixas, dias))
+        conexao.commit()
+        total += quantidade
+        taxa = (total - existentes) / (time.perf_counter() - inicio)
+        print(f'  {total:,} eventos ({taxa:,.0f}/s)', end='\r', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    cursor.execute("DROP TABLE #faixas")
+    cursor.close()
+    
+    consolidar_reproducoes()
+    hoje = datetime.now().date()
+    for atras in range(dias + 1):
+        dia = hoje - timedelta(days=atras)
+        executar_transacao(lambda cursor: reconstruir_dia_reproducao(cursor, dia))
+        print(f'  rollups reconstruídos: {atras + 1}/{dias + 1} dias', end='\r', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede os top-N de reprodução com o histórico em grande volume.')
+    parser.add_argument('--eventos', type=int, default=100000000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--lote', type=int, default=LOTE_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args(argv)
+    
+    conexao = get_conexao(somente_leitura=False)
+    try:
+        total = _gerar(conexao, args.eventos, args.dias, args.lote)
+        cursor = conexao.cursor()
+        cursor.execute("SELECT (SELECT COUNT_BIG(*) FROM dbo.REPRODUCAO_MINUTO), "
+                       "(SELECT COUNT_BIG(*) FROM dbo.REPRODUCAO_DIA)")
+        linhas_minuto, linhas_dia = cursor.fetchone()
+        print(f'{total:,} eventos no histórico; rollups: {linhas_minuto:,} linhas por minuto, '
+              f'{linhas_dia:,} por dia; mediana de {args.repeticoes} execuções\n')
+        
+        cliente = app.test_client()
+        fim = datetime.now().replace(microsecond=0)
+        print(f'{"janela":<10} {"rollups (ms)":>14} {"histórico (ms)":>16}')
+        for dias_janela in sorted({1, 7, 30, args.dias}):
+            inicio = fim - timedelta(days=dias_janela)
+            url = (f'/api/playback/top-tracks?inicio={inicio.isoformat()}&fim={fim.isoformat()}'
+                   f'&limite={args.limite}')
+            rollups = _medir(lambda: cliente.get(url), args.repeticoes)
+            
+            def historico():
+                cursor.execute(SQL_TOP_HISTORICO, (args.limite, inicio, fim))
+                cursor.fetchall()
+            
+            print(f'{f"{dias_janela} dias":<10} {rollups:14.1f} {_medir(historico, args.repeticoes):16.1f}')
+        cursor.close()
+    finally:
+        conexao.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
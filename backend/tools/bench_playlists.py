@@ -0,0 +1,130 @@
+# backend/tools/bench_playlists.py
+# Compara clone/append/união/interseção/diferença no servidor com o caminho
+# antigo do cliente (buscar as faixas e adicionar uma a uma)
+#
+# Uso (a partir de backend/):
+#   python -m tools.bench_playlists [--faixas 1000]
+#
+# Cria duas playlists de `--faixas` faixas com metade das faixas em comum,
+# mede cada operação pelos dois caminhos (via test client do Flask, contra o
+# banco configurado em config/database.py) e remove tudo o que criou.
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SPOTPER_AQUECIMENTO', '0')
+os.environ.setdefault('SPOTPER_TAREFAS', '0')
+
+from app import app
+from config.database import get_conexao
+
+CHAVE = ('cod_album', 'numero_unidade', 'numero_faixa')
+
+
+def _faixas_amostra(quantidade):
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    cursor.execute("""
+        SELECT TOP (?) cod_album, numero_unidade, numero_faixa
+        FROM FAIXA ORDER BY cod_album, numero_unidade, numero_faixa
+    """, (quantidade,))
+    faixas = [dict(zip(CHAVE, row)) for row in cursor.fetchall()]
+    cursor.close()
+    conexao.close()
+    return faixas
+
+
+def _criar(cliente, nome, faixas=()):
+    resposta = cliente.post('/api/playlists', json={'nome': nome, 'faixas': list(faixas)})
+    return resposta.get_json()['cod_playlist']
+
+
+def _faixas_playlist(cliente, cod_playlist):
+    resposta = cliente.get(f'/api/playlists/{cod_playlist}/tracks?fields=' + ','.join(CHAVE))
+    return [tuple(f[c] for c in CHAVE) for f in resposta.get_json()]
+
+
+def _adicionar_uma_a_uma(cliente, cod_playlist, chaves):
+    for chave in chaves:
+        cliente.post(f'/api/playlists/{cod_playlist}/tracks', json=dict(zip(CHAVE, chave)))
+
+
+def _cliente_combinar(cliente, operacao, origens, destino=None):
+    """Caminho antigo: lê as playlists, combina no cliente e posta faixa a faixa."""
+    listas = [_faixas_playlist(cliente, c) for c in origens]
+    if operacao == 'intersecao':
+        demais = [set(l) for l in listas[1:]]
+        chaves = [c for c in listas[0] if all(c in d for d in demais)]
+    elif operacao == 'diferenca':
+        demais = set().union(*listas[1:])
+        chaves = [c for c in listas[0] if c not in demais]
+    else:
+        chaves = list(dict.fromkeys(c for l in listas for c in l))
+    if destino is None:
+        destino = _criar(cliente, f'bench {operacao} (cliente)')
+    else:
+        existentes = set(_faixas_playlist(cliente, destino))
+        chaves = [c for c in chaves if c not in existentes]
+    _adicionar_uma_a_uma(cliente, destino, chaves)
+    return destino
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede as operações de playlist no servidor x no cliente.')
+    parser.add_argument('--faixas', type=int, default=1000, help='faixas por playlist de origem')
+    args = parser.parse_args(argv)
+    
+    amostra = _faixas_amostra(args.faixas + args.faixas // 2)
+    if len(amostra) < args.faixas + args.faixas // 2:
+        print(f'O catálogo precisa de ao menos {args.faixas + args.faixas // 2} faixas.')
+        return 1
+    
+    cliente = app.test_client()
+    a = _criar(cliente, 'bench A', amostra[:args.faixas])
+    b = _criar(cliente, 'bench B', amostra[args.faixas // 2:])
+    criadas = [a, b]
+    
+    casos = [
+        ('clone', lambda: _cliente_combinar(cliente, 'uniao', [a]),
+         lambda: cliente.post(f'/api/playlists/{a}/clone', json={'nome': 'bench clone'})),
+        ('união', lambda: _cliente_combinar(cliente, 'uniao', [a, b]),
+         lambda: cliente.post('/api/playlists/union', json={'nome': 'bench união', 'playlists': [a, b]})),
+        ('interseção', lambda: _cliente_combinar(cliente, 'intersecao', [a, b]),
+         lambda: cliente.post('/api/playlists/intersect', json={'nome': 'bench interseção', 'playlists': [a, b]})),
+        ('diferença', lambda: _cliente_combinar(cliente, 'diferenca', [a, b]),
+         lambda: cliente.post('/api/playlists/difference', json={'nome': 'bench diferença', 'playlists': [a, b]})),
+    ]
+    
+    print(f'{args.faixas} faixas por playlist de origem\n')
+    print(f'{"operação":<12} {"cliente (ms)":>14} {"servidor (ms)":>14} {"faixas":>8}')
+    try:
+        for nome, no_cliente, no_servidor in casos:
+            tempo_cliente, cod_cliente = _medir(no_cliente)
+            tempo_servidor, resposta = _medir(no_servidor)
+            dados = resposta.get_json()
+            criadas += [cod_cliente, dados['cod_playlist']]
+            print(f'{nome:<12} {tempo_cliente:14.1f} {tempo_servidor:14.1f} {dados["qtd_faixas"]:>8}')
+        
+        # Append: cada caminho acrescenta B a uma cópia de A
+        copias = [cliente.post(f'/api/playlists/{a}/clone').get_json()['cod_playlist'] for _ in range(2)]
+        criadas += copias
+        tempo_cliente, _ = _medir(lambda: _cliente_combinar(cliente, 'uniao', [b], destino=copias[0]))
+        tempo_servidor, resposta = _medir(
+            lambda: cliente.post(f'/api/playlists/{copias[1]}/append', json={'playlists': [b]}))
+        print(f'{"append":<12} {tempo_cliente:14.1f} {tempo_servidor:14.1f} {resposta.get_json()["qtd_faixas"]:>8}')
+    finally:
+        for cod_playlist in criadas:
+            cliente.delete(f'/api/playlists/{cod_playlist}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# backend/tools/bench_reorder.py
+# Mede a reordenação de uma playlist grande (PUT /tracks/order) contra o
+# caminho antigo do cliente (remover as faixas e adicioná-las de novo na
+# nova ordem)
+#
+# Uso (a partir de backend/):
+#   python -m tools.bench_reorder [--faixas 5000] [--movimentos 50]
+#
+# Cria uma playlist com `--faixas` faixas e mede, via test client do Flask
+# contra o banco configurado em config/database.py:
+#   movimento   - mover uma faixa para uma posição aleatória (uma linha,
+#                 salvo renumeração)
+#   permutacao  - aplicar uma ordem completa embaralhada (uma instrução)
+#   cliente     - a mesma permutação removendo e readicionando faixa a faixa
+# Remove tudo o que criou ao final.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SPOTPER_AQUECIMENTO', '0')
+os.environ.setdefault('SPOTPER_TAREFAS', '0')
+
+from app import app
+from tools.bench_playlists import CHAVE, _faixas_amostra, _criar
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def _reordenar_no_cliente(cliente, cod_playlist, ordem):
+    """Caminho antigo: sem reordenação no servidor, remove e readiciona tudo."""
+    for faixa in ordem:
+        cliente.delete(f'/api/playlists/{cod_playlist}/tracks/'
+                       + '/'.join(str(faixa[c]) for c in CHAVE))
+    for faixa in ordem:
+        cliente.post(f'/api/playlists/{cod_playlist}/tracks', json=faixa)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede a reordenação de playlists grandes.')
+    parser.add_argument('--faixas', type=int, default=5000)
+    parser.add_argument('--movimentos', type=int, default=50)
+    parser.add_argument('--semente', type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    amostra = _faixas_amostra(args.faixas)
+    if len(amostra) < args.faixas:
+        print(f'O catálogo precisa de ao menos {args.faixas} faixas.')
+        return 1
+    
+    aleatorio = random.Random(args.semente)
+    cliente = app.test_client()
+    cod_playlist = _criar(cliente, 'bench reordenação', amostra)
+    try:
+        rebalanceamentos = 0
+        tempos = []
+        for _ in range(args.movimentos):
+            corpo = {'faixa': aleatorio.choice(amostra), 'posicao': aleatorio.randint(1, args.faixas)}
+            tempo, resposta = _medir(
+                lambda: cliente.put(f'/api/playlists/{cod_playlist}/tracks/order', json=corpo))
+            tempos.append(tempo)
+            rebalanceamentos += bool(resposta.get_json().get('rebalanceada'))
+        
+        ordem = amostra[:]
+        aleatorio.shuffle(ordem)
+        tempo_permutacao, resposta = _medir(
+            lambda: cliente.put(f'/api/playlists/{cod_playlist}/tracks/order', json={'faixas': ordem}))
+        if resposta.status_code != 200:
+            print(f'Permutação falhou: {resposta.get_json()}')
+            return 1
+        
+        aleatorio.shuffle(ordem)
+        tempo_cliente, _ = _medir(lambda: _reordenar_no_cliente(cliente, cod_playlist, ordem))
+        
+        print(f'{args.faixas} faixas na playlist\n')
+        print(f'{"movimento":<12} {statistics.median(tempos):12.1f} ms (mediana de {args.movimentos}, '
+              f'{rebalanceamentos} renumerações)')
+        print(f'{"permutação":<12} {tempo_permutacao:12.1f} ms')
+        print(f'{"cliente":<12} {tempo_cliente:12.1f} ms (remover e readicionar)')
+    finally:
+        cliente.delete(f'/api/playlists/{cod_playlist}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
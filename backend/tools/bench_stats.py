@@ -0,0 +1,152 @@
+# backend/tools/bench_stats.py
+# Compara /api/stats (retrato NumPy) com as consultas GROUP BY equivalentes
+#
+# Uso (a partir de backend/):
+#   python -m tools.bench_stats [--repeticoes 5]
+#
+# Mede, no banco configurado em config/database.py:
+#   sql       - uma consulta GROUP BY por estatística, como seria sem o retrato
+#   carga     - leitura das colunas para o retrato (após invalidar_catalogo)
+#   calculo   - estatísticas sobre o retrato já carregado
+#   cache     - chamada repetida sem invalidação
+
+import argparse
+import statistics
+import sys
+import time
+
+from config.database import get_conexao
+from services import stats
+
+CONSULTAS_SQL = {
+    'tempo_por_tipo_midia': """
+        SELECT a.tipo_midia, SUM(f.tempo_execucao)
+        FROM FAIXA f JOIN ALBUM a ON f.cod_album = a.cod_album
+        GROUP BY a.tipo_midia
+    """,
+    'tempo_por_gravadora': """
+        SELECT TOP (?) g.cod_gravadora, g.nome, SUM(f.tempo_execucao) AS segundos
+        FROM FAIXA f
+        JOIN ALBUM a ON f.cod_album = a.cod_album
+        JOIN GRAVADORA g ON a.cod_gravadora = g.cod_gravadora
+        GROUP BY g.cod_gravadora, g.nome
+        ORDER BY segundos DESC
+    """,
+    'tempo_por_compositor': """
+        SELECT TOP (?) c.cod_compositor, c.nome, SUM(f.tempo_execucao) AS segundos
+        FROM FAIXA_COMPOSITOR fc
+        JOIN FAIXA f ON fc.cod_album = f.cod_album AND fc.numero_unidade = f.numero_unidade
+                    AND fc.numero_faixa = f.numero_faixa
+        JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
+        GROUP BY c.cod_compositor, c.nome
+        ORDER BY segundos DESC
+    """,
+    'tempo_por_periodo': """
+        SELECT p.cod_periodo, p.descricao, SUM(f.tempo_execucao)
+        FROM (SELECT DISTINCT fc.cod_album, fc.numero_unidade, fc.numero_faixa, c.cod_periodo
+              FROM FAIXA_COMPOSITOR fc JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor) fp
+        JOIN FAIXA f ON fp.cod_album = f.cod_album AND fp.numero_unidade = f.numero_unidade
+                    AND fp.numero_faixa = f.numero_faixa
+        JOIN PERIODO_MUSICAL p ON fp.cod_periodo = p.cod_periodo
+        GROUP BY p.cod_periodo, p.descricao
+    """,
+    'tempo_escutado': """
+        SELECT SUM(CAST(f.tempo_execucao AS BIGINT) * pf.num_vezes_tocada)
+        FROM PLAYLIST_FAIXA pf
+        JOIN FAIXA f ON pf.cod_album = f.cod_album AND pf.numero_unidade = f.numero_unidade
+                    AND pf.numero_faixa = f.numero_faixa
+    """,
+    'tipo_gravacao': """
+        SELECT tipo_gravacao, COUNT(*) FROM FAIXA
+        WHERE tipo_gravacao IS NOT NULL
+        GROUP BY tipo_gravacao
+    """,
+    'precos_por_tipo_compra': """
+        SELECT DISTINCT tipo_compra,
+               PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY preco_compra) OVER (PARTITION BY tipo_compra),
+               PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY preco_compra) OVER (PARTITION BY tipo_compra),
+               PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY preco_compra) OVER (PARTITION BY tipo_compra),
+               PERCENTILE_CONT(0.90) WITHIN GROUP (ORDER BY preco_compra) OVER (PARTITION BY tipo_compra),
+               MIN(preco_compra) OVER (PARTITION BY tipo_compra),
+               MAX(preco_compra) OVER (PARTITION BY tipo_compra),
+               AVG(preco_compra) OVER (PARTITION BY tipo_compra)
+        FROM ALBUM
+    """,
+    'histograma_reproducoes': """
+        SELECT CASE WHEN num_vezes_tocada >= 100 THEN 100 WHEN num_vezes_tocada >= 50 THEN 50
+                    WHEN num_vezes_tocada >= 20 THEN 20 WHEN num_vezes_tocada >= 10 THEN 10
+                    WHEN num_vezes_tocada >= 5 THEN 5 WHEN num_vezes_tocada >= 2 THEN 2
+                    ELSE num_vezes_tocada END AS faixa, COUNT(*)
+        FROM PLAYLIST_FAIXA
+        GROUP BY CASE WHEN num_vezes_tocada >= 100 THEN 100 WHEN num_vezes_tocada >= 50 THEN 50
+                      WHEN num_vezes_tocada >= 20 THEN 20 WHEN num_vezes_tocada >= 10 THEN 10
+                      WHEN num_vezes_tocada >= 5 THEN 5 WHEN num_vezes_tocada >= 2 THEN 2
+                      ELSE num_vezes_tocada END
+    """,
+}
+
+
+def _medir(funcao, repeticoes):
+    """Mediana, em milissegundos, de `repeticoes` execuções."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def _executar_sql(limite):
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    tempos = {}
+    for nome, sql in CONSULTAS_SQL.items():
+        inicio = time.perf_counter()
+        cursor.execute(sql, (limite,)) if '?' in sql else cursor.execute(sql)
+        cursor.fetchall()
+        tempos[nome] = (time.perf_counter() - inicio) * 1000
+    cursor.close()
+    conexao.close()
+    return tempos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara /api/stats com as consultas SQL equivalentes.')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite', type=int, default=stats.LIMITE_GRUPOS)
+    args = parser.parse_args(argv)
+    
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    cursor.execute("SELECT (SELECT COUNT(*) FROM FAIXA), (SELECT COUNT(*) FROM PLAYLIST_FAIXA)")
+    qtd_faixas, qtd_entradas = cursor.fetchone()
+    cursor.close()
+    conexao.close()
+    print(f'{qtd_faixas} faixas, {qtd_entradas} entradas de playlist, mediana de {args.repeticoes} execuções\n')
+    
+    execucoes = [_executar_sql(args.limite) for _ in range(args.repeticoes)]
+    print('SQL (uma consulta por estatística):')
+    for nome in CONSULTAS_SQL:
+        print(f'  {nome:<26} {statistics.median(e[nome] for e in execucoes):10.1f} ms')
+    total_sql = statistics.median(sum(e.values()) for e in execucoes)
+    print(f'  {"total":<26} {total_sql:10.1f} ms\n')
+
+    def carregar():
+        stats.invalidar_catalogo()
+        stats.obter_estatisticas(args.limite)
+
+    def calcular():
+        stats._estado['resultados'] = {}
+        stats.obter_estatisticas(args.limite)
+    
+    print('Retrato NumPy:')
+    print(f'  {"carga + cálculo":<26} {_medir(carregar, args.repeticoes):10.1f} ms')
+    tempo_calculo = _medir(calcular, args.repeticoes)
+    print(f'  {"cálculo":<26} {tempo_calculo:10.1f} ms')
+    print(f'  {"cache":<26} {_medir(lambda: stats.obter_estatisticas(args.limite), args.repeticoes):10.3f} ms')
+    print(f'\nCálculo sobre o retrato: {total_sql / tempo_calculo:.0f}x mais rápido que o SQL')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
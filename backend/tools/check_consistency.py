@@ -0,0 +1,329 @@
+# backend/tools/check_consistency.py
+# Verifica (e opcionalmente corrige) os dados derivados mantidos por triggers
+#
+# Uso (a partir de backend/):
+#   python -m tools.check_consistency [--verificacoes playlists,albuns,reproducoes]
+#                                     [--trabalhadores 8] [--lote 2000] [--reparar]
+#
+# Com trigger desabilitado, carga direta no banco ou trigger que falhou no
+# meio do cursor, os valores derivados podem divergir do que os dados dizem:
+#   playlists    PLAYLIST.tempo_total_execucao, qtd_faixas e qtd_albuns
+#                (ATUALIZAR_TEMPO_PLAYLIST e contadores) e
+#                PLAYLIST_FAIXA.tempo_inicio
+#   albuns       ALBUM.qtd_faixas, e qtd_unidades abaixo da maior
+#                numero_unidade das faixas (o "calculado" é o mínimo)
+#   reproducoes  REPRODUCAO_DIA e REPRODUCAO_MINUTO contra o histórico já
+#                consolidado (CONSOLIDACAO_REPRODUCAO)
+#
+# As chaves são divididas em faixas (cod_playlist, cod_album; um dia para as
+# reproduções) verificadas em paralelo, cada trabalhador com a sua conexão
+# no primário. Cada consulta agrega no servidor e devolve só as divergências
+# (no máximo --exemplos linhas com a contagem total), então a memória não
+# cresce com o tamanho das tabelas. Faixas com divergência são verificadas
+# de novo ao final, para descartar escritas concorrentes em andamento.
+#
+# --reparar corrige só as faixas confirmadas, com os mesmos UPDATEs set-based
+# das tarefas de manutenção, uma transação por faixa. Sai com código 1 se
+# sobrar divergência.
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.database import get_conexao
+from utils.transactions import executar_transacao
+from services.maintenance import (CTE_TOTAIS_PLAYLISTS, CTE_TEMPO_INICIO, SQL_RECALCULAR_PLAYLISTS,
+                                  SQL_RECALCULAR_TEMPO_INICIO, SQL_DIAS_REPRODUCAO, MINUTO,
+                                  reconstruir_dia_reproducao)
+
+TRABALHADORES_PADRAO = 8
+LOTE_PADRAO = 2000
+EXEMPLOS_PADRAO = 20
+
+# Toda consulta devolve (chave, campo, gravado, calculado, total de divergências)
+SQL_DIVERGENCIAS_PLAYLISTS = CTE_TOTAIS_PLAYLISTS + """
+    SELECT TOP (?) CAST(play.cod_playlist AS VARCHAR(20)), v.campo, v.gravado, v.calculado,
+           COUNT(*) OVER ()
+    FROM dbo.PLAYLIST play
+    JOIN total ON play.cod_playlist = total.cod_playlist
+    CROSS APPLY (VALUES ('tempo_total_execucao', play.tempo_total_execucao, total.tempo_total),
+                        ('qtd_faixas', play.qtd_faixas, total.faixas),
+                        ('qtd_albuns', play.qtd_albuns, total.albuns)) v (campo, gravado, calculado)
+    WHERE v.gravado <> v.calculado
+    ORDER BY play.cod_playlist
+"""
+SQL_DIVERGENCIAS_TEMPO_INICIO = CTE_TEMPO_INICIO + """
+    SELECT TOP (?) CONCAT(pf.cod_playlist, ' #', pf.ordem_reproducao), 'tempo_inicio',
+           pf.tempo_inicio, rec.novo_tempo_inicio, COUNT(*) OVER ()
+    FROM dbo.PLAYLIST_FAIXA pf
+    JOIN recalculo rec
+        ON pf.cod_playlist = rec.cod_playlist
+        AND pf.cod_album = rec.cod_album
+        AND pf.numero_unidade = rec.numero_unidade
+        AND pf.numero_faixa = rec.numero_faixa
+    WHERE pf.tempo_inicio <> rec.novo_tempo_inicio
+    ORDER BY pf.cod_playlist, pf.ordem_reproducao
+"""
+
+CTE_TOTAIS_ALBUNS = """
+    WITH total AS (
+        SELECT alb.cod_album,
+               COUNT(fax.numero_faixa) AS faixas,
+               ISNULL(MAX(fax.numero_unidade), 1) AS unidade_maxima
+        FROM dbo.ALBUM alb
+        LEFT JOIN dbo.FAIXA fax ON fax.cod_album = alb.cod_album
+        WHERE alb.cod_album BETWEEN ? AND ?
+        GROUP BY alb.cod_album
+    )
+"""
+SQL_DIVERGENCIAS_ALBUNS = CTE_TOTAIS_ALBUNS + """
+    SELECT TOP (?) CAST(alb.cod_album AS VARCHAR(20)), v.campo, v.gravado, v.calculado,
+           COUNT(*) OVER ()
+    FROM dbo.ALBUM alb
+    JOIN total ON alb.cod_album = total.cod_album
+    CROSS APPLY (VALUES ('qtd_faixas', alb.qtd_faixas, total.faixas,
+                         CASE WHEN alb.qtd_faixas <> total.faixas THEN 1 ELSE 0 END),
+                        ('qtd_unidades', alb.qtd_unidades, total.unidade_maxima,
+                         CASE WHEN alb.qtd_unidades < total.unidade_maxima THEN 1 ELSE 0 END)
+                ) v (campo, gravado, calculado, diverge)
+    WHERE v.diverge = 1
+    ORDER BY alb.cod_album
+"""
+# Download só pode ter uma unidade (CHECK): nesse caso a faixa é que está errada
+SQL_REPARAR_ALBUNS = CTE_TOTAIS_ALBUNS + """
+    UPDATE alb
+    SET qtd_faixas = total.faixas,
+        qtd_unidades = CASE WHEN alb.qtd_unidades < total.unidade_maxima AND alb.tipo_midia <> 'DOWNLOAD'
+                            THEN total.unidade_maxima ELSE alb.qtd_unidades END
+    FROM dbo.ALBUM alb
+    JOIN total ON alb.cod_album = total.cod_album
+    WHERE alb.qtd_faixas <> total.faixas
+       OR (alb.qtd_unidades < total.unidade_maxima AND alb.tipo_midia <> 'DOWNLOAD')
+"""
+
+SQL_DIVERGENCIAS_REPRODUCAO_DIA = """
+    WITH historico AS (
+        SELECT cod_album, numero_unidade, numero_faixa, COUNT(*) AS qtd
+        FROM dbo.HISTORICO_REPRODUCAO
+        WHERE data_reproducao >= ? AND data_reproducao < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+          AND data_reproducao < (SELECT consolidado_ate FROM dbo.CONSOLIDACAO_REPRODUCAO)
+        GROUP BY cod_album, numero_unidade, numero_faixa
+    ), agregado AS (
+        SELECT cod_album, numero_unidade, numero_faixa, qtd_reproducoes
+        FROM dbo.REPRODUCAO_DIA
+        WHERE dia = ?
+    )
+    SELECT TOP (?) CONCAT(ISNULL(h.cod_album, a.cod_album), '/', ISNULL(h.numero_unidade, a.numero_unidade),
+                          '/', ISNULL(h.numero_faixa, a.numero_faixa)),
+           'REPRODUCAO_DIA', ISNULL(a.qtd_reproducoes, 0), ISNULL(h.qtd, 0), COUNT(*) OVER ()
+    FROM historico h
+    FULL JOIN agregado a
+        ON h.cod_album = a.cod_album
+        AND h.numero_unidade = a.numero_unidade
+        AND h.numero_faixa = a.numero_faixa
+    WHERE ISNULL(h.qtd, 0) <> ISNULL(a.qtd_reproducoes, 0)
+"""
+SQL_DIVERGENCIAS_REPRODUCAO_MINUTO = f"""
+    WITH historico AS (
+        SELECT {MINUTO} AS minuto, cod_album, numero_unidade, numero_faixa, COUNT(*) AS qtd
+        FROM dbo.HISTORICO_REPRODUCAO
+        WHERE data_reproducao >= ? AND data_reproducao < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+          AND data_reproducao < (SELECT consolidado_ate FROM dbo.CONSOLIDACAO_REPRODUCAO)
+        GROUP BY {MINUTO}, cod_album, numero_unidade, numero_faixa
+    ), agregado AS (
+        SELECT minuto, cod_album, numero_unidade, numero_faixa, qtd_reproducoes
+        FROM dbo.REPRODUCAO_MINUTO
+        WHERE minuto >= ? AND minuto < DATEADD(DAY, 1, CAST(? AS DATETIME2(0)))
+    )
+    SELECT TOP (?) CONCAT(CONVERT(VARCHAR(16), ISNULL(h.minuto, a.minuto), 120), ' ',
+                          ISNULL(h.cod_album, a.cod_album), '/', ISNULL(h.numero_unidade, a.numero_unidade),
+                          '/', ISNULL(h.numero_faixa, a.numero_faixa)),
+           'REPRODUCAO_MINUTO', ISNULL(a.qtd_reproducoes, 0), ISNULL(h.qtd, 0), COUNT(*) OVER ()
+    FROM historico h
+    FULL JOIN agregado a
+        ON h.minuto = a.minuto
+        AND h.cod_album = a.cod_album
+        AND h.numero_unidade = a.numero_unidade
+        AND h.numero_faixa = a.numero_faixa
+    WHERE ISNULL(h.qtd, 0) <> ISNULL(a.qtd_reproducoes, 0)
+"""
+
+
+def _faixas_chaves(tabela, coluna, lote):
+    def particionar(cursor):
+        cursor.execute(f"SELECT MIN({coluna}), MAX({coluna}) FROM dbo.{tabela}")
+        minimo, maximo = cursor.fetchone()
+        if minimo is None:
+            return []
+        return [(inicio, min(inicio + lote - 1, maximo)) for inicio in range(minimo, maximo + 1, lote)]
+    return particionar
+
+
+def _dias_reproducao(cursor):
+    cursor.execute(SQL_DIAS_REPRODUCAO, (None, None, None, None))
+    return [(row[0], row[0]) for row in cursor.fetchall()]
+
+
+def _reparar_playlists(cursor, inicio, fim):
+    cursor.execute(SQL_RECALCULAR_PLAYLISTS, (inicio, fim))
+    cursor.execute(SQL_RECALCULAR_TEMPO_INICIO, (inicio, fim))
+
+
+def _reparar_albuns(cursor, inicio, fim):
+    cursor.execute(SQL_REPARAR_ALBUNS, (inicio, fim))
+
+
+def _reparar_reproducoes(cursor, dia, _):
+    reconstruir_dia_reproducao(cursor, dia)
+
+
+# nome -> (particionar(cursor), [(sql, parâmetros(início, fim))], reparar(cursor, início, fim))
+VERIFICACOES = {
+    'playlists': (
+        lambda lote: _faixas_chaves('PLAYLIST', 'cod_playlist', lote),
+        [(SQL_DIVERGENCIAS_PLAYLISTS, lambda i, f: (i, f)),
+         (SQL_DIVERGENCIAS_TEMPO_INICIO, lambda i, f: (i, f))],
+        _reparar_playlists,
+    ),
+    'albuns': (
+        lambda lote: _faixas_chaves('ALBUM', 'cod_album', lote),
+        [(SQL_DIVERGENCIAS_ALBUNS, lambda i, f: (i, f))],
+        _reparar_albuns,
+    ),
+    'reproducoes': (
+        lambda lote: _dias_reproducao,
+        [(SQL_DIVERGENCIAS_REPRODUCAO_DIA, lambda dia, _: (dia, dia, dia)),
+         (SQL_DIVERGENCIAS_REPRODUCAO_MINUTO, lambda dia, _: (dia, dia, dia, dia))],
+        _reparar_reproducoes,
+    ),
+}
+
+
+class Verificador:
+    """Executa as consultas de uma verificação por faixa de chaves, em paralelo."""
+
+    def __init__(self, trabalhadores, exemplos):
+        self.trabalhadores = trabalhadores
+        self.exemplos = exemplos
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+
+    def _cursor(self):
+        # Uma conexão por thread do pool, aberta no primeiro uso
+        if not hasattr(self._local, 'conexao'):
+            self._local.conexao = get_conexao(somente_leitura=False)
+            with self._trava:
+                self._conexoes.append(self._local.conexao)
+        return self._local.conexao.cursor()
+
+    def fechar(self):
+        for conexao in self._conexoes:
+            conexao.close()
+
+    def _verificar_faixa(self, consultas, faixa):
+        cursor = self._cursor()
+        try:
+            total, exemplos = 0, []
+            for sql, parametros in consultas:
+                cursor.execute(sql, (*parametros(*faixa), self.exemplos))
+                linhas = cursor.fetchall()
+                if linhas:
+                    total += linhas[0][4]
+                    exemplos.extend(tuple(row[:4]) for row in linhas)
+            return total, exemplos
+        finally:
+            cursor.close()
+            # Leituras no nível padrão: não deixa bloqueios nem transação aberta
+            self._local.conexao.commit()
+
+    def verificar(self, consultas, faixas, progresso=None):
+        """{faixa: (total, exemplos)} das faixas com alguma divergência."""
+        divergentes = {}
+        with ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix='verificacao') as pool:
+            futuros = {pool.submit(self._verificar_faixa, consultas, faixa): faixa for faixa in faixas}
+            for feitas, futuro in enumerate(as_completed(futuros), 1):
+                total, exemplos = futuro.result()
+                if total:
+                    divergentes[futuros[futuro]] = (total, exemplos)
+                if progresso:
+                    progresso(feitas, len(faixas))
+        return divergentes
+
+
+def _progresso(nome):
+    def mostrar(feitas, total):
+        print(f'  {nome}: {feitas}/{total} faixas', end='\n' if feitas == total else '\r',
+              file=sys.stderr, flush=True)
+    return mostrar
+
+
+def _mostrar(divergentes, exemplos):
+    mostrados = 0
+    for faixa in sorted(divergentes):
+        for chave, campo, gravado, calculado in divergentes[faixa][1]:
+            if mostrados == exemplos:
+                return
+            print(f'    {chave:<28} {campo:<22} gravado {gravado!s:<12} calculado {calculado}')
+            mostrados += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verifica e corrige os dados derivados do banco.')
+    parser.add_argument('--verificacoes', default=','.join(VERIFICACOES),
+                        help='lista separada por vírgulas: ' + ', '.join(VERIFICACOES))
+    parser.add_argument('--trabalhadores', type=int, default=TRABALHADORES_PADRAO)
+    parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='chaves por faixa')
+    parser.add_argument('--exemplos', type=int, default=EXEMPLOS_PADRAO,
+                        help='divergências listadas por verificação')
+    parser.add_argument('--reparar', action='store_true', help='corrige as faixas divergentes')
+    args = parser.parse_args(argv)
+    
+    nomes = [n.strip() for n in args.verificacoes.split(',') if n.strip()]
+    invalidas = [n for n in nomes if n not in VERIFICACOES]
+    if invalidas:
+        parser.error('verificações desconhecidas: ' + ', '.join(invalidas))
+    
+    verificador = Verificador(args.trabalhadores, args.exemplos)
+    restantes = 0
+    try:
+        for nome in nomes:
+            particionar, consultas, reparar = VERIFICACOES[nome]
+            conexao = get_conexao(somente_leitura=False)
+            cursor = conexao.cursor()
+            try:
+                faixas = particionar(args.lote)(cursor)
+            finally:
+                cursor.close()
+                conexao.close()
+            
+            inicio = time.perf_counter()
+            divergentes = verificador.verificar(consultas, faixas, _progresso(nome))
+            # Segunda passada só nas faixas divergentes: escritas em andamento
+            # durante a primeira podem ter sido vistas pela metade
+            if divergentes:
+                divergentes = verificador.verificar(consultas, list(divergentes))
+            duracao = time.perf_counter() - inicio
+            
+            total = sum(t for t, _ in divergentes.values())
+            print(f'{nome:<12} {len(faixas):>6} faixas em {duracao:7.1f} s   '
+                  f'{total} divergências em {len(divergentes)} faixas')
+            _mostrar(divergentes, args.exemplos)
+            
+            if divergentes and args.reparar:
+                for faixa in sorted(divergentes):
+                    executar_transacao(lambda cursor: reparar(cursor, *faixa))
+                depois = verificador.verificar(consultas, sorted(divergentes))
+                total = sum(t for t, _ in depois.values())
+                print(f'  reparo: {len(divergentes)} faixas corrigidas, {total} divergências restantes')
+            restantes += total
+    finally:
+        verificador.fechar()
+    
+    return 1 if restantes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
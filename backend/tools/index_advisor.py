@@ -0,0 +1,217 @@
+# backend/tools/index_advisor.py
+# Sugestão de índices a partir da carga capturada
+#
+# Uso (a partir de backend/):
+#   python -m tools.index_advisor carga.json --banco BDSpotPer_Rascunho [--top 10] [--manter]
+#
+# 1. Reexecuta cada instrução da carga (utils/workload.py) com SHOWPLAN_XML
+#    num banco de rascunho: nada é executado de fato, só os planos estimados
+#    são coletados.
+# 2. Junta os MissingIndexes dos planos por tabela e colunas de chave e
+#    ordena os candidatos pelo benefício estimado:
+#    execuções x custo da instrução x impacto (%).
+# 3. Cria os melhores candidatos no rascunho e reexecuta a carga. Ficam só os
+#    índices que o otimizador passou a usar, com o custo antes/depois.
+
+import argparse
+import json
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import pyodbc
+
+from config.database import SERVER
+
+NS = {'sp': 'http://schemas.microsoft.com/sqlserver/2004/07/showplan'}
+AMOSTRAS_POR_INSTRUCAO = 3
+
+
+def _sem_colchetes(nome):
+    return nome.strip('[]')
+
+
+def _conectar(servidor, banco):
+    return pyodbc.connect(
+        f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={servidor};DATABASE={banco};Trusted_Connection=yes;',
+        autocommit=True
+    )
+
+
+def _planos(cursor, sql, parametros):
+    """Executa a instrução com SHOWPLAN_XML ON e retorna os XMLs dos planos."""
+    planos = []
+    cursor.execute('SET SHOWPLAN_XML ON')
+    try:
+        cursor.execute(sql, parametros) if parametros else cursor.execute(sql)
+        while True:
+            for row in cursor.fetchall():
+                planos.append(row[0])
+            if not cursor.nextset():
+                break
+    finally:
+        cursor.execute('SET SHOWPLAN_XML OFF')
+    return planos
+
+
+def _analisar_plano(xml):
+    """Retorna (custo, indices usados, [índices faltantes]) de um plano."""
+    raiz = ET.fromstring(xml)
+    custo = 0.0
+    faltantes = []
+    usados = set()
+    
+    for instrucao in raiz.iter(f'{{{NS["sp"]}}}StmtSimple'):
+        custo += float(instrucao.get('StatementSubTreeCost', 0))
+    
+    for objeto in raiz.iter(f'{{{NS["sp"]}}}Object'):
+        if objeto.get('Index'):
+            usados.add(_sem_colchetes(objeto.get('Index')))
+    
+    for grupo in raiz.iter(f'{{{NS["sp"]}}}MissingIndexGroup'):
+        impacto = float(grupo.get('Impact', 0))
+        for indice in grupo.findall('sp:MissingIndex', NS):
+            colunas = {'EQUALITY': [], 'INEQUALITY': [], 'INCLUDE': []}
+            for coluna_grupo in indice.findall('sp:ColumnGroup', NS):
+                nomes = [_sem_colchetes(c.get('Name')) for c in coluna_grupo.findall('sp:Column', NS)]
+                colunas[coluna_grupo.get('Usage')].extend(nomes)
+            faltantes.append({
+                'esquema': _sem_colchetes(indice.get('Schema')),
+                'tabela': _sem_colchetes(indice.get('Table')),
+                'igualdade': tuple(colunas['EQUALITY']),
+                'desigualdade': tuple(colunas['INEQUALITY']),
+                'inclusao': set(colunas['INCLUDE']),
+                'impacto': impacto,
+            })
+    return custo, usados, faltantes
+
+
+def reproduzir(cursor, carga):
+    """Coleta custo médio, índices usados e faltantes de cada instrução da carga."""
+    resultados = []
+    for instrucao in carga:
+        amostras = instrucao['parametros'][:AMOSTRAS_POR_INSTRUCAO] or [[]]
+        if amostras == [[]] and '?' in instrucao['sql']:
+            continue
+        
+        custos, usados, faltantes = [], set(), []
+        for parametros in amostras:
+            try:
+                planos = _planos(cursor, instrucao['sql'], parametros)
+            except pyodbc.Error as e:
+                print(f'  ignorada ({e.args[0]}): {instrucao["sql"][:80]}', file=sys.stderr)
+                break
+            custo = 0.0
+            for plano in planos:
+                custo_plano, usados_plano, faltantes_plano = _analisar_plano(plano)
+                custo += custo_plano
+                usados |= usados_plano
+                faltantes.extend(faltantes_plano)
+            custos.append(custo)
+        
+        if custos:
+            resultados.append({
+                'sql': instrucao['sql'],
+                'execucoes': instrucao['execucoes'],
+                'custo': sum(custos) / len(custos),
+                'usados': usados,
+                'faltantes': faltantes,
+                'amostras': len(custos),
+            })
+    return resultados
+
+
+def candidatos(resultados):
+    """Agrupa os índices faltantes por chave e ordena pelo benefício estimado."""
+    agrupados = {}
+    for resultado in resultados:
+        for faltante in resultado['faltantes']:
+            chave = (faltante['esquema'], faltante['tabela'], faltante['igualdade'], faltante['desigualdade'])
+            candidato = agrupados.setdefault(chave, {
+                'esquema': faltante['esquema'], 'tabela': faltante['tabela'],
+                'igualdade': faltante['igualdade'], 'desigualdade': faltante['desigualdade'],
+                'inclusao': set(), 'beneficio': 0.0, 'instrucoes': set(),
+            })
+            candidato['inclusao'] |= faltante['inclusao']
+            # Cada amostra contribui com a sua fração das execuções
+            peso = resultado['execucoes'] / resultado['amostras']
+            candidato['beneficio'] += peso * resultado['custo'] * faltante['impacto'] / 100
+            candidato['instrucoes'].add(resultado['sql'])
+    
+    ordenados = sorted(agrupados.values(), key=lambda c: -c['beneficio'])
+    for candidato in ordenados:
+        chave = candidato['igualdade'] + candidato['desigualdade']
+        candidato['inclusao'] -= set(chave)
+        candidato['nome'] = re.sub(r'\W', '_', 'sugestao_' + candidato['tabela'].lower() + '_' + '_'.join(chave))[:128]
+    return ordenados
+
+
+def ddl(candidato):
+    """CREATE INDEX do candidato."""
+    chave = ', '.join(candidato['igualdade'] + candidato['desigualdade'])
+    sql = f"CREATE NONCLUSTERED INDEX {candidato['nome']}\n    ON {candidato['esquema']}.{candidato['tabela']}({chave})"
+    if candidato['inclusao']:
+        sql += f"\n    INCLUDE ({', '.join(sorted(candidato['inclusao']))})"
+    return sql + ';'
+
+
+def custo_total(resultados):
+    return sum(r['execucoes'] * r['custo'] for r in resultados)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sugere índices para a carga capturada.')
+    parser.add_argument('carga', help='arquivo JSON gerado pela captura (SPOTPER_CAPTURA_CARGA)')
+    parser.add_argument('--servidor', default=SERVER)
+    parser.add_argument('--banco', required=True, help='banco de rascunho (cópia do BDSpotPer)')
+    parser.add_argument('--top', type=int, default=10, help='quantos candidatos verificar')
+    parser.add_argument('--manter', action='store_true', help='não remove os índices verificados do rascunho')
+    args = parser.parse_args(argv)
+    
+    with open(args.carga, encoding='utf-8') as arquivo:
+        carga = json.load(arquivo)
+    
+    conexao = _conectar(args.servidor, args.banco)
+    cursor = conexao.cursor()
+    
+    print(f'Reproduzindo {len(carga)} instruções em {args.banco}...')
+    antes = reproduzir(cursor, carga)
+    sugestoes = candidatos(antes)[:args.top]
+    if not sugestoes:
+        print('Nenhum índice faltante nos planos.')
+        return 0
+    
+    criados = []
+    for candidato in sugestoes:
+        try:
+            cursor.execute(ddl(candidato))
+            criados.append(candidato)
+        except pyodbc.Error as e:
+            print(f'  não foi possível criar {candidato["nome"]}: {e.args[1]}', file=sys.stderr)
+    
+    print('Verificando com os índices criados...')
+    depois = reproduzir(cursor, carga)
+    usados = set().union(*(r['usados'] for r in depois)) if depois else set()
+    
+    custo_antes, custo_depois = custo_total(antes), custo_total(depois)
+    print(f'\nCusto estimado da carga: {custo_antes:.2f} -> {custo_depois:.2f}\n')
+    
+    for candidato in criados:
+        if candidato['nome'] in usados:
+            print(f'-- benefício estimado {candidato["beneficio"]:.2f} '
+                  f'({len(candidato["instrucoes"])} instrução(ões))')
+            print(ddl(candidato) + '\nGO\n')
+        else:
+            print(f'-- descartado (não usado pelo otimizador): {candidato["nome"]}\n')
+    
+    if not args.manter:
+        for candidato in criados:
+            cursor.execute(f"DROP INDEX {candidato['nome']} ON {candidato['esquema']}.{candidato['tabela']}")
+    
+    cursor.close()
+    conexao.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# backend/tools/validation_parity.py
+# Confere a pré-validação (services/validation.py) contra os triggers do banco
+#
+# Uso (a partir de backend/):
+#   python -m tools.validation_parity [--aleatorios 200] [--semente 1]
+#
+# Para cada caso (escritas montadas a partir do catálogo atual, mais
+# `--aleatorios` inserções sorteadas), compara o que a pré-validação diz com o
+# que o banco faz quando a mesma escrita roda numa transação desfeita no fim:
+#   - sem violações, o banco precisa aceitar;
+#   - com violações, o banco precisa recusar, e o erro dele precisa ser uma
+#     delas (texto do RAISERROR ou nome da constraint).
+# Nada é gravado. Sai com código 1 se algum caso divergir.
+
+import argparse
+import json
+import random
+import sys
+from decimal import Decimal
+
+import pyodbc
+
+from config.database import get_conexao
+from services import validation
+from services.track_index import indice_faixas
+
+SQL_INSERIR_FAIXAS = """
+    INSERT INTO FAIXA (cod_album, numero_unidade, numero_faixa, descricao,
+                      cod_tipo_composicao, tempo_execucao, tipo_gravacao)
+    SELECT cod_album, numero_unidade, numero_faixa, descricao,
+           cod_tipo_composicao, tempo_execucao, tipo_gravacao
+    FROM OPENJSON(?) WITH (
+        cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, descricao NVARCHAR(MAX),
+        cod_tipo_composicao INT, tempo_execucao INT, tipo_gravacao NVARCHAR(MAX)
+    )
+"""
+SQL_INSERIR_COMPOSITORES = """
+    INSERT INTO FAIXA_COMPOSITOR (cod_album, numero_unidade, numero_faixa, cod_compositor)
+    SELECT cod_album, numero_unidade, numero_faixa, cod_compositor
+    FROM OPENJSON(?) WITH (
+        cod_album INT, numero_unidade TINYINT, numero_faixa TINYINT, cod_compositor INT
+    )
+"""
+
+
+def _inserir_faixas(cursor, faixas):
+    cursor.execute(SQL_INSERIR_FAIXAS, (json.dumps(faixas),))
+    associacoes = [{'cod_album': f['cod_album'], 'numero_unidade': f['numero_unidade'],
+                    'numero_faixa': f['numero_faixa'], 'cod_compositor': c}
+                   for f in faixas for c in f.get('compositores', ())]
+    if associacoes:
+        cursor.execute(SQL_INSERIR_COMPOSITORES, (json.dumps(associacoes),))
+
+
+def _atualizar_faixa(cursor, chave, dados):
+    cursor.execute("""
+        UPDATE FAIXA
+        SET descricao = ?, cod_tipo_composicao = ?, tempo_execucao = ?, tipo_gravacao = ?
+        WHERE cod_album = ? AND numero_unidade = ? AND numero_faixa = ?
+    """, (dados['descricao'], dados['cod_tipo_composicao'], dados['tempo_execucao'],
+          dados.get('tipo_gravacao')) + chave)
+
+
+def _inserir_album(cursor, dados):
+    cursor.execute("""
+        INSERT INTO ALBUM (nome, descricao, cod_gravadora, preco_compra, data_compra,
+                          data_gravacao, tipo_compra, tipo_midia, qtd_unidades)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, tuple(dados[c] for c in validation.CAMPOS_ALBUM) + (dados.get('qtd_unidades', 1),))
+
+
+def _atualizar_album(cursor, cod_album, dados):
+    cursor.execute("""
+        UPDATE ALBUM
+        SET nome = ?, descricao = ?, cod_gravadora = ?, preco_compra = ?,
+            data_compra = ?, data_gravacao = ?, tipo_compra = ?, qtd_unidades = ?
+        WHERE cod_album = ?
+    """, tuple(dados[c] for c in validation.CAMPOS_ALBUM[:-1]) + (dados.get('qtd_unidades', 1), cod_album))
+
+
+def _executar_no_banco(escrita):
+    """Roda a escrita numa transação sempre desfeita; retorna o erro ou None."""
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    try:
+        escrita(cursor)
+        return None
+    except pyodbc.Error as e:
+        return str(e.args[1] if len(e.args) > 1 else e)
+    finally:
+        conexao.rollback()
+        cursor.close()
+        conexao.close()
+
+
+def _confere(violacoes, erro_banco):
+    if not violacoes:
+        return erro_banco is None
+    if erro_banco is None:
+        return False
+    return any(v['mensagem'] in erro_banco or v['regra'] in erro_banco for v in violacoes)
+
+
+class _Catalogo:
+    """Dados do banco para montar os casos."""
+
+    def __init__(self):
+        conexao = get_conexao(somente_leitura=False)
+        cursor = conexao.cursor()
+        cursor.execute("SELECT cod_album, tipo_midia, qtd_unidades, qtd_faixas FROM ALBUM")
+        self.albuns = [dict(zip(('cod_album', 'tipo_midia', 'qtd_unidades', 'qtd_faixas'), row))
+                       for row in cursor.fetchall()]
+        cursor.execute("SELECT MIN(cod_tipo_composicao) FROM TIPO_COMPOSICAO")
+        self.tipo_composicao = cursor.fetchone()[0]
+        cursor.execute("SELECT MIN(cod_gravadora) FROM GRAVADORA")
+        self.gravadora = cursor.fetchone()[0]
+        cursor.execute(validation.SQL_COMPOSITORES)
+        compositores = cursor.fetchall()
+        self.barrocos = [row[0] for row in compositores if row[2]]
+        self.outros = [row[0] for row in compositores if not row[2]]
+        cursor.execute("""
+            SELECT TOP 1 fc.cod_album, fc.numero_unidade, fc.numero_faixa
+            FROM FAIXA_COMPOSITOR fc
+            JOIN COMPOSITOR c ON fc.cod_compositor = c.cod_compositor
+            JOIN PERIODO_MUSICAL p ON c.cod_periodo = p.cod_periodo
+            WHERE UPPER(p.descricao) LIKE '%BARROCO%'
+        """)
+        row = cursor.fetchone()
+        self.faixa_barroca = tuple(row) if row else None
+        cursor.close()
+        conexao.close()
+
+    def album(self, **criterios):
+        for album in self.albuns:
+            if all(album[c] == v for c, v in criterios.items()):
+                return album
+        return None
+
+    def numero_livre(self, cod_album, unidade=1, ignorar=()):
+        """Primeiro número de faixa livre na unidade (segundo o índice)."""
+        for numero in range(1, 256):
+            chave = (cod_album, unidade, numero)
+            if chave not in ignorar and not indice_faixas.estado_faixas([chave]):
+                return numero
+        return None
+
+    def faixa(self, album, gravacao='DDD', unidade=1, numero=None, **extras):
+        return dict({
+            'cod_album': album['cod_album'], 'numero_unidade': unidade,
+            'numero_faixa': numero or self.numero_livre(album['cod_album'], unidade),
+            'descricao': 'validacao', 'cod_tipo_composicao': self.tipo_composicao,
+            'tempo_execucao': 180, 'tipo_gravacao': gravacao,
+        }, **extras)
+
+
+def _gravacao_valida(album):
+    return 'DDD' if album['tipo_midia'] == 'CD' else None
+
+
+def _casos(catalogo):
+    """(nome, violações previstas, escrita) para cada caso montado."""
+    casos = []
+
+    def inserir(nome, faixas):
+        casos.append((nome, validation.validar_faixas(faixas), lambda c: _inserir_faixas(c, faixas)))
+    
+    cd = catalogo.album(tipo_midia='CD')
+    vinil = catalogo.album(tipo_midia='VINIL')
+    download = catalogo.album(tipo_midia='DOWNLOAD')
+    if cd:
+        inserir('faixa válida (CD)', [catalogo.faixa(cd)])
+        inserir('CD sem tipo_gravacao', [catalogo.faixa(cd, gravacao=None)])
+        inserir('unidade além de qtd_unidades', [catalogo.faixa(cd, unidade=cd['qtd_unidades'] + 1)])
+        inserir('tempo_execucao zero', [catalogo.faixa(cd, tempo_execucao=0)])
+        if catalogo.barrocos:
+            inserir('compositor barroco com ADD',
+                    [catalogo.faixa(cd, gravacao='ADD', compositores=[catalogo.barrocos[0]])])
+            inserir('compositor barroco com DDD',
+                    [catalogo.faixa(cd, compositores=[catalogo.barrocos[0]])])
+        livres = []
+        for _ in range(max(0, 65 - cd['qtd_faixas'])):
+            livres.append(catalogo.numero_livre(cd['cod_album'], ignorar={
+                (cd['cod_album'], 1, n) for n in livres}))
+        if None not in livres:
+            inserir('65 faixas no álbum', [catalogo.faixa(cd, numero=n) for n in livres])
+    if vinil:
+        inserir('VINIL com tipo_gravacao', [catalogo.faixa(vinil, gravacao='ADD')])
+    if download:
+        inserir('DOWNLOAD na unidade 2', [catalogo.faixa(download, gravacao=None, unidade=2)])
+    if cd and vinil:
+        inserir('lote com várias violações', [
+            catalogo.faixa(cd, gravacao=None), catalogo.faixa(vinil, gravacao='DDD'),
+            catalogo.faixa(cd, unidade=cd['qtd_unidades'] + 1),
+        ])
+    
+    if catalogo.faixa_barroca:
+        chave = catalogo.faixa_barroca
+        dados = {'descricao': 'validacao', 'cod_tipo_composicao': catalogo.tipo_composicao,
+                 'tempo_execucao': 180, 'tipo_gravacao': 'ADD'}
+        casos.append(('faixa barroca atualizada para ADD', validation.validar_atualizacao_faixa(chave, dados),
+                      lambda c, d=dados: _atualizar_faixa(c, chave, d)))
+    
+    media = validation.agregados.media_ddd()
+    if media:
+        for nome, preco in (('álbum no limite de preço', 3 * media),
+                            ('álbum acima do limite de preço', 3 * media + Decimal('0.01'))):
+            dados = {'nome': 'validacao', 'descricao': 'validacao', 'cod_gravadora': catalogo.gravadora,
+                     'preco_compra': str(preco), 'data_compra': '2024-01-01',
+                     'data_gravacao': '2020-01-01', 'tipo_compra': 'validacao', 'tipo_midia': 'CD'}
+            casos.append((nome, validation.validar_album(dados), lambda c, d=dados: _inserir_album(c, d)))
+        alvo = catalogo.albuns[0]
+        dados = {'nome': 'validacao', 'descricao': 'validacao', 'cod_gravadora': catalogo.gravadora,
+                 'preco_compra': str(100 * media), 'data_compra': '2024-01-01',
+                 'data_gravacao': '2020-01-01', 'tipo_compra': 'validacao',
+                 'qtd_unidades': alvo['qtd_unidades']}
+        casos.append(('preço de álbum existente acima do limite',
+                      validation.validar_album(dados, alvo['cod_album']),
+                      lambda c, d=dados: _atualizar_album(c, alvo['cod_album'], d)))
+    return casos
+
+
+def _casos_aleatorios(catalogo, quantidade, rng):
+    """Inserções de uma a três faixas com campos sorteados."""
+    casos = []
+    for i in range(quantidade):
+        faixas = []
+        usadas = set()
+        for _ in range(rng.randint(1, 3)):
+            album = rng.choice(catalogo.albuns)
+            unidade = rng.choice([1, 1, 1, 2, album['qtd_unidades'] + 1])
+            numero = catalogo.numero_livre(album['cod_album'], unidade, usadas)
+            if numero is None:
+                continue
+            usadas.add((album['cod_album'], unidade, numero))
+            compositores = []
+            if catalogo.barrocos and rng.random() < 0.3:
+                compositores.append(rng.choice(catalogo.barrocos))
+            if catalogo.outros and rng.random() < 0.3:
+                compositores.append(rng.choice(catalogo.outros))
+            gravacao = rng.choice([_gravacao_valida(album)] * 3 + [None, 'ADD', 'DDD'])
+            faixas.append(catalogo.faixa(album, gravacao=gravacao, unidade=unidade, numero=numero,
+                                         compositores=compositores))
+        if faixas:
+            casos.append((f'aleatório {i + 1}', validation.validar_faixas(faixas),
+                          lambda c, f=faixas: _inserir_faixas(c, f)))
+    return casos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Confere a pré-validação contra os triggers do banco.')
+    parser.add_argument('--aleatorios', type=int, default=200)
+    parser.add_argument('--semente', type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    catalogo = _Catalogo()
+    if not catalogo.albuns:
+        print('O catálogo precisa de ao menos um álbum.')
+        return 1
+    casos = _casos(catalogo) + _casos_aleatorios(catalogo, args.aleatorios, random.Random(args.semente))
+    
+    divergencias = 0
+    recusados = 0
+    for nome, violacoes, escrita in casos:
+        erro_banco = _executar_no_banco(escrita)
+        recusados += erro_banco is not None
+        if not _confere(violacoes, erro_banco):
+            divergencias += 1
+            print(f'DIVERGE  {nome}')
+            print(f'  pré-validação: {[v["regra"] for v in violacoes] or "ok"}')
+            print(f'  banco:         {erro_banco or "ok"}')
+        elif not nome.startswith('aleatório'):
+            regras = ', '.join(dict.fromkeys(v['regra'] for v in violacoes)) or 'ok'
+            print(f'ok       {nome:<44} {regras}')
+    
+    print(f'\n{len(casos)} casos, {recusados} recusados pelo banco, {divergencias} divergências')
+    return 1 if divergencias else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# backend/utils/__init__.py
+# Utilitários compartilhados pelas rotas do backend SpotPer
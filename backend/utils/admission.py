@@ -0,0 +1,126 @@
+# backend/utils/admission.py
+# Controle de admissão por classe de endpoint
+#
+# Cada classe (reprodução, interativo, relatório...) tem um limite de
+# requisições simultâneas e uma fila de espera limitada. Com a fila cheia, ou
+# depois de esperar demais, a requisição é recusada com 503 + Retry-After.
+# Assim uma rajada de relatórios ocupa no máximo os workers da sua classe e as
+# rotas de reprodução e interativas continuam respondendo.
+#
+# Não há prioridade entre classes: nenhuma fila é servida antes de outra, e
+# uma requisição barata nunca passa à frente de uma cara da mesma classe. A
+# proteção das rotas baratas vem do isolamento, porque cada classe só disputa
+# os seus próprios lugares. Por isso a soma dos limites deve caber nos workers
+# do servidor; se passar, as classes voltam a competir pelos mesmos workers.
+# tests/test_admission.py verifica que a latência da reprodução continua
+# baixa com a classe de relatórios saturada.
+
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from utils.metrics import definir, incrementar
+
+CLASSE_PADRAO = 'interativo'
+
+_classes = {}
+_rotas = {}
+
+
+class _Classe:
+    """Limite de concorrência com fila de espera limitada."""
+
+    def __init__(self, nome, limite, fila, espera_maxima=10.0, retry_after=2):
+        self.nome = nome
+        self.limite = limite
+        self.fila = fila
+        self.espera_maxima = espera_maxima
+        self.retry_after = retry_after
+        self.ativas = 0
+        self.esperando = 0
+        self._condicao = threading.Condition()
+
+    def _publicar(self):
+        definir(f'admissao.{self.nome}.ativas', self.ativas)
+        definir(f'admissao.{self.nome}.fila', self.esperando)
+
+    def adquirir(self):
+        """Ocupa uma vaga; retorna False se a requisição deve ser recusada."""
+        with self._condicao:
+            if self.ativas < self.limite:
+                self.ativas += 1
+                self._publicar()
+                return True
+            if self.esperando >= self.fila:
+                incrementar(f'admissao.{self.nome}.rejeitadas')
+                return False
+            
+            self.esperando += 1
+            self._publicar()
+            limite_espera = time.monotonic() + self.espera_maxima
+            try:
+                while self.ativas >= self.limite:
+                    restante = limite_espera - time.monotonic()
+                    if restante <= 0:
+                        incrementar(f'admissao.{self.nome}.expiradas_na_fila')
+                        return False
+                    self._condicao.wait(restante)
+                self.ativas += 1
+                return True
+            finally:
+                self.esperando -= 1
+                self._publicar()
+
+    def liberar(self):
+        with self._condicao:
+            self.ativas -= 1
+            self._publicar()
+            self._condicao.notify()
+
+
+def classe_da_rota(endpoint):
+    """Classe do endpoint: configuração do endpoint, depois do blueprint."""
+    if endpoint is None:
+        return None
+    if endpoint in _rotas:
+        return _rotas[endpoint]
+    blueprint = endpoint.rsplit('.', 1)[0] if '.' in endpoint else None
+    return _rotas.get(blueprint, CLASSE_PADRAO)
+
+
+def _admitir():
+    if request.method == 'OPTIONS':
+        return None
+    classe = _classes.get(classe_da_rota(request.endpoint))
+    if classe is None:
+        return None
+    
+    if not classe.adquirir():
+        resposta = jsonify({'error': True, 'message': 'Servidor ocupado, tente novamente'})
+        resposta.status_code = 503
+        resposta.headers['Retry-After'] = str(classe.retry_after)
+        return resposta
+    g.admissao = classe
+    return None
+
+
+def _liberar(erro=None):
+    classe = g.pop('admissao', None)
+    if classe is not None:
+        classe.liberar()
+
+
+def configurar_admissao(app, classes, rotas):
+    """Ativa o controle de admissão.
+    
+    `classes` mapeia nome -> dict(limite, fila[, espera_maxima, retry_after]).
+    `rotas` mapeia endpoint ou blueprint -> nome da classe; rotas sem
+    entrada usam CLASSE_PADRAO, e um valor None deixa a rota sem controle.
+    """
+    for nome, parametros in classes.items():
+        _classes[nome] = _Classe(nome, **parametros)
+        _classes[nome]._publicar()
+    _rotas.update(rotas)
+    app.before_request(_admitir)
+    app.teardown_request(_liberar)
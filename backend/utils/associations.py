@@ -0,0 +1,96 @@
+# backend/utils/associations.py
+# Sincronização de tabelas de associação por diferença
+#
+# Atualizar a lista de compositores de uma faixa (ou de telefones de uma
+# gravadora) apagando tudo e inserindo de novo reexecuta os triggers de
+# validação e mexe nos índices mesmo quando nada mudou. sincronizar() lê as
+# linhas atuais, compara com as desejadas e aplica só a diferença, com no
+# máximo um DELETE, um UPDATE e um INSERT em lote (OPENJSON). Sem diferença,
+# não há escrita nenhuma.
+
+import json
+
+
+class Associacao:
+    """Tabela de associação: colunas do dono, coluna da chave e atributos.
+    
+    As colunas são pares (nome, tipo SQL), usados no WITH do OPENJSON.
+    """
+
+    def __init__(self, tabela, dono, chave, atributos=()):
+        self.tabela = tabela
+        self.dono = [nome for nome, _ in dono]
+        self.chave = chave[0]
+        self.atributos = [nome for nome, _ in atributos]
+        filtro = ' AND '.join(f'{nome} = ?' for nome in self.dono)
+        esquema = ', '.join(f'{nome} {tipo}' for nome, tipo in (chave, *atributos))
+        colunas = [self.chave, *self.atributos]
+        
+        self.sql_ler = f"SELECT {', '.join(colunas)} FROM {tabela} WHERE {filtro}"
+        self.sql_remover = f"""
+            DELETE FROM {tabela}
+            WHERE {filtro} AND {self.chave} IN (
+                SELECT {self.chave} FROM OPENJSON(?) WITH ({chave[0]} {chave[1]})
+            )
+        """
+        self.sql_alterar = f"""
+            UPDATE t SET {', '.join(f't.{nome} = j.{nome}' for nome in self.atributos)}
+            FROM {tabela} t
+            JOIN OPENJSON(?) WITH ({esquema}) j ON t.{self.chave} = j.{self.chave}
+            WHERE {' AND '.join(f't.{nome} = ?' for nome in self.dono)}
+        """
+        self.sql_inserir = f"""
+            INSERT INTO {tabela} ({', '.join(self.dono + colunas)})
+            SELECT {', '.join(['?'] * len(self.dono) + colunas)}
+            FROM OPENJSON(?) WITH ({esquema})
+        """
+
+
+FAIXA_COMPOSITOR = Associacao(
+    'FAIXA_COMPOSITOR',
+    dono=(('cod_album', 'INT'), ('numero_unidade', 'TINYINT'), ('numero_faixa', 'TINYINT')),
+    chave=('cod_compositor', 'INT'),
+)
+FAIXA_INTERPRETE = Associacao(
+    'FAIXA_INTERPRETE',
+    dono=(('cod_album', 'INT'), ('numero_unidade', 'TINYINT'), ('numero_faixa', 'TINYINT')),
+    chave=('cod_interprete', 'INT'),
+)
+TELEFONE_GRAVADORA = Associacao(
+    'TELEFONE_GRAVADORA',
+    dono=(('cod_gravadora', 'INT'),),
+    chave=('telefone', 'VARCHAR(15)'),
+    atributos=(('tipo_telefone', 'VARCHAR(15)'),),
+)
+
+
+def sincronizar(cursor, associacao, dono, desejados):
+    """Deixa as linhas do dono iguais a `desejados` (dentro da transação do chamador).
+    
+    `dono` é a tupla de valores das colunas do dono; `desejados` mapeia
+    chave -> tupla de atributos (ou é só um iterável de chaves, quando a
+    tabela não tem atributos). Retorna {'inseridos', 'removidos', 'alterados'}
+    com as chaves de cada grupo.
+    """
+    if not isinstance(desejados, dict):
+        desejados = {chave: () for chave in desejados}
+    
+    cursor.execute(associacao.sql_ler, dono)
+    atuais = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+    
+    removidos = sorted(set(atuais).difference(desejados))
+    inseridos = sorted(set(desejados).difference(atuais))
+    alterados = sorted(chave for chave in set(desejados).intersection(atuais)
+                       if tuple(desejados[chave]) != atuais[chave])
+    
+    def linhas(chaves):
+        return json.dumps([dict(zip([associacao.chave, *associacao.atributos],
+                                    (chave, *desejados.get(chave, ())))) for chave in chaves])
+    
+    if removidos:
+        cursor.execute(associacao.sql_remover, (*dono, linhas(removidos)))
+    if alterados:
+        cursor.execute(associacao.sql_alterar, (linhas(alterados), *dono))
+    if inseridos:
+        cursor.execute(associacao.sql_inserir, (*dono, linhas(inseridos)))
+    return {'inseridos': inseridos, 'removidos': removidos, 'alterados': alterados}
@@ -0,0 +1,115 @@
+# backend/utils/coalescing.py
+# Coalescência de requisições idênticas (single-flight)
+#
+# Requisições concorrentes para a mesma rota com os mesmos argumentos
+# compartilham uma única execução no banco: a primeira (líder) executa o
+# handler e as demais aguardam e recebem uma cópia da mesma resposta.
+#
+# Um cliente que acabou de escrever (token em X-SpotPer-Escrita) só
+# aproveita execuções iniciadas depois da sua escrita: uma resposta da
+# janela de graça, ou um líder que começou antes, pode não conter a escrita.
+
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+
+from config.database import CABECALHO_ESCRITA, escreveu_recentemente, leitura_na_replica
+
+TEMPO_ESPERA_PADRAO = 30.0   # segundos que uma requisição aguarda o líder
+JANELA_GRACA_PADRAO = 0.5    # segundos em que uma resposta pronta é reaproveitada
+
+_chamadas = {}
+_trava = threading.Lock()
+
+
+class _Chamada:
+    """Execução em andamento (ou recém-concluída) de uma chave."""
+
+    def __init__(self):
+        self.pronta = threading.Event()
+        self.resposta = None
+        self.concluida_em = None
+        self.iniciada_em = time.time()  # mesmo relógio do token de escrita
+
+    def expirada(self, agora, janela_graca):
+        return self.concluida_em is not None and agora - self.concluida_em > janela_graca
+
+
+def _chave_requisicao():
+    """Rota + argumentos da URL + query string normalizada + destino da leitura.
+    
+    Quem acabou de escrever lê do primário e não pode receber o resultado
+    de uma execução feita na réplica.
+    """
+    argumentos_rota = tuple(sorted((request.view_args or {}).items()))
+    argumentos = tuple(sorted(request.args.items(multi=True)))
+    return (request.endpoint, argumentos_rota, argumentos, leitura_na_replica())
+
+
+def _instante_escrita():
+    """Instante da escrita recente do cliente (None se não houver)."""
+    if not escreveu_recentemente():
+        return None
+    try:
+        return float(request.headers[CABECALHO_ESCRITA])
+    except ValueError:
+        return float('inf')  # token malformado: não aproveita nenhuma execução
+
+
+def _remover_expiradas(agora, janela_graca):
+    """Remove chamadas concluídas fora da janela de graça (com a trava)."""
+    for chave in [c for c, ch in _chamadas.items() if ch.expirada(agora, janela_graca)]:
+        del _chamadas[chave]
+
+
+def coalescer(tempo_espera=TEMPO_ESPERA_PADRAO, janela_graca=JANELA_GRACA_PADRAO):
+    """Decorador de handlers GET que compartilha execuções idênticas.
+    
+    Se o líder não terminar em `tempo_espera` segundos, ou falhar com exceção,
+    quem estava aguardando executa o handler por conta própria.
+    """
+    def decorador(funcao):
+        @wraps(funcao)
+        def wrapper(*args, **kwargs):
+            chave = _chave_requisicao()
+            escrita = _instante_escrita()
+            
+            with _trava:
+                agora = time.monotonic()
+                chamada = _chamadas.get(chave)
+                if chamada is not None and (chamada.expirada(agora, janela_graca)
+                                            or (escrita is not None and chamada.iniciada_em < escrita)):
+                    chamada = None
+                lider = chamada is None
+                if lider:
+                    chamada = _Chamada()
+                    _chamadas[chave] = chamada
+            
+            if lider:
+                try:
+                    resposta = current_app.make_response(funcao(*args, **kwargs))
+                    # Só respostas de sucesso são compartilhadas: uma falha do
+                    # líder (ex.: cliente desconectou e a consulta foi cancelada)
+                    # faz os demais executarem por conta própria
+                    if not resposta.is_streamed and resposta.status_code < 400:
+                        chamada.resposta = (resposta.get_data(), resposta.status_code,
+                                            list(resposta.headers.items()))
+                    return resposta
+                finally:
+                    with _trava:
+                        chamada.concluida_em = time.monotonic()
+                        if chamada.resposta is None and _chamadas.get(chave) is chamada:
+                            del _chamadas[chave]
+                        _remover_expiradas(chamada.concluida_em, janela_graca)
+                    chamada.pronta.set()
+            
+            if not chamada.pronta.wait(tempo_espera) or chamada.resposta is None:
+                return funcao(*args, **kwargs)
+            
+            corpo, status, cabecalhos = chamada.resposta
+            return current_app.response_class(corpo, status=status, headers=cabecalhos)
+        
+        return wrapper
+    return decorador
@@ -0,0 +1,180 @@
+# backend/utils/deadlines.py
+# Prazos por rota e cancelamento de consultas
+#
+# Cada requisição recebe um prazo (configurado por endpoint e, opcionalmente,
+# encurtado pelo cliente com o cabeçalho X-SpotPer-Prazo, em segundos). As
+# conexões abertas durante a requisição recebem o tempo restante como timeout
+# de consulta, e uma thread de monitoramento cancela os cursores em execução
+# quando o prazo vence ou quando o cliente desconecta.
+
+import math
+import select
+import socket
+import threading
+import time
+
+import pyodbc
+from flask import g, has_request_context, jsonify, request
+
+CABECALHO_PRAZO = 'X-SpotPer-Prazo'
+PRAZO_PADRAO = 30.0      # segundos
+INTERVALO_MONITOR = 0.2  # segundos entre verificações
+
+_prazos_rotas = {}
+_ativas = {}
+_trava = threading.Lock()
+_monitor = None
+
+
+class _Requisicao:
+    """Estado de uma requisição acompanhada pelo monitor."""
+
+    def __init__(self, prazo, soquete):
+        self.prazo = prazo
+        self.soquete = soquete
+        self.cursores = []
+        self.motivo = None   # 'prazo' ou 'desconexao' depois de cancelada
+
+    def restante(self):
+        return self.prazo - time.monotonic()
+
+    def cancelar(self, motivo):
+        self.motivo = motivo
+        for cursor in list(self.cursores):
+            try:
+                cursor.cancel()
+            except Exception:
+                pass  # cursor já fechado ou sem consulta em andamento
+
+
+class _ConexaoMonitorada:
+    """Conexão que registra os cursores abertos para poder cancelá-los."""
+
+    def __init__(self, conexao, estado):
+        self._conexao = conexao
+        self._estado = estado
+
+    def cursor(self):
+        cursor = self._conexao.cursor()
+        self._estado.cursores.append(cursor)
+        return cursor
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+
+def _cliente_desconectou(soquete):
+    """O cliente fechou a conexão? (leitura sem consumir, sem bloquear)"""
+    try:
+        legivel, _, _ = select.select([soquete], [], [], 0)
+        return bool(legivel) and soquete.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+
+def _monitorar():
+    while True:
+        time.sleep(INTERVALO_MONITOR)
+        with _trava:
+            ativas = list(_ativas.values())
+        for estado in ativas:
+            if estado.motivo is not None or not estado.cursores:
+                continue
+            if estado.restante() <= 0:
+                estado.cancelar('prazo')
+            elif estado.soquete is not None and _cliente_desconectou(estado.soquete):
+                estado.cancelar('desconexao')
+
+
+def _iniciar_monitor():
+    global _monitor
+    with _trava:
+        if _monitor is None:
+            _monitor = threading.Thread(target=_monitorar, name='monitor-prazos', daemon=True)
+            _monitor.start()
+
+
+def _prazo_da_requisicao():
+    """Prazo da rota, encurtado pelo cabeçalho do cliente se ele pedir menos."""
+    prazo = _prazos_rotas.get(request.endpoint, _prazos_rotas.get(None, PRAZO_PADRAO))
+    try:
+        pedido = float(request.headers.get(CABECALHO_PRAZO, prazo))
+    except ValueError:
+        pedido = prazo
+    return min(prazo, pedido) if pedido > 0 else prazo
+
+
+def _iniciar_requisicao():
+    soquete = request.environ.get('werkzeug.socket') or request.environ.get('gunicorn.socket')
+    estado = _Requisicao(time.monotonic() + _prazo_da_requisicao(), soquete)
+    g.prazo = estado
+    with _trava:
+        _ativas[id(estado)] = estado
+
+
+def _encerrar_requisicao(erro=None):
+    estado = g.pop('prazo', None)
+    if estado is not None:
+        with _trava:
+            _ativas.pop(id(estado), None)
+
+
+def prazo_excedido():
+    """A requisição atual teve a consulta cancelada ou passou do prazo?"""
+    estado = g.get('prazo') if has_request_context() else None
+    return estado is not None and (estado.motivo is not None or estado.restante() <= 0)
+
+
+def _resposta_prazo():
+    return jsonify({'error': True, 'message': 'Tempo limite da requisição excedido'}), 504
+
+
+def _converter_resposta(resposta):
+    """Falhas de uma requisição cancelada/vencida viram 504 em vez de 400/500."""
+    if resposta.status_code >= 400 and prazo_excedido():
+        corpo, status = _resposta_prazo()
+        corpo.status_code = status
+        return corpo
+    return resposta
+
+
+def monitorar_conexao(conexao):
+    """Aplica o prazo da requisição atual à conexão e registra seus cursores.
+    
+    Fora de uma requisição (ou sem prazos configurados), devolve a conexão
+    sem alterações.
+    """
+    estado = g.get('prazo') if has_request_context() else None
+    if estado is None:
+        return conexao
+    conexao.timeout = max(1, math.ceil(estado.restante()))
+    return _ConexaoMonitorada(conexao, estado)
+
+
+def registrar_cursor(cursor):
+    """Inclui no cancelamento da requisição atual um cursor criado fora de
+    monitorar_conexao (ex.: os preparados de utils/statements.py)."""
+    estado = g.get('prazo') if has_request_context() else None
+    if estado is not None and cursor not in estado.cursores:
+        estado.cursores.append(cursor)
+
+
+def configurar_prazos(app, prazos):
+    """Ativa os prazos na aplicação.
+    
+    `prazos` mapeia endpoint ('blueprint.funcao') -> segundos; a chave None
+    define o prazo padrão das demais rotas.
+    """
+    _prazos_rotas.update(prazos)
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_converter_resposta)
+    app.teardown_request(_encerrar_requisicao)
+
+    @app.errorhandler(pyodbc.Error)
+    def erro_com_prazo(e):
+        """Erros de banco não tratados em requisições vencidas também viram 504."""
+        if prazo_excedido():
+            return _resposta_prazo()
+        raise e
+    
+    _iniciar_monitor()
@@ -0,0 +1,18 @@
+# backend/utils/etags.py
+# ETag nas respostas GET (revalidação do cache do frontend)
+#
+# O SpotPerAPI guarda as respostas GET (memória e IndexedDB) e, para
+# revalidar, manda If-None-Match com o ETag recebido. O ETag é o hash do
+# corpo: a consulta ainda roda, mas uma resposta igual volta como 304 sem
+# corpo.
+
+from flask import request
+
+
+def marcar_etag(resposta):
+    """after_request: ETag e 304 condicional nas leituras bem-sucedidas."""
+    if (request.method != 'GET' or resposta.status_code != 200
+            or resposta.is_streamed or resposta.direct_passthrough):
+        return resposta
+    resposta.add_etag()
+    return resposta.make_conditional(request)
@@ -0,0 +1,147 @@
+# backend/utils/events.py
+# Barramento de eventos de alteração (GET /api/events)
+#
+# Os handlers de escrita publicam, depois do commit, um evento por entidade
+# alterada: {"seq", "entidade", "acao", "chave", "dados"}. `dados` é a linha
+# como nas listagens (insert), as colunas alteradas (update, sempre com a
+# chave) ou None (delete).
+#
+# Dois tipos de consumidor:
+#   - ouvintes do processo (@assinar): índice de faixas, agregados de
+#     validação e estatísticas. São chamados na thread que publicou, antes da
+#     resposta da escrita, para que quem escreveu leia o próprio dado;
+#   - clientes do stream SSE, que leem o histórico circular a partir da
+#     última sequência recebida.
+#
+# A sequência recomeça quando o processo reinicia: o id SSE leva a época do
+# processo ("<época>-<seq>"). Um Last-Event-ID de outra época, ou mais antigo
+# que o histórico, recebe o evento "reset" e o cliente recarrega as listas.
+#
+# Com vários processos, utils/invalidation.py repassa os eventos locais aos
+# outros nós e publica aqui os que chegam (com "origem"). Quando um nó perde
+# eventos, descartar() esvazia os caches (@ao_descartar) e força o "reset"
+# dos clientes do stream.
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from utils.metrics import incrementar
+
+TAMANHO_HISTORICO = 2048
+
+ENTIDADES = ('albums', 'tracks', 'playlists', 'playlist_tracks', 'composers',
+             'interpreters', 'labels', 'periods', 'composition_types')
+
+
+class BarramentoEventos:
+    """Sequência, histórico circular e ouvintes dos eventos de alteração."""
+
+    def __init__(self, tamanho=TAMANHO_HISTORICO):
+        self.epoca = format(int(time.time()), 'x')
+        self.sequencia = 0
+        self._historico = deque(maxlen=tamanho)
+        self._condicao = threading.Condition()
+        self._ouvintes = {}          # entidade -> [função(evento)]
+        self._descartes = []         # funções chamadas por descartar()
+
+    def assinar(self, entidades, funcao):
+        for entidade in entidades:
+            self._ouvintes.setdefault(entidade, []).append(funcao)
+
+    def ao_descartar(self, funcao):
+        self._descartes.append(funcao)
+
+    def publicar(self, entidade, acao, chave, dados=None, origem=None):
+        """Notifica os ouvintes e acrescenta o evento ao histórico.
+        
+        `origem` é o nó que fez a escrita, para eventos vindos de outro processo.
+        """
+        evento = {'entidade': entidade, 'acao': acao, 'chave': chave, 'dados': dados}
+        if origem is not None:
+            evento['origem'] = origem
+        # Ouvintes antes do stream: um cliente que reage ao evento já
+        # encontra o índice e as estatísticas atualizados
+        for funcao in self._ouvintes.get(entidade, ()):
+            try:
+                funcao(evento)
+            except Exception as e:
+                incrementar('eventos.erros_ouvintes')
+                print(f'  Ouvinte de {entidade} falhou: {e}')
+        
+        with self._condicao:
+            self.sequencia += 1
+            evento['seq'] = self.sequencia
+            self._historico.append(evento)
+            self._condicao.notify_all()
+        incrementar(f'eventos.{entidade}.{acao}')
+        return evento
+
+    def descartar(self):
+        """Esvazia os caches assinantes e força "reset" nos clientes do stream.
+        
+        Usado quando eventos se perderam: os caches voltam a ser lidos do banco.
+        """
+        for funcao in self._descartes:
+            try:
+                funcao()
+            except Exception as e:
+                incrementar('eventos.erros_ouvintes')
+                print(f'  Descarte de cache falhou: {e}')
+        
+        # Histórico vazio e sequência adiante: todo cliente fica sem ponto de retomada
+        with self._condicao:
+            self.sequencia += 1
+            self._historico.clear()
+            self._condicao.notify_all()
+        incrementar('eventos.descartes')
+
+    def eventos_apos(self, sequencia):
+        """Eventos posteriores a `sequencia`, ou None se já saíram do histórico."""
+        with self._condicao:
+            if sequencia >= self.sequencia:
+                return []
+            if not self._historico or self._historico[0]['seq'] > sequencia + 1:
+                return None
+            inicio = sequencia + 1 - self._historico[0]['seq']
+            return list(itertools.islice(self._historico, inicio, None))
+
+    def aguardar(self, sequencia, tempo):
+        """Espera até `tempo` segundos por eventos posteriores a `sequencia`."""
+        with self._condicao:
+            self._condicao.wait_for(lambda: self.sequencia > sequencia, tempo)
+        return self.eventos_apos(sequencia)
+
+    def id_evento(self, sequencia):
+        return f'{self.epoca}-{sequencia}'
+
+    def sequencia_do_id(self, id_evento):
+        """Sequência de um Last-Event-ID desta época (None se de outra)."""
+        epoca, _, sequencia = (id_evento or '').partition('-')
+        if epoca != self.epoca or not sequencia.isdigit() or int(sequencia) > self.sequencia:
+            return None
+        return int(sequencia)
+
+
+# Barramento único do processo
+barramento = BarramentoEventos()
+
+
+def publicar(entidade, acao, chave, dados=None):
+    """Publica uma alteração (chamar depois do commit)."""
+    return barramento.publicar(entidade, acao, chave, dados)
+
+
+def assinar(*entidades):
+    """Registra a função decorada como ouvinte das alterações dessas entidades."""
+    def registrar(funcao):
+        barramento.assinar(entidades, funcao)
+        return funcao
+    return registrar
+
+
+def ao_descartar(funcao):
+    """Registra a função decorada para esvaziar um cache em descartar()."""
+    barramento.ao_descartar(funcao)
+    return funcao
@@ -0,0 +1,68 @@
+# backend/utils/fields.py
+# Seleção parcial de campos (?fields=) nas listagens
+#
+# Cada rota declara um catálogo ordenado {campo: (expressão SQL, conversor)}.
+# O SELECT é montado só com os campos pedidos, o que permite pular colunas
+# derivadas caras (subconsultas correlacionadas) quando o cliente não as usa.
+
+# Cache do SQL gerado por (modelo, campos). O número de variantes é limitado
+# pelas combinações dos catálogos, então não há política de expiração.
+_cache_sql = {}
+
+
+class CampoInvalido(ValueError):
+    """Campo pedido em ?fields= que não existe no catálogo da rota."""
+
+
+def como_texto(valor):
+    """Converte datas para string (mantém None)."""
+    return str(valor) if valor else None
+
+
+def como_float(valor):
+    """Converte DECIMAL para float (mantém None)."""
+    return float(valor) if valor else None
+
+
+def selecionar_campos(parametro, colunas, extras=()):
+    """Valida o parâmetro ?fields= e retorna a tupla de campos pedidos.
+
+    Sem parâmetro, retorna todos os campos do catálogo (e os extras). A ordem
+    segue o catálogo, para que pedidos equivalentes gerem o mesmo SQL.
+    """
+    permitidos = list(colunas) + list(extras)
+    if not parametro:
+        return tuple(permitidos)
+
+    pedidos = {c.strip() for c in parametro.split(',') if c.strip()}
+    invalidos = sorted(pedidos.difference(permitidos))
+    if invalidos:
+        raise CampoInvalido('Campos inválidos: ' + ', '.join(invalidos))
+    if not pedidos:
+        return tuple(permitidos)
+
+    return tuple(c for c in permitidos if c in pedidos)
+
+
+def montar_select(modelo, colunas, campos):
+    """Monta o SQL com apenas as colunas pedidas, usando o cache de variantes.
+
+    `modelo` é o texto da consulta com o marcador {colunas} no lugar da lista
+    do SELECT. Campos fora do catálogo (extras) são ignorados.
+    """
+    chave = (modelo, campos)
+    sql = _cache_sql.get(chave)
+    if sql is None:
+        lista = ', '.join(f'{colunas[c][0]} AS {c}' for c in campos if c in colunas)
+        sql = modelo.format(colunas=lista)
+        _cache_sql[chave] = sql
+    return sql
+
+
+def linha_para_dict(row, colunas, campos):
+    """Converte uma linha do cursor no dicionário de resposta."""
+    item = {}
+    for i, campo in enumerate(c for c in campos if c in colunas):
+        conversor = colunas[campo][1]
+        item[campo] = conversor(row[i]) if conversor else row[i]
+    return item
@@ -0,0 +1,286 @@
+# backend/utils/invalidation.py
+# Difusão dos eventos de alteração entre processos (vários workers ou nós)
+#
+# Cada processo guarda caches próprios (índice de faixas, agregados de
+# validação, estatísticas) que os eventos do barramento mantêm em dia. Com
+# mais de um worker, uma escrita atendida por um deles ficaria invisível aos
+# outros. A difusão repassa cada evento local aos demais nós, que o publicam
+# no próprio barramento: os mesmos ouvintes rodam e os clientes SSE de
+# qualquer worker recebem a alteração.
+#
+# Entrega: cada nó numera suas mensagens (seq) e manda uma batida com a
+# última seq a cada INTERVALO_BATIDA. O receptor guarda a última seq de cada
+# origem: repetidas são ignoradas, e um salto (datagrama perdido, fila cheia,
+# nó pausado) vira um descarte completo do barramento, que esvazia os caches
+# e força "reset" nos clientes SSE. Um nó que começou depois deste tem de
+# aparecer a partir da seq 1; um que já existia entra na seq que mandar.
+# Toda alteração, portanto, chega pelo menos uma vez: pela própria mensagem
+# ou pela releitura do banco.
+#
+# Transportes (SPOTPER_INVALIDACAO):
+#   unix:///tmp/spotper-invalidacao   workers da mesma máquina; cada um
+#       abre um socket datagrama no diretório e envia aos demais
+#   udp://0.0.0.0:9400?pares=10.0.0.2:9400,10.0.0.3:9400   nós em rede;
+#       só aceita datagramas vindos dos pares
+# Outros transportes entram com registrar_transporte(esquema, classe).
+# Com SPOTPER_INVALIDACAO_SEGREDO, as mensagens levam um HMAC-SHA256 e as
+# que não conferem são descartadas.
+
+import abc
+import glob
+import hashlib
+import hmac
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit, parse_qs
+
+from utils.events import barramento, ENTIDADES
+from utils.metrics import incrementar, definir
+
+INTERVALO_BATIDA = 1.0     # segundos entre batidas (detecta perdas no fim da fila)
+TAMANHO_MAXIMO = 60000     # bytes por datagrama
+TENTATIVAS_ENVIO = 3
+TEMPO_ENVIO = 0.2          # segundos de espera por tentativa com a fila do par cheia
+
+
+class Transporte(abc.ABC):
+    """Entrega mensagens (bytes) a todos os outros nós."""
+
+    @abc.abstractmethod
+    def iniciar(self, no, receber):
+        """Começa a escutar; `receber(mensagem)` é chamado numa thread própria."""
+
+    @abc.abstractmethod
+    def enviar(self, mensagem):
+        """Envia a todos os pares; devolve quantos envios falharam."""
+
+
+class TransporteUnix(Transporte):
+    """Sockets datagrama num diretório compartilhado pelos workers da máquina."""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.caminho = None
+        self._envio = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._envio.settimeout(TEMPO_ENVIO)
+
+    def iniciar(self, no, receber):
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.caminho = os.path.join(self.diretorio, f'{no}.sock')
+        escuta = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        escuta.bind(self.caminho)
+        
+        def escutar():
+            while True:
+                receber(escuta.recv(TAMANHO_MAXIMO))
+        
+        threading.Thread(target=escutar, name='invalidacao-unix', daemon=True).start()
+
+    def enviar(self, mensagem):
+        falhas = 0
+        for caminho in glob.glob(os.path.join(self.diretorio, '*.sock')):
+            if caminho == self.caminho:
+                continue
+            try:
+                _com_tentativas(lambda: self._envio.sendto(mensagem, caminho))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket de um worker que terminou sem apagar o arquivo
+                try:
+                    os.unlink(caminho)
+                except OSError:
+                    pass
+            except OSError:
+                falhas += 1
+        return falhas
+
+
+class TransporteUdp(Transporte):
+    """Datagramas UDP para uma lista fixa de pares."""
+
+    def __init__(self, host, porta, pares):
+        self.endereco = (host, porta)
+        self.pares = pares
+        self._ips_pares = {info[4][0] for host_par, porta_par in pares
+                           for info in socket.getaddrinfo(host_par, porta_par, type=socket.SOCK_DGRAM)}
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def iniciar(self, no, receber):
+        self._socket.bind(self.endereco)
+        
+        def escutar():
+            while True:
+                mensagem, origem = self._socket.recvfrom(TAMANHO_MAXIMO)
+                if origem[0] in self._ips_pares:
+                    receber(mensagem)
+        
+        threading.Thread(target=escutar, name='invalidacao-udp', daemon=True).start()
+
+    def enviar(self, mensagem):
+        falhas = 0
+        for par in self.pares:
+            try:
+                _com_tentativas(lambda: self._socket.sendto(mensagem, par))
+            except OSError:
+                falhas += 1
+        return falhas
+
+
+def _com_tentativas(enviar):
+    for tentativa in range(TENTATIVAS_ENVIO):
+        try:
+            return enviar()
+        except (BlockingIOError, socket.timeout, InterruptedError):
+            # Fila do par cheia: espera um pouco antes de desistir
+            if tentativa == TENTATIVAS_ENVIO - 1:
+                raise
+            time.sleep(TEMPO_ENVIO)
+
+
+def _criar_unix(url):
+    return TransporteUnix(url.path)
+
+
+def _criar_udp(url):
+    pares = []
+    for par in ','.join(parse_qs(url.query).get('pares', [])).split(','):
+        if par.strip():
+            host, _, porta = par.strip().rpartition(':')
+            pares.append((host, int(porta)))
+    return TransporteUdp(url.hostname or '0.0.0.0', url.port, pares)
+
+
+# Esquema da URL -> fábrica(url) do transporte
+_transportes = {'unix': _criar_unix, 'udp': _criar_udp}
+
+
+def registrar_transporte(esquema, fabrica):
+    """Registra um transporte: `fabrica(url)` recebe a URL já separada (urlsplit)."""
+    _transportes[esquema] = fabrica
+
+
+def criar_transporte(url):
+    partes = urlsplit(url)
+    if partes.scheme not in _transportes:
+        raise ValueError(f'Transporte de invalidação desconhecido: {partes.scheme}')
+    return _transportes[partes.scheme](partes)
+
+
+class DifusaoInvalidacoes:
+    """Repassa os eventos do barramento aos outros nós e publica os recebidos."""
+
+    def __init__(self, transporte, segredo=None):
+        self.transporte = transporte
+        self.no = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.inicio = time.time()
+        self.sequencia = 0
+        self._enviada = 0             # seq da última mensagem tirada da fila
+        self._segredo = segredo.encode() if segredo else None
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._vistos = {}             # nó de origem -> última seq recebida
+
+    def iniciar(self):
+        """Escuta os pares e repassa os eventos locais (uma vez por processo)."""
+        self.transporte.iniciar(self.no, self._receber)
+        barramento.assinar(ENTIDADES, self._difundir)
+        threading.Thread(target=self._laco_envio, name='invalidacao-envio', daemon=True).start()
+
+    def _difundir(self, evento):
+        """Ouvinte do barramento: enfileira os eventos feitos neste processo."""
+        if 'origem' in evento:
+            return
+        with self._trava:
+            self.sequencia += 1
+            self._fila.put({'no': self.no, 'inicio': self.inicio, 'seq': self.sequencia, 'evento': {
+                campo: evento[campo] for campo in ('entidade', 'acao', 'chave', 'dados')}})
+
+    def _laco_envio(self):
+        while True:
+            try:
+                mensagem = self._fila.get(timeout=INTERVALO_BATIDA)
+                self._enviada = mensagem['seq']
+            except queue.Empty:
+                # A batida anuncia só o que já saiu da fila: com self.sequencia,
+                # um evento enfileirado neste instante seria anunciado antes de
+                # ser enviado, e os pares o descartariam como repetido
+                mensagem = {'no': self.no, 'inicio': self.inicio, 'seq': self._enviada}
+            try:
+                dados = self._codificar(mensagem)
+                if len(dados) > TAMANHO_MAXIMO:
+                    # Não cabe num datagrama: os pares veem o salto e descartam
+                    incrementar('invalidacao.grandes_demais')
+                    continue
+                falhas = self.transporte.enviar(dados)
+                if falhas:
+                    incrementar('invalidacao.erros_envio', falhas)
+                if 'evento' in mensagem:
+                    incrementar('invalidacao.enviadas')
+            except Exception as e:
+                incrementar('invalidacao.erros_envio')
+                print(f'  Difusão de invalidações: {e}')
+
+    def _codificar(self, mensagem):
+        corpo = json.dumps(mensagem, default=str, separators=(',', ':')).encode()
+        if self._segredo:
+            corpo = hmac.new(self._segredo, corpo, hashlib.sha256).digest() + corpo
+        return corpo
+
+    def _decodificar(self, dados):
+        if self._segredo:
+            assinatura, dados = dados[:32], dados[32:]
+            if not hmac.compare_digest(assinatura, hmac.new(self._segredo, dados, hashlib.sha256).digest()):
+                return None
+        try:
+            return json.loads(dados)
+        except ValueError:
+            return None
+
+    def _receber(self, dados):
+        mensagem = self._decodificar(dados)
+        if not isinstance(mensagem, dict) or mensagem.get('no') == self.no:
+            incrementar('invalidacao.rejeitadas')
+            return
+        
+        origem, seq = mensagem.get('no'), mensagem.get('seq')
+        if not isinstance(seq, int):
+            incrementar('invalidacao.rejeitadas')
+            return
+        ultima = self._vistos.get(origem)
+        if ultima is None and mensagem.get('inicio', 0) < self.inicio:
+            # Nó que já existia quando este começou: o que ele escreveu antes
+            # está no banco, e os caches daqui ainda vão lê-lo
+            ultima = seq - 1
+        elif ultima is None:
+            ultima = 0
+        if seq <= ultima:
+            if 'evento' in mensagem:
+                incrementar('invalidacao.repetidas')
+            return
+        if seq > ultima + 1:
+            incrementar('invalidacao.lacunas')
+            barramento.descartar()
+        self._vistos[origem] = seq
+        definir('invalidacao.nos', len(self._vistos))
+        
+        evento = mensagem.get('evento')
+        if evento:
+            incrementar('invalidacao.recebidas')
+            barramento.publicar(evento['entidade'], evento['acao'], evento['chave'],
+                                evento.get('dados'), origem=origem)
+
+
+difusao = None
+
+
+def iniciar_difusao(url, segredo=None):
+    """Liga a difusão de eventos entre processos (SPOTPER_INVALIDACAO)."""
+    global difusao
+    if difusao is None:
+        difusao = DifusaoInvalidacoes(criar_transporte(url), segredo)
+        difusao.iniciar()
+    return difusao
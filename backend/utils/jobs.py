@@ -0,0 +1,329 @@
+# backend/utils/jobs.py
+# Tarefas em segundo plano com registro persistente (tabela TAREFA)
+#
+# Trabalho demorado (importações, recálculos, reconstrução de tabelas de
+# relatório) não cabe numa requisição: POST /api/jobs grava uma tarefa
+# PENDENTE e um executor por processo a executa num pool limitado de threads.
+#
+# Execução no máximo uma vez: a tarefa é reivindicada por um UPDATE atômico
+# (PENDENTE -> EXECUTANDO, com READPAST entre processos) confirmado antes de
+# rodar. O executor renova data_sinal das suas tarefas a cada INTERVALO_SINAL;
+# uma tarefa EXECUTANDO sem sinal há TEMPO_ABANDONO (processo morto ou
+# reiniciado) vira FALHOU e nunca é reexecutada.
+#
+# Cancelamento: uma tarefa PENDENTE é cancelada direto; numa EXECUTANDO, a
+# coluna cancelar é marcada e a função da tarefa recebe TarefaCancelada na
+# próxima chamada a contexto.progresso() / contexto.verificar_cancelamento().
+#
+# Funções periódicas (@periodica) rodam na thread do executor a cada
+# intervalo, sem linha em TAREFA: trabalho curto e repetitivo (ex.:
+# consolidar as reproduções) que se coordena entre processos pelo próprio
+# banco, já que todo processo com o executor ligado as chama.
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config.database import get_conexao
+from utils.metrics import incrementar
+
+TRABALHADORES_PADRAO = 2
+INTERVALO_VARREDURA = 2.0     # segundos entre buscas por tarefas pendentes
+INTERVALO_SINAL = 5.0         # segundos entre renovações de data_sinal
+TEMPO_ABANDONO = 60           # segundos sem sinal até a tarefa ser dada como perdida
+INTERVALO_PROGRESSO = 1.0     # gravação mínima de progresso, em segundos
+LIMITE_LISTAGEM = 200
+
+ESTADOS = ('PENDENTE', 'EXECUTANDO', 'CONCLUIDA', 'FALHOU', 'CANCELADA')
+COLUNAS = ('cod_tarefa', 'tipo', 'parametros', 'estado', 'progresso', 'mensagem', 'resultado',
+           'erro', 'instancia', 'data_criacao', 'data_inicio', 'data_sinal', 'data_fim')
+
+# Tipos de tarefa registrados com @tarefa: nome -> função(contexto, **parametros)
+_tipos = {}
+
+# Funções registradas com @periodica: nome -> [função, intervalo, última execução]
+_periodicas = {}
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o cancelamento foi pedido."""
+
+
+def tarefa(nome):
+    """Registra uma função como tipo de tarefa.
+    
+    A função recebe um ContextoTarefa e os parâmetros do POST como
+    argumentos nomeados; o retorno (serializável em JSON) vira o resultado.
+    """
+    def registrar(funcao):
+        _tipos[nome] = funcao
+        return funcao
+    return registrar
+
+
+def periodica(nome, intervalo):
+    """Registra uma função sem argumentos chamada a cada `intervalo` segundos."""
+    def registrar(funcao):
+        _periodicas[nome] = [funcao, intervalo, 0.0]
+        return funcao
+    return registrar
+
+
+def tipos_registrados():
+    return sorted(_tipos)
+
+
+def _linha_para_dict(row):
+    tarefa = dict(zip(COLUNAS, row))
+    for coluna in ('parametros', 'resultado'):
+        if tarefa[coluna] is not None:
+            tarefa[coluna] = json.loads(tarefa[coluna])
+    tarefa['progresso'] = float(tarefa['progresso'])
+    for coluna in ('data_criacao', 'data_inicio', 'data_sinal', 'data_fim'):
+        if tarefa[coluna] is not None:
+            tarefa[coluna] = tarefa[coluna].isoformat()
+    return tarefa
+
+
+def _executar_sql(sql, parametros=(), buscar=False):
+    """Executa e confirma um comando curto; retorna as linhas se `buscar`."""
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(sql, parametros)
+        linhas = cursor.fetchall() if buscar else cursor.rowcount
+        conexao.commit()
+        return linhas
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+class ContextoTarefa:
+    """Canal da função da tarefa com o executor: progresso e cancelamento."""
+
+    def __init__(self, cod_tarefa, instancia):
+        self.cod_tarefa = cod_tarefa
+        self.instancia = instancia
+        self.cancelamento_pedido = False
+        self._ultima_gravacao = 0.0
+
+    def verificar_cancelamento(self):
+        if self.cancelamento_pedido:
+            raise TarefaCancelada()
+
+    def progresso(self, fracao, mensagem=None):
+        """Registra o avanço (0 a 1) e verifica se o cancelamento foi pedido.
+        
+        A gravação no banco acontece no máximo a cada INTERVALO_PROGRESSO,
+        então pode ser chamada a cada item sem custo relevante.
+        """
+        agora = time.monotonic()
+        if agora - self._ultima_gravacao >= INTERVALO_PROGRESSO or fracao >= 1:
+            self._ultima_gravacao = agora
+            linhas = _executar_sql("""
+                UPDATE TAREFA
+                SET progresso = ?, mensagem = ?, data_sinal = SYSDATETIME()
+                OUTPUT inserted.cancelar
+                WHERE cod_tarefa = ? AND instancia = ? AND estado = 'EXECUTANDO'
+            """, (round(min(max(fracao, 0.0), 1.0) * 100, 2), mensagem and mensagem[:400],
+                  self.cod_tarefa, self.instancia), buscar=True)
+            # Sem linha: a tarefa foi dada como abandonada por outro processo
+            if not linhas or linhas[0][0]:
+                self.cancelamento_pedido = True
+        self.verificar_cancelamento()
+
+
+class ExecutorTarefas:
+    """Busca tarefas pendentes e as executa num pool de threads limitado."""
+
+    def __init__(self):
+        self.trabalhadores = 0
+        self.instancia = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._pool = None
+        self._em_execucao = {}        # cod_tarefa -> ContextoTarefa
+        self._trava = threading.Lock()
+        self._acordar = threading.Event()
+
+    def iniciar(self, trabalhadores=TRABALHADORES_PADRAO):
+        """Cria o pool e a thread que busca tarefas (uma vez por processo)."""
+        with self._trava:
+            if self._pool is not None:
+                return
+            self.trabalhadores = trabalhadores
+            self._pool = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='tarefa')
+        threading.Thread(target=self._laco, name='executor-tarefas', daemon=True).start()
+
+    def acordar(self):
+        """Antecipa a próxima busca (chamado ao criar uma tarefa)."""
+        self._acordar.set()
+
+    def _laco(self):
+        ultimo_sinal = 0.0
+        while True:
+            try:
+                if time.monotonic() - ultimo_sinal >= INTERVALO_SINAL:
+                    self._renovar_sinal()
+                    self._recolher_abandonadas()
+                    ultimo_sinal = time.monotonic()
+                while self._vagas() and self._reivindicar():
+                    pass
+            except Exception as e:
+                incrementar('tarefas.erros_executor')
+                print(f'  Executor de tarefas: {e}')
+            self._executar_periodicas()
+            self._acordar.wait(INTERVALO_VARREDURA)
+            self._acordar.clear()
+
+    def _executar_periodicas(self):
+        agora = time.monotonic()
+        for nome, periodica in list(_periodicas.items()):
+            funcao, intervalo, ultima = periodica
+            if agora - ultima < intervalo:
+                continue
+            periodica[2] = agora
+            try:
+                funcao()
+            except Exception as e:
+                incrementar('tarefas.erros_periodicas')
+                print(f'  Tarefa periódica {nome}: {e}')
+    
+    def _vagas(self):
+        with self._trava:
+            return len(self._em_execucao) < self.trabalhadores
+
+    def _renovar_sinal(self):
+        """Renova data_sinal das tarefas deste processo e lê os pedidos de cancelamento."""
+        with self._trava:
+            if not self._em_execucao:
+                return
+        linhas = _executar_sql("""
+            UPDATE TAREFA SET data_sinal = SYSDATETIME()
+            OUTPUT inserted.cod_tarefa, inserted.cancelar
+            WHERE instancia = ? AND estado = 'EXECUTANDO'
+        """, (self.instancia,), buscar=True)
+        with self._trava:
+            for cod_tarefa, cancelar in linhas:
+                contexto = self._em_execucao.get(cod_tarefa)
+                if contexto is not None and cancelar:
+                    contexto.cancelamento_pedido = True
+
+    def _recolher_abandonadas(self):
+        quantidade = _executar_sql("""
+            UPDATE TAREFA
+            SET estado = 'FALHOU', data_fim = SYSDATETIME(),
+                erro = 'Interrompida: o processo que executava a tarefa parou de responder'
+            WHERE estado = 'EXECUTANDO' AND data_sinal < DATEADD(SECOND, -?, SYSDATETIME())
+        """, (TEMPO_ABANDONO,))
+        if quantidade > 0:
+            incrementar('tarefas.abandonadas', quantidade)
+
+    def _reivindicar(self):
+        """Passa a próxima tarefa pendente de um tipo conhecido para EXECUTANDO."""
+        if not _tipos:
+            return False
+        linhas = _executar_sql("""
+            WITH proxima AS (
+                SELECT TOP (1) *
+                FROM TAREFA WITH (READPAST, UPDLOCK, ROWLOCK)
+                WHERE estado = 'PENDENTE' AND tipo IN (SELECT [value] FROM OPENJSON(?))
+                ORDER BY cod_tarefa
+            )
+            UPDATE proxima
+            SET estado = 'EXECUTANDO', instancia = ?, data_inicio = SYSDATETIME(),
+                data_sinal = SYSDATETIME()
+            OUTPUT inserted.cod_tarefa, inserted.tipo, inserted.parametros
+        """, (json.dumps(list(_tipos)), self.instancia), buscar=True)
+        if not linhas:
+            return False
+        
+        cod_tarefa, tipo, parametros = linhas[0]
+        contexto = ContextoTarefa(cod_tarefa, self.instancia)
+        with self._trava:
+            self._em_execucao[cod_tarefa] = contexto
+        self._pool.submit(self._executar, contexto, tipo, json.loads(parametros) if parametros else {})
+        return True
+
+    def _executar(self, contexto, tipo, parametros):
+        estado, resultado, erro = 'CONCLUIDA', None, None
+        try:
+            resultado = _tipos[tipo](contexto, **parametros)
+            # Serializa aqui: um resultado que não vira JSON é falha da tarefa
+            resultado = None if resultado is None else json.dumps(resultado)
+        except TarefaCancelada:
+            estado = 'CANCELADA'
+        except Exception as e:
+            estado, erro = 'FALHOU', str(e)
+        incrementar(f'tarefas.{estado.lower()}')
+        
+        try:
+            _executar_sql("""
+                UPDATE TAREFA
+                SET estado = ?, resultado = ?, erro = ?, data_fim = SYSDATETIME(),
+                    progresso = CASE WHEN ? = 'CONCLUIDA' THEN 100 ELSE progresso END
+                WHERE cod_tarefa = ? AND instancia = ? AND estado = 'EXECUTANDO'
+            """, (estado, resultado if estado == 'CONCLUIDA' else None, erro, estado,
+                  contexto.cod_tarefa, self.instancia))
+        finally:
+            with self._trava:
+                self._em_execucao.pop(contexto.cod_tarefa, None)
+            self.acordar()
+
+
+# Executor único do processo (iniciado por iniciar_executor_tarefas)
+executor = ExecutorTarefas()
+
+
+def criar_tarefa(tipo, parametros=None):
+    """Grava uma tarefa PENDENTE e retorna seu código."""
+    if tipo not in _tipos:
+        raise ValueError(f'Tipo de tarefa desconhecido: {tipo}')
+    linhas = _executar_sql("""
+        INSERT INTO TAREFA (tipo, parametros) OUTPUT inserted.cod_tarefa VALUES (?, ?)
+    """, (tipo, json.dumps(parametros or {})), buscar=True)
+    executor.acordar()
+    return linhas[0][0]
+
+
+def obter_tarefa(cod_tarefa):
+    linhas = _executar_sql(f"SELECT {', '.join(COLUNAS)} FROM TAREFA WHERE cod_tarefa = ?",
+                           (cod_tarefa,), buscar=True)
+    return _linha_para_dict(linhas[0]) if linhas else None
+
+
+def listar_tarefas(estado=None, limite=50):
+    """Tarefas mais recentes (sem parâmetros e resultado, que podem ser grandes)."""
+    colunas = ', '.join('NULL' if c in ('parametros', 'resultado') else c for c in COLUNAS)
+    filtro, parametros = ('WHERE estado = ?', (estado,)) if estado else ('', ())
+    linhas = _executar_sql(f"""
+        SELECT TOP ({min(max(limite, 1), LIMITE_LISTAGEM):d}) {colunas}
+        FROM TAREFA {filtro}
+        ORDER BY cod_tarefa DESC
+    """, parametros, buscar=True)
+    return [_linha_para_dict(row) for row in linhas]
+
+
+def cancelar_tarefa(cod_tarefa):
+    """Cancela uma tarefa pendente ou pede o cancelamento de uma em execução.
+    
+    Retorna o estado resultante, ou None se a tarefa não existe.
+    """
+    if _executar_sql("""
+        UPDATE TAREFA SET estado = 'CANCELADA', data_fim = SYSDATETIME()
+        WHERE cod_tarefa = ? AND estado = 'PENDENTE'
+    """, (cod_tarefa,)) > 0:
+        return 'CANCELADA'
+    _executar_sql("""
+        UPDATE TAREFA SET cancelar = 1 WHERE cod_tarefa = ? AND estado = 'EXECUTANDO'
+    """, (cod_tarefa,))
+    tarefa = obter_tarefa(cod_tarefa)
+    return tarefa['estado'] if tarefa else None
+
+
+def iniciar_executor_tarefas(trabalhadores=TRABALHADORES_PADRAO):
+    """Inicia o executor de tarefas deste processo."""
+    executor.iniciar(trabalhadores)
@@ -0,0 +1,25 @@
+# backend/utils/metrics.py
+# Contadores de métricas do processo (expostos em /api/metrics)
+
+import threading
+
+_contadores = {}
+_trava = threading.Lock()
+
+
+def incrementar(nome, valor=1):
+    """Soma `valor` ao contador `nome` (criado com zero se não existir)."""
+    with _trava:
+        _contadores[nome] = _contadores.get(nome, 0) + valor
+
+
+def definir(nome, valor):
+    """Define o valor atual de um medidor (ex.: tamanho de fila)."""
+    with _trava:
+        _contadores[nome] = valor
+
+
+def obter_metricas():
+    """Retorna uma cópia ordenada de todos os contadores."""
+    with _trava:
+        return dict(sorted(_contadores.items()))
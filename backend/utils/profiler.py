@@ -0,0 +1,145 @@
+# backend/utils/profiler.py
+# Perfilador por amostragem de requisições individuais
+#
+# Ativado por requisição com o cabeçalho X-SpotPer-Perfil (igual ao token
+# configurado) ou por sorteio com a taxa de amostragem. Enquanto o handler
+# roda, uma thread lê a pilha da thread da requisição (sys._current_frames)
+# a intervalos fixos e conta as pilhas no formato "folded" (a;b;c N), que os
+# geradores de flamegraph leem diretamente. Desativado, o custo por requisição
+# é uma consulta de cabeçalho.
+
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import g, request
+
+CABECALHO_PERFIL = 'X-SpotPer-Perfil'
+INTERVALO_AMOSTRA = 0.002   # segundos entre amostras
+TOP_FUNCOES = 15
+
+_config = {'token': None, 'taxa': 0.0, 'diretorio': None}
+_perfis = deque(maxlen=50)
+_trava = threading.Lock()
+
+
+class _Amostrador:
+    """Thread que amostra a pilha de uma outra thread até ser parada."""
+
+    def __init__(self, ident):
+        self.ident = ident
+        self.pilhas = Counter()
+        self.inicio = time.perf_counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, name='perfilador', daemon=True)
+        self._thread.start()
+
+    def _amostrar(self):
+        while not self._parar.wait(INTERVALO_AMOSTRA):
+            frame = sys._current_frames().get(self.ident)
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                frame = frame.f_back
+            if pilha:
+                self.pilhas[';'.join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+        return time.perf_counter() - self.inicio
+
+
+def _resumir(pilhas):
+    """Tempo próprio (topo da pilha) e total (em qualquer nível) por função."""
+    proprio = Counter()
+    total = Counter()
+    for pilha, quantidade in pilhas.items():
+        funcoes = pilha.split(';')
+        proprio[funcoes[-1]] += quantidade
+        for funcao in set(funcoes):
+            total[funcao] += quantidade
+    return [
+        {'funcao': funcao, 'proprio': proprio[funcao], 'total': quantidade}
+        for funcao, quantidade in total.most_common()
+        if proprio[funcao]
+    ][:TOP_FUNCOES]
+
+
+def _deve_perfilar():
+    token = _config['token']
+    if token and request.headers.get(CABECALHO_PERFIL) == token:
+        return True
+    return _config['taxa'] > 0 and random.random() < _config['taxa']
+
+
+def _iniciar():
+    if request.blueprint != 'admin' and _deve_perfilar():
+        g.perfilador = _Amostrador(threading.get_ident())
+
+
+def _encerrar(erro=None):
+    amostrador = g.pop('perfilador', None)
+    if amostrador is None:
+        return
+    
+    duracao = amostrador.parar()
+    perfil = {
+        'id': uuid.uuid4().hex[:12],
+        'endpoint': request.endpoint,
+        'metodo': request.method,
+        'caminho': request.full_path.rstrip('?'),
+        'inicio': datetime.now().isoformat(timespec='seconds'),
+        'duracao_ms': round(duracao * 1000, 1),
+        'amostras': sum(amostrador.pilhas.values()),
+        'intervalo_ms': INTERVALO_AMOSTRA * 1000,
+        'funcoes': _resumir(amostrador.pilhas),
+    }
+    folded = '\n'.join(f'{pilha} {n}' for pilha, n in amostrador.pilhas.most_common())
+    
+    if _config['diretorio']:
+        os.makedirs(_config['diretorio'], exist_ok=True)
+        with open(os.path.join(_config['diretorio'], perfil['id'] + '.folded'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(folded + '\n')
+    
+    with _trava:
+        _perfis.appendleft((perfil, folded))
+
+
+def autorizado():
+    """A requisição atual traz o token do perfilador?"""
+    token = _config['token']
+    return bool(token) and request.headers.get(CABECALHO_PERFIL) == token
+
+
+def listar_perfis(endpoint=None):
+    """Resumos dos perfis recentes (mais novos primeiro)."""
+    with _trava:
+        return [p for p, _ in _perfis if endpoint is None or p['endpoint'] == endpoint]
+
+
+def obter_perfil(id_perfil):
+    """Retorna (resumo, pilhas folded) de um perfil, ou None."""
+    with _trava:
+        return next(((p, f) for p, f in _perfis if p['id'] == id_perfil), None)
+
+
+def configurar_perfilador(app, token=None, taxa=0.0, diretorio=None, maximo=50):
+    """Ativa o perfilador.
+    
+    `token` habilita o cabeçalho X-SpotPer-Perfil (e o acesso às rotas de
+    administração); `taxa` é a fração de requisições perfiladas por sorteio;
+    `diretorio`, se informado, recebe um arquivo .folded por perfil.
+    """
+    global _perfis
+    _config.update(token=token, taxa=taxa, diretorio=diretorio)
+    _perfis = deque(maxlen=maximo)
+    if token or taxa:
+        app.before_request(_iniciar)
+        app.teardown_request(_encerrar)
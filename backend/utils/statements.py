@@ -0,0 +1,287 @@
+# backend/utils/statements.py
+# Registro central das instruções SQL, preparadas uma vez por conexão do pool
+#
+# Cada instrução é declarada uma vez com registrar(nome, sql, ...): tipos dos
+# parâmetros, catálogo de colunas (?fields=, como em utils/fields.py) ou
+# função de mapeamento do resultado, e, para instruções em lote, se usa
+# fast_executemany. As rotas executam pelo nome (consultar, consultar_um,
+# executar, executar_lote), passando o cursor que já usam.
+#
+# Reaproveitamento: o pyodbc só prepara (SQLPrepare, sp_prepexec no SQL
+# Server) quando o texto muda em relação à última execução do mesmo cursor.
+# Por isso cada conexão física guarda um cursor por instrução (no máximo
+# MAXIMO_PREPARADAS, o mais antigo é fechado): da segunda execução em diante
+# na mesma conexão, só os parâmetros trafegam. Os cursores sobrevivem à
+# devolução ao pool e são fechados quando o pool fecha a conexão
+# (liberar_conexao). São criados sem timeout de consulta, porque o timeout da
+# conexão muda a cada requisição; o prazo da requisição vale pelo
+# cancelamento (utils/deadlines.py registra o cursor). Mais de um cursor
+# ativo na mesma conexão requer MARS (config/database.py).
+#
+# Tipos declarados viram setinputsizes no cursor preparado: o driver não
+# precisa descobrir os tipos e, com fast_executemany, o lote inteiro é
+# enviado num único array de parâmetros com buffers do tamanho certo.
+#
+# Cada execução soma nas estatísticas da instrução (execuções, linhas, tempo,
+# preparações, erros), expostas em /api/admin/statements. ajustar(nome, ...)
+# muda fast_executemany e os tipos em execução; os cursores já preparados
+# com a configuração anterior são substituídos no próximo uso.
+#
+# Migradas até aqui: as listagens de álbuns, períodos, tipos de composição e
+# intérpretes e os lotes de faixas, gravadoras e playlists. Ainda executam
+# SQL direto no cursor da requisição: composers, queries, playback, o
+# restante de playlists, labels e tracks e os serviços. INSERT seguido de
+# SELECT SCOPE_IDENTITY() não pode ser migrado como está: cada execução
+# preparada é um escopo próprio, então o INSERT precisa passar a devolver a
+# chave com OUTPUT inserted.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pyodbc
+
+from utils.deadlines import registrar_cursor
+from utils.fields import montar_select, linha_para_dict
+from utils.workload import captura_ligada, registrar_execucao
+
+MAXIMO_PREPARADAS = 64  # cursores preparados mantidos por conexão
+
+# Tipo SQL declarado -> nome da constante do pyodbc para setinputsizes
+TIPOS_SQL = {
+    'INT': 'SQL_INTEGER',
+    'TINYINT': 'SQL_TINYINT',
+    'SMALLINT': 'SQL_SMALLINT',
+    'BIGINT': 'SQL_BIGINT',
+    'BIT': 'SQL_BIT',
+    'VARCHAR': 'SQL_VARCHAR',
+    'NVARCHAR': 'SQL_WVARCHAR',
+    'DECIMAL': 'SQL_DECIMAL',
+    'DATE': 'SQL_TYPE_DATE',
+    'DATETIME2': 'SQL_TYPE_TIMESTAMP',
+}
+
+_tipo = re.compile(r'^(\w+)(?:\((MAX|\d+)(?:,\s*(\d+))?\))?$', re.IGNORECASE)
+
+_instrucoes = {}
+_preparadas = {}     # id da conexão física -> OrderedDict((nome, versão, sql) -> cursor)
+_trava = threading.Lock()
+
+
+class InstrucaoDesconhecida(KeyError):
+    """Nome que não foi declarado com registrar()."""
+
+
+def tamanho_entrada(tipo):
+    """'VARCHAR(150)' -> (pyodbc.SQL_VARCHAR, 150, 0), para setinputsizes."""
+    partes = _tipo.match(tipo.strip())
+    if not partes or partes.group(1).upper() not in TIPOS_SQL:
+        raise ValueError(f'Tipo de parâmetro não suportado: {tipo}')
+    nome, tamanho, escala = partes.groups()
+    tamanho = 0 if tamanho is None or tamanho.upper() == 'MAX' else int(tamanho)
+    return (getattr(pyodbc, TIPOS_SQL[nome.upper()]), tamanho, int(escala or 0))
+
+
+class Instrucao:
+    """Instrução SQL registrada: texto, parâmetros, mapeamento e estatísticas."""
+
+    def __init__(self, nome, sql, parametros=(), colunas=None, mapear=None, lote=False,
+                 fast_executemany=None):
+        self.nome = nome
+        self.sql = sql
+        self.parametros = tuple(parametros)
+        self.colunas = colunas
+        self.mapear = mapear
+        self.lote = lote
+        self.fast_executemany = lote if fast_executemany is None else fast_executemany
+        self.versao = 0
+        self.estatisticas = {'execucoes': 0, 'linhas': 0, 'tempo_total': 0.0, 'tempo_maximo': 0.0,
+                             'preparacoes': 0, 'erros': 0}
+
+    def texto(self, campos=None):
+        """SQL final; com catálogo de colunas, só as `campos` pedidas (todas por padrão)."""
+        if self.colunas is None:
+            return self.sql
+        return montar_select(self.sql, self.colunas, campos or tuple(self.colunas))
+
+    def valores(self, parametros):
+        """Tupla de parâmetros; um dict é ordenado pelos nomes declarados."""
+        if isinstance(parametros, dict):
+            return tuple(parametros.get(nome) for nome, _ in self.parametros)
+        return tuple(parametros)
+
+    def converter(self, row, campos=None):
+        if self.colunas is not None:
+            return linha_para_dict(row, self.colunas, campos or tuple(self.colunas))
+        return self.mapear(row) if self.mapear else row
+
+    def configurar(self, cursor):
+        """Opções fixas do cursor preparado (valem para todas as execuções)."""
+        tipos = [tipo for _, tipo in self.parametros if tipo]
+        if tipos and len(tipos) == len(self.parametros):
+            cursor.setinputsizes([tamanho_entrada(tipo) for tipo in tipos])
+        if self.fast_executemany:
+            cursor.fast_executemany = True
+
+
+def registrar(nome, sql, **opcoes):
+    """Declara a instrução `nome` (opções como em Instrucao) e a retorna.
+    
+    `parametros` são pares (nome, tipo SQL), como em utils/associations.py;
+    com todos os tipos informados, o cursor preparado recebe setinputsizes.
+    """
+    with _trava:
+        if nome in _instrucoes:
+            raise ValueError(f'Instrução já registrada: {nome}')
+        instrucao = _instrucoes[nome] = Instrucao(nome, sql, **opcoes)
+    return instrucao
+
+
+def obter_instrucao(nome):
+    try:
+        return _instrucoes[nome]
+    except KeyError:
+        raise InstrucaoDesconhecida(nome) from None
+
+
+def ajustar(nome, fast_executemany=None, parametros=None):
+    """Muda fast_executemany e/ou os tipos dos parâmetros de uma instrução."""
+    instrucao = obter_instrucao(nome)
+    with _trava:
+        if fast_executemany is not None:
+            instrucao.fast_executemany = fast_executemany
+        if parametros is not None:
+            instrucao.parametros = tuple(parametros)
+        instrucao.versao += 1
+
+
+def _cursor_preparado(cursor, instrucao, sql):
+    """Cursor da conexão de `cursor` dedicado a (instrução, sql)."""
+    conexao = cursor.connection
+    chave = (instrucao.nome, instrucao.versao, sql)
+    with _trava:
+        cursores = _preparadas.setdefault(id(conexao), OrderedDict())
+        preparado = cursores.get(chave)
+        if preparado is not None:
+            cursores.move_to_end(chave)
+    
+    if preparado is None:
+        # Sem o timeout da requisição atual, que ficaria gravado no cursor
+        timeout, conexao.timeout = conexao.timeout, 0
+        try:
+            preparado = conexao.cursor()
+        finally:
+            conexao.timeout = timeout
+        instrucao.configurar(preparado)
+        with _trava:
+            instrucao.estatisticas['preparacoes'] += 1
+            cursores[chave] = preparado
+            excedentes = [cursores.popitem(last=False)[1] for _ in range(len(cursores) - MAXIMO_PREPARADAS)]
+        for antigo in excedentes:
+            antigo.close()
+    
+    registrar_cursor(preparado)
+    return preparado
+
+
+def liberar_conexao(conexao):
+    """Fecha os cursores preparados de uma conexão física (antes de fechá-la)."""
+    with _trava:
+        cursores = _preparadas.pop(id(conexao), {})
+    for preparado in cursores.values():
+        try:
+            preparado.close()
+        except pyodbc.Error:
+            pass
+
+
+def _executar(cursor, nome, parametros, campos, operacao):
+    instrucao = obter_instrucao(nome)
+    sql = instrucao.texto(campos)
+    preparado = _cursor_preparado(cursor, instrucao, sql)
+    inicio = time.perf_counter()
+    try:
+        resultado, linhas = operacao(preparado, instrucao, sql)
+    except Exception:
+        with _trava:
+            instrucao.estatisticas['erros'] += 1
+        raise
+    duracao = time.perf_counter() - inicio
+    
+    with _trava:
+        estatisticas = instrucao.estatisticas
+        estatisticas['execucoes'] += 1
+        estatisticas['linhas'] += max(linhas, 0)
+        estatisticas['tempo_total'] += duracao
+        estatisticas['tempo_maximo'] = max(estatisticas['tempo_maximo'], duracao)
+    if captura_ligada():
+        amostra = parametros[0] if instrucao.lote else parametros
+        registrar_execucao(sql, (instrucao.valores(amostra),), duracao)
+    return resultado
+
+
+def _liberar_resultados(preparado):
+    # Esgota os conjuntos pendentes (ex.: contagens de triggers) sem desfazer
+    # a preparação, para o cursor não deixar a conexão ocupada
+    while preparado.nextset():
+        pass
+
+
+def consultar(cursor, nome, parametros=(), campos=None):
+    """Executa a consulta `nome` e retorna todas as linhas já convertidas."""
+    def operacao(preparado, instrucao, sql):
+        preparado.execute(sql, instrucao.valores(parametros))
+        linhas = [instrucao.converter(row, campos) for row in preparado.fetchall()]
+        _liberar_resultados(preparado)
+        return linhas, len(linhas)
+    
+    return _executar(cursor, nome, parametros, campos, operacao)
+
+
+def consultar_um(cursor, nome, parametros=(), campos=None):
+    """Primeira linha convertida da consulta `nome` (ou None)."""
+    linhas = consultar(cursor, nome, parametros, campos)
+    return linhas[0] if linhas else None
+
+
+def executar(cursor, nome, parametros=()):
+    """Executa a instrução `nome` (sem resultado) e retorna o rowcount."""
+    def operacao(preparado, instrucao, sql):
+        preparado.execute(sql, instrucao.valores(parametros))
+        afetadas = preparado.rowcount
+        _liberar_resultados(preparado)
+        return afetadas, afetadas
+    
+    return _executar(cursor, nome, parametros, None, operacao)
+
+
+def executar_lote(cursor, nome, linhas):
+    """Executa a instrução `nome` uma vez por item de `linhas` (executemany).
+    
+    Retorna quantas linhas foram enviadas. Cada item é uma tupla ou um dict
+    com os nomes dos parâmetros declarados.
+    """
+    linhas = list(linhas)
+    if not linhas:
+        return 0
+    
+    def operacao(preparado, instrucao, sql):
+        preparado.executemany(sql, [instrucao.valores(linha) for linha in linhas])
+        _liberar_resultados(preparado)
+        return len(linhas), len(linhas)
+    
+    return _executar(cursor, nome, linhas, None, operacao)
+
+
+def obter_estatisticas():
+    """Estatísticas por instrução, da que consumiu mais tempo para a que consumiu menos."""
+    with _trava:
+        itens = [dict(nome=nome, lote=instrucao.lote, fast_executemany=instrucao.fast_executemany,
+                      **instrucao.estatisticas)
+                 for nome, instrucao in _instrucoes.items()]
+        preparadas = sum(len(cursores) for cursores in _preparadas.values())
+    for item in itens:
+        item['tempo_medio'] = item['tempo_total'] / item['execucoes'] if item['execucoes'] else 0.0
+    return {'instrucoes': sorted(itens, key=lambda item: -item['tempo_total']),
+            'cursores_preparados': preparadas}
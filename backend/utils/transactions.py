@@ -0,0 +1,93 @@
+# backend/utils/transactions.py
+# Execução de transações com repetição em erros transitórios
+#
+# Os triggers em cascata de FAIXA e PLAYLIST_FAIXA fazem edições concorrentes
+# caírem em deadlock (1205) ou timeout de lock (1222). Esses erros não dizem
+# nada sobre os dados enviados: a unidade de trabalho é desfeita e repetida
+# após uma espera aleatória crescente.
+
+import random
+import re
+import time
+
+import pyodbc
+
+from config.database import get_conexao
+from utils.metrics import incrementar
+
+TENTATIVAS_PADRAO = 4
+ESPERA_BASE = 0.05     # segundos
+ESPERA_MAXIMA = 1.0    # segundos
+
+# SQLSTATE 40001: falha de serialização (o driver usa para vítima de deadlock)
+SQLSTATES_TRANSITORIOS = {'40001'}
+
+# Erros nativos do SQL Server que podem ser repetidos com segurança
+ERROS_TRANSITORIOS = {
+    1205: 'deadlock',
+    1222: 'timeout_lock',
+    3960: 'conflito_snapshot',
+}
+
+# O pyodbc monta a mensagem como "[SQLSTATE] [driver]texto (nativo) (SQLFunção)"
+# e acrescenta "; [SQLSTATE] [driver]texto (nativo)" por diagnóstico extra. Só
+# o número nessa posição é o código nativo; outros números entre parênteses
+# podem vir do próprio texto (ex.: o valor da chave duplicada).
+_codigo_nativo = re.compile(r'\((\d+)\)(?=\s*(?:\(SQL\w+\)|;|$))')
+
+
+def codigo_erro(erro):
+    """Extrai o código nativo do SQL Server da mensagem do pyodbc (ou None)."""
+    mensagem = erro.args[1] if len(erro.args) > 1 else str(erro)
+    for codigo in _codigo_nativo.findall(str(mensagem)):
+        if int(codigo) in ERROS_TRANSITORIOS:
+            return int(codigo)
+    return None
+
+
+def erro_transitorio(erro):
+    """O erro é de concorrência (e a unidade de trabalho pode ser repetida)?"""
+    if not isinstance(erro, pyodbc.Error):
+        return False
+    sqlstate = erro.args[0] if erro.args else None
+    return sqlstate in SQLSTATES_TRANSITORIOS or codigo_erro(erro) is not None
+
+
+def _espera(tentativa):
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+
+
+def executar_transacao(unidade, tentativas=TENTATIVAS_PADRAO):
+    """Executa `unidade(cursor)` numa transação no primário e faz commit.
+    
+    Em erro transitório a transação é desfeita e `unidade` é chamada de novo,
+    por isso ela deve ser idempotente: tudo o que faz no banco precisa estar
+    dentro da transação. Retorna o valor de `unidade`; outros erros (ou o
+    último erro transitório) são relançados após o rollback.
+    """
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    
+    try:
+        for tentativa in range(tentativas):
+            incrementar('transacoes.tentativas')
+            try:
+                resultado = unidade(cursor)
+                conexao.commit()
+                return resultado
+            except Exception as e:
+                conexao.rollback()
+                if not erro_transitorio(e):
+                    raise
+                
+                incrementar('transacoes.erros_transitorios.' + ERROS_TRANSITORIOS.get(codigo_erro(e), 'serializacao'))
+                if tentativa + 1 == tentativas:
+                    incrementar('transacoes.esgotadas')
+                    raise
+                
+                incrementar('transacoes.repeticoes')
+                time.sleep(_espera(tentativa))
+    finally:
+        cursor.close()
+        conexao.close()
@@ -0,0 +1,117 @@
+# backend/utils/warmup.py
+# Aquecimento do backend antes de receber tráfego
+#
+# Depois de um deploy, as primeiras requisições pagavam conexões ODBC frias,
+# planos fora do cache do SQL Server e caches da aplicação vazios. O
+# aquecimento roda numa thread ao criar a aplicação: abre as conexões do pool
+# e faz um GET em cada rota de leitura registrada, com parâmetros
+# representativos lidos do próprio banco. /api/ready só responde 200 depois,
+# e só se as conexões do pool abriram: sem banco a instância não fica pronta.
+# Com o aquecimento desligado, a instância é dada como pronta desde o início.
+
+import threading
+import time
+from datetime import datetime
+
+from flask import url_for
+
+from config.database import aquecer_pool, get_conexao
+
+# Rotas que não entram no aquecimento (o stream SSE não termina sozinho)
+ROTAS_IGNORADAS = {'static', 'health', 'ready', 'metrics', 'events.stream_eventos'}
+BLUEPRINTS_IGNORADOS = {'admin'}
+
+# Argumentos de query string por endpoint ({chave} vem das amostras)
+ARGUMENTOS_ROTAS = {
+    'composers.buscar_compositores': {'nome': '{nome_compositor}'},
+    'composers.buscar_albuns_compositor': {'nome': '{nome_compositor}'},
+    'playlists.obter_faixa_no_tempo': {'t': '0'},
+}
+
+# Uma linha de cada tabela preenche os parâmetros de URL das rotas
+CONSULTAS_AMOSTRAS = [
+    "SELECT TOP 1 cod_album, numero_unidade, numero_faixa FROM FAIXA ORDER BY cod_album",
+    "SELECT TOP 1 cod_playlist FROM PLAYLIST ORDER BY qtd_faixas DESC",
+    "SELECT TOP 1 cod_compositor, nome AS nome_compositor FROM COMPOSITOR ORDER BY cod_compositor",
+    "SELECT TOP 1 cod_gravadora FROM GRAVADORA ORDER BY cod_gravadora",
+]
+
+_estado = {'pronto': False, 'concluido': False, 'desligado': False, 'inicio': None, 'duracao': None, 'rotas': 0, 'falhas': []}
+
+
+def _amostras():
+    """Valores representativos para os parâmetros das rotas."""
+    valores = {}
+    conexao = get_conexao(somente_leitura=False)
+    cursor = conexao.cursor()
+    for sql in CONSULTAS_AMOSTRAS:
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        if row:
+            valores.update(zip([coluna[0] for coluna in cursor.description], row))
+    cursor.close()
+    conexao.close()
+    return valores
+
+
+def _urls_leitura(app, valores):
+    """URLs de todas as rotas GET que podem ser montadas com as amostras."""
+    urls = []
+    with app.test_request_context():
+        for regra in app.url_map.iter_rules():
+            endpoint = regra.endpoint
+            if ('GET' not in regra.methods or endpoint in ROTAS_IGNORADAS
+                    or endpoint.split('.')[0] in BLUEPRINTS_IGNORADOS):
+                continue
+            if not regra.arguments.issubset(valores):
+                continue
+            argumentos = {a: valores[a] for a in regra.arguments}
+            for nome, modelo in ARGUMENTOS_ROTAS.get(endpoint, {}).items():
+                argumentos[nome] = modelo.format(**valores)
+            urls.append((endpoint, url_for(endpoint, **argumentos)))
+    return urls
+
+
+def aquecer(app, conexoes=None):
+    """Abre as conexões do pool e executa cada rota de leitura uma vez."""
+    _estado['inicio'] = datetime.now().isoformat(timespec='seconds')
+    inicio = time.perf_counter()
+    pool_aquecido = False
+    
+    try:
+        aquecer_pool(conexoes)
+        pool_aquecido = True
+        valores = _amostras()
+        cliente = app.test_client()
+        for endpoint, url in _urls_leitura(app, valores):
+            try:
+                resposta = cliente.get(url)
+                if resposta.status_code >= 500:
+                    _estado['falhas'].append(f'{endpoint}: HTTP {resposta.status_code}')
+            except Exception as e:
+                _estado['falhas'].append(f'{endpoint}: {e}')
+            _estado['rotas'] += 1
+    except Exception as e:
+        _estado['falhas'].append(f'aquecimento: {e}')
+    
+    _estado['duracao'] = round(time.perf_counter() - inicio, 3)
+    _estado['concluido'] = True
+    _estado['pronto'] = pool_aquecido
+    print(f"  Aquecimento concluído em {_estado['duracao']:.2f}s "
+          f"({_estado['rotas']} rotas, {len(_estado['falhas'])} falhas)"
+          + ('' if pool_aquecido else ' sem conexão com o banco'))
+
+
+def iniciar_aquecimento(app, conexoes=None):
+    """Dispara o aquecimento numa thread em segundo plano."""
+    threading.Thread(target=aquecer, args=(app, conexoes), name='aquecimento', daemon=True).start()
+
+
+def dispensar_aquecimento():
+    """Marca o backend como pronto sem aquecer (SPOTPER_AQUECIMENTO=0)."""
+    _estado.update(pronto=True, concluido=True, desligado=True)
+
+
+def estado_aquecimento():
+    """Cópia do estado do aquecimento (para /api/ready)."""
+    return dict(_estado, falhas=list(_estado['falhas']))
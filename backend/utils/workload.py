@@ -0,0 +1,119 @@
+# backend/utils/workload.py
+# Captura da carga de SQL executada pelo backend
+#
+# Com a captura ligada (SPOTPER_CAPTURA_CARGA=<arquivo.json>), cada
+# cursor.execute() é registrado pelo texto normalizado do SQL: número de
+# execuções, tempo total e algumas amostras de parâmetros. O arquivo gerado é
+# a entrada de tools/index_advisor.py, que reexecuta a carga num banco de
+# rascunho e sugere índices.
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+AMOSTRAS_POR_INSTRUCAO = 10
+
+_carga = {}
+_trava = threading.Lock()
+_config = {'arquivo': os.environ.get('SPOTPER_CAPTURA_CARGA')}
+
+_espacos = re.compile(r'\s+')
+
+
+def normalizar_sql(sql):
+    """Texto do SQL com espaços colapsados (chave da instrução)."""
+    return _espacos.sub(' ', sql).strip()
+
+
+def _serializavel(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return None
+    return valor
+
+
+def captura_ligada():
+    return bool(_config['arquivo'])
+
+
+def registrar_execucao(sql, parametros, duracao):
+    """Acumula uma execução na carga capturada."""
+    chave = normalizar_sql(sql)
+    if parametros and len(parametros) == 1 and isinstance(parametros[0], (list, tuple)):
+        parametros = parametros[0]
+    amostra = [_serializavel(p) for p in parametros]
+    with _trava:
+        instrucao = _carga.setdefault(chave, {'execucoes': 0, 'tempo_total': 0.0, 'parametros': []})
+        instrucao['execucoes'] += 1
+        instrucao['tempo_total'] += duracao
+        if len(instrucao['parametros']) < AMOSTRAS_POR_INSTRUCAO and amostra not in instrucao['parametros']:
+            instrucao['parametros'].append(amostra)
+
+
+class _CursorCapturado:
+    """Cursor que mede e registra cada execute()."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *parametros):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, *parametros)
+        finally:
+            registrar_execucao(sql, parametros, time.perf_counter() - inicio)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class _ConexaoCapturada:
+    """Conexão cujos cursores registram o SQL executado."""
+
+    def __init__(self, conexao):
+        object.__setattr__(self, '_conexao', conexao)
+
+    def cursor(self):
+        return _CursorCapturado(self._conexao.cursor())
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._conexao, nome, valor)
+
+
+def capturar_conexao(conexao):
+    """Envolve a conexão se a captura estiver ligada."""
+    if not captura_ligada():
+        return conexao
+    return _ConexaoCapturada(conexao)
+
+
+def obter_carga():
+    """Cópia da carga capturada, das instruções mais executadas para as menos."""
+    with _trava:
+        itens = sorted(_carga.items(), key=lambda item: -item[1]['execucoes'])
+        return [dict(sql=sql, **dict(dados, parametros=list(dados['parametros']))) for sql, dados in itens]
+
+
+def gravar_carga(caminho=None):
+    """Grava a carga capturada em JSON (no arquivo configurado por padrão)."""
+    caminho = caminho or _config['arquivo']
+    if not caminho:
+        return None
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(obter_carga(), arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+
+if _config['arquivo']:
+    atexit.register(gravar_carga)
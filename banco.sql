@@ -50,6 +50,10 @@ LOG ON
 );
 GO
 
+-- Leituras da aplicação podem rodar em SNAPSHOT e não bloqueiam nos escritores
+ALTER DATABASE BDSpotPer SET ALLOW_SNAPSHOT_ISOLATION ON;
+GO
+
 USE BDSpotPer;
 GO
 
@@ -166,6 +170,7 @@ CREATE TABLE dbo.ALBUM
     tipo_compra     VARCHAR(40) NOT NULL,
     tipo_midia      VARCHAR(10) NOT NULL,
     qtd_unidades    TINYINT NOT NULL DEFAULT 1,
+    qtd_faixas      INT NOT NULL DEFAULT 0,
     
     CONSTRAINT FK_ALBUM_GRAVADORA 
         FOREIGN KEY (cod_gravadora) 
@@ -185,6 +190,9 @@ CREATE TABLE dbo.ALBUM
     CONSTRAINT VERIFICAR_ALBUM_QTD_UNIDADES 
         CHECK (qtd_unidades >= 1),
     
+    CONSTRAINT VERIFICAR_ALBUM_QTD_FAIXAS 
+        CHECK (qtd_faixas >= 0),
+    
     CONSTRAINT VERIFICAR_DOWNLOAD_UNIDADE_UNICA 
         CHECK (tipo_midia <> 'DOWNLOAD' OR qtd_unidades = 1)
 ) ON FG_GERAL;
@@ -256,7 +264,12 @@ CREATE TABLE dbo.PLAYLIST
     cod_playlist         INT IDENTITY(1,1) PRIMARY KEY,
     nome                 VARCHAR(150) NOT NULL,
     data_criacao         DATE NOT NULL DEFAULT GETDATE(),
-    tempo_total_execucao INT NOT NULL DEFAULT 0
+    tempo_total_execucao INT NOT NULL DEFAULT 0,
+    qtd_faixas           INT NOT NULL DEFAULT 0,
+    qtd_albuns           INT NOT NULL DEFAULT 0,
+    
+    CONSTRAINT VERIFICAR_PLAYLIST_CONTADORES 
+        CHECK (qtd_faixas >= 0 AND qtd_albuns >= 0)
 ) ON FG_PLAYLISTS;
 GO
 
@@ -324,9 +337,10 @@ CREATE TABLE dbo.PLAYLIST_FAIXA
     cod_album               INT NOT NULL,
     numero_unidade          TINYINT NOT NULL,
     numero_faixa            TINYINT NOT NULL,
-    ordem_reproducao        SMALLINT NOT NULL,
+    ordem_reproducao        INT NOT NULL,
     data_ultima_vez_tocada  DATETIME NULL,
     num_vezes_tocada        INT NOT NULL DEFAULT 0,
+    tempo_inicio            INT NOT NULL DEFAULT 0,
 
     CONSTRAINT PK_PLAYLIST_FAIXA
         PRIMARY KEY (cod_playlist, cod_album, numero_unidade, numero_faixa),
@@ -359,6 +373,141 @@ CREATE INDEX indice_playlist_faixa_faixa
     ON FG_PLAYLISTS;
 GO
 
+-- tempo_inicio guarda a soma acumulada (prefixo) de tempo_execucao das faixas
+-- anteriores na ordem de reprodução; o índice permite achar a faixa tocando
+-- no instante T com uma busca em O(log n).
+CREATE INDEX indice_playlist_faixa_tempo 
+    ON dbo.PLAYLIST_FAIXA(cod_playlist, tempo_inicio) 
+    ON FG_PLAYLISTS;
+GO
+
+-- Faixas tocadas desde uma data (restrição "não tocada desde" do gerador)
+CREATE INDEX indice_playlist_faixa_ultima_vez 
+    ON dbo.PLAYLIST_FAIXA(data_ultima_vez_tocada) 
+    INCLUDE (cod_album, numero_unidade, numero_faixa) 
+    ON FG_PLAYLISTS;
+GO
+
+-- Histórico de reproduções (somente inserção), particionado por mês
+-- As partições são criadas do início do ano corrente até três anos à frente;
+-- dbo.ESTENDER_PARTICOES_HISTORICO acrescenta novos meses depois disso.
+
+DECLARE @limites NVARCHAR(MAX) = N'';
+DECLARE @mes DATE = DATEFROMPARTS(YEAR(GETDATE()), 1, 1);
+DECLARE @ultimo_mes DATE = DATEADD(YEAR, 3, @mes);
+
+WHILE @mes < @ultimo_mes
+BEGIN
+    SET @limites = @limites 
+                 + CASE WHEN @limites = N'' THEN N'' ELSE N', ' END
+                 + N'''' + CONVERT(NCHAR(10), @mes, 23) + N'''';
+    SET @mes = DATEADD(MONTH, 1, @mes);
+END
+
+EXEC (N'CREATE PARTITION FUNCTION PF_HISTORICO_REPRODUCAO (DATETIME2(0)) '
+    + N'AS RANGE RIGHT FOR VALUES (' + @limites + N');');
+GO
+
+CREATE PARTITION SCHEME PS_HISTORICO_REPRODUCAO
+AS PARTITION PF_HISTORICO_REPRODUCAO
+ALL TO (FG_PLAYLISTS);
+GO
+
+-- Sem FKs de propósito: é um log de eventos e não deve bloquear a remoção
+-- de faixas ou playlists nem pagar a verificação a cada reprodução.
+
+CREATE TABLE dbo.HISTORICO_REPRODUCAO
+(
+    cod_reproducao  BIGINT IDENTITY(1,1) NOT NULL,
+    data_reproducao DATETIME2(0) NOT NULL DEFAULT SYSDATETIME(),
+    cod_playlist    INT NULL,
+    cod_album       INT NOT NULL,
+    numero_unidade  TINYINT NOT NULL,
+    numero_faixa    TINYINT NOT NULL,
+
+    CONSTRAINT PK_HISTORICO_REPRODUCAO
+        PRIMARY KEY CLUSTERED (data_reproducao, cod_reproducao)
+) ON PS_HISTORICO_REPRODUCAO (data_reproducao);
+GO
+
+CREATE TABLE dbo.REPRODUCAO_MINUTO
+(
+    minuto          DATETIME2(0) NOT NULL,
+    cod_album       INT NOT NULL,
+    numero_unidade  TINYINT NOT NULL,
+    numero_faixa    TINYINT NOT NULL,
+    qtd_reproducoes INT NOT NULL,
+
+    CONSTRAINT PK_REPRODUCAO_MINUTO
+        PRIMARY KEY (minuto, cod_album, numero_unidade, numero_faixa)
+) ON FG_PLAYLISTS;
+GO
+
+CREATE TABLE dbo.REPRODUCAO_DIA
+(
+    dia             DATE NOT NULL,
+    cod_album       INT NOT NULL,
+    numero_unidade  TINYINT NOT NULL,
+    numero_faixa    TINYINT NOT NULL,
+    qtd_reproducoes INT NOT NULL,
+
+    CONSTRAINT PK_REPRODUCAO_DIA
+        PRIMARY KEY (dia, cod_album, numero_unidade, numero_faixa)
+) ON FG_PLAYLISTS;
+GO
+
+-- Até onde o histórico já foi somado nos rollups e nos contadores de
+-- PLAYLIST_FAIXA (consolidar_reproducoes em backend/services/maintenance.py).
+-- Uma linha só; o histórico começa vazio, então parte do momento da criação.
+
+CREATE TABLE dbo.CONSOLIDACAO_REPRODUCAO
+(
+    id              TINYINT NOT NULL DEFAULT 1,
+    consolidado_ate DATETIME2(0) NOT NULL,
+
+    CONSTRAINT PK_CONSOLIDACAO_REPRODUCAO PRIMARY KEY (id),
+    CONSTRAINT VERIFICAR_CONSOLIDACAO_LINHA_UNICA CHECK (id = 1)
+) ON FG_PLAYLISTS;
+GO
+
+INSERT INTO dbo.CONSOLIDACAO_REPRODUCAO (consolidado_ate) VALUES (SYSDATETIME());
+GO
+
+-- Tarefas em segundo plano (backend/utils/jobs.py). Uma tarefa só passa de
+-- PENDENTE para EXECUTANDO uma vez; se o processo que a executa para de
+-- renovar data_sinal, ela vira FALHOU e não é executada de novo.
+
+CREATE TABLE dbo.TAREFA
+(
+    cod_tarefa   INT IDENTITY(1,1) PRIMARY KEY,
+    tipo         VARCHAR(60) NOT NULL,
+    parametros   NVARCHAR(MAX) NULL,
+    estado       VARCHAR(12) NOT NULL DEFAULT 'PENDENTE',
+    progresso    DECIMAL(5,2) NOT NULL DEFAULT 0,
+    mensagem     VARCHAR(400) NULL,
+    resultado    NVARCHAR(MAX) NULL,
+    erro         NVARCHAR(MAX) NULL,
+    cancelar     BIT NOT NULL DEFAULT 0,
+    instancia    VARCHAR(100) NULL,
+    data_criacao DATETIME2(0) NOT NULL DEFAULT SYSDATETIME(),
+    data_inicio  DATETIME2(0) NULL,
+    data_sinal   DATETIME2(0) NULL,
+    data_fim     DATETIME2(0) NULL,
+
+    CONSTRAINT VERIFICAR_TAREFA_ESTADO
+        CHECK (estado IN ('PENDENTE', 'EXECUTANDO', 'CONCLUIDA', 'FALHOU', 'CANCELADA')),
+
+    CONSTRAINT VERIFICAR_TAREFA_PROGRESSO
+        CHECK (progresso BETWEEN 0 AND 100)
+) ON FG_GERAL;
+GO
+
+CREATE INDEX indice_tarefa_estado
+    ON dbo.TAREFA(estado, cod_tarefa)
+    INCLUDE (tipo, instancia, data_sinal)
+    ON FG_GERAL;
+GO
+
 CREATE VIEW dbo.VW_PLAYLIST_ALBUM_UNICO
 WITH SCHEMABINDING
 AS
@@ -674,6 +823,219 @@ BEGIN
 END;
 GO
 
+-- Contadores mantidos (ALBUM.qtd_faixas, PLAYLIST.qtd_faixas/qtd_albuns)
+-- Substituem os COUNT(*) correlacionados das listagens. Os triggers aplicam
+-- apenas a variação da instrução, de forma set-based.
+
+CREATE TRIGGER ATUALIZAR_QTD_FAIXAS_ALBUM
+ON dbo.FAIXA
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT UPDATE(cod_album)
+        RETURN;
+    
+    UPDATE alb
+    SET qtd_faixas = alb.qtd_faixas + delta.variacao
+    FROM dbo.ALBUM alb
+    JOIN (
+        SELECT mov.cod_album, SUM(mov.variacao) AS variacao
+        FROM (
+            SELECT cod_album, 1 AS variacao FROM inserted
+            UNION ALL
+            SELECT cod_album, -1 FROM deleted
+        ) AS mov
+        GROUP BY mov.cod_album
+    ) AS delta ON alb.cod_album = delta.cod_album
+    WHERE delta.variacao <> 0;
+END;
+GO
+
+-- Álbuns distintos: para cada par (playlist, álbum) afetado, compara a
+-- contagem da view indexada VW_PLAYLIST_ALBUM_UNICO depois da instrução
+-- (já mantida pelo SQL Server) com a contagem antes dela.
+
+CREATE TRIGGER ATUALIZAR_CONTADORES_PLAYLIST
+ON dbo.PLAYLIST_FAIXA
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(cod_playlist) OR UPDATE(cod_album))
+        RETURN;
+    
+    WITH movimento AS (
+        SELECT cod_playlist, cod_album, 1 AS variacao FROM inserted
+        UNION ALL
+        SELECT cod_playlist, cod_album, -1 FROM deleted
+    ),
+    pares AS (
+        SELECT mov.cod_playlist,
+               mov.cod_album,
+               SUM(mov.variacao) AS variacao,
+               ISNULL(MAX(vw.qtd_faixas_album), 0) AS qtd_depois
+        FROM movimento mov
+        LEFT JOIN dbo.VW_PLAYLIST_ALBUM_UNICO vw WITH (NOEXPAND)
+            ON vw.cod_playlist = mov.cod_playlist
+            AND vw.cod_album = mov.cod_album
+        GROUP BY mov.cod_playlist, mov.cod_album
+    ),
+    delta AS (
+        SELECT cod_playlist,
+               SUM(variacao) AS faixas,
+               SUM(CASE WHEN qtd_depois > 0 THEN 1 ELSE 0 END)
+             - SUM(CASE WHEN qtd_depois - variacao > 0 THEN 1 ELSE 0 END) AS albuns
+        FROM pares
+        GROUP BY cod_playlist
+    )
+    UPDATE play
+    SET qtd_faixas = play.qtd_faixas + delta.faixas,
+        qtd_albuns = play.qtd_albuns + delta.albuns
+    FROM dbo.PLAYLIST play
+    JOIN delta ON play.cod_playlist = delta.cod_playlist
+    WHERE delta.faixas <> 0 OR delta.albuns <> 0;
+END;
+GO
+
+-- Rollups por minuto e por dia: sem trigger no histórico. A reprodução só
+-- insere o evento; rollups e contadores de PLAYLIST_FAIXA são somados em lote
+-- fora da requisição (CONSOLIDACAO_REPRODUCAO). As consultas de "mais
+-- tocadas" leem apenas os rollups.
+
+-- Somas acumuladas (PLAYLIST_FAIXA.tempo_inicio)
+-- Recalcula apenas a partir da menor posição afetada de cada playlist:
+-- inserir no fim toca uma linha; remover ou mover desloca só o sufixo.
+
+CREATE TRIGGER ATUALIZAR_TEMPO_INICIO_PLAYLIST
+ON dbo.PLAYLIST_FAIXA
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+       AND NOT (UPDATE(ordem_reproducao) OR UPDATE(cod_playlist) OR UPDATE(cod_album)
+                OR UPDATE(numero_unidade) OR UPDATE(numero_faixa))
+        RETURN;
+    
+    WITH afetadas AS (
+        SELECT mov.cod_playlist, MIN(mov.ordem_reproducao) AS ordem_minima
+        FROM (
+            SELECT cod_playlist, ordem_reproducao FROM inserted
+            UNION ALL
+            SELECT cod_playlist, ordem_reproducao FROM deleted
+        ) AS mov
+        GROUP BY mov.cod_playlist
+    ),
+    recalculo AS (
+        SELECT pf.cod_playlist, pf.cod_album, pf.numero_unidade, pf.numero_faixa,
+               ISNULL(base.tempo_base, 0)
+             + SUM(fax.tempo_execucao) OVER (PARTITION BY pf.cod_playlist
+                                             ORDER BY pf.ordem_reproducao
+                                             ROWS UNBOUNDED PRECEDING)
+             - fax.tempo_execucao AS novo_tempo_inicio
+        FROM afetadas af
+        JOIN dbo.PLAYLIST_FAIXA pf 
+            ON pf.cod_playlist = af.cod_playlist
+            AND pf.ordem_reproducao >= af.ordem_minima
+        JOIN dbo.FAIXA fax 
+            ON pf.cod_album = fax.cod_album
+            AND pf.numero_unidade = fax.numero_unidade
+            AND pf.numero_faixa = fax.numero_faixa
+        OUTER APPLY (
+            SELECT TOP 1 ant.tempo_inicio + fant.tempo_execucao AS tempo_base
+            FROM dbo.PLAYLIST_FAIXA ant
+            JOIN dbo.FAIXA fant 
+                ON ant.cod_album = fant.cod_album
+                AND ant.numero_unidade = fant.numero_unidade
+                AND ant.numero_faixa = fant.numero_faixa
+            WHERE ant.cod_playlist = af.cod_playlist
+              AND ant.ordem_reproducao < af.ordem_minima
+            ORDER BY ant.ordem_reproducao DESC
+        ) AS base
+    )
+    UPDATE pf
+    SET tempo_inicio = rec.novo_tempo_inicio
+    FROM dbo.PLAYLIST_FAIXA pf
+    JOIN recalculo rec 
+        ON pf.cod_playlist = rec.cod_playlist
+        AND pf.cod_album = rec.cod_album
+        AND pf.numero_unidade = rec.numero_unidade
+        AND pf.numero_faixa = rec.numero_faixa
+    WHERE pf.tempo_inicio <> rec.novo_tempo_inicio;
+END;
+GO
+
+-- Mesma atualização quando muda a duração de uma faixa já em playlists
+
+CREATE TRIGGER ATUALIZAR_TEMPO_INICIO_FAIXA
+ON dbo.FAIXA
+AFTER UPDATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF NOT UPDATE(tempo_execucao)
+        RETURN;
+    
+    WITH afetadas AS (
+        SELECT pf.cod_playlist, MIN(pf.ordem_reproducao) AS ordem_minima
+        FROM inserted ins
+        JOIN deleted del 
+            ON ins.cod_album = del.cod_album
+            AND ins.numero_unidade = del.numero_unidade
+            AND ins.numero_faixa = del.numero_faixa
+        JOIN dbo.PLAYLIST_FAIXA pf 
+            ON pf.cod_album = ins.cod_album
+            AND pf.numero_unidade = ins.numero_unidade
+            AND pf.numero_faixa = ins.numero_faixa
+        WHERE ins.tempo_execucao <> del.tempo_execucao
+        GROUP BY pf.cod_playlist
+    ),
+    recalculo AS (
+        SELECT pf.cod_playlist, pf.cod_album, pf.numero_unidade, pf.numero_faixa,
+               ISNULL(base.tempo_base, 0)
+             + SUM(fax.tempo_execucao) OVER (PARTITION BY pf.cod_playlist
+                                             ORDER BY pf.ordem_reproducao
+                                             ROWS UNBOUNDED PRECEDING)
+             - fax.tempo_execucao AS novo_tempo_inicio
+        FROM afetadas af
+        JOIN dbo.PLAYLIST_FAIXA pf 
+            ON pf.cod_playlist = af.cod_playlist
+            AND pf.ordem_reproducao >= af.ordem_minima
+        JOIN dbo.FAIXA fax 
+            ON pf.cod_album = fax.cod_album
+            AND pf.numero_unidade = fax.numero_unidade
+            AND pf.numero_faixa = fax.numero_faixa
+        OUTER APPLY (
+            SELECT TOP 1 ant.tempo_inicio + fant.tempo_execucao AS tempo_base
+            FROM dbo.PLAYLIST_FAIXA ant
+            JOIN dbo.FAIXA fant 
+                ON ant.cod_album = fant.cod_album
+                AND ant.numero_unidade = fant.numero_unidade
+                AND ant.numero_faixa = fant.numero_faixa
+            WHERE ant.cod_playlist = af.cod_playlist
+              AND ant.ordem_reproducao < af.ordem_minima
+            ORDER BY ant.ordem_reproducao DESC
+        ) AS base
+    )
+    UPDATE pf
+    SET tempo_inicio = rec.novo_tempo_inicio
+    FROM dbo.PLAYLIST_FAIXA pf
+    JOIN recalculo rec 
+        ON pf.cod_playlist = rec.cod_playlist
+        AND pf.cod_album = rec.cod_album
+        AND pf.numero_unidade = rec.numero_unidade
+        AND pf.numero_faixa = rec.numero_faixa
+    WHERE pf.tempo_inicio <> rec.novo_tempo_inicio;
+END;
+GO
+
 CREATE TRIGGER BARROCO_PERIODO_UPDATE
 ON dbo.COMPOSITOR
 AFTER UPDATE
@@ -830,20 +1192,43 @@ CREATE PROCEDURE dbo.REGISTRAR_REPRODUCAO
     @param_numero_faixa TINYINT
 AS
 BEGIN
-    DECLARE @linhas_afetadas INT;
-    
-    UPDATE dbo.PLAYLIST_FAIXA
-    SET data_ultima_vez_tocada = GETDATE(),
-        num_vezes_tocada = num_vezes_tocada + 1
+    -- Só o evento: contadores e rollups são consolidados depois
+    INSERT INTO dbo.HISTORICO_REPRODUCAO (cod_playlist, cod_album, numero_unidade, numero_faixa)
+    SELECT cod_playlist, cod_album, numero_unidade, numero_faixa
+    FROM dbo.PLAYLIST_FAIXA
     WHERE cod_playlist = @param_cod_playlist 
       AND cod_album = @param_cod_album
       AND numero_unidade = @param_numero_unidade
       AND numero_faixa = @param_numero_faixa;
     
-    SET @linhas_afetadas = @@ROWCOUNT;
-    
-    IF @linhas_afetadas = 0
+    IF @@ROWCOUNT = 0
+    BEGIN
         RAISERROR('Faixa nao encontrada na playlist.', 16, 1);
+        RETURN;
+    END
+END;
+GO
+
+CREATE PROCEDURE dbo.ESTENDER_PARTICOES_HISTORICO
+    @param_meses INT = 1
+AS
+BEGIN
+    DECLARE @ultimo_limite DATETIME2(0);
+    
+    SELECT @ultimo_limite = MAX(CAST(prv.value AS DATETIME2(0)))
+    FROM sys.partition_range_values prv
+    JOIN sys.partition_functions pfn ON prv.function_id = pfn.function_id
+    WHERE pfn.name = 'PF_HISTORICO_REPRODUCAO';
+    
+    WHILE @param_meses > 0
+    BEGIN
+        SET @ultimo_limite = DATEADD(MONTH, 1, @ultimo_limite);
+        
+        ALTER PARTITION SCHEME PS_HISTORICO_REPRODUCAO NEXT USED FG_PLAYLISTS;
+        ALTER PARTITION FUNCTION PF_HISTORICO_REPRODUCAO() SPLIT RANGE (@ultimo_limite);
+        
+        SET @param_meses = @param_meses - 1;
+    END
 END;
 GO
 
@@ -1056,7 +1441,7 @@ BEGIN
     DECLARE @playlist_existe INT;
     DECLARE @faixa_existe INT;
     DECLARE @ja_na_playlist INT;
-    DECLARE @proxima_ordem SMALLINT;
+    DECLARE @intervalo_ordem INT = 1024;
     
     SELECT @playlist_existe = COUNT(*)
     FROM dbo.PLAYLIST 
@@ -1093,14 +1478,14 @@ BEGIN
         RETURN;
     END
     
-    SELECT @proxima_ordem = ISNULL(MAX(ordem_reproducao), 0) + 1
-    FROM dbo.PLAYLIST_FAIXA
-    WHERE cod_playlist = @param_cod_playlist;
-    
+    -- Ordem esparsa (intervalo de 1024) calculada na própria inserção;
+    -- UPDLOCK/HOLDLOCK serializa inserções concorrentes na mesma playlist
     INSERT INTO dbo.PLAYLIST_FAIXA (cod_playlist, cod_album, numero_unidade, 
                                      numero_faixa, ordem_reproducao, num_vezes_tocada)
-    VALUES (@param_cod_playlist, @param_cod_album, @param_numero_unidade, 
-            @param_numero_faixa, @proxima_ordem, 0);
+    SELECT @param_cod_playlist, @param_cod_album, @param_numero_unidade, 
+           @param_numero_faixa, ISNULL(MAX(ordem_reproducao), 0) + @intervalo_ordem, 0
+    FROM dbo.PLAYLIST_FAIXA WITH (UPDLOCK, HOLDLOCK)
+    WHERE cod_playlist = @param_cod_playlist;
 END;
 GO
 
@@ -1137,7 +1522,7 @@ BEGIN
         alb.tipo_midia,
         alb.preco_compra,
         alb.data_gravacao,
-        (SELECT COUNT(*) FROM dbo.FAIXA fax WHERE fax.cod_album = alb.cod_album) AS qtd_faixas
+        alb.qtd_faixas
     FROM dbo.ALBUM alb
     JOIN dbo.GRAVADORA grav ON alb.cod_gravadora = grav.cod_gravadora
     ORDER BY alb.nome;
@@ -1187,7 +1572,8 @@ BEGIN
         play.nome,
         play.data_criacao,
         play.tempo_total_execucao,
-        (SELECT COUNT(*) FROM dbo.PLAYLIST_FAIXA pf WHERE pf.cod_playlist = play.cod_playlist) AS qtd_faixas
+        play.qtd_faixas,
+        play.qtd_albuns
     FROM dbo.PLAYLIST play
     ORDER BY play.nome;
 END;
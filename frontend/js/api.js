@@ -2,42 +2,267 @@
 
 const API_BASE_URL = 'http://localhost:8080/api'; // Será configurado quando o backend estiver pronto
 
+// Token devolvido pelo backend após escritas; reenviado para ler do primário
+// enquanto a réplica de leitura pode estar atrasada (read-your-writes)
+const WRITE_TOKEN_HEADER = 'X-SpotPer-Escrita';
+
+// Cache das respostas GET (memória + IndexedDB). Uma entrada é servida sem
+// rede enquanto o stream de alterações está em dia (ele invalida o que mudou)
+// ou por CACHE_FRESH_MS; depois disso é servida e revalidada em segundo plano
+// (stale-while-revalidate). Entradas invalidadas esperam a revalidação, que
+// usa o ETag (If-None-Match -> 304).
+const CACHE_DB_NAME = 'spotper-cache';
+const CACHE_STORE = 'respostas';
+const CACHE_FRESH_MS = 30000;
+const CACHE_MAX_ENTRIES = 500;
+const FEED_ID_KEY = 'spotper-feed-id';
+
+// Endpoints em cache e as entidades de que dependem (primeira regra que casa).
+// Os totais das playlists (qtd_faixas, tempo total) são mantidos por triggers
+// e mudam com as faixas da playlist, as faixas e os álbuns.
+const CACHE_RULES = [
+    [/^\/albums\/\d+\/tracks$/, ['albums', 'tracks', 'composers', 'interpreters']],
+    [/^\/albums(\/\d+)?$/, ['albums', 'tracks', 'labels']],
+    [/^\/tracks\/filter/, ['tracks', 'albums', 'composers', 'interpreters', 'periods', 'composition_types']],
+    [/^\/composers\/albums/, ['composers', 'albums', 'tracks']],
+    [/^\/composers/, ['composers', 'periods']],
+    [/^\/interpreters$/, ['interpreters']],
+    [/^\/labels(\/\d+)?$/, ['labels']],
+    [/^\/periods$/, ['periods']],
+    [/^\/composition-types$/, ['composition_types']],
+    [/^\/playlists\/\d+\/tracks/, ['playlist_tracks', 'tracks', 'albums', 'composers', 'interpreters']],
+    [/^\/playlists(\/\d+)?$/, ['playlists', 'playlist_tracks', 'tracks', 'albums']]
+];
+
+// Entidades alteradas por escrita: [endpoint, entidades, extras no DELETE (cascata)]
+const CACHE_WRITE_RULES = [
+    [/^\/albums/, ['albums'], ['tracks', 'playlists', 'playlist_tracks']],
+    [/^\/tracks/, ['tracks', 'albums', 'playlists', 'playlist_tracks'], []],
+    [/^\/playlists/, ['playlists', 'playlist_tracks'], []],
+    [/^\/composers/, ['composers'], ['tracks']],
+    [/^\/interpreters/, ['interpreters'], ['tracks']],
+    [/^\/labels/, ['labels'], ['albums']],
+    [/^\/periods/, ['periods'], []],
+    [/^\/composition-types/, ['composition_types'], []]
+];
+
+function cacheDependencies(endpoint) {
+    const rule = CACHE_RULES.find(([pattern]) => pattern.test(endpoint));
+    return rule ? rule[1] : null;
+}
+
+function writtenEntities(method, endpoint) {
+    if (endpoint.includes('dry_run=1')) return [];
+    const rule = CACHE_WRITE_RULES.find(([pattern]) => pattern.test(endpoint));
+    if (!rule) return [];
+    return method === 'DELETE' ? [...rule[1], ...rule[2]] : rule[1];
+}
+
 /**
  * Classe para gerenciar chamadas de API
  */
 class SpotPerAPI {
     constructor(baseURL = API_BASE_URL) {
         this.baseURL = baseURL;
+        this.writeToken = sessionStorage.getItem(WRITE_TOKEN_HEADER);
+        this.cache = new Map();         // endpoint -> { endpoint, data, etag, savedAt, stale }
+        this.inflight = new Map();      // endpoint -> Promise (GETs em andamento)
+        this.cacheTrusted = false;      // stream de alterações conectado e em dia
+        this.versions = { '*': 0 };     // entidade -> nº de invalidações ('*': todas)
+        this.cacheLoaded = this.loadCache();
     }
 
     /**
      * Método genérico para fazer requisições
      */
     async request(endpoint, options = {}) {
+        const method = (options.method || 'GET').toUpperCase();
+        if (method !== 'GET') {
+            try {
+                return await (await this.send(endpoint, options)).json();
+            } finally {
+                // Mesmo em erro: a escrita pode ter sido gravada antes da falha
+                this.invalidateEntities(writtenEntities(method, endpoint));
+            }
+        }
+
+        // GETs idênticos em andamento compartilham a mesma requisição
+        if (!this.inflight.has(endpoint)) {
+            const pending = this.cachedGet(endpoint, options)
+                .finally(() => this.inflight.delete(endpoint));
+            this.inflight.set(endpoint, pending);
+        }
+        // Cópia: quem chama pode alterar o resultado sem mexer no cache
+        return structuredClone(await this.inflight.get(endpoint));
+    }
+
+    async send(endpoint, options = {}) {
         const url = `${this.baseURL}${endpoint}`;
         const config = {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...(this.writeToken ? { [WRITE_TOKEN_HEADER]: this.writeToken } : {}),
                 ...options.headers
-            },
-            ...options
+            }
         };
 
         try {
             const response = await fetch(url, config);
 
-            if (!response.ok) {
+            const writeToken = response.headers.get(WRITE_TOKEN_HEADER);
+            if (writeToken) {
+                this.writeToken = writeToken;
+                sessionStorage.setItem(WRITE_TOKEN_HEADER, writeToken);
+            }
+
+            if (!response.ok && response.status !== 304) {
                 const error = await response.json().catch(() => ({ message: 'Erro desconhecido' }));
                 throw new Error(error.message || `HTTP ${response.status}`);
             }
 
-            return await response.json();
+            return response;
         } catch (error) {
             console.error(`[API Error] ${endpoint}:`, error);
             throw error;
         }
     }
 
+    // ========== CACHE ==========
+    async cachedGet(endpoint, options) {
+        if (!cacheDependencies(endpoint)) {
+            return (await this.send(endpoint, options)).json();
+        }
+
+        await this.cacheLoaded;
+        const entry = this.cache.get(endpoint);
+        if (!entry || entry.stale) {
+            return this.revalidate(endpoint, entry, options);
+        }
+        if (!this.cacheTrusted && Date.now() - entry.savedAt >= CACHE_FRESH_MS && !entry.revalidating) {
+            entry.revalidating = true;
+            this.revalidate(endpoint, entry, options)
+                .catch(() => {})
+                .finally(() => { entry.revalidating = false; });
+        }
+        return entry.data;
+    }
+
+    dependencyVersion(endpoint) {
+        return cacheDependencies(endpoint)
+            .reduce((total, entity) => total + (this.versions[entity] || 0), this.versions['*']);
+    }
+
+    async revalidate(endpoint, entry, options) {
+        const version = this.dependencyVersion(endpoint);
+        const response = await this.send(endpoint, {
+            ...options,
+            headers: { ...options.headers, ...(entry?.etag ? { 'If-None-Match': entry.etag } : {}) }
+        });
+        const data = response.status === 304 ? entry.data : await response.json();
+
+        // Uma escrita durante a requisição pode ter tornado a resposta velha
+        if (version === this.dependencyVersion(endpoint)) {
+            this.storeEntry({
+                endpoint,
+                data,
+                etag: response.headers.get('ETag') || entry?.etag || null,
+                savedAt: Date.now(),
+                stale: false
+            });
+        }
+        return data;
+    }
+
+    storeEntry(entry) {
+        this.cache.delete(entry.endpoint);
+        this.cache.set(entry.endpoint, entry);
+        this.persistEntries([entry]);
+
+        // Mais antigas primeiro (ordem de inserção do Map)
+        if (this.cache.size > CACHE_MAX_ENTRIES) {
+            const [oldest] = this.cache.keys();
+            this.cache.delete(oldest);
+            this.withStore('readwrite', store => store.delete(oldest));
+        }
+    }
+
+    /**
+     * Marca como velhas as respostas que dependem dessas entidades
+     * (escritas deste cliente e eventos do stream de alterações)
+     */
+    invalidateEntities(entities) {
+        if (!entities.length) return;
+        for (const entity of entities) this.versions[entity] = (this.versions[entity] || 0) + 1;
+        const changed = [];
+        for (const entry of this.cache.values()) {
+            if (!entry.stale && cacheDependencies(entry.endpoint).some(e => entities.includes(e))) {
+                entry.stale = true;
+                changed.push(entry);
+            }
+        }
+        for (const endpoint of this.inflight.keys()) {
+            if (cacheDependencies(endpoint)?.some(e => entities.includes(e))) {
+                this.inflight.delete(endpoint);
+            }
+        }
+        this.persistEntries(changed);
+    }
+
+    /**
+     * Todas as respostas passam a ser revalidadas (eventos perdidos)
+     */
+    invalidateAll() {
+        this.versions['*']++;
+        this.inflight.clear();
+        for (const entry of this.cache.values()) entry.stale = true;
+        this.persistEntries([...this.cache.values()]);
+    }
+
+    openCacheDB() {
+        return new Promise((resolve) => {
+            if (typeof indexedDB === 'undefined') return resolve(null);
+            const open = indexedDB.open(CACHE_DB_NAME, 1);
+            open.onupgradeneeded = () => open.result.createObjectStore(CACHE_STORE, { keyPath: 'endpoint' });
+            open.onsuccess = () => resolve(open.result);
+            open.onerror = () => resolve(null);
+        });
+    }
+
+    async loadCache() {
+        this.db = await this.openCacheDB();
+        if (!this.db) return;
+
+        const entries = await new Promise((resolve) => {
+            const all = this.db.transaction(CACHE_STORE).objectStore(CACHE_STORE).getAll();
+            all.onsuccess = () => resolve(all.result);
+            all.onerror = () => resolve([]);
+        });
+        entries.sort((a, b) => a.savedAt - b.savedAt);
+        for (const entry of entries) {
+            if (this.cache.has(entry.endpoint)) continue;
+            // Escrita ou evento durante a carga: não se sabe o que ele alterou
+            if (Object.keys(this.versions).length > 1 || this.versions['*']) entry.stale = true;
+            this.cache.set(entry.endpoint, entry);
+        }
+    }
+
+    withStore(mode, action) {
+        if (!this.db) return;
+        try {
+            action(this.db.transaction(CACHE_STORE, mode).objectStore(CACHE_STORE));
+        } catch (error) {
+            console.warn('[API Cache] IndexedDB indisponível:', error);
+        }
+    }
+
+    persistEntries(entries) {
+        if (!entries.length) return;
+        this.withStore('readwrite', (store) => {
+            for (const { revalidating, ...entry } of entries) store.put(entry);
+        });
+    }
+
     // ========== ÁLBUNS ==========
     async listAlbums() {
         return this.request('/albums');
@@ -61,6 +286,18 @@ class SpotPerAPI {
         });
     }
 
+    /**
+     * Valida um álbum contra as regras do banco sem gravar (dry_run).
+     * Retorna { valido, violacoes: [{ regra, mensagem, campo, ... }] }
+     */
+    async validateAlbum(albumData, codAlbum = null) {
+        const endpoint = codAlbum ? `/albums/${codAlbum}` : '/albums';
+        return this.request(`${endpoint}?dry_run=1`, {
+            method: codAlbum ? 'PUT' : 'POST',
+            body: JSON.stringify(albumData)
+        });
+    }
+
     async deleteAlbum(codAlbum) {
         return this.request(`/albums/${codAlbum}`, {
             method: 'DELETE'
@@ -72,6 +309,20 @@ class SpotPerAPI {
     }
 
     // ========== FAIXAS ==========
+    /**
+     * Filtra faixas por facetas no índice do backend.
+     * filters: { tipo_midia: ['CD'], periodo: [2], duracao_min: 60, limite: 50, ... }
+     * Retorna { total, faixas, facetas: { faceta: { valor: contagem } } }
+     */
+    async filterTracks(filters = {}) {
+        const params = new URLSearchParams();
+        for (const [key, value] of Object.entries(filters)) {
+            if (value === undefined || value === null || value === '') continue;
+            params.set(key, Array.isArray(value) ? value.join(',') : value);
+        }
+        return this.request(`/tracks/filter?${params}`);
+    }
+
     async createTrack(trackData) {
         return this.request('/tracks', {
             method: 'POST',
@@ -86,6 +337,20 @@ class SpotPerAPI {
         });
     }
 
+    async createTracks(tracks) {
+        return this.request('/tracks/batch', {
+            method: 'POST',
+            body: JSON.stringify({ faixas: tracks })
+        });
+    }
+
+    async validateTracks(tracks) {
+        return this.request('/tracks/batch?dry_run=1', {
+            method: 'POST',
+            body: JSON.stringify({ faixas: tracks })
+        });
+    }
+
     async deleteTrack(codAlbum, numeroUnidade, numeroFaixa) {
         return this.request(`/tracks/${codAlbum}/${numeroUnidade}/${numeroFaixa}`, {
             method: 'DELETE'
@@ -184,6 +449,35 @@ class SpotPerAPI {
         });
     }
 
+    async generatePlaylist(constraints) {
+        return this.request('/playlists/generate', {
+            method: 'POST',
+            body: JSON.stringify(constraints)
+        });
+    }
+
+    async clonePlaylist(codPlaylist, nome = null) {
+        return this.request(`/playlists/${codPlaylist}/clone`, {
+            method: 'POST',
+            body: JSON.stringify(nome ? { nome } : {})
+        });
+    }
+
+    async appendPlaylists(codPlaylist, playlists) {
+        return this.request(`/playlists/${codPlaylist}/append`, {
+            method: 'POST',
+            body: JSON.stringify({ playlists })
+        });
+    }
+
+    // operation: 'union' | 'intersect' | 'difference'
+    async combinePlaylists(operation, nome, playlists) {
+        return this.request(`/playlists/${operation}`, {
+            method: 'POST',
+            body: JSON.stringify({ nome, playlists })
+        });
+    }
+
     async updatePlaylist(codPlaylist, playlistData) {
         return this.request(`/playlists/${codPlaylist}`, {
             method: 'PUT',
@@ -201,6 +495,14 @@ class SpotPerAPI {
         return this.request(`/playlists/${codPlaylist}/tracks`);
     }
 
+    async getPlaylistTrackAt(codPlaylist, seconds) {
+        return this.request(`/playlists/${codPlaylist}/tracks/at?t=${seconds}`);
+    }
+
+    async getPlaylistTrackWindow(codPlaylist, params = {}) {
+        return this.request(`/playlists/${codPlaylist}/tracks/window?${new URLSearchParams(params)}`);
+    }
+
     async addTrackToPlaylist(codPlaylist, trackData) {
         return this.request(`/playlists/${codPlaylist}/tracks`, {
             method: 'POST',
@@ -208,6 +510,13 @@ class SpotPerAPI {
         });
     }
 
+    async reorderPlaylistTracks(codPlaylist, orderData) {
+        return this.request(`/playlists/${codPlaylist}/tracks/order`, {
+            method: 'PUT',
+            body: JSON.stringify(orderData)
+        });
+    }
+
     async removeTrackFromPlaylist(codPlaylist, codAlbum, numeroUnidade, numeroFaixa) {
         return this.request(`/playlists/${codPlaylist}/tracks/${codAlbum}/${numeroUnidade}/${numeroFaixa}`, {
             method: 'DELETE'
@@ -220,6 +529,19 @@ class SpotPerAPI {
         });
     }
 
+    // ========== REPRODUÇÕES (ROLLUPS) ==========
+    async getTopTracks(params = {}) {
+        return this.request(`/playback/top-tracks?${new URLSearchParams(params)}`);
+    }
+
+    async getTopComposers(params = {}) {
+        return this.request(`/playback/top-composers?${new URLSearchParams(params)}`);
+    }
+
+    async getTopAlbums(params = {}) {
+        return this.request(`/playback/top-albums?${new URLSearchParams(params)}`);
+    }
+
     // ========== ASSOCIAÇÕES ==========
     async associateComposerToTrack(codAlbum, numeroUnidade, numeroFaixa, codCompositor) {
         return this.request(`/tracks/${codAlbum}/${numeroUnidade}/${numeroFaixa}/composers`, {
@@ -263,6 +585,63 @@ class SpotPerAPI {
             body: JSON.stringify(data)
         });
     }
+
+    // ========== TAREFAS ==========
+    async createJob(tipo, parametros = {}) {
+        return this.request('/jobs', {
+            method: 'POST',
+            body: JSON.stringify({ tipo, parametros })
+        });
+    }
+
+    async getJob(codTarefa) {
+        return this.request(`/jobs/${codTarefa}`);
+    }
+
+    async cancelJob(codTarefa) {
+        return this.request(`/jobs/${codTarefa}/cancel`, {
+            method: 'POST'
+        });
+    }
+
+    // ========== EVENTOS ==========
+    /**
+     * Abre o stream de alterações (SSE). O EventSource reconecta sozinho e
+     * reenvia o Last-Event-ID; o último id também fica no localStorage, para
+     * que a próxima carga da página retome de onde esta parou e possa usar
+     * o cache do IndexedDB sem revalidar.
+     */
+    subscribeChanges({ onChange, onReset, onSynced, onOpen, onError } = {}) {
+        const since = localStorage.getItem(FEED_ID_KEY);
+        // Sem ponto de retomada, o que está em cache pode ter mudado sem aviso
+        if (!since) this.invalidateAll();
+
+        const source = new EventSource(`${this.baseURL}/events${since ? `?desde=${encodeURIComponent(since)}` : ''}`);
+        const remember = (e) => e.lastEventId && localStorage.setItem(FEED_ID_KEY, e.lastEventId);
+
+        source.addEventListener('change', (e) => {
+            const event = JSON.parse(e.data);
+            this.invalidateEntities([event.entidade]);
+            remember(e);
+            onChange?.(event);
+        });
+        source.addEventListener('reset', (e) => {
+            this.invalidateAll();
+            remember(e);
+            onReset?.();
+        });
+        source.addEventListener('synced', (e) => {
+            this.cacheTrusted = true;
+            remember(e);
+            onSynced?.();
+        });
+        source.onopen = () => onOpen?.();
+        source.onerror = () => {
+            this.cacheTrusted = false;
+            onError?.();
+        };
+        return source;
+    }
 }
 
 // Instância global da API
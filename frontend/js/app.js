@@ -31,7 +31,14 @@ const SpotPerState = {
     interpreters: [],
     albums: [],
     playlists: [],
+    playlistTracks: {}, // cod_playlist -> tracks of the open playlist details
     queryResults: {} // Results from DB views (ALBUNS_ACIMA_MEDIA, etc.)
+  },
+  // Change feed (GET /api/events): while connected, writes patch the cache
+  // from the events instead of re-fetching whole lists
+  feed: {
+    connected: false,
+    initialized: false // initApp finished; resets reload the lists after this
   }
 };
 
@@ -47,6 +54,10 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 
 async function initApp() {
+  // Change feed first: once it is in sync, cached API responses are served
+  // without revalidation, so a warm load barely touches the backend
+  await connectChangeFeed();
+
   // Load initial data from backend API
   await loadInitialData();
 
@@ -59,6 +70,7 @@ async function initApp() {
 
   bindGlobalActions();
   renderAll();
+  SpotPerState.feed.initialized = true;
 }
 
 /**
@@ -100,6 +112,132 @@ async function loadInitialData() {
   }
 }
 
+// ----------------------------
+// Change feed (SSE)
+// ----------------------------
+
+// Event entity -> [cache key, id field]
+const CHANGE_FEED_CACHES = {
+  albums: ['albums', 'cod_album'],
+  playlists: ['playlists', 'cod_playlist'],
+  composers: ['composers', 'cod_compositor'],
+  interpreters: ['interpreters', 'cod_interprete'],
+  labels: ['labels', 'cod_gravadora'],
+  periods: ['periods', 'cod_periodo'],
+  composition_types: ['compositionTypes', 'cod_tipo_composicao']
+};
+
+// Longest wait for the feed before the first load goes ahead without it
+const CHANGE_FEED_SYNC_TIMEOUT_MS = 1500;
+
+let changeFeedRenderPending = false;
+
+/**
+ * Opens the change feed; resolves once it is in sync (or gave up waiting)
+ */
+function connectChangeFeed() {
+  if (typeof EventSource === 'undefined') return Promise.resolve();
+
+  return new Promise((resolve) => {
+    setTimeout(resolve, CHANGE_FEED_SYNC_TIMEOUT_MS);
+    api.subscribeChanges({
+      onOpen: () => { SpotPerState.feed.connected = true; },
+      onError: () => {
+        SpotPerState.feed.connected = false;
+        resolve();
+      },
+      onSynced: resolve,
+      onChange: applyChangeEvent,
+      // Events were lost (server restart or client too far behind): reload.
+      // During initApp the first load is still to come and covers it.
+      onReset: async () => {
+        if (!SpotPerState.feed.initialized) return;
+        await loadInitialData();
+        scheduleChangeRender();
+      }
+    });
+  });
+}
+
+/**
+ * Patches SpotPerState.cache with one change event
+ */
+function applyChangeEvent(event) {
+  const { entidade, acao, chave, dados } = event;
+
+  if (entidade === 'playlist_tracks') {
+    applyPlaylistTrackEvent(acao, chave, dados);
+    return;
+  }
+
+  if (entidade === 'tracks') {
+    // Lists only show the album's track count
+    const album = SpotPerState.cache.albums.find(a => a.cod_album === chave.cod_album);
+    if (album && acao !== 'update') {
+      album.qtd_faixas = Math.max(0, (album.qtd_faixas || 0) + (acao === 'insert' ? 1 : -1));
+    }
+  } else if (CHANGE_FEED_CACHES[entidade]) {
+    const [cacheKey, idField] = CHANGE_FEED_CACHES[entidade];
+    const list = SpotPerState.cache[cacheKey];
+    const index = list.findIndex(item => item[idField] === chave[idField]);
+
+    if (acao === 'delete') {
+      if (index >= 0) list.splice(index, 1);
+    } else if (index >= 0) {
+      Object.assign(list[index], dados);
+    } else if (acao === 'insert') {
+      list.push(dados);
+    }
+
+    if (entidade === 'playlists' && acao !== 'delete') {
+      renderPlaylistDetailsHeader(dados);
+    }
+  } else {
+    return;
+  }
+
+  scheduleChangeRender();
+}
+
+/**
+ * Play counts and track lists of the open playlist details
+ */
+function applyPlaylistTrackEvent(acao, chave, dados) {
+  const codPlaylist = chave.cod_playlist;
+  const tracks = SpotPerState.cache.playlistTracks[codPlaylist];
+  if (!tracks || SpotPerState.selection.playlistId !== codPlaylist) return;
+
+  if (acao === 'update' && dados) {
+    const track = tracks.find(t => t.cod_album === chave.cod_album
+      && t.numero_unidade === chave.numero_unidade
+      && t.numero_faixa === chave.numero_faixa);
+    if (track) {
+      Object.assign(track, dados);
+      renderPlaylistDetailTracks(tracks, codPlaylist);
+      return;
+    }
+  }
+
+  // Inserts, removals and reorders need the joined track names: re-read this list only
+  api.getPlaylistTracks(codPlaylist)
+    .then((fresh) => {
+      SpotPerState.cache.playlistTracks[codPlaylist] = fresh;
+      if (SpotPerState.selection.playlistId === codPlaylist) {
+        renderPlaylistDetailTracks(fresh, codPlaylist);
+      }
+    })
+    .catch(console.error);
+}
+
+function scheduleChangeRender() {
+  if (changeFeedRenderPending) return;
+  changeFeedRenderPending = true;
+  requestAnimationFrame(() => {
+    changeFeedRenderPending = false;
+    renderAll();
+  });
+}
+
 function bindGlobalActions() {
   // Left actions
   const addTrackBtn = document.getElementById('btn-add-track');
@@ -812,20 +950,8 @@ function openPlaylistDetails(codPlaylist) {
         api.getPlaylistTracks(codPlaylist)
       ]);
 
-      // Populate header fields
-      const titleEl = document.getElementById('playlist-details-title');
-      const createdEl = document.getElementById('playlist-details-created');
-      const durationEl = document.getElementById('playlist-details-duration');
-      const trackCountEl = document.getElementById('playlist-details-track-count');
-
-      if (titleEl) titleEl.textContent = playlist.nome || 'Sem título';
-      if (createdEl) createdEl.textContent = playlist.data_criacao || '-';
-      if (trackCountEl) trackCountEl.textContent = tracks.length;
-
-      const totalSeconds = playlist.tempo_total_execucao || 0;
-      const hours = Math.floor(totalSeconds / 3600);
-      const mins = Math.floor((totalSeconds % 3600) / 60);
-      if (durationEl) durationEl.textContent = hours > 0 ? `${hours}h ${mins}min` : `${mins}min`;
+      SpotPerState.cache.playlistTracks = { [codPlaylist]: tracks };
+      renderPlaylistDetailsHeader(playlist);
 
       // Render tracks
       renderPlaylistDetailTracks(tracks, codPlaylist);
@@ -835,6 +961,27 @@ function openPlaylistDetails(codPlaylist) {
   });
 }
 
+/**
+ * Fills the playlist details header (also called by playlist change events)
+ */
+function renderPlaylistDetailsHeader(playlist) {
+  if (!playlist || SpotPerState.selection.playlistId !== playlist.cod_playlist) return;
+
+  const titleEl = document.getElementById('playlist-details-title');
+  const createdEl = document.getElementById('playlist-details-created');
+  const durationEl = document.getElementById('playlist-details-duration');
+  const trackCountEl = document.getElementById('playlist-details-track-count');
+
+  if (titleEl) titleEl.textContent = playlist.nome || 'Sem título';
+  if (createdEl) createdEl.textContent = playlist.data_criacao || '-';
+  if (trackCountEl) trackCountEl.textContent = playlist.qtd_faixas ?? 0;
+
+  const totalSeconds = playlist.tempo_total_execucao || 0;
+  const hours = Math.floor(totalSeconds / 3600);
+  const mins = Math.floor((totalSeconds % 3600) / 60);
+  if (durationEl) durationEl.textContent = hours > 0 ? `${hours}h ${mins}min` : `${mins}min`;
+}
+
 /**
  * Renders tracks in the playlist details modal
  */
@@ -885,8 +1032,9 @@ function renderPlaylistDetailTracks(tracks, codPlaylist) {
 async function registerPlayback(codPlaylist, codAlbum, numeroUnidade, numeroFaixa) {
   try {
     await api.registerPlayback(codPlaylist, codAlbum, numeroUnidade, numeroFaixa);
-    // Refresh the playlist view to show updated play count
-    openPlaylistDetails(codPlaylist);
+    // The count is folded in the background a few seconds later; with the change
+    // feed connected its playlist_tracks event updates the row
+    if (!SpotPerState.feed.connected) openPlaylistDetails(codPlaylist);
   } catch (error) {
     console.error('Erro ao registrar reprodução:', error);
   }
@@ -396,6 +396,9 @@ function showSuccess(message) {
  * Atualiza o cache após submissão de formulário
  */
 async function refreshCacheAfterSubmit(formId) {
+    // O stream de alterações já atualiza o cache
+    if (SpotPerState.feed?.connected) return;
+
     const cache = SpotPerState.cache;
     try {
         switch (formId) {
@@ -443,15 +443,14 @@ async function loadCompositionTypesForSelectElement(select) {
 
 /**
  * Configura validação de preço do álbum (VALIDAR_PRECO_ALBUM)
- * Preço não pode exceder 3x a média dos álbuns DDD
+ * O backend avalia as regras do banco em dry_run e devolve a violação de preço
  */
+const PRICE_RULES = ['VALIDAR_PRECO_ALBUM', 'VERIFICAR_ALBUM_PRECO'];
+
 function setupAlbumPriceValidation() {
     const priceInput = document.getElementById('album-preco');
-    if (!priceInput) return;
-
-    // Calculate average DDD price from cache
-    const dddAverage = calculateDDDAveragePrice();
-    const maxPrice = dddAverage * 3;
+    const form = document.getElementById('album-form');
+    if (!priceInput || !form) return;
 
     // Add price warning element if not exists
     let warningEl = document.getElementById('album-price-warning');
@@ -459,84 +458,45 @@ function setupAlbumPriceValidation() {
         warningEl = document.createElement('p');
         warningEl.id = 'album-price-warning';
         warningEl.className = 'hidden text-xs text-red-600 dark:text-red-400 mt-1 flex items-center gap-1';
-        warningEl.innerHTML = `<span class="material-symbols-outlined !text-[14px]">error</span> Preço excede 3x a média DDD (R$ ${maxPrice.toFixed(2)})`;
         priceInput.parentElement.appendChild(warningEl);
     }
 
-    // Add hint about max price
-    let hintEl = document.getElementById('album-price-hint');
-    if (!hintEl && priceInput.parentElement && dddAverage > 0) {
-        hintEl = document.createElement('p');
-        hintEl.id = 'album-price-hint';
-        hintEl.className = 'text-[10px] text-[#8a8060] mt-1';
-        hintEl.innerHTML = `Máximo permitido: R$ ${maxPrice.toFixed(2)} (3x média DDD)`;
-        priceInput.parentElement.appendChild(hintEl);
-    }
+    let priceViolation = null;
+    let timer = null;
 
-    priceInput.addEventListener('input', function () {
-        const price = parseFloat(this.value) || 0;
-        if (dddAverage > 0 && price > maxPrice) {
-            warningEl?.classList.remove('hidden');
-            this.classList.add('border-red-500', 'dark:border-red-500');
+    const validatePrice = async () => {
+        const data = Object.fromEntries(new FormData(form));
+        try {
+            const result = await api.validateAlbum(data, form.dataset.editId || null);
+            priceViolation = result.violacoes.find(v => PRICE_RULES.includes(v.regra)) || null;
+        } catch {
+            // Sem validação prévia: o backend recusa na gravação
+            priceViolation = null;
+        }
+
+        if (priceViolation) {
+            warningEl.innerHTML = `<span class="material-symbols-outlined !text-[14px]">error</span> ${priceViolation.mensagem}`;
+            warningEl.classList.remove('hidden');
+            priceInput.classList.add('border-red-500', 'dark:border-red-500');
         } else {
             warningEl?.classList.add('hidden');
-            this.classList.remove('border-red-500', 'dark:border-red-500');
+            priceInput.classList.remove('border-red-500', 'dark:border-red-500');
         }
+    };
+
+    priceInput.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(validatePrice, 300);
     });
 
     // Form submit validation
-    const form = document.getElementById('album-form');
-    if (form) {
-        form.addEventListener('submit', (e) => {
-            const price = parseFloat(priceInput.value) || 0;
-            if (dddAverage > 0 && price > maxPrice) {
-                e.preventDefault();
-                alert(`Erro: O preço R$ ${price.toFixed(2)} excede o limite permitido de R$ ${maxPrice.toFixed(2)} (3x a média dos álbuns DDD).`);
-                return false;
-            }
-        });
-    }
-}
-
-/**
- * Cache para média DDD do backend
- */
-let cachedDDDAverage = null;
-
-/**
- * Busca a média DDD do backend (cacheada)
- */
-async function fetchDDDAverage() {
-    if (cachedDDDAverage === null) {
-        try {
-            const result = await api.getDDDAverage();
-            cachedDDDAverage = result.media_ddd || 50;
-        } catch {
-            cachedDDDAverage = 50;
+    form.addEventListener('submit', (e) => {
+        if (priceViolation) {
+            e.preventDefault();
+            alert(`Erro: ${priceViolation.mensagem}`);
+            return false;
         }
-    }
-    return cachedDDDAverage;
-}
-
-/**
- * Calcula a média de preços dos álbuns com faixas DDD (usa cache ou backend)
- */
-function calculateDDDAveragePrice() {
-    // Usa valor cacheado se disponível
-    if (cachedDDDAverage !== null) {
-        return cachedDDDAverage;
-    }
-
-    // Fallback: calcular localmente
-    const albums = SpotPerState?.cache?.albums || [];
-    const dddAlbums = albums.filter(a => a.has_ddd_tracks || a.tipo_midia === 'CD');
-
-    if (dddAlbums.length === 0) {
-        return 50; // R$ 50,00 default
-    }
-
-    const total = dddAlbums.reduce((sum, a) => sum + (parseFloat(a.preco_compra) || 0), 0);
-    return total / dddAlbums.length;
+    });
 }
 
 /**
@@ -1585,7 +1545,9 @@ async function savePlaylist() {
         };
 
         await api.createPlaylist(playlistData);
-        SpotPerState.cache.playlists = await api.listPlaylists().catch(() => SpotPerState.cache.playlists);
+        if (!SpotPerState.feed.connected) {
+            SpotPerState.cache.playlists = await api.listPlaylists().catch(() => SpotPerState.cache.playlists);
+        }
 
         if (typeof renderAll === 'function') renderAll();
         closeModal();